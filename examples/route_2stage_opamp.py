@@ -1,5 +1,6 @@
 import argparse
 import sys
+import time
 from pathlib import Path
 
 # Load environment variables from .env file (must be before doroutes import)
@@ -9,10 +10,12 @@ load_dotenv(Path(__file__).parent.parent.parent / ".env")
 
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
+import gdsfactory as gf  # noqa: E402
 from gdsfactory.add_pins import add_instance_label  # noqa: E402
 from gdsfactory.component import Component  # noqa: E402
 from gdsfactory.pdk import get_active_pdk  # noqa: E402
 
+from sky130.route_geometry import RouteGeometryWriter  # noqa: E402
 from sky130.routing_utils import (  # noqa: E402
     RouteNetSpec,
     route_multilayer_3d,
@@ -164,8 +167,7 @@ def test_2stage_opamp(
         ),
     ]
     for net in critical_nets:
-        before_inst = len(c.insts)
-        route_multilayer_3d(
+        result = route_multilayer_3d(
             c,
             start=net.start,
             stop=net.stop,
@@ -176,10 +178,12 @@ def test_2stage_opamp(
             add_segment_ports=add_segment_ports,
             port_name_prefix=net.port_name_prefix,
             deterministic=True,
+            return_result=True,
         )
-        if len(c.insts) <= before_inst:
+        if not result.success:
             raise RuntimeError(
-                f"[OPAMP] Critical pre-route failed for net '{net.name}'"
+                f"[OPAMP] Critical pre-route failed for net '{net.name}': "
+                f"{result.failure_reason}"
             )
 
     # Practical routed core netlist (internal connections only).
@@ -319,6 +323,72 @@ def test_2stage_opamp(
     return c
 
 
+def benchmark_segment_ports(repeat: int = 3) -> None:
+    """Time the old and the new segment-port path on the opamp nets.
+
+    Routes the opamp with and without segment ports, then adds the segment
+    ports of the routed nets, net by net, to an empty cell in two ways: with
+    ``c.draw_ports()`` after every ``add_port`` (the old path of the routers)
+    and through ``RouteGeometryWriter.port`` with one ``flush`` per net (the
+    current path). Both get the same ports in the same order.
+    """
+    timings = {}
+    for add_segment_ports in (False, True):
+        best = float("inf")
+        for k in range(repeat):
+            t0 = time.perf_counter()
+            c = test_2stage_opamp(
+                component_name=f"bench_2stage_opamp_{add_segment_ports}_{k}",
+                add_segment_ports=add_segment_ports,
+            )
+            best = min(best, time.perf_counter() - t0)
+        timings[add_segment_ports] = best
+
+    # Segment ports are named after their net, in routing order.
+    nets: dict[str, list[dict]] = {}
+    for port in c.ports:
+        info = c.kcl.get_info(port.layer)
+        nets.setdefault(port.name, []).append(
+            dict(
+                name=port.name,
+                center=(float(port.dcenter[0]), float(port.dcenter[1])),
+                width=0.01,
+                orientation=port.orientation,
+                layer=(info.layer, info.datatype),
+                port_type="electrical",
+            )
+        )
+
+    def old_path(cell: Component) -> None:
+        for specs in nets.values():
+            for spec in specs:
+                cell.add_port(**spec)
+                cell.draw_ports()
+
+    def new_path(cell: Component) -> None:
+        writer = RouteGeometryWriter(cell)
+        for specs in nets.values():
+            for spec in specs:
+                writer.port(**spec)
+            writer.flush()
+
+    num_ports = sum(len(specs) for specs in nets.values())
+    print(f"routing without segment ports: {timings[False]:.3f}s")
+    print(f"routing with {num_ports} segment ports: {timings[True]:.3f}s")
+    for label, add_ports in (("draw_ports per port", old_path), ("writer", new_path)):
+        best = float("inf")
+        for _ in range(repeat):
+            cell = gf.Component()
+            t0 = time.perf_counter()
+            add_ports(cell)
+            best = min(best, time.perf_counter() - t0)
+        shapes = sum(
+            cell.shapes(layer_index).size()
+            for layer_index in cell.kcl.layout.layer_indexes()
+        )
+        print(f"{len(nets)} nets, {label}: {best:.4f}s, {shapes} marker shapes")
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(
         description="Route 2-stage opamp example (headless by default)."
@@ -333,7 +403,15 @@ if __name__ == "__main__":
         default="./results/test_2stage_opamp.gds",
         help="Output GDS path.",
     )
+    parser.add_argument(
+        "--benchmark",
+        action="store_true",
+        help="Time routing with and without segment ports and exit.",
+    )
     args = parser.parse_args()
+    if args.benchmark:
+        benchmark_segment_ports()
+        sys.exit(0)
 
     c = test_2stage_opamp(
         component_name="test_2stage_opamp",
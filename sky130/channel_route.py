@@ -0,0 +1,239 @@
+"""Track assignment for channel routing between standard-cell rows.
+
+A channel is the horizontal strip between two rows of ``sky130_fd_sc_hd``
+cells. Pins sit on the met2 track columns of the rows above ("top") and
+below ("bottom") the channel. Every net gets horizontal met1 trunks on
+channel tracks and met2 branches from its pins to its trunks.
+
+Tracks are assigned with the constrained left-edge algorithm: tracks are
+filled top-down, each with the leftmost trunks that fit, and a trunk may only
+be placed once every trunk that has to lie above it is placed. Such a vertical
+constraint arises wherever one net has a top pin and another net a bottom pin
+in the same column. With ``dogleg=True`` a net is split at its pin columns
+into one trunk per pair of consecutive pin columns, which shortens the
+constraint chains; remaining constraint cycles are broken by splitting a trunk
+of the cycle at a column without pins (a jog column)::
+
+    pins = [ChannelPin("a", 0, top=True), ChannelPin("a", 3, top=False), ...]
+    assignment = assign_tracks(pins)
+    assignment.trunks  # [ChannelTrunk("a", left=0, right=3, track=0), ...]
+"""
+
+from collections import defaultdict
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+
+
+@dataclass(frozen=True)
+class ChannelPin:
+    """Pin of a net on the channel boundary.
+
+    Attributes:
+        net: Net name.
+        column: Track column of the pin.
+        top: True for a pin above the channel, False for one below it.
+    """
+
+    net: str
+    column: int
+    top: bool
+
+
+@dataclass(frozen=True)
+class ChannelTrunk:
+    """Horizontal trunk of a net between two of its pin columns.
+
+    Attributes:
+        net: Net name.
+        left: First column.
+        right: Last column.
+        track: Channel track, 0 being the top one.
+    """
+
+    net: str
+    left: int
+    right: int
+    track: int
+
+
+@dataclass
+class ChannelAssignment:
+    """Outcome of assign_tracks.
+
+    Attributes:
+        trunks: Trunks of all nets, in track order.
+        num_tracks: Tracks used, including tracks left empty to separate
+            vias of different nets in one column.
+        jogs: (net, column) of the columns without pins where a net changes
+            tracks to break a constraint cycle.
+    """
+
+    trunks: list[ChannelTrunk] = field(default_factory=list)
+    num_tracks: int = 0
+    jogs: list[tuple[str, int]] = field(default_factory=list)
+
+
+def _net_spans(
+    columns_of: dict[str, set[int]], dogleg: bool
+) -> list[tuple[str, int, int]]:
+    """(net, left, right) of the trunks to place, by net then column."""
+    spans = []
+    for net, net_columns in columns_of.items():
+        columns = sorted(net_columns)
+        if len(columns) < 2:
+            continue
+        if dogleg:
+            spans.extend((net, a, b) for a, b in zip(columns, columns[1:]))
+        else:
+            spans.append((net, columns[0], columns[-1]))
+    return spans
+
+
+def _vertical_constraints(
+    spans: list[tuple[str, int, int]],
+    columns_of: dict[str, set[int]],
+    slots: dict[tuple[int, bool], str],
+) -> list[set[int]]:
+    """Trunks that have to lie above each trunk."""
+    # Trunks of each net reaching each of its columns.
+    touching: dict[tuple[str, int], list[int]] = defaultdict(list)
+    for k, (net, left, right) in enumerate(spans):
+        for column in columns_of[net]:
+            if left <= column <= right:
+                touching[net, column].append(k)
+    # The trunks of the top net of a column lie above those of its bottom net.
+    above: list[set[int]] = [set() for _ in spans]
+    for (column, top), net in slots.items():
+        if not top:
+            continue
+        lower = slots.get((column, False))
+        if lower is None or lower == net:
+            continue
+        for k in touching.get((lower, column), ()):
+            above[k].update(touching.get((net, column), ()))
+    return above
+
+
+def _left_edge(
+    spans: list[tuple[str, int, int]], above: list[set[int]], vertical_gap: int
+) -> tuple[dict[int, int], list[int]]:
+    """Constrained left-edge packing: track per trunk and the trunks left over.
+
+    Trunks are left over only if the constraints are cyclic.
+    """
+    track_of: dict[int, int] = {}
+    unplaced = sorted(range(len(spans)), key=lambda k: (spans[k][1], spans[k][2], k))
+    track = 0
+    while unplaced:
+        placed: list[int] = []
+        last_net, last_right = None, None
+        for k in unplaced:
+            net, left, right = spans[k]
+            if any(track_of.get(p, track) > track - vertical_gap for p in above[k]):
+                continue
+            # Trunks of different nets may not share a column on one track.
+            if last_right is not None and (
+                left < last_right or (left == last_right and net != last_net)
+            ):
+                continue
+            placed.append(k)
+            track_of[k] = track
+            last_net, last_right = net, right
+        blocked = (any(p not in track_of for p in above[k]) for k in unplaced)
+        if not placed and all(blocked):
+            return track_of, unplaced
+        placed_set = set(placed)
+        unplaced = [k for k in unplaced if k not in placed_set]
+        track += 1
+    return track_of, []
+
+
+def _constraint_cycle(unplaced: list[int], above: list[set[int]]) -> list[int]:
+    """Trunks of one cycle among the unplaced trunks."""
+    remaining = set(unplaced)
+    seen: dict[int, int] = {}
+    k = unplaced[0]
+    while k not in seen:
+        seen[k] = len(seen)
+        k = min(p for p in above[k] if p in remaining)
+    return [j for j, pos in seen.items() if pos >= seen[k]]
+
+
+def assign_tracks(
+    pins: Sequence[ChannelPin],
+    dogleg: bool = True,
+    vertical_gap: int = 2,
+) -> ChannelAssignment:
+    """Assign channel tracks to the trunks of all nets.
+
+    Args:
+        pins: Pins of all nets. A column holds at most one top and one bottom
+            pin.
+        dogleg: Split nets into one trunk per pair of consecutive pin
+            columns, and break constraint cycles with jog columns.
+        vertical_gap: Minimum track distance between the trunk of a net with
+            a top pin in a column and the trunk of another net with a bottom
+            pin there. 2 leaves one empty track between their via pads.
+
+    Returns:
+        ChannelAssignment with one track per trunk.
+
+    Raises:
+        ValueError: If two nets share a pin slot, or the vertical constraints
+            are cyclic and no trunk of the cycle spans a column without pins.
+    """
+    slots: dict[tuple[int, bool], str] = {}
+    columns_of: dict[str, set[int]] = defaultdict(set)
+    for pin in pins:
+        owner = slots.setdefault((pin.column, pin.top), pin.net)
+        if owner != pin.net:
+            side = "top" if pin.top else "bottom"
+            raise ValueError(
+                f"Nets {owner!r} and {pin.net!r} share the {side} pin of "
+                f"column {pin.column}"
+            )
+        columns_of[pin.net].add(pin.column)
+    used_columns = {column for column, _ in slots}
+
+    jogs: list[tuple[str, int]] = []
+    while True:
+        spans = _net_spans(columns_of, dogleg)
+        above = _vertical_constraints(spans, columns_of, slots)
+        track_of, unplaced = _left_edge(spans, above, vertical_gap)
+        if not unplaced:
+            break
+        cycle = _constraint_cycle(unplaced, above)
+        jog = None
+        if dogleg:
+            # Split the widest trunk of the cycle at the free column closest
+            # to its middle.
+            for k in sorted(cycle, key=lambda k: spans[k][1] - spans[k][2]):
+                net, left, right = spans[k]
+                middle = (left + right) // 2
+                free = (
+                    column
+                    for offset in range(right - left)
+                    for column in (middle - offset, middle + offset + 1)
+                    if left < column < right and column not in used_columns
+                )
+                column = next(free, None)
+                if column is not None:
+                    jog = net, column
+                    break
+        if jog is None:
+            nets = sorted({spans[k][0] for k in cycle})
+            raise ValueError(f"Cyclic vertical constraints between nets {nets}")
+        columns_of[jog[0]].add(jog[1])
+        used_columns.add(jog[1])
+        jogs.append(jog)
+
+    trunks = [
+        ChannelTrunk(net, left, right, track_of[k])
+        for k, (net, left, right) in enumerate(spans)
+    ]
+    trunks.sort(key=lambda t: (t.track, t.left))
+    return ChannelAssignment(
+        trunks=trunks,
+        num_tracks=max(track_of.values(), default=-1) + 1,
+        jogs=jogs,
+    )
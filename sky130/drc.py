@@ -0,0 +1,338 @@
+"""Tiled, multithreaded DRC of a sky130 rule subset on KLayout regions.
+
+The rule deck (``sky130_rules``) is built from the rules the generators and
+routers already draw with: metal width and spacing and cut size, spacing and
+enclosure from ``sky130.routing_layers``, and the front-end rules of the
+Magic MOSFET generator (``sky130.pcells.mosfets.MOSFET_RULES``: licon size,
+diffusion and poly enclosure of licon, poly end cap, diffusion extension,
+implant and nwell enclosure, met1 surround of mcon).
+
+``run_drc`` runs the deck through a KLayout TilingProcessor: the cell is cut
+into tiles which are checked on all cores, each tile seeing the shapes
+within the largest rule distance around it. Results found in several tiles
+are reported once::
+
+    report = run_drc(c)  # Component, kdb.Cell
+    report.count, report.by_rule()
+    report.save("c.lyrdb")  # open in KLayout's marker browser
+
+Width, spacing, enclosure and extension violations are reported as edge
+pairs; cuts (or other enclosed shapes) not covered by their enclosing layer
+as polygons.
+"""
+
+import os
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+import klayout.db as kdb
+import klayout.rdb as rdb
+
+Layer = tuple[int, int]
+
+_KINDS = ("width", "space", "enclosure", "extension")
+
+# Diffusion spacing of the Magic ruleset (open_pdks sky130.tcl diff_spacing).
+_DIFF_SPACING = 0.28
+
+
+@dataclass(frozen=True)
+class DrcRule:
+    """One check of the deck.
+
+    Attributes:
+        name: Rule name, e.g. "met1.width" or "via1.enclosure.met2".
+        kind: "width", "space", "enclosure" (`layer` encloses `other` by
+            `value`) or "extension" (`layer` extends beyond `other` by
+            `value` where they overlap).
+        layer: Checked layer.
+        value: Minimum distance in um.
+        other: Second layer of enclosure and extension rules.
+        only_interacting: For enclosure rules, check only the shapes of
+            `other` touching `layer` (e.g. the licons on diffusion). Otherwise
+            shapes of `other` outside `layer` are violations too.
+        description: Text shown in the marker database.
+    """
+
+    name: str
+    kind: str
+    layer: Layer
+    value: float
+    other: Layer | None = None
+    only_interacting: bool = False
+    description: str = ""
+
+    def __post_init__(self) -> None:
+        if self.kind not in _KINDS:
+            raise ValueError(f"Unknown rule kind {self.kind!r}, use one of {_KINDS}")
+        if self.kind in ("enclosure", "extension") and self.other is None:
+            raise ValueError(f"{self.kind} rule {self.name!r} needs `other`")
+
+
+def sky130_rules() -> list[DrcRule]:
+    """Rule deck of the sky130 rules used by the generators and routers."""
+    from sky130.layers import LAYER
+    from sky130.pcells.mosfets import MOSFET_RULES
+    from sky130.routing_layers import _CUT_RULES, _METAL_NAMES, _METAL_RULES, _as_tuple
+
+    rules = []
+    for layer, name in _METAL_NAMES.items():
+        width, spacing = _METAL_RULES[name]
+        rules.append(DrcRule(f"{name}.width", "width", layer, width))
+        rules.append(DrcRule(f"{name}.space", "space", layer, spacing))
+
+    cut_names = {(67, 44): "mcon", (68, 44): "via1", (69, 44): "via2"}
+    cut_names.update({(70, 44): "via3", (71, 44): "via4"})
+    for cut, (size, spacing, enclosure) in _CUT_RULES.items():
+        name = cut_names[cut]
+        rules.append(DrcRule(f"{name}.width", "width", cut, size))
+        rules.append(DrcRule(f"{name}.space", "space", cut, spacing))
+        # Cut (n, 44) joins the metals (n, 20) and (n + 1, 20).
+        for metal in ((cut[0], 20), (cut[0] + 1, 20)):
+            value = enclosure
+            if name == "mcon":
+                # li1 only covers mcon, met1 surrounds it as in the MOSFETs.
+                value = MOSFET_RULES["met1_surround"] if metal == (68, 20) else 0.0
+            rules.append(
+                DrcRule(
+                    f"{name}.enclosure.{_METAL_NAMES[metal]}",
+                    "enclosure",
+                    metal,
+                    value,
+                    other=cut,
+                )
+            )
+
+    diff = _as_tuple(LAYER.diffdrawing)
+    poly = _as_tuple(LAYER.polydrawing)
+    licon = _as_tuple(LAYER.licon1drawing)
+    rules += [
+        DrcRule("licon.width", "width", licon, MOSFET_RULES["contact_size"]),
+        DrcRule(
+            "licon.enclosure.diff",
+            "enclosure",
+            diff,
+            MOSFET_RULES["diff_surround"],
+            other=licon,
+            only_interacting=True,
+        ),
+        DrcRule(
+            "licon.enclosure.poly",
+            "enclosure",
+            poly,
+            MOSFET_RULES["poly_surround"],
+            other=licon,
+            only_interacting=True,
+        ),
+        DrcRule("diff.space", "space", diff, _DIFF_SPACING),
+        DrcRule(
+            "poly.extension.diff",
+            "extension",
+            poly,
+            MOSFET_RULES["end_cap"],
+            other=diff,
+            description="poly end cap beyond the gate",
+        ),
+        DrcRule(
+            "diff.extension.poly",
+            "extension",
+            diff,
+            MOSFET_RULES["diff_extension"],
+            other=poly,
+            description="diffusion beyond the gate",
+        ),
+    ]
+    for implant, value in (
+        (LAYER.nsdmdrawing, MOSFET_RULES["implant_enc"]),
+        (LAYER.psdmdrawing, MOSFET_RULES["implant_enc"]),
+        (LAYER.nwelldrawing, MOSFET_RULES["nwell_enc_x"]),
+    ):
+        implant = _as_tuple(implant)
+        name = {(93, 44): "nsdm", (94, 20): "psdm", (64, 20): "nwell"}[implant]
+        rules.append(
+            DrcRule(
+                f"diff.enclosure.{name}",
+                "enclosure",
+                implant,
+                value,
+                other=diff,
+                only_interacting=True,
+            )
+        )
+    return rules
+
+
+@dataclass
+class DrcReport:
+    """Violations found by ``run_drc``.
+
+    Attributes:
+        cell: Name of the checked cell.
+        dbu: Database unit of the edge pairs and polygons.
+        rules: Rules that were run.
+        edge_pairs: Width, spacing, enclosure and extension violations per
+            rule name.
+        polygons: Shapes not covered by their enclosing layer per rule name.
+        seconds: Wall time of the run.
+    """
+
+    cell: str
+    dbu: float
+    rules: list[DrcRule]
+    edge_pairs: dict[str, list[kdb.EdgePair]] = field(default_factory=dict)
+    polygons: dict[str, list[kdb.Polygon]] = field(default_factory=dict)
+    seconds: float = 0.0
+
+    @property
+    def count(self) -> int:
+        return sum(self.by_rule().values())
+
+    def by_rule(self) -> dict[str, int]:
+        """Number of violations per rule, for the rules that have any."""
+        counts = {}
+        for rule in self.rules:
+            n = len(self.edge_pairs.get(rule.name, ()))
+            n += len(self.polygons.get(rule.name, ()))
+            if n:
+                counts[rule.name] = n
+        return counts
+
+    def to_rdb(self) -> rdb.ReportDatabase:
+        """Marker database with one category per violated rule."""
+        db = rdb.ReportDatabase("sky130 DRC")
+        db.top_cell_name = self.cell
+        cell = db.create_cell(self.cell)
+        trans = kdb.CplxTrans(self.dbu)
+        for rule in self.rules:
+            edge_pairs = self.edge_pairs.get(rule.name, [])
+            polygons = self.polygons.get(rule.name, [])
+            if not edge_pairs and not polygons:
+                continue
+            category = db.create_category(rule.name)
+            category.description = rule.description or f"{rule.kind} {rule.value} um"
+            if edge_pairs:
+                db.create_items(
+                    cell.rdb_id(), category.rdb_id(), trans, kdb.EdgePairs(edge_pairs)
+                )
+            if polygons:
+                db.create_items(
+                    cell.rdb_id(), category.rdb_id(), trans, kdb.Region(polygons)
+                )
+        return db
+
+    def save(self, path: str | Path) -> Path:
+        """Write the marker database (.lyrdb) to `path`."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.to_rdb().save(str(path))
+        return path
+
+
+def _kdb_cell(cell: Any) -> kdb.Cell:
+    """KLayout cell of a Component/KCell or kdb.Cell."""
+    if isinstance(cell, kdb.Cell):
+        return cell
+    return cell.kcl.layout.cell(cell.cell_index())
+
+
+def _rule_script(
+    k: int, rule: DrcRule, inputs: dict[Layer, str], dbu: float
+) -> str | None:
+    """Tiling processor script of `rule` writing to outputs e<k> and r<k>."""
+    d = int(round(rule.value / dbu))
+    a = inputs.get(rule.layer)
+    b = inputs.get(rule.other) if rule.other is not None else None
+    if rule.kind == "width" and a is not None:
+        return f"_output(e{k}, {a}.width_check({d}))"
+    if rule.kind == "space" and a is not None:
+        return f"_output(e{k}, {a}.space_check({d}))"
+    if rule.kind == "enclosure" and b is not None:
+        if a is None:
+            # Nothing encloses `other`: every shape of it is uncovered.
+            return None if rule.only_interacting else f"_output(r{k}, {b})"
+        inner = f"{b}.interacting({a})" if rule.only_interacting else b
+        script = f"var inner = {inner}; _output(r{k}, inner - {a})"
+        if d > 0:
+            script += f"; _output(e{k}, {a}.enclosing_check(inner, {d}))"
+        return script
+    if rule.kind == "extension" and a is not None and b is not None:
+        # Edges shared by `layer` and the overlap are at distance zero.
+        return (
+            f"_output(e{k}, {a}.enclosing_check({a} & {b}, {d})"
+            f".with_distance(1, {d}, false))"
+        )
+    return None
+
+
+def run_drc(
+    cell: Any,
+    rules: Iterable[DrcRule] | None = None,
+    threads: int | None = None,
+    tile_size: float = 100.0,
+) -> DrcReport:
+    """Check `cell` (with its hierarchy) against `rules`.
+
+    Args:
+        cell: Component, KCell or kdb.Cell to check.
+        rules: Rule deck, ``sky130_rules()`` by default.
+        threads: Worker threads, all cores by default.
+        tile_size: Tile edge in um. Each tile is checked with a border of the
+            largest rule distance, so every violation is seen whole in at
+            least one tile.
+
+    Returns:
+        DrcReport with the violations of every rule.
+    """
+    t0 = time.perf_counter()
+    kcell = _kdb_cell(cell)
+    layout = kcell.layout()
+    dbu = layout.dbu
+    rules = sky130_rules() if rules is None else list(rules)
+
+    tp = kdb.TilingProcessor()
+    tp.dbu = dbu
+    tp.threads = threads or os.cpu_count() or 1
+    tp.tile_size(tile_size, tile_size)
+    border = max((rule.value for rule in rules), default=0.0) + 2 * dbu
+    tp.tile_border(border, border)
+
+    inputs: dict[Layer, str] = {}
+    for rule in rules:
+        for layer in (rule.layer, rule.other):
+            if layer is None or layer in inputs:
+                continue
+            index = layout.find_layer(*layer)
+            if index is None:
+                continue
+            inputs[layer] = f"l{len(inputs)}"
+            tp.input(inputs[layer], layout, kcell.cell_index(), index)
+
+    outputs: list[tuple[DrcRule, kdb.EdgePairs, kdb.Region]] = []
+    for k, rule in enumerate(rules):
+        script = _rule_script(k, rule, inputs, dbu)
+        if script is None:
+            continue
+        edge_pairs, region = kdb.EdgePairs(), kdb.Region()
+        tp.output(f"e{k}", edge_pairs)
+        tp.output(f"r{k}", region)
+        tp.queue(script)
+        outputs.append((rule, edge_pairs, region))
+
+    report = DrcReport(cell=kcell.name, dbu=dbu, rules=rules)
+    if outputs:
+        tp.execute("sky130 DRC")
+    for rule, edge_pairs, region in outputs:
+        # A violation near a tile edge is found by every tile that sees it.
+        if not edge_pairs.is_empty():
+            report.edge_pairs[rule.name] = _unique(edge_pairs.each())
+        if not region.is_empty():
+            report.polygons[rule.name] = _unique(region.each())
+    report.seconds = time.perf_counter() - t0
+    return report
+
+
+def _unique(items: Iterable[Any]) -> list[Any]:
+    return sorted(set(items), key=str)
@@ -0,0 +1,308 @@
+"""Global routing of many nets on a GCell congestion map.
+
+The routing area is divided into square GCells. Each GCell boundary has a
+capacity: the number of wiring tracks of the layers whose preferred direction
+crosses it, less the tracks covered by obstructions::
+
+    grid = build_gcell_grid(bbox, gcell_dbu, blockages, ["h", "v"], [460, 460])
+    plan = route_global(grid, nets)
+    plan.paths["out"]  # [(i, j), ...] GCells of net "out"
+    gcell_guide(grid, plan.paths["out"])  # GCell centers at bends (DBU)
+
+All nets are assigned GCell paths together with negotiated congestion (as in
+``sky130.pathfinder``, but a boundary may hold ``capacity`` nets): crossing a
+boundary costs more the more it is overused and the longer it stays
+overused, and only nets on overused boundaries are rerouted. Detail routers
+then search each net's corridor (``guide`` of ``route_multilayer_3d``)
+instead of the whole cell.
+"""
+
+import heapq
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+
+import numpy as np
+
+Box = tuple[int, int, int, int]
+GCell = tuple[int, int]
+
+
+@dataclass(frozen=True)
+class GCellGrid:
+    """GCell capacity grid (DBU).
+
+    Attributes:
+        origin: Lower left corner (x, y) of GCell (0, 0).
+        size: GCell edge length.
+        capacity_h: Tracks crossing the boundary between GCells (i, j) and
+            (i + 1, j), shape (nx - 1, ny).
+        capacity_v: Tracks crossing the boundary between GCells (i, j) and
+            (i, j + 1), shape (nx, ny - 1).
+    """
+
+    origin: tuple[int, int]
+    size: int
+    capacity_h: np.ndarray
+    capacity_v: np.ndarray
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return self.capacity_v.shape[0], self.capacity_h.shape[1]
+
+    def gcell(self, x: float, y: float) -> GCell:
+        """GCell holding point (x, y), clamped to the grid."""
+        nx, ny = self.shape
+        i = int((x - self.origin[0]) // self.size)
+        j = int((y - self.origin[1]) // self.size)
+        return min(max(i, 0), nx - 1), min(max(j, 0), ny - 1)
+
+    def center(self, cell: GCell) -> tuple[int, int]:
+        """Center of a GCell."""
+        return (
+            self.origin[0] + cell[0] * self.size + self.size // 2,
+            self.origin[1] + cell[1] * self.size + self.size // 2,
+        )
+
+
+@dataclass(frozen=True)
+class GlobalNet:
+    """Two-terminal net of a global routing run.
+
+    Attributes:
+        name: Net name.
+        source: Source point (x, y) in DBU.
+        target: Target point (x, y) in DBU.
+    """
+
+    name: str
+    source: tuple[int, int]
+    target: tuple[int, int]
+
+
+@dataclass
+class GlobalRouteResult:
+    """Outcome of route_global.
+
+    Attributes:
+        paths: GCell path per net name.
+        converged: True if no boundary holds more nets than its capacity.
+        iterations: Rip-up-and-reroute iterations run.
+        reroutes: Total number of net searches.
+        overflow: Sum over boundaries of the demand above capacity.
+        demand_h: Nets crossing each horizontal-move boundary (congestion map).
+        demand_v: Nets crossing each vertical-move boundary.
+    """
+
+    paths: dict[str, list[GCell]] = field(default_factory=dict)
+    converged: bool = False
+    iterations: int = 0
+    reroutes: int = 0
+    overflow: int = 0
+    demand_h: np.ndarray | None = None
+    demand_v: np.ndarray | None = None
+
+
+def _blocked_fraction(
+    boxes: Sequence[Box], origin: tuple[int, int], size: int, shape: tuple[int, int]
+) -> np.ndarray:
+    """Fraction of each GCell covered by `boxes` (overlaps counted once each)."""
+    nx, ny = shape
+    covered = np.zeros(shape, dtype=np.float64)
+    x_edges = origin[0] + size * np.arange(nx + 1)
+    y_edges = origin[1] + size * np.arange(ny + 1)
+    for left, bottom, right, top in boxes:
+        i0 = max(0, (left - origin[0]) // size)
+        i1 = min(nx, (right - origin[0] - 1) // size + 1)
+        j0 = max(0, (bottom - origin[1]) // size)
+        j1 = min(ny, (top - origin[1] - 1) // size + 1)
+        if i0 >= i1 or j0 >= j1:
+            continue
+        dx = np.minimum(x_edges[i0 + 1 : i1 + 1], right) - np.maximum(
+            x_edges[i0:i1], left
+        )
+        dy = np.minimum(y_edges[j0 + 1 : j1 + 1], top) - np.maximum(
+            y_edges[j0:j1], bottom
+        )
+        covered[i0:i1, j0:j1] += np.outer(dx, dy)
+    return np.minimum(covered / float(size * size), 1.0)
+
+
+def build_gcell_grid(
+    bbox: Box,
+    gcell_size: int,
+    blockages: Sequence[Sequence[Box]],
+    directions: Sequence[str],
+    pitches: Sequence[int],
+) -> GCellGrid:
+    """GCell grid over `bbox` with capacities from layer pitches and blockages.
+
+    Args:
+        bbox: Routing area (left, bottom, right, top) in DBU.
+        gcell_size: GCell edge length in DBU.
+        blockages: Obstruction boxes per layer in DBU.
+        directions: Preferred direction per layer, "h" or "v".
+        pitches: Track pitch per layer in DBU.
+    """
+    if not len(blockages) == len(directions) == len(pitches):
+        raise ValueError("blockages, directions and pitches need one entry per layer")
+    if gcell_size <= 0:
+        raise ValueError("gcell_size must be positive")
+    left, bottom, right, top = bbox
+    shape = (
+        max(1, -(-(right - left) // gcell_size)),
+        max(1, -(-(top - bottom) // gcell_size)),
+    )
+    tracks_h = np.zeros(shape, dtype=np.int64)
+    tracks_v = np.zeros(shape, dtype=np.int64)
+    for boxes, direction, pitch in zip(blockages, directions, pitches):
+        free = 1.0 - _blocked_fraction(boxes, (left, bottom), gcell_size, shape)
+        tracks = np.floor(free * (gcell_size // max(1, pitch))).astype(np.int64)
+        if direction == "h":
+            tracks_h += tracks
+        else:
+            tracks_v += tracks
+    # A boundary holds as many tracks as the tighter of its two GCells.
+    return GCellGrid(
+        origin=(left, bottom),
+        size=gcell_size,
+        capacity_h=np.minimum(tracks_h[:-1, :], tracks_h[1:, :]),
+        capacity_v=np.minimum(tracks_v[:, :-1], tracks_v[:, 1:]),
+    )
+
+
+def gcell_guide(grid: GCellGrid, path: Sequence[GCell]) -> list[tuple[int, int]]:
+    """GCell centers of the endpoints and bends of a GCell path (DBU)."""
+    if len(path) < 3:
+        return [grid.center(cell) for cell in path]
+    corners = [path[0]]
+    for a, b, c in zip(path, path[1:], path[2:]):
+        if (b[0] - a[0], b[1] - a[1]) != (c[0] - b[0], c[1] - b[1]):
+            corners.append(b)
+    corners.append(path[-1])
+    return [grid.center(cell) for cell in corners]
+
+
+def route_global(
+    grid: GCellGrid,
+    nets: Sequence[GlobalNet],
+    max_iterations: int = 20,
+    present_factor: float = 0.5,
+    present_growth: float = 1.5,
+    history_factor: float = 1.0,
+    seed: int | None = None,
+) -> GlobalRouteResult:
+    """Assign GCell paths to all nets, minimizing boundary overflow.
+
+    Args:
+        grid: GCell capacity grid.
+        nets: Nets to route. Names must be unique.
+        max_iterations: Maximum rip-up-and-reroute iterations.
+        present_factor: Initial weight of present overflow.
+        present_growth: Factor applied to present_factor after each iteration.
+        history_factor: History cost added per iteration per unit of overflow.
+        seed: Seed for the routing order. None keeps the given order.
+
+    Returns:
+        GlobalRouteResult with one path per net.
+    """
+    names = [net.name for net in nets]
+    if len(set(names)) != len(names):
+        raise ValueError("Net names must be unique")
+    nx, ny = grid.shape
+    # Boundaries are flat indices: horizontal moves first, then vertical.
+    num_h = (nx - 1) * ny
+    capacity = np.concatenate(
+        [grid.capacity_h.ravel(), grid.capacity_v.ravel()]
+    ).tolist()
+    demand = [0] * len(capacity)
+    history = [0.0] * len(capacity)
+
+    def edge(a: int, b: int) -> int:
+        (i0, j0), (i1, _) = divmod(min(a, b), ny), divmod(max(a, b), ny)
+        if i0 != i1:
+            return i0 * ny + j0
+        return num_h + i0 * (ny - 1) + j0
+
+    order = list(range(len(nets)))
+    if seed is not None:
+        order = [int(k) for k in np.random.default_rng(seed).permutation(len(nets))]
+
+    def cell_id(point: tuple[int, int]) -> int:
+        i, j = grid.gcell(*point)
+        return i * ny + j
+
+    ends = [(cell_id(net.source), cell_id(net.target)) for net in nets]
+    result = GlobalRouteResult()
+    paths: list[list[int]] = [[] for _ in nets]
+    edges: list[list[int]] = [[] for _ in nets]
+    pres = present_factor
+    inf = float("inf")
+
+    def search(k: int) -> list[int]:
+        source, target = ends[k]
+        ti, tj = divmod(target, ny)
+        g: dict[int, float] = {source: 0.0}
+        parents: dict[int, int] = {source: -1}
+        closed: set[int] = set()
+        heap = [(0.0, 0, source)]
+        counter = 0
+        while heap:
+            _, _, cell = heapq.heappop(heap)
+            if cell in closed:
+                continue
+            closed.add(cell)
+            if cell == target:
+                path = [cell]
+                while parents[cell] >= 0:
+                    cell = parents[cell]
+                    path.append(cell)
+                return path[::-1]
+            i, j = divmod(cell, ny)
+            for ni, nj in ((i + 1, j), (i - 1, j), (i, j + 1), (i, j - 1)):
+                if not (0 <= ni < nx and 0 <= nj < ny):
+                    continue
+                nb = ni * ny + nj
+                if nb in closed:
+                    continue
+                e = edge(cell, nb)
+                over = max(0, demand[e] + 1 - capacity[e])
+                gn = g[cell] + (1.0 + history[e]) * (1.0 + pres * over)
+                if gn >= g.get(nb, inf):
+                    continue
+                g[nb] = gn
+                parents[nb] = cell
+                counter += 1
+                heapq.heappush(heap, (gn + abs(ni - ti) + abs(nj - tj), counter, nb))
+        # Capacities are soft, so every GCell is reachable.
+        raise AssertionError("GCell grid is disconnected")
+
+    def route(k: int) -> None:
+        for e in edges[k]:
+            demand[e] -= 1
+        paths[k] = search(k)
+        edges[k] = [edge(a, b) for a, b in zip(paths[k], paths[k][1:])]
+        for e in edges[k]:
+            demand[e] += 1
+        result.reroutes += 1
+
+    to_route = order
+    for iteration in range(1, max_iterations + 1):
+        result.iterations = iteration
+        for k in to_route:
+            route(k)
+        overused = {e for e, d in enumerate(demand) if d > capacity[e]}
+        if not overused:
+            result.converged = True
+            break
+        for e in overused:
+            history[e] += history_factor * (demand[e] - capacity[e])
+        pres *= present_growth
+        to_route = [k for k in order if not overused.isdisjoint(edges[k])]
+
+    result.overflow = sum(max(0, d - cap) for d, cap in zip(demand, capacity))
+    demand_array = np.asarray(demand, dtype=np.int64)
+    result.demand_h = demand_array[:num_h].reshape(nx - 1, ny)
+    result.demand_v = demand_array[num_h:].reshape(nx, ny - 1)
+    for k, net in enumerate(nets):
+        result.paths[net.name] = [divmod(cell, ny) for cell in paths[k]]
+    return result
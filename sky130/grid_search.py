@@ -0,0 +1,335 @@
+"""Search strategies for uniform-cost rectilinear routing grids.
+
+All strategies operate on a boolean ``blocked`` array indexed as
+``blocked[i, j]`` (x index first, matching the grids built by
+``sky130.routing.route_astar``) and move in the four cardinal directions
+with unit step cost.
+"""
+
+import heapq
+from dataclasses import dataclass
+
+import numpy as np
+
+Cell = tuple[int, int]
+
+SEARCH_STRATEGIES = ("astar", "jps", "bidirectional", "bend_penalty")
+
+_DIRECTIONS: tuple[Cell, ...] = ((1, 0), (0, 1), (-1, 0), (0, -1))
+
+
+@dataclass
+class GridSearchResult:
+    """Outcome of a grid search."""
+
+    path: list[Cell] | None
+    nodes_expanded: int
+    strategy: str
+
+    @property
+    def found(self) -> bool:
+        return self.path is not None
+
+    @property
+    def num_bends(self) -> int:
+        """Number of direction changes along the path."""
+        if not self.path or len(self.path) < 3:
+            return 0
+        bends = 0
+        for a, b, c in zip(self.path, self.path[1:], self.path[2:]):
+            if (b[0] - a[0], b[1] - a[1]) != (c[0] - b[0], c[1] - b[1]):
+                bends += 1
+        return bends
+
+
+def _manhattan(a: Cell, b: Cell) -> int:
+    return abs(a[0] - b[0]) + abs(a[1] - b[1])
+
+
+def _reconstruct(parents: dict[Cell, Cell | None], node: Cell) -> list[Cell]:
+    path = [node]
+    while parents[node] is not None:
+        node = parents[node]
+        path.append(node)
+    path.reverse()
+    return path
+
+
+def compress_path(path: list[Cell]) -> list[Cell]:
+    """Reduce a cell path to its endpoints and corner cells."""
+    if len(path) < 3:
+        return list(path)
+    corners = [path[0]]
+    for a, b, c in zip(path, path[1:], path[2:]):
+        if (b[0] - a[0], b[1] - a[1]) != (c[0] - b[0], c[1] - b[1]):
+            corners.append(b)
+    corners.append(path[-1])
+    return corners
+
+
+def expand_path(points: list[Cell]) -> list[Cell]:
+    """Interpolate every grid cell between consecutive collinear points."""
+    cells = [points[0]]
+    for a, b in zip(points, points[1:]):
+        di = (b[0] > a[0]) - (b[0] < a[0])
+        dj = (b[1] > a[1]) - (b[1] < a[1])
+        i, j = a
+        while (i, j) != b:
+            i += di
+            j += dj
+            cells.append((i, j))
+    return cells
+
+
+def _astar(free: list[list[bool]], start: Cell, goal: Cell) -> GridSearchResult:
+    nx, ny = len(free), len(free[0])
+    g: dict[Cell, int] = {start: 0}
+    parents: dict[Cell, Cell | None] = {start: None}
+    closed: set[Cell] = set()
+    heap = [(_manhattan(start, goal), _manhattan(start, goal), start)]
+    expanded = 0
+    while heap:
+        _, _, node = heapq.heappop(heap)
+        if node in closed:
+            continue
+        closed.add(node)
+        expanded += 1
+        if node == goal:
+            return GridSearchResult(_reconstruct(parents, node), expanded, "astar")
+        gn = g[node] + 1
+        for di, dj in _DIRECTIONS:
+            i, j = node[0] + di, node[1] + dj
+            if not (0 <= i < nx and 0 <= j < ny) or not free[i][j]:
+                continue
+            nb = (i, j)
+            if nb in closed or gn >= g.get(nb, gn + 1):
+                continue
+            g[nb] = gn
+            parents[nb] = node
+            h = _manhattan(nb, goal)
+            heapq.heappush(heap, (gn + h, h, nb))
+    return GridSearchResult(None, expanded, "astar")
+
+
+def _jps(free: list[list[bool]], start: Cell, goal: Cell) -> GridSearchResult:
+    """Jump-point search for 4-connected grids.
+
+    Canonical paths prefer vertical moves: vertical jumps scan horizontally at
+    every step, while horizontal jumps only stop at goal or forced neighbours.
+    """
+    nx, ny = len(free), len(free[0])
+
+    def is_free(i: int, j: int) -> bool:
+        return 0 <= i < nx and 0 <= j < ny and free[i][j]
+
+    def jump_h(i: int, j: int, di: int) -> Cell | None:
+        while True:
+            i += di
+            if not is_free(i, j):
+                return None
+            if (i, j) == goal:
+                return (i, j)
+            for dj in (1, -1):
+                if is_free(i, j + dj) and not is_free(i - di, j + dj):
+                    return (i, j)
+
+    def jump_v(i: int, j: int, dj: int) -> Cell | None:
+        while True:
+            j += dj
+            if not is_free(i, j):
+                return None
+            if (i, j) == goal:
+                return (i, j)
+            for di in (1, -1):
+                if is_free(i + di, j) and not is_free(i + di, j - dj):
+                    return (i, j)
+            if jump_h(i, j, 1) is not None or jump_h(i, j, -1) is not None:
+                return (i, j)
+
+    def successors(node: Cell, parent: Cell | None) -> list[Cell]:
+        if parent is None:
+            return list(_DIRECTIONS)
+        di = (node[0] > parent[0]) - (node[0] < parent[0])
+        dj = (node[1] > parent[1]) - (node[1] < parent[1])
+        if dj == 0:
+            dirs = [(di, 0)]
+            for sj in (1, -1):
+                if is_free(node[0], node[1] + sj) and not is_free(
+                    node[0] - di, node[1] + sj
+                ):
+                    dirs.append((0, sj))
+            return dirs
+        return [(0, dj), (1, 0), (-1, 0)]
+
+    g: dict[Cell, int] = {start: 0}
+    parents: dict[Cell, Cell | None] = {start: None}
+    closed: set[Cell] = set()
+    heap = [(_manhattan(start, goal), _manhattan(start, goal), start)]
+    expanded = 0
+    while heap:
+        _, _, node = heapq.heappop(heap)
+        if node in closed:
+            continue
+        closed.add(node)
+        expanded += 1
+        if node == goal:
+            jump_points = _reconstruct(parents, node)
+            return GridSearchResult(expand_path(jump_points), expanded, "jps")
+        for di, dj in successors(node, parents[node]):
+            jp = (
+                jump_h(node[0], node[1], di)
+                if dj == 0
+                else jump_v(node[0], node[1], dj)
+            )
+            if jp is None or jp in closed:
+                continue
+            gn = g[node] + _manhattan(node, jp)
+            if gn >= g.get(jp, gn + 1):
+                continue
+            g[jp] = gn
+            parents[jp] = node
+            h = _manhattan(jp, goal)
+            heapq.heappush(heap, (gn + h, h, jp))
+    return GridSearchResult(None, expanded, "jps")
+
+
+def _bidirectional(free: list[list[bool]], start: Cell, goal: Cell) -> GridSearchResult:
+    """Bidirectional A* with the max(f_fwd, f_bwd) >= best termination rule."""
+    nx, ny = len(free), len(free[0])
+    targets = (goal, start)
+    g: tuple[dict[Cell, int], dict[Cell, int]] = ({start: 0}, {goal: 0})
+    parents: tuple[dict[Cell, Cell | None], dict[Cell, Cell | None]] = (
+        {start: None},
+        {goal: None},
+    )
+    closed: tuple[set[Cell], set[Cell]] = (set(), set())
+    heaps = (
+        [(_manhattan(start, goal), _manhattan(start, goal), start)],
+        [(_manhattan(start, goal), _manhattan(start, goal), goal)],
+    )
+    best = float("inf")
+    meet: Cell | None = start if start == goal else None
+    if meet is not None:
+        best = 0
+    expanded = 0
+    while heaps[0] and heaps[1]:
+        if max(heaps[0][0][0], heaps[1][0][0]) >= best:
+            break
+        side = 0 if len(heaps[0]) <= len(heaps[1]) else 1
+        _, _, node = heapq.heappop(heaps[side])
+        if node in closed[side]:
+            continue
+        closed[side].add(node)
+        expanded += 1
+        gn = g[side][node] + 1
+        other = 1 - side
+        for di, dj in _DIRECTIONS:
+            i, j = node[0] + di, node[1] + dj
+            if not (0 <= i < nx and 0 <= j < ny) or not free[i][j]:
+                continue
+            nb = (i, j)
+            if nb in closed[side] or gn >= g[side].get(nb, gn + 1):
+                continue
+            g[side][nb] = gn
+            parents[side][nb] = node
+            h = _manhattan(nb, targets[side])
+            heapq.heappush(heaps[side], (gn + h, h, nb))
+            if nb in g[other] and gn + g[other][nb] < best:
+                best = gn + g[other][nb]
+                meet = nb
+
+    if meet is None:
+        return GridSearchResult(None, expanded, "bidirectional")
+    forward = _reconstruct(parents[0], meet)
+    backward = _reconstruct(parents[1], meet)
+    backward.reverse()
+    return GridSearchResult(forward + backward[1:], expanded, "bidirectional")
+
+
+def _bend_penalty(
+    free: list[list[bool]], start: Cell, goal: Cell, bend_cost: float
+) -> GridSearchResult:
+    """A* over (cell, heading) states charging ``bend_cost`` per direction change."""
+    nx, ny = len(free), len(free[0])
+    State = tuple[int, int, int]
+    origin: State = (start[0], start[1], -1)
+    g: dict[State, float] = {origin: 0.0}
+    parents: dict[State, State | None] = {origin: None}
+    closed: set[State] = set()
+    heap = [(float(_manhattan(start, goal)), _manhattan(start, goal), origin)]
+    expanded = 0
+    while heap:
+        _, _, state = heapq.heappop(heap)
+        if state in closed:
+            continue
+        closed.add(state)
+        expanded += 1
+        i0, j0, heading = state
+        if (i0, j0) == goal:
+            path: list[Cell] = []
+            node: State | None = state
+            while node is not None:
+                path.append((node[0], node[1]))
+                node = parents[node]
+            path.reverse()
+            return GridSearchResult(path, expanded, "bend_penalty")
+        for d, (di, dj) in enumerate(_DIRECTIONS):
+            if heading >= 0 and d == (heading + 2) % 4:
+                continue
+            i, j = i0 + di, j0 + dj
+            if not (0 <= i < nx and 0 <= j < ny) or not free[i][j]:
+                continue
+            nb: State = (i, j, d)
+            if nb in closed:
+                continue
+            gn = g[state] + 1.0 + (bend_cost if 0 <= heading != d else 0.0)
+            if gn >= g.get(nb, gn + 1.0):
+                continue
+            g[nb] = gn
+            parents[nb] = state
+            h = _manhattan((i, j), goal)
+            heapq.heappush(heap, (gn + h, h, nb))
+    return GridSearchResult(None, expanded, "bend_penalty")
+
+
+def search_grid(
+    blocked: np.ndarray,
+    start: Cell,
+    goal: Cell,
+    strategy: str = "astar",
+    bend_cost: float = 2.0,
+) -> GridSearchResult:
+    """Find a 4-connected path between two free cells of a grid.
+
+    Args:
+        blocked: 2D boolean array, True where the grid cell is an obstacle.
+        start: Start cell (i, j).
+        goal: Goal cell (i, j).
+        strategy: One of "astar", "jps" (jump-point search), "bidirectional"
+            (bidirectional A*) or "bend_penalty" (A* with a cost per corner).
+        bend_cost: Extra cost per direction change for "bend_penalty".
+
+    Returns:
+        GridSearchResult with the cell path (None if unreachable) and the
+        number of expanded nodes.
+    """
+    if strategy not in SEARCH_STRATEGIES:
+        raise ValueError(
+            f"Unknown search strategy {strategy!r}, expected one of {SEARCH_STRATEGIES}"
+        )
+    free = (~np.asarray(blocked, dtype=bool)).tolist()
+    start = (int(start[0]), int(start[1]))
+    goal = (int(goal[0]), int(goal[1]))
+    for cell in (start, goal):
+        if not (0 <= cell[0] < len(free) and 0 <= cell[1] < len(free[0])):
+            raise ValueError(f"Cell {cell} is outside the grid")
+        if not free[cell[0]][cell[1]]:
+            return GridSearchResult(None, 0, strategy)
+
+    if strategy == "jps":
+        return _jps(free, start, goal)
+    if strategy == "bidirectional":
+        return _bidirectional(free, start, goal)
+    if strategy == "bend_penalty":
+        return _bend_penalty(free, start, goal, bend_cost)
+    return _astar(free, start, goal)
@@ -0,0 +1,304 @@
+"""Negotiated-congestion (PathFinder) routing on a layered grid.
+
+Nets are routed on a shared ``(layer, i, j)`` grid where every node has
+capacity one. Each net's A* search pays, per node,
+
+    (base + history[n]) * (1 + present_factor * occupancy[n])
+
+so nets may temporarily share nodes, but sharing gets more expensive every
+iteration (``present_factor`` grows) and nodes that stay overused accumulate
+history cost. After the first iteration only nets that use an overused node
+are ripped up and rerouted. Net order is fixed by ``seed``, so results are
+deterministic.
+
+Each layer has a preferred direction, horizontal (along i) or vertical
+(along j); by default even layers are horizontal and odd layers vertical,
+matching the met1/met2 convention of the 3D router. Via costs may differ per
+layer pair.
+"""
+
+import heapq
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+
+import numpy as np
+
+Node = tuple[int, int, int]
+
+_PLANAR_MOVES = ((1, 0), (-1, 0), (0, 1), (0, -1))
+
+
+@dataclass(frozen=True)
+class CongestionNet:
+    """One two-terminal net of a negotiated-congestion run.
+
+    Attributes:
+        name: Net name.
+        source: Source node (layer, i, j).
+        target: Target node (layer, i, j).
+        passable: Blocked nodes this net may use anyway (its own pin shapes).
+    """
+
+    name: str
+    source: Node
+    target: Node
+    passable: frozenset[Node] = frozenset()
+
+
+@dataclass
+class NegotiationResult:
+    """Outcome of negotiate_routes.
+
+    Attributes:
+        paths: Node path per net name, None if the net could not be routed.
+        converged: True if no node is shared by two nets.
+        iterations: Rip-up-and-reroute iterations run.
+        reroutes: Total number of net searches.
+        nodes_expanded: Nodes expanded over all searches.
+        overused: Number of nodes still shared by several nets.
+    """
+
+    paths: dict[str, list[Node] | None] = field(default_factory=dict)
+    converged: bool = False
+    iterations: int = 0
+    reroutes: int = 0
+    nodes_expanded: int = 0
+    overused: int = 0
+
+
+def path_corners(path: Sequence[Node]) -> list[Node]:
+    """Reduce a node path to its endpoints, bends and layer changes."""
+    if len(path) < 3:
+        return list(path)
+    corners = [path[0]]
+    for a, b, c in zip(path, path[1:], path[2:]):
+        step_ab = (b[0] - a[0], b[1] - a[1], b[2] - a[2])
+        step_bc = (c[0] - b[0], c[1] - b[1], c[2] - b[2])
+        if step_ab != step_bc:
+            corners.append(b)
+    corners.append(path[-1])
+    return corners
+
+
+def _window(net: CongestionNet, margin: int, shape: tuple[int, ...]):
+    _, nx, ny = shape
+    i0 = max(0, min(net.source[1], net.target[1]) - margin)
+    i1 = min(nx - 1, max(net.source[1], net.target[1]) + margin)
+    j0 = max(0, min(net.source[2], net.target[2]) - margin)
+    j1 = min(ny - 1, max(net.source[2], net.target[2]) + margin)
+    return i0, i1, j0, j1
+
+
+def negotiate_routes(
+    blocked: np.ndarray,
+    nets: Sequence[CongestionNet],
+    via_cost: float | Sequence[float] = 10.0,
+    wrong_way_penalty: float = 8.0,
+    max_iterations: int = 30,
+    present_factor: float = 0.5,
+    present_growth: float = 1.5,
+    history_factor: float = 1.0,
+    window_margin: int = 8,
+    seed: int | None = None,
+    directions: Sequence[str] | None = None,
+) -> NegotiationResult:
+    """Route nets on a layered grid with negotiated congestion.
+
+    Args:
+        blocked: Boolean array (layers, nx, ny), True where a node is an
+            obstacle for every net.
+        nets: Nets to route. Names must be unique.
+        via_cost: Base cost of a layer change, or one cost per layer pair
+            (index k joins layers k and k + 1).
+        wrong_way_penalty: Extra base cost of a move against the layer's
+            preferred direction.
+        max_iterations: Maximum rip-up-and-reroute iterations.
+        present_factor: Initial weight of present congestion.
+        present_growth: Factor applied to present_factor after each iteration.
+        history_factor: History cost added per iteration a node is overused.
+        window_margin: Searches are first confined to the terminals' bounding
+            box grown by this many cells; the full grid is used if that fails.
+            The margin doubles each time a net is ripped up.
+        seed: Seed for the routing order. None keeps the given order.
+        directions: Preferred direction per layer, "h" (along i) or "v"
+            (along j). Defaults to alternating, starting horizontal.
+
+    Returns:
+        NegotiationResult with one path per net.
+    """
+    blocked = np.asarray(blocked, dtype=bool)
+    if blocked.ndim != 3:
+        raise ValueError("blocked must have shape (layers, nx, ny)")
+    names = [net.name for net in nets]
+    if len(set(names)) != len(names):
+        raise ValueError("Net names must be unique")
+    shape = blocked.shape
+    num_layers, nx, ny = shape
+    nxy = nx * ny
+    if isinstance(via_cost, int | float):
+        via_costs = [float(via_cost)] * (num_layers - 1)
+    else:
+        via_costs = [float(cost) for cost in via_cost]
+    if len(via_costs) != num_layers - 1:
+        raise ValueError("via_cost needs one cost per pair of adjacent layers")
+    if directions is None:
+        directions = ["h" if layer % 2 == 0 else "v" for layer in range(num_layers)]
+    if len(directions) != num_layers:
+        raise ValueError("directions needs one entry per layer")
+    horizontal = [direction == "h" for direction in directions]
+    # Cost of the vias from layer a to layer b, and of leaving a layer for a
+    # neighbour and coming back.
+    via_prefix = [0.0]
+    for cost in via_costs:
+        via_prefix.append(via_prefix[-1] + cost)
+    detour = [
+        2 * min(via_costs[max(layer - 1, 0) : layer + 1], default=float("inf"))
+        for layer in range(num_layers)
+    ]
+
+    # Nodes are flat indices (layer * nx + i) * ny + j into per-node lists.
+    def node_id(node: Node) -> int:
+        return (node[0] * nx + node[1]) * ny + node[2]
+
+    def id_node(nid: int) -> Node:
+        layer, rem = divmod(nid, nxy)
+        i, j = divmod(rem, ny)
+        return layer, i, j
+
+    free = (~blocked).ravel().tolist()
+    occupancy = [0] * blocked.size
+    history = [0.0] * blocked.size
+    # Terminals are reserved for their own net.
+    reserved: dict[int, int] = {}
+    for k, net in enumerate(nets):
+        for node in (net.source, net.target):
+            if not all(0 <= v < n for v, n in zip(node, shape)):
+                raise ValueError(
+                    f"Terminal {node} of net {net.name!r} is outside the grid"
+                )
+            reserved.setdefault(node_id(node), k)
+    passable = [frozenset(node_id(node) for node in net.passable) for net in nets]
+
+    order = list(range(len(nets)))
+    if seed is not None:
+        order = [int(k) for k in np.random.default_rng(seed).permutation(len(nets))]
+
+    result = NegotiationResult(paths=dict.fromkeys(names))
+    paths: list[list[int] | None] = [None] * len(nets)
+    pres = present_factor
+    # (planar offset, di, dj) per move; wrong-way cost depends on the layer.
+    planar = [(ny, 1, 0), (-ny, -1, 0), (1, 0, 1), (-1, 0, -1)]
+    step_wrong = 1.0 + wrong_way_penalty
+    inf = float("inf")
+
+    def search(k: int, window) -> tuple[list[int] | None, int]:
+        i0, i1, j0, j1 = window
+        source, target = node_id(nets[k].source), node_id(nets[k].target)
+        tl, ti, tj = nets[k].target
+        own = passable[k]
+
+        def heuristic(nid: int) -> float:
+            # Staying on the target layer pays the wrong-way penalty for the
+            # off-axis distance or two vias to a neighbour and back; any other
+            # layer pays at least the vias down (or up) to the target layer.
+            layer, i, j = id_node(nid)
+            di, dj = abs(i - ti), abs(j - tj)
+            if layer != tl:
+                return di + dj + abs(via_prefix[layer] - via_prefix[tl])
+            off_axis = dj if horizontal[layer] else di
+            return di + dj + min(wrong_way_penalty * off_axis, detour[layer])
+
+        g: dict[int, float] = {source: 0.0}
+        parents: dict[int, int] = {source: -1}
+        closed: set[int] = set()
+        h0 = heuristic(source)
+        heap = [(h0, h0, 0, source)]
+        counter = 0
+        expanded = 0
+        while heap:
+            _, _, _, nid = heapq.heappop(heap)
+            if nid in closed:
+                continue
+            closed.add(nid)
+            expanded += 1
+            if nid == target:
+                path = [nid]
+                while parents[nid] >= 0:
+                    nid = parents[nid]
+                    path.append(nid)
+                path.reverse()
+                return path, expanded
+            layer, i, j = id_node(nid)
+            along_i = horizontal[layer]
+            gn0 = g[nid]
+            moves = []
+            for offset, di, dj in planar:
+                if i0 <= i + di <= i1 and j0 <= j + dj <= j1:
+                    wrong_way = dj if along_i else di
+                    moves.append((nid + offset, step_wrong if wrong_way else 1.0))
+            if layer > 0:
+                moves.append((nid - nxy, via_costs[layer - 1]))
+            if layer < num_layers - 1:
+                moves.append((nid + nxy, via_costs[layer]))
+            for nb, base in moves:
+                if nb in closed:
+                    continue
+                owner = reserved.get(nb)
+                if owner is not None:
+                    if owner != k:
+                        continue
+                elif not free[nb] and nb not in own:
+                    continue
+                gn = gn0 + (base + history[nb]) * (1.0 + pres * occupancy[nb])
+                if gn >= g.get(nb, inf):
+                    continue
+                g[nb] = gn
+                parents[nb] = nid
+                counter += 1
+                h = heuristic(nb)
+                heapq.heappush(heap, (gn + h, h, counter, nb))
+        return None, expanded
+
+    def route(k: int) -> None:
+        old = paths[k]
+        if old is not None:
+            for nid in old:
+                occupancy[nid] -= 1
+        path, expanded = search(k, _window(nets[k], margins[k], shape))
+        if path is None:
+            path, extra = search(k, (0, nx - 1, 0, ny - 1))
+            expanded += extra
+        result.reroutes += 1
+        result.nodes_expanded += expanded
+        paths[k] = path
+        if path is not None:
+            for nid in path:
+                occupancy[nid] += 1
+
+    margins = [window_margin] * len(nets)
+    to_route = order
+    for iteration in range(1, max_iterations + 1):
+        result.iterations = iteration
+        for k in to_route:
+            route(k)
+        overused = {nid for nid, count in enumerate(occupancy) if count > 1}
+        if not overused:
+            result.converged = True
+            break
+        for nid in overused:
+            history[nid] += history_factor
+        pres *= present_growth
+        to_route = [
+            k
+            for k in order
+            if paths[k] is not None and not overused.isdisjoint(paths[k])
+        ]
+        # Nets that stay congested may need to detour further.
+        for k in to_route:
+            margins[k] *= 2
+
+    result.overused = sum(count > 1 for count in occupancy)
+    for k, net in enumerate(nets):
+        if paths[k] is not None:
+            result.paths[net.name] = [id_node(nid) for nid in paths[k]]
+    return result
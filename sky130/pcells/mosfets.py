@@ -11,6 +11,24 @@ import gdsfactory as gf
 
 from sky130.layers import LAYER
 
+# Magic design-rule constants of the mos_device generator (um), also used by
+# the sky130.drc rule deck.
+MOSFET_RULES = {
+    "contact_size": 0.17,
+    "diff_surround": 0.06,  # Diffusion enclosure of licon contact
+    "poly_surround": 0.08,  # Poly enclosure of licon contact (on poly)
+    "gate_to_diffcont": 0.145,  # Gate edge to diff contact center (edge contacts)
+    "gate_to_polycont_n": 0.275,  # Gate edge to poly contact center (NFET)
+    "gate_to_polycont_p": 0.32,  # Gate edge to poly contact center (PFET)
+    "diff_extension": 0.29,  # Diffusion extension beyond gate (nf=1 edge)
+    "end_cap": 0.13,  # Poly extension beyond diffusion (non-contact side)
+    "implant_enc": 0.125,  # Implant enclosure beyond diffusion
+    "nwell_enc_x": 0.18,  # Nwell enclosure of diff in x (PFET)
+    "npc_ext": 0.02,  # NPC extension beyond poly pad
+    "met1_surround": 0.03,  # Met1 surround of mcon contact
+    "li1_ext_y": 0.02,  # Li1 extension beyond diffusion edge for S/D
+}
+
 
 def _snap(val: float, grid: float = 0.005) -> float:
     """Snap a value to the nearest grid point (default 5nm)."""
@@ -41,19 +59,19 @@ def _mosfet_core(
     Returns a dict of key coordinates for port placement and enclosure calculations.
     """
     # ---- Magic design-rule constants ----
-    contact_size = 0.17
-    diff_surround = 0.06  # Diffusion enclosure of licon contact
-    poly_surround = 0.08  # Poly enclosure of licon contact (on poly)
-    gate_to_diffcont = 0.145  # Gate edge to diff contact center (edge contacts)
-    gate_to_polycont_n = 0.275  # Gate edge to poly contact center (NFET)
-    gate_to_polycont_p = 0.32  # Gate edge to poly contact center (PFET)
-    diff_extension = 0.29  # Diffusion extension beyond gate (nf=1 edge)
-    end_cap = 0.13  # Poly extension beyond diffusion (non-contact side)
-    implant_enc = 0.125  # Implant enclosure beyond diffusion
-    nwell_enc_x = 0.18  # Nwell enclosure of diff in x (PFET)
-    npc_ext = 0.02  # NPC extension beyond poly pad
-    met1_surround = 0.03  # Met1 surround of mcon contact
-    li1_ext_y = 0.02  # Li1 extension beyond diffusion edge for S/D
+    contact_size = MOSFET_RULES["contact_size"]
+    diff_surround = MOSFET_RULES["diff_surround"]
+    poly_surround = MOSFET_RULES["poly_surround"]
+    gate_to_diffcont = MOSFET_RULES["gate_to_diffcont"]
+    gate_to_polycont_n = MOSFET_RULES["gate_to_polycont_n"]
+    gate_to_polycont_p = MOSFET_RULES["gate_to_polycont_p"]
+    diff_extension = MOSFET_RULES["diff_extension"]
+    end_cap = MOSFET_RULES["end_cap"]
+    implant_enc = MOSFET_RULES["implant_enc"]
+    nwell_enc_x = MOSFET_RULES["nwell_enc_x"]
+    npc_ext = MOSFET_RULES["npc_ext"]
+    met1_surround = MOSFET_RULES["met1_surround"]
+    li1_ext_y = MOSFET_RULES["li1_ext_y"]
 
     gate_to_polycont = gate_to_polycont_p if is_pmos else gate_to_polycont_n
 
@@ -1,6 +1,17 @@
+from math import ceil, floor
+
 import gdsfactory as gf
+from gdsfactory.typings import Float2, LayerSpec
 
 from sky130.pcells.via_generator import via_generator
+from sky130.routing_layers import RoutingVia, routing_stack
+
+# Canonical via pads are rounded up to this grid (um), two DBU, so that pads
+# centered on a via position keep their edges on grid.
+_PAD_GRID = 0.002
+# Step (um) of the canonical pads routers ask for: fine enough to keep pads
+# close to the wire width, coarse enough to share via cells between widths.
+_PAD_STEP = 0.01
 
 
 @gf.cell(tags=["vias"])
@@ -88,3 +99,191 @@ def via_m1_m2(
     )
 
     return c
+
+
+@gf.cell(tags=["vias"])
+def via_transition(
+    width: float = 0.5,
+    length: float = 0.5,
+    bottom_layer: LayerSpec = (68, 20),
+    via_layer: LayerSpec = (68, 44),
+    top_layer: LayerSpec = (69, 20),
+    via_size: Float2 = (0.15, 0.15),
+    via_spacing: Float2 = (0.17, 0.17),
+    via_enclosure: Float2 = (0.07, 0.07),
+) -> gf.Component:
+    """Return a via transition between two adjacent metals.
+
+    Same construction as via_m1_m2 for any metal pair: landing pads of
+    (width + enclosure) x (length + enclosure) on both metals around a cut
+    array, with port e1 on the bottom metal and e2 on the top metal.
+
+    Args:
+        width: via pad width.
+        length: via pad length.
+        bottom_layer: lower metal.
+        via_layer: cut layer.
+        top_layer: upper metal.
+        via_size: cut size.
+        via_spacing: cut spacing.
+        via_enclosure: metal enclosure of the cut array.
+    """
+    c = gf.Component()
+
+    for layer in (bottom_layer, top_layer):
+        pad = c.add_ref(
+            gf.components.rectangle(
+                size=(width + via_enclosure[0], length + via_enclosure[1]),
+                layer=layer,
+            )
+        )
+        pad.dcenter = (0, 0)
+
+    v = via_generator(
+        width=width,
+        length=length,
+        via_size=via_size,
+        via_spacing=via_spacing,
+        via_layer=via_layer,
+        via_enclosure=via_enclosure,
+    )
+    via_ref = c.add_ref(v)
+    via_ref.dcenter = (0, 0)
+
+    c.add_port(
+        name="e1",
+        center=(-width / 2, 0),
+        width=width,
+        orientation=180,
+        layer=bottom_layer,
+        port_type="electrical",
+    )
+    c.add_port(
+        name="e2",
+        center=(0, width / 2),
+        width=width,
+        orientation=90,
+        layer=top_layer,
+        port_type="electrical",
+    )
+    return c
+
+
+def via_pad_size(via: RoutingVia, cuts: int = 1) -> float:
+    """Canonical via pad in um of `via` holding `cuts` cuts per side.
+
+    As for via_transition, the metal pads are drawn ``via.enclosure`` larger
+    than the via pad, so the pad of n cuts is n * size + (n - 1) * spacing +
+    enclosure, and at least ``via.min_pad``.
+    """
+    pad = cuts * via.size + (cuts - 1) * via.spacing + via.enclosure
+    pad = max(pad, via.min_pad)
+    return round(ceil(round(pad / _PAD_GRID, 6)) * _PAD_GRID, 6)
+
+
+def _cut_count(pad: float, via: RoutingVia) -> int:
+    """Cuts per side fitting a via pad of `pad` um."""
+    pitch = via.size + via.spacing
+    return max(1, floor((pad - via.enclosure + via.spacing) / pitch + 1e-9))
+
+
+def quantize_via_pad(pad: float, via: RoutingVia, round_up: bool = True) -> float:
+    """Canonical via pad of `via` next to `pad` (um).
+
+    Canonical pads are multiples of 0.01 um and at least the one-cut pad
+    (``via_pad_size(via)``); via_stack fits as many cuts as the pad holds.
+
+    Args:
+        pad: Requested via pad.
+        via: Cut rules.
+        round_up: Return the smallest canonical pad of at least `pad`.
+            Otherwise the largest of at most `pad`, or the smallest pad if
+            `pad` is below it.
+    """
+    steps = round(pad / _PAD_STEP, 6)
+    steps = ceil(steps) if round_up else floor(steps)
+    return max(via_pad_size(via), round(steps * _PAD_STEP, 6))
+
+
+def _centered_box(c: gf.Component, width: float, length: float, layer) -> None:
+    """Add a width x length box centered on the origin, edges on the 1 nm grid."""
+    x = ceil(round(width / 2 / 0.001, 6)) * 0.001
+    y = ceil(round(length / 2 / 0.001, 6)) * 0.001
+    c.add_polygon([(-x, -y), (x, -y), (x, y), (-x, y)], layer=layer)
+
+
+@gf.cell(tags=["vias"])
+def via_stack(
+    width: float = 0.29,
+    length: float | None = None,
+    bottom: str = "met1",
+    top: str = "met2",
+) -> gf.Component:
+    """Return a via stack from `bottom` to `top`, centered on the origin.
+
+    Every cut level between the two metals is drawn from the rules of
+    ``routing_stack``: the via pad is rounded up to the canonical pad of the
+    level (see ``quantize_via_pad``), the cuts, as many as fit the pad, are
+    one arrayed reference of a single cut cell and the metal pads, drawn
+    ``enclosure`` larger than the via pad and as large as the largest level
+    they land on, are plain shapes. Routers pass canonical pads, so a run
+    reuses one cell per 0.01 um of pad size.
+
+    Args:
+        width: via pad width.
+        length: via pad length, `width` if None.
+        bottom: lower metal, by LAYER_STACK name (li1, met1 ... met4).
+        top: upper metal (met1 ... met5), above `bottom`.
+
+    .. plot::
+      :include-source:
+
+      from sky130.pcells.vias import via_stack
+
+      c = via_stack(width=1.0, bottom="li1", top="met3")
+      c.plot()
+    """
+    length = width if length is None else length
+    stack = routing_stack((bottom, top))
+    c = gf.Component()
+
+    pads = [
+        (quantize_via_pad(width, via), quantize_via_pad(length, via))
+        for via in stack.vias
+    ]
+    for k, metal in enumerate(stack.layers):
+        # A metal is as large as the largest landing pad of the cuts on it.
+        levels = [z for z in (k - 1, k) if 0 <= z < len(stack.vias)]
+        pad_w = max(pads[z][0] + stack.vias[z].enclosure for z in levels)
+        pad_l = max(pads[z][1] + stack.vias[z].enclosure for z in levels)
+        _centered_box(c, pad_w, pad_l, metal.layer)
+
+    for via, (pad_w, pad_l) in zip(stack.vias, pads):
+        columns, rows = _cut_count(pad_w, via), _cut_count(pad_l, via)
+        pitch = via.size + via.spacing
+        cut = gf.components.rectangle(size=(via.size, via.size), layer=via.layer)
+        cuts = c.add_ref(
+            cut, rows=rows, columns=columns, column_pitch=pitch, row_pitch=pitch
+        )
+        cuts.dmove(
+            (-(columns * pitch - via.spacing) / 2, -(rows * pitch - via.spacing) / 2)
+        )
+
+    first, last = pads[0], pads[-1]
+    c.add_port(
+        name="e1",
+        center=(-first[0] / 2, 0),
+        width=first[1],
+        orientation=180,
+        layer=stack.layers[0].layer,
+        port_type="electrical",
+    )
+    c.add_port(
+        name="e2",
+        center=(0, last[1] / 2),
+        width=last[0],
+        orientation=90,
+        layer=stack.layers[-1].layer,
+        port_type="electrical",
+    )
+    return c
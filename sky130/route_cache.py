@@ -0,0 +1,195 @@
+"""Content-addressed cache for routing search results.
+
+Routers key each search on everything that determines its outcome (endpoint
+ports, cross-section, clearance, search settings and a digest of the obstacle
+geometry inside the search window). On a hit the stored corner list is reused
+and the search is skipped.
+
+Caching is opt-in: routers take ``route_cache=True`` for the process-wide
+default cache or a RouteCache instance of their own. The default cache lives
+in memory. Set ``SKY130_ROUTE_CACHE=0`` to switch it off and
+``SKY130_ROUTE_CACHE_DIR`` to also persist entries on disk.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from collections import OrderedDict
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+_DISABLED_VALUES = {"0", "false", "no", "off"}
+
+
+def array_digest(arrays: np.ndarray | Iterable[np.ndarray]) -> str:
+    """Stable digest of one array or a sequence of arrays (shape, dtype and data)."""
+    h = hashlib.blake2b(digest_size=16)
+    if isinstance(arrays, np.ndarray):
+        arrays = [arrays]
+    for arr in arrays:
+        arr = np.ascontiguousarray(arr)
+        h.update(f"{arr.dtype.str}{arr.shape}".encode())
+        h.update(arr.tobytes())
+    return h.hexdigest()
+
+
+class RouteCache:
+    """LRU cache of routing results with an optional on-disk store.
+
+    Args:
+        maxsize: Maximum number of entries kept in memory.
+        path: Optional directory used to persist entries as JSON files.
+        enabled: If False, every lookup misses and nothing is stored.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        path: str | Path | None = None,
+        enabled: bool = True,
+    ) -> None:
+        self.maxsize = maxsize
+        self.path = Path(path) if path is not None else None
+        self.enabled = enabled
+        self._entries: OrderedDict[str, Any] = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """Hash JSON-serializable key parts into a cache key."""
+        payload = json.dumps(parts, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _file(self, key: str) -> Path:
+        assert self.path is not None
+        return self.path / f"{key}.json"
+
+    def get(self, key: str) -> Any | None:
+        """Return the cached value for key, or None on a miss."""
+        if not self.enabled:
+            return None
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+        if self.path is not None:
+            try:
+                value = json.loads(self._file(key).read_text())
+            except (OSError, ValueError):
+                value = None
+            if value is not None:
+                self._remember(key, value)
+                self.hits += 1
+                self.disk_hits += 1
+                return value
+        self.misses += 1
+        return None
+
+    def put(self, key: str, value: Any) -> None:
+        """Store a JSON-serializable value under key."""
+        if not self.enabled:
+            return
+        self._remember(key, value)
+        self.stores += 1
+        if self.path is not None:
+            self.path.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                json.dump(value, f)
+            os.replace(tmp, self._file(key))
+
+    def _remember(self, key: str, value: Any) -> None:
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def entries(self) -> dict[str, Any]:
+        """Copy of the in-memory entries, e.g. to hand to another process."""
+        return dict(self._entries)
+
+    def load(self, entries: dict[str, Any]) -> None:
+        """Add entries exported by ``entries()`` without counting stores."""
+        if not self.enabled:
+            return
+        for key, value in entries.items():
+            self._remember(key, value)
+
+    def clear(self, disk: bool = False) -> None:
+        """Drop in-memory entries (and on-disk entries if disk=True)."""
+        self._entries.clear()
+        if disk and self.path is not None and self.path.exists():
+            for f in self.path.glob("*.json"):
+                f.unlink()
+
+    def reset_stats(self) -> None:
+        self.hits = self.disk_hits = self.misses = self.stores = 0
+
+    def stats(self) -> dict[str, int | float]:
+        """Hit/miss statistics."""
+        lookups = self.hits + self.misses
+        return dict(
+            hits=self.hits,
+            disk_hits=self.disk_hits,
+            misses=self.misses,
+            stores=self.stores,
+            entries=len(self._entries),
+            hit_rate=self.hits / lookups if lookups else 0.0,
+        )
+
+    @contextmanager
+    def disabled(self) -> Iterator["RouteCache"]:
+        """Temporarily switch the cache off."""
+        enabled = self.enabled
+        self.enabled = False
+        try:
+            yield self
+        finally:
+            self.enabled = enabled
+
+
+def _default_cache() -> RouteCache:
+    enabled = (
+        os.environ.get("SKY130_ROUTE_CACHE", "1").strip().lower()
+        not in _DISABLED_VALUES
+    )
+    return RouteCache(path=os.environ.get("SKY130_ROUTE_CACHE_DIR"), enabled=enabled)
+
+
+_route_cache = _default_cache()
+
+
+def get_route_cache() -> RouteCache:
+    """Return the process-wide default route cache."""
+    return _route_cache
+
+
+def set_route_cache(cache: RouteCache) -> None:
+    """Replace the process-wide default route cache."""
+    global _route_cache
+    _route_cache = cache
+
+
+def resolve_route_cache(route_cache: "RouteCache | bool | None") -> RouteCache | None:
+    """Map a router's ``route_cache`` argument to a cache instance or None.
+
+    True selects the default cache, False/None disables caching.
+    """
+    if isinstance(route_cache, RouteCache):
+        cache = route_cache
+    elif route_cache:
+        cache = _route_cache
+    else:
+        return None
+    return cache if cache.enabled else None
@@ -0,0 +1,243 @@
+"""Emission of routed geometry into a component.
+
+Routers used to add one ``gf.components.rectangle`` reference per wire
+segment and corner patch, so every distinct segment length became a cell of
+its own and a large multi-net run left thousands of one-off cells behind.
+``RouteGeometryWriter`` inserts wires and corner patches as plain boxes in the
+routed cell; only vias, whose cells repeat, are added as references::
+
+    writer = RouteGeometryWriter(c, shape_index=session)
+    writer.segment((0, 0), (5, 0), 0.14, LAYER_M1)
+    writer.via(via_m1_m2(width=0.29, length=0.29), (5, 0))
+    writer.flush()
+
+With ``emit_shapes=False`` boxes are added as rectangle references, as
+before.
+
+Segment ports added through the writer get their markers drawn together on
+``flush``, once per route, instead of redrawing every port of the cell after
+each ``add_port``.
+
+A ``RouteTransaction`` collects the output of a multi-net attempt in an
+overlay cell, so a failed attempt is dropped without walking or copying the
+routed cell::
+
+    transaction = RouteTransaction(c, session)
+    route_multilayer_3d(c, ..., session=session)  # draws into the overlay
+    transaction.rollback()  # nothing routed since the transaction opened
+    route_multilayer_3d(c, ..., session=session)
+    transaction.commit()  # flattens the overlay into c
+"""
+
+from collections import defaultdict
+
+import gdsfactory as gf
+import klayout.db as kdb
+from gdsfactory.component import Component
+from gdsfactory.typings import Port
+
+from sky130.routing_session import RoutingSession
+from sky130.spatial_index import ShapeIndex
+
+# Segments shorter than this (um) are not drawn.
+_MIN_LENGTH = 0.001
+
+
+class RouteGeometryWriter:
+    """Adds route wires, patches and vias to a component.
+
+    Args:
+        c: Component to draw into.
+        emit_shapes: Insert boxes as shapes of `c`. If False, add one
+            rectangle reference per box instead.
+        shape_index: Shape index (or RoutingSession) of `c` to keep up to date
+            with the inserted shapes, so the next route does not flatten the
+            layers again. Updated on ``flush``. If it is a session with an
+            open transaction, geometry goes to the transaction's overlay and
+            port markers are drawn on commit. If the session has a recorder,
+            boxes, vias and ports are also reported to it.
+    """
+
+    def __init__(
+        self,
+        c: Component,
+        emit_shapes: bool = True,
+        shape_index: ShapeIndex | None = None,
+    ) -> None:
+        self.c = c
+        self.emit_shapes = emit_shapes
+        self.shape_index = shape_index
+        overlay = self.recorder = None
+        if isinstance(shape_index, RoutingSession):
+            overlay = shape_index.overlay
+            self.recorder = shape_index.recorder
+        # Cell receiving the geometry; ports always go to `c`.
+        self.target = c if overlay is None else overlay
+        self._dbu = c.kcl.dbu
+        self._pending: dict[tuple[int, int], list[kdb.Polygon]] = defaultdict(list)
+        # Index in c.ports of the first port without a drawn marker.
+        self._first_port: int | None = None
+
+    def box(
+        self,
+        layer: tuple[int, int],
+        left: float,
+        bottom: float,
+        right: float,
+        top: float,
+    ) -> None:
+        """Draw a box given by its corners in um."""
+        if self.recorder is not None:
+            self.recorder.box(layer, left, bottom, right, top)
+        if not self.emit_shapes:
+            rect = self.target.add_ref(
+                gf.components.rectangle(size=(right - left, top - bottom), layer=layer)
+            )
+            rect.dmove((left, bottom))
+            return
+        dbox = kdb.DBox(left, bottom, right, top)
+        self.target.shapes(self.c.kcl.layer(*layer)).insert(dbox)
+        if self.shape_index is not None:
+            self._pending[tuple(layer)].append(kdb.Polygon(dbox.to_itype(self._dbu)))
+
+    def rect(
+        self,
+        center: tuple[float, float],
+        size: tuple[float, float],
+        layer: tuple[int, int],
+    ) -> None:
+        """Draw a rectangle of `size` centered on `center` (um)."""
+        x, y = center
+        w, h = size
+        self.box(layer, x - w / 2, y - h / 2, x + w / 2, y + h / 2)
+
+    def segment(
+        self,
+        p0: tuple[float, float],
+        p1: tuple[float, float],
+        width: float,
+        layer: tuple[int, int],
+    ) -> tuple[tuple[float, float], bool] | None:
+        """Draw an axis-parallel wire of `width` from `p0` to `p1` (um).
+
+        Returns:
+            Center of the wire and whether it is horizontal, or None if the
+            segment is too short to draw.
+        """
+        if abs(p1[1] - p0[1]) < _MIN_LENGTH:
+            x_min, x_max = sorted((p0[0], p1[0]))
+            if x_max - x_min < _MIN_LENGTH:
+                return None
+            y = p0[1]
+            self.box(layer, x_min, y - width / 2, x_max, y + width / 2)
+            return ((x_min + x_max) / 2, y), True
+        y_min, y_max = sorted((p0[1], p1[1]))
+        if y_max - y_min < _MIN_LENGTH:
+            return None
+        x = p0[0]
+        self.box(layer, x - width / 2, y_min, x + width / 2, y_max)
+        return (x, (y_min + y_max) / 2), False
+
+    def via(self, component: Component, center: tuple[float, float]) -> None:
+        """Add a reference to a via cell centered on `center` (um)."""
+        if self.recorder is not None:
+            self.recorder.via(component, center)
+        via = self.target.add_ref(component)
+        via.dcenter = center
+
+    def port(self, **kwargs) -> Port:
+        """Add a port to `c` (see ``Component.add_port``), marker drawn on flush."""
+        if self.recorder is not None:
+            self.recorder.port(kwargs)
+        if self._first_port is None:
+            self._first_port = len(self.c.ports.bases)
+        return self.c.add_port(**kwargs)
+
+    def flush(self) -> None:
+        """Draw pending port markers and pass new shapes to the shape index."""
+        if self._first_port is not None:
+            if self.target is self.c:
+                _draw_port_markers(self.c, self._first_port)
+            self._first_port = None
+        if self.shape_index is not None:
+            for layer, polygons in self._pending.items():
+                self.shape_index.add_shapes(layer, polygons)
+        self._pending.clear()
+
+
+def _draw_port_markers(c: Component, first: int) -> None:
+    """Draw the markers of the ports of `c` from index `first` on.
+
+    ``draw_ports`` draws every port of the cell, so the earlier ports are
+    set aside while it runs.
+    """
+    bases = c.ports.bases
+    earlier = bases[:first]
+    del bases[:first]
+    try:
+        c.draw_ports()
+    finally:
+        bases[:0] = earlier
+
+
+class RouteTransaction:
+    """Route output of one attempt, kept in an overlay cell of `c`.
+
+    Opening a transaction places an empty overlay cell in `c` and points the
+    session at it. Routers given the session then draw wires, patches and
+    vias into the overlay, while segment ports are still added to `c`.
+    ``rollback`` empties the overlay and drops the ports added since the
+    transaction opened; the rest of `c` is not touched. ``commit`` flattens
+    the overlay into `c` once and draws the markers of the new ports.
+    ``abort`` rolls back and closes the transaction. Both delete the overlay
+    cell from the layout.
+
+    Args:
+        c: Component being routed.
+        session: RoutingSession of `c` passed to the routers.
+    """
+
+    def __init__(self, c: Component, session: RoutingSession) -> None:
+        if session.overlay is not None:
+            raise RuntimeError("The session already has an open transaction")
+        self.c = c
+        self.session = session
+        self.overlay = gf.Component()
+        self._ref = c.add_ref(self.overlay)
+        self._port_count = len(c.ports.bases)
+        session.overlay = self.overlay
+
+    @property
+    def is_open(self) -> bool:
+        return self.session.overlay is self.overlay
+
+    def _clear_overlay(self) -> None:
+        self.c.kcl.layout.cell(self.overlay.cell_index()).clear()
+
+    def rollback(self) -> None:
+        """Drop the geometry and ports routed since the transaction opened."""
+        if not self.is_open:
+            raise RuntimeError("The transaction is closed")
+        self._clear_overlay()
+        del self.c.ports.bases[self._port_count :]
+        self.session.reset()
+
+    def abort(self) -> None:
+        """Roll back, remove the overlay from `c` and close the transaction."""
+        self.rollback()
+        self._ref.instance.delete()
+        self._close()
+
+    def commit(self) -> None:
+        """Merge the overlay into `c` and close the transaction."""
+        if not self.is_open:
+            raise RuntimeError("The transaction is closed")
+        # One level: wires become shapes of `c`, vias stay via cell references.
+        self._ref.instance.flatten(1)
+        self._close()
+        _draw_port_markers(self.c, self._port_count)
+
+    def _close(self) -> None:
+        # The overlay is no longer referenced; drop it from the layout.
+        self.c.kcl.delete_cell(self.overlay)
+        self.session.overlay = None
@@ -0,0 +1,272 @@
+"""Journal of routed nets, replayed without search while nothing changed.
+
+The journal keeps per net a fingerprint of its endpoints and route settings,
+the drawn geometry (wire and patch boxes with layers, via cells and centers,
+segment ports) and a digest of the obstacles near that geometry. Routing a
+net again with the journal first checks the fingerprint and the obstacle
+digest against the current cell; if both match, the geometry is drawn again
+as recorded and the search is skipped. Nets whose endpoints or nearby
+obstacles changed are routed as usual and their entries replaced::
+
+    journal = RouteJournal()
+    route_nets_deterministic(c, nets, journal=journal)
+    journal.save("routes.json")
+
+    # After an edit elsewhere in the layout:
+    journal = RouteJournal.load("routes.json")
+    route_nets_deterministic(c, nets, journal=journal)
+    journal.replays, journal.reroutes
+
+Obstacles are the polygons of the routing layers (and avoided layers) that
+existed before the net was drawn and overlap the bounding box of its
+geometry grown by ``margin``.
+"""
+
+import json
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any
+
+from gdsfactory.component import Component
+from gdsfactory.typings import Port
+
+from sky130.pcells.vias import via_m1_m2, via_stack, via_transition
+from sky130.route_cache import RouteCache
+from sky130.route_geometry import RouteGeometryWriter
+from sky130.routing_session import RoutingSession
+
+Layer = tuple[int, int]
+
+# Via cells the journal can build again, by gf.cell function name.
+_VIA_CELLS = {
+    "via_m1_m2": via_m1_m2,
+    "via_stack": via_stack,
+    "via_transition": via_transition,
+}
+
+
+def _as_tuples(value: Any) -> Any:
+    """JSON lists back to the tuples cell functions were called with."""
+    if isinstance(value, list):
+        return tuple(_as_tuples(v) for v in value)
+    if isinstance(value, dict):
+        return {k: _as_tuples(v) for k, v in value.items()}
+    return value
+
+
+def _as_json(value: Any) -> Any:
+    if isinstance(value, tuple | list):
+        return [_as_json(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _as_json(v) for k, v in value.items()}
+    if hasattr(value, "item"):
+        return value.item()
+    return value
+
+
+class RouteRecorder:
+    """Geometry drawn for one net, as stored in the journal.
+
+    RouteGeometryWriter reports to the recorder of its RoutingSession.
+
+    Attributes:
+        boxes: [layer, left, bottom, right, top] per box (um).
+        vias: [cell function name, settings, x, y] per via (um).
+        ports: Keyword arguments of each ``add_port`` call.
+        replayable: False once a via cell without a known function was drawn.
+    """
+
+    def __init__(self) -> None:
+        self.boxes: list[list] = []
+        self.vias: list[list] = []
+        self.ports: list[dict[str, Any]] = []
+        self.replayable = True
+
+    def box(
+        self, layer: Layer, left: float, bottom: float, right: float, top: float
+    ) -> None:
+        coords = (left, bottom, right, top)
+        self.boxes.append([list(layer), *(float(v) for v in coords)])
+
+    def via(self, component: Component, center: tuple[float, float]) -> None:
+        name = getattr(component, "function_name", None)
+        if name not in _VIA_CELLS:
+            self.replayable = False
+            return
+        settings = _as_json(component.settings.model_dump())
+        self.vias.append([name, settings, float(center[0]), float(center[1])])
+
+    def port(self, kwargs: dict[str, Any]) -> None:
+        self.ports.append(_as_json(kwargs))
+
+    def bbox(self) -> tuple[float, float, float, float] | None:
+        """Bounding box of boxes and via centers (um), None if nothing was drawn."""
+        xs = [v for box in self.boxes for v in (box[1], box[3])]
+        ys = [v for box in self.boxes for v in (box[2], box[4])]
+        xs.extend(via[2] for via in self.vias)
+        ys.extend(via[3] for via in self.vias)
+        if not xs:
+            return None
+        return min(xs), min(ys), max(xs), max(ys)
+
+
+def _obstacle_digest(
+    session: RoutingSession,
+    layers: Sequence[Layer],
+    window: tuple[int, int, int, int],
+    counts: dict[Layer, int] | None = None,
+) -> str:
+    """Digest of the polygons of `layers` overlapping `window` (DBU).
+
+    With `counts`, only the first ``counts[layer]`` polygons of each layer
+    (those that existed before the net was drawn) are included.
+    """
+    parts = []
+    for layer in layers:
+        shapes = session.layer(layer)
+        limit = len(shapes) if counts is None else counts[layer]
+        polygons = sorted(
+            shapes.polygons[idx].to_s()
+            for idx in shapes.index.query(window, strict=False)
+            if idx < limit
+        )
+        parts.append([list(layer), polygons])
+    return RouteCache.make_key(parts)
+
+
+class RouteJournal:
+    """Routed geometry per net, for replay while nothing near it changed.
+
+    Args:
+        margin: Distance in um around a net's geometry within which obstacle
+            changes cause the net to be routed again.
+    """
+
+    def __init__(self, margin: float = 2.0) -> None:
+        self.margin = margin
+        self.entries: dict[str, dict[str, Any]] = {}
+        self.replays = 0
+        self.reroutes = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.entries
+
+    def _window(self, bbox: Sequence[float], dbu: float) -> list[int]:
+        left, bottom, right, top = bbox
+        return [
+            int((left - self.margin) / dbu),
+            int((bottom - self.margin) / dbu),
+            int((right + self.margin) / dbu) + 1,
+            int((top + self.margin) / dbu) + 1,
+        ]
+
+    def replay(
+        self,
+        key: str,
+        fingerprint: str,
+        c: Component,
+        session: RoutingSession,
+        layers: Sequence[Layer],
+        emit_shapes: bool = True,
+    ) -> tuple[list[Port], list[list]] | None:
+        """Draw the journaled geometry of `key` if it is still valid.
+
+        Args:
+            key: Net key.
+            fingerprint: Fingerprint of the endpoints and route settings.
+            c: Component to draw into.
+            session: RoutingSession of `c`.
+            layers: Obstacle layers.
+            emit_shapes: See RouteGeometryWriter.
+
+        Returns:
+            Added ports and the recorded polylines, or None if the entry is
+            missing or stale.
+        """
+        entry = self.entries.get(key)
+        if entry is None or entry["fingerprint"] != fingerprint:
+            return None
+        session.sync()
+        window = tuple(entry["window"])
+        if _obstacle_digest(session, layers, window) != entry["obstacles"]:
+            return None
+        writer = RouteGeometryWriter(c, emit_shapes, session)
+        for layer, left, bottom, right, top in entry["boxes"]:
+            writer.box(tuple(layer), left, bottom, right, top)
+        for name, settings, x, y in entry["vias"]:
+            writer.via(_VIA_CELLS[name](**_as_tuples(settings)), (x, y))
+        ports = [writer.port(**_as_tuples(kwargs)) for kwargs in entry["ports"]]
+        writer.flush()
+        self.replays += 1
+        polylines = [
+            [(x, y, tuple(layer)) for x, y, layer in polyline]
+            for polyline in entry["polylines"]
+        ]
+        return ports, polylines
+
+    def start(self, session: RoutingSession, layers: Sequence[Layer]) -> dict:
+        """Begin recording the geometry routed next in `session`.
+
+        Returns:
+            Recording state to pass to ``finish``.
+        """
+        session.sync()
+        counts = {tuple(layer): len(session.layer(layer)) for layer in layers}
+        recorder = RouteRecorder()
+        session.recorder = recorder
+        return dict(recorder=recorder, counts=counts)
+
+    def finish(
+        self,
+        key: str,
+        fingerprint: str,
+        session: RoutingSession,
+        recording: dict,
+        polylines: Sequence[Sequence[tuple[float, float, Layer]]] | None,
+    ) -> None:
+        """Stop recording and store the entry of `key`.
+
+        Args:
+            polylines: Polylines of the route, or None if routing failed, in
+                which case any earlier entry of `key` is dropped.
+        """
+        recorder: RouteRecorder = recording["recorder"]
+        if session.recorder is recorder:
+            session.recorder = None
+        self.reroutes += 1
+        bbox = recorder.bbox()
+        if not polylines or not recorder.replayable or bbox is None:
+            self.entries.pop(key, None)
+            return
+        counts = recording["counts"]
+        window = self._window(bbox, session.kc.kcl.dbu)
+        self.entries[key] = dict(
+            fingerprint=fingerprint,
+            window=window,
+            obstacles=_obstacle_digest(session, list(counts), tuple(window), counts),
+            boxes=recorder.boxes,
+            vias=recorder.vias,
+            ports=recorder.ports,
+            polylines=[
+                [[float(x), float(y), list(layer)] for x, y, layer in polyline]
+                for polyline in polylines
+            ],
+        )
+
+    def clear(self) -> None:
+        self.entries.clear()
+
+    def save(self, path: str | Path) -> None:
+        """Write the entries to a JSON file."""
+        Path(path).write_text(json.dumps(dict(margin=self.margin, nets=self.entries)))
+
+    @classmethod
+    def load(cls, path: str | Path) -> "RouteJournal":
+        """Read a journal written by ``save``."""
+        data = json.loads(Path(path).read_text())
+        journal = cls(margin=data["margin"])
+        journal.entries = data["nets"]
+        return journal
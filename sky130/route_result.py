@@ -0,0 +1,157 @@
+"""Structured result shared by the sky130 routers.
+
+Every router can return a RouteResult (``return_result=True``) carrying the
+drawn corner polylines, via count, per-layer wirelength, search statistics,
+per-phase wall time and the failure reason, so routing runs can be profiled
+and compared without parsing log output.
+"""
+
+import time
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any
+
+from sky130.routing_trace import span
+
+Layer = tuple[int, int]
+PolylinePoint = tuple[float, float, Layer]
+
+
+@dataclass
+class RouteResult:
+    """Outcome of a routing call.
+
+    Attributes:
+        router: Name of the router that was called.
+        success: True if geometry was drawn for every requested connection.
+        failure_reason: Short description of why routing failed, if it did.
+        ports: Ports added by the router (segment ports, route ports).
+        polylines: Drawn centerlines as (x_um, y_um, layer) points. Two
+            consecutive points at the same location on different layers
+            denote a via.
+        via_count: Number of layer transitions.
+        wirelength_by_layer: Centerline length in um per layer.
+        grid_shape: Search grid dimensions of the final search.
+        nodes_expanded: Nodes expanded by the search, if the engine reports it.
+        clearance: Obstruction clearance step (um) that produced the route.
+        fallback: Router that produced the geometry when it differs from
+            ``router`` (e.g. "hierarchical").
+        fallback_reason: Why the fallback was taken.
+        timings: Wall time in seconds per phase.
+        attempts: Number of attempts (net orders, clearance steps) evaluated.
+        attempt_reports: Per-attempt summaries of multi-net routers (index,
+            net order, success, failure reason, wall time).
+        nets: Per-net results for multi-net routers.
+        replayed: True if the geometry was drawn from a RouteJournal entry
+            instead of being searched.
+    """
+
+    router: str
+    success: bool = False
+    failure_reason: str | None = None
+    ports: list[Any] = field(default_factory=list)
+    polylines: list[list[PolylinePoint]] = field(default_factory=list)
+    via_count: int = 0
+    wirelength_by_layer: dict[Layer, float] = field(default_factory=dict)
+    grid_shape: tuple[int, ...] | None = None
+    nodes_expanded: int | None = None
+    clearance: float | None = None
+    fallback: str | None = None
+    fallback_reason: str | None = None
+    timings: dict[str, float] = field(default_factory=dict)
+    attempts: int = 0
+    attempt_reports: list[dict[str, Any]] = field(default_factory=list)
+    nets: dict[str, "RouteResult"] = field(default_factory=dict)
+    replayed: bool = False
+
+    def __bool__(self) -> bool:
+        return self.success
+
+    @property
+    def wirelength(self) -> float:
+        """Total centerline length in um."""
+        return sum(self.wirelength_by_layer.values())
+
+    @contextmanager
+    def timed(self, phase: str) -> Iterator[None]:
+        """Accumulate the wall time of the enclosed block under ``phase``.
+
+        The block is also recorded as a trace span when tracing is enabled.
+        """
+        t0 = time.perf_counter()
+        try:
+            with span(phase, router=self.router):
+                yield
+        finally:
+            self.timings[phase] = (
+                self.timings.get(phase, 0.0) + time.perf_counter() - t0
+            )
+
+    def fail(self, reason: str) -> list[Any]:
+        """Record a failure and return an empty port list for the caller."""
+        self.success = False
+        self.failure_reason = reason
+        return []
+
+    def add_polyline(self, points: Sequence[PolylinePoint]) -> None:
+        """Record a drawn centerline and update via count and wirelength."""
+        points = [(float(x), float(y), layer) for x, y, layer in points]
+        self.polylines.append(points)
+        for (x0, y0, l0), (x1, y1, l1) in zip(points, points[1:]):
+            if l0 != l1:
+                self.via_count += 1
+                continue
+            length = abs(x1 - x0) + abs(y1 - y0)
+            self.wirelength_by_layer[l0] = (
+                self.wirelength_by_layer.get(l0, 0.0) + length
+            )
+
+    def merge(self, other: "RouteResult") -> None:
+        """Fold another result's geometry and timings into this one."""
+        self.ports.extend(other.ports)
+        self.polylines.extend(other.polylines)
+        self.via_count += other.via_count
+        for layer, length in other.wirelength_by_layer.items():
+            self.wirelength_by_layer[layer] = (
+                self.wirelength_by_layer.get(layer, 0.0) + length
+            )
+        for phase, seconds in other.timings.items():
+            self.timings[phase] = self.timings.get(phase, 0.0) + seconds
+        if other.nodes_expanded is not None:
+            self.nodes_expanded = (self.nodes_expanded or 0) + other.nodes_expanded
+
+    def to_dict(self) -> dict[str, Any]:
+        """JSON-friendly summary (ports by name, layers as "layer/datatype")."""
+
+        def layer_name(layer: Layer) -> str:
+            if isinstance(layer, tuple):
+                return f"{layer[0]}/{layer[1]}"
+            return str(layer)
+
+        return dict(
+            router=self.router,
+            success=self.success,
+            failure_reason=self.failure_reason,
+            ports=[getattr(p, "name", None) for p in self.ports],
+            polylines=[
+                [(x, y, layer_name(layer)) for x, y, layer in polyline]
+                for polyline in self.polylines
+            ],
+            via_count=self.via_count,
+            wirelength_by_layer={
+                layer_name(layer): length
+                for layer, length in self.wirelength_by_layer.items()
+            },
+            wirelength=self.wirelength,
+            grid_shape=list(self.grid_shape) if self.grid_shape else None,
+            nodes_expanded=self.nodes_expanded,
+            clearance=self.clearance,
+            fallback=self.fallback,
+            fallback_reason=self.fallback_reason,
+            timings=dict(self.timings),
+            attempts=self.attempts,
+            attempt_reports=[dict(report) for report in self.attempt_reports],
+            nets={name: net.to_dict() for name, net in self.nets.items()},
+            replayed=self.replayed,
+        )
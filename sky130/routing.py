@@ -1,11 +1,13 @@
 """Routing functions with obstacle avoidance for sky130 PDK."""
 
+import math
+import time
+import warnings
 from collections.abc import Sequence
 from typing import Any
 
 import gdsfactory as gf
 import klayout.dbcore as kdb
-import networkx as nx
 import numpy as np
 from gdsfactory.component import Component
 from gdsfactory.routing.route_astar import _generate_grid
@@ -16,6 +18,31 @@ from gdsfactory.typings import (
     Port,
 )
 
+from sky130.channel_route import ChannelPin, assign_tracks
+from sky130.grid_search import (
+    SEARCH_STRATEGIES,
+    compress_path,
+    expand_path,
+    search_grid,
+)
+from sky130.pcells.vias import via_transition
+from sky130.route_cache import RouteCache, array_digest, resolve_route_cache
+from sky130.route_result import RouteResult
+
+
+class RouteWarning(UserWarning):
+    """Warning issued when ``route_astar`` cannot route a port pair.
+
+    Attributes:
+        route_idx: Index of the port pair in the request.
+        reason: Short machine-readable reason, e.g. "no_path".
+    """
+
+    def __init__(self, message: str, route_idx: int, reason: str) -> None:
+        super().__init__(message)
+        self.route_idx = route_idx
+        self.reason = reason
+
 
 class Route:
     """Container for route results."""
@@ -26,11 +53,24 @@ class Route:
         length: float,
         length_effective: float,
         ports: list[Port],
+        nodes_expanded: list[int] | None = None,
+        search_strategy: str = "astar",
+        warnings: list[RouteWarning] | None = None,
+        result: RouteResult | None = None,
     ):
         self.references = references
         self.length = length
         self.length_effective = length_effective
         self.ports = ports
+        self.nodes_expanded = nodes_expanded or []
+        self.search_strategy = search_strategy
+        self.warnings = warnings or []
+        self.result = result
+
+    @property
+    def total_nodes_expanded(self) -> int:
+        """Grid nodes expanded by the search over all routed port pairs."""
+        return sum(self.nodes_expanded)
 
 
 def _mark_layer_obstacles(
@@ -266,6 +306,347 @@ def _simplify_manhattan_path(
     return final
 
 
+def _grid_path_to_points(
+    path: list[tuple[int, int]],
+    x_vals: np.ndarray,
+    y_vals: np.ndarray,
+    p1: Port,
+    p2: Port,
+    width: float,
+    min_segment_length: float,
+) -> list[kdb.Point]:
+    """Turn a grid cell path into Manhattan DBU waypoints anchored at the ports.
+
+    Args:
+        path: Grid cells (i, j) from the search.
+        x_vals: X coordinate array in um.
+        y_vals: Y coordinate array in um.
+        p1: Source port.
+        p2: Destination port.
+        width: Route width in um.
+        min_segment_length: Minimum segment length kept by path simplification.
+
+    Returns:
+        Waypoints in DBU, starting at p1 and ending at p2.
+    """
+    port1x = p1.dx
+    port1y = p1.dy
+    port2x = p2.dx
+    port2y = p2.dy
+
+    # Convert path to waypoints (in um) - only keep turning points
+    raw_path = [[x_vals[i], y_vals[j]] for i, j in path]
+
+    # Extract only the turning points from the path
+    if len(raw_path) <= 2:
+        waypoints_grid = raw_path
+    else:
+        waypoints_grid = [raw_path[0]]
+        for i in range(1, len(raw_path) - 1):
+            prev = raw_path[i - 1]
+            curr = raw_path[i]
+            next_pt = raw_path[i + 1]
+
+            # Check if this is a turning point (direction change)
+            dx1 = curr[0] - prev[0]
+            dy1 = curr[1] - prev[1]
+            dx2 = next_pt[0] - curr[0]
+            dy2 = next_pt[1] - curr[1]
+
+            # Direction changes when one axis switches from moving to static or vice versa
+            is_turn = (np.isclose(dx1, 0) != np.isclose(dx2, 0)) or (
+                np.isclose(dy1, 0) != np.isclose(dy2, 0)
+            )
+
+            if is_turn:
+                waypoints_grid.append(curr)
+
+        waypoints_grid.append(raw_path[-1])
+
+    # Ensure minimum standoff from ports - INSERT new waypoints if needed
+    # This is critical because grid paths often don't align with port orientations
+    min_standoff_um = max(1.5, width * 2)  # At least 1.5um or 2x wire width
+
+    # Get port orientations
+    angle1 = p1.orientation if p1.orientation is not None else 0
+    angle2 = p2.orientation if p2.orientation is not None else 0
+
+    # Port facing direction vectors
+    # 0° = facing right (+x), 90° = facing up (+y), 180° = left, 270° = down
+    def port_facing_direction(angle):
+        rad = math.radians(angle)
+        dx = math.cos(rad)
+        dy = math.sin(rad)
+        # Snap to cardinal direction
+        if abs(dx) > abs(dy):
+            return (1 if dx > 0 else -1, 0)
+        else:
+            return (0, 1 if dy > 0 else -1)
+
+    dir1 = port_facing_direction(angle1)
+    dir2 = port_facing_direction(angle2)
+
+    # Create standoff point for port1 - always insert at start
+    standoff1_x = port1x + dir1[0] * min_standoff_um
+    standoff1_y = port1y + dir1[1] * min_standoff_um
+
+    # Create standoff point for port2 - always insert at end
+    standoff2_x = port2x + dir2[0] * min_standoff_um
+    standoff2_y = port2y + dir2[1] * min_standoff_um
+
+    # Build new waypoints list with standoffs
+    # Structure: port1 -> standoff1 -> grid path -> standoff2 -> port2
+    new_waypoints_grid = [[standoff1_x, standoff1_y]]
+
+    # Check if we can skip grid waypoints and use a direct route
+    # This is the case when there are no obstacles to avoid
+    # Direct route is possible if standoff1 and standoff2 can be connected simply
+
+    # Only use direct route if standoff points are far enough apart
+    standoff_dist = abs(standoff1_x - standoff2_x) + abs(standoff1_y - standoff2_y)
+    if standoff_dist > 2 * min_standoff_um:
+        # Check if grid path has any significant waypoints (turns around obstacles)
+        # If all grid waypoints are near the standoff points, we can use direct route
+        significant_waypoints = []
+        for wp in waypoints_grid:
+            dist1 = max(abs(wp[0] - standoff1_x), abs(wp[1] - standoff1_y))
+            dist2 = max(abs(wp[0] - standoff2_x), abs(wp[1] - standoff2_y))
+            # Keep waypoints that are far from both standoffs
+            if dist1 >= min_standoff_um * 2 and dist2 >= min_standoff_um * 2:
+                significant_waypoints.append(wp)
+
+        if len(significant_waypoints) > 0:
+            # There are obstacles - use grid path
+            for wp in significant_waypoints:
+                new_waypoints_grid.append(wp)
+
+    # Add standoff2 at end
+    new_waypoints_grid.append([standoff2_x, standoff2_y])
+
+    waypoints_grid = new_waypoints_grid
+
+    # Now build final waypoints: port1 -> path -> port2
+    # with proper Manhattan connections
+    final_waypoints = [[port1x, port1y]]
+
+    for wp in waypoints_grid:
+        last = final_waypoints[-1]
+
+        # Skip if same position
+        if np.isclose(last[0], wp[0]) and np.isclose(last[1], wp[1]):
+            continue
+
+        # Ensure Manhattan: add intermediate if diagonal
+        if not np.isclose(last[0], wp[0]) and not np.isclose(last[1], wp[1]):
+            # Check port orientation for first segment
+            if len(final_waypoints) == 1:
+                # First segment - respect port1 orientation
+                angle1 = p1.orientation if p1.orientation is not None else 0
+                if abs(angle1 - 90) < 45 or abs(angle1 - 270) < 45:
+                    # Port faces vertical - go vertical first
+                    final_waypoints.append([last[0], wp[1]])
+                else:
+                    # Port faces horizontal - go horizontal first
+                    final_waypoints.append([wp[0], last[1]])
+            else:
+                # Default: horizontal then vertical
+                final_waypoints.append([wp[0], last[1]])
+
+        final_waypoints.append(wp)
+
+    # Add port2 with proper connection
+    last = final_waypoints[-1]
+    if not (np.isclose(last[0], port2x) and np.isclose(last[1], port2y)):
+        if not np.isclose(last[0], port2x) and not np.isclose(last[1], port2y):
+            # Need intermediate - use port2 orientation
+            angle2 = p2.orientation if p2.orientation is not None else 0
+            if abs(angle2 - 90) < 45 or abs(angle2 - 270) < 45:
+                # Port faces vertical - arrive vertically
+                final_waypoints.append([port2x, last[1]])
+            else:
+                # Port faces horizontal - arrive horizontally
+                final_waypoints.append([last[0], port2y])
+        final_waypoints.append([port2x, port2y])
+
+    # Apply final simplification
+    cleaned_waypoints = _simplify_manhattan_path(final_waypoints, min_segment_length)
+
+    # Additional cleanup: ensure minimum distance from ports for proper bend placement
+    # Remove points that are too close to start/end ports but maintain Manhattan routing
+    min_standoff = max(2.0, width * 3)  # 2um minimum standoff
+
+    if len(cleaned_waypoints) > 3:
+        # Check first waypoint after start - but keep Manhattan structure
+        wp = cleaned_waypoints[1]
+        dx = abs(wp[0] - port1x)
+        dy = abs(wp[1] - port1y)
+        dist = max(dx, dy)
+        if dist < min_standoff and len(cleaned_waypoints) > 3:
+            # Replace with a point that maintains Manhattan routing
+            wp_next = cleaned_waypoints[2]
+            if np.isclose(wp[0], wp_next[0]):
+                # Vertical segment follows - keep x, move closer to next y
+                cleaned_waypoints[1] = [wp[0], port1y]
+            elif np.isclose(wp[1], wp_next[1]):
+                # Horizontal segment follows - keep y, move closer to next x
+                cleaned_waypoints[1] = [port1x, wp[1]]
+
+        # Check last waypoint before end
+        wp = cleaned_waypoints[-2]
+        dx = abs(wp[0] - port2x)
+        dy = abs(wp[1] - port2y)
+        dist = max(dx, dy)
+        if dist < min_standoff and len(cleaned_waypoints) > 3:
+            wp_prev = cleaned_waypoints[-3]
+            if np.isclose(wp[0], wp_prev[0]):
+                # Vertical segment precedes
+                cleaned_waypoints[-2] = [wp[0], port2y]
+            elif np.isclose(wp[1], wp_prev[1]):
+                # Horizontal segment precedes
+                cleaned_waypoints[-2] = [port2x, wp[1]]
+
+    # Ensure we have at least a valid 2-point path
+    if len(cleaned_waypoints) < 2:
+        cleaned_waypoints = [[port1x, port1y], [port2x, port2y]]
+
+    # Final Manhattan validation - ensure all segments are orthogonal
+    valid_waypoints = [cleaned_waypoints[0]]
+    for i in range(1, len(cleaned_waypoints)):
+        prev = valid_waypoints[-1]
+        curr = cleaned_waypoints[i]
+
+        if not np.isclose(prev[0], curr[0]) and not np.isclose(prev[1], curr[1]):
+            # Diagonal - insert intermediate
+            valid_waypoints.append([curr[0], prev[1]])
+
+        valid_waypoints.append(curr)
+
+    cleaned_waypoints = valid_waypoints
+
+    # For very close ports, just use direct connection
+    port_dist = abs(port1x - port2x) + abs(port1y - port2y)
+    if port_dist < min_standoff:
+        # Just connect directly - let route_single handle it
+        if np.isclose(port1x, port2x) or np.isclose(port1y, port2y):
+            # Already Manhattan
+            cleaned_waypoints = [[port1x, port1y], [port2x, port2y]]
+        else:
+            # Need intermediate
+            cleaned_waypoints = [
+                [port1x, port1y],
+                [port2x, port1y],
+                [port2x, port2y],
+            ]
+
+    # Convert to DBU points
+    final_points_dbu = [
+        kdb.Point(int(round(pt[0] * 1000)), int(round(pt[1] * 1000)))
+        for pt in cleaned_waypoints
+    ]
+
+    # Remove duplicate DBU points
+    final_points = [final_points_dbu[0]]
+    for pt in final_points_dbu[1:]:
+        if pt != final_points[-1]:
+            final_points.append(pt)
+
+    # Aggressive short segment removal - route_single fails with segments under ~500nm
+    min_segment_dbu = 1000  # 1um minimum segment length in DBU (nm)
+
+    def is_manhattan(p1, p2):
+        return p1.x == p2.x or p1.y == p2.y
+
+    # Remove short segments - only if result is still Manhattan
+    # Single pass to avoid infinite loop
+    i = 1
+    while i < len(final_points) - 1 and len(final_points) > 2:
+        prev_pt = final_points[i - 1]
+        curr_pt = final_points[i]
+        next_pt = final_points[i + 1]
+
+        # Calculate segment length from prev to curr
+        seg_len = max(abs(curr_pt.x - prev_pt.x), abs(curr_pt.y - prev_pt.y))
+
+        if seg_len < min_segment_dbu:
+            # Try to remove this point if result is Manhattan
+            if is_manhattan(prev_pt, next_pt):
+                final_points.pop(i)
+                # Don't increment i - check the new point at this index
+                continue
+        i += 1
+
+    # Check last segment - if too short, try to fix
+    if len(final_points) > 2:
+        seg_len = max(
+            abs(final_points[-1].x - final_points[-2].x),
+            abs(final_points[-1].y - final_points[-2].y),
+        )
+        if seg_len < min_segment_dbu:
+            # Try removing second-to-last if result is Manhattan
+            prev_pt = final_points[-3] if len(final_points) > 2 else final_points[0]
+            end_pt = final_points[-1]
+            if is_manhattan(prev_pt, end_pt):
+                final_points.pop(-2)
+
+    # Ensure exact port positions
+    if final_points:
+        final_points[0] = kdb.Point(p1.ix, p1.iy)
+        final_points[-1] = kdb.Point(p2.ix, p2.iy)
+    else:
+        final_points = [kdb.Point(p1.ix, p1.iy), kdb.Point(p2.ix, p2.iy)]
+
+    return final_points
+
+
+def _fill_window(grid: np.ndarray, i: int, j: int, radius: int, value: int) -> None:
+    """Assign value to the square window around (i, j), clipped to the grid."""
+    grid[
+        max(0, i - radius) : i + radius + 1,
+        max(0, j - radius) : j + radius + 1,
+    ] = value
+
+
+def _nearest_free_cell(
+    blocked: np.ndarray, cell: tuple[int, int]
+) -> tuple[int, int] | None:
+    """Closest free cell to `cell` (Euclidean, ties broken by index), or None.
+
+    Grows a square window geometrically until it contains a free cell, then
+    searches the window that covers every cell at that distance.
+    """
+    nx, ny = blocked.shape
+    ci, cj = cell
+    max_radius = max(ci, cj, nx - 1 - ci, ny - 1 - cj)
+
+    def best_in(radius: int) -> tuple[int, tuple[int, int]] | None:
+        i0, j0 = max(0, ci - radius), max(0, cj - radius)
+        ii, jj = np.nonzero(~blocked[i0 : ci + radius + 1, j0 : cj + radius + 1])
+        if ii.size == 0:
+            return None
+        ii = ii + i0
+        jj = jj + j0
+        d2 = (ii - ci) ** 2 + (jj - cj) ** 2
+        k = np.lexsort((jj, ii, d2))[0]
+        return int(d2[k]), (int(ii[k]), int(jj[k]))
+
+    radius = 1
+    while True:
+        found = best_in(radius)
+        if found is not None:
+            # A free cell at squared distance d2 may still be beaten by one
+            # just outside the square window; search the enclosing window.
+            exact = best_in(int(math.isqrt(found[0])) + 1)
+            return exact[1] if exact is not None else found[1]
+        if radius >= max_radius:
+            return None
+        radius = min(radius * 2, max_radius)
+
+
+def _port_cache_key(port: Port) -> list[Any]:
+    """Geometry of a port that affects the routed waypoints."""
+    return [port.ix, port.iy, port.orientation, port.width, str(port.layer)]
+
+
 def route_astar(
     component: Component,
     port1: Port | list[Port],
@@ -277,6 +658,9 @@ def route_astar(
     bend: ComponentSpec = gf.components.bend_euler,
     straight: ComponentSpec = "straight",
     avoid_same_layer: bool = False,
+    search_strategy: str = "astar",
+    bend_cost: float = 2.0,
+    route_cache: RouteCache | bool | None = None,
     **kwargs: Any,
 ) -> Route:
     """Route A* with support for list of ports, sequential avoidance, and port exclusion zones.
@@ -292,11 +676,22 @@ def route_astar(
         bend: Bend component to use.
         straight: Straight component to use.
         avoid_same_layer: If True, automatically avoid existing geometry on the routing layer.
+        search_strategy: Grid search engine, one of "astar", "jps" (jump-point
+            search), "bidirectional" or "bend_penalty" (fewer corners).
+        bend_cost: Extra cost per corner for the "bend_penalty" strategy.
+        route_cache: Cache for search results, off by default. True uses the
+            process-wide default cache (see ``sky130.route_cache``), a
+            RouteCache instance a cache owned by the caller.
         **kwargs: Additional arguments for cross-section.
 
     Returns:
         Route object containing references, length, and ports.
     """
+    if search_strategy not in SEARCH_STRATEGIES:
+        raise ValueError(
+            f"Unknown search_strategy {search_strategy!r}, expected one of {SEARCH_STRATEGIES}"
+        )
+
     # Normalize to lists
     if isinstance(port1, list):
         if not isinstance(port2, list) or len(port1) != len(port2):
@@ -312,6 +707,16 @@ def route_astar(
     length = 0.0
     length_effective = 0.0
     ports = []
+    nodes_expanded = []
+    route_warnings: list[RouteWarning] = []
+    route_result = RouteResult(router="astar")
+    t_start = time.perf_counter()
+
+    def _warn(message: str, route_idx: int, reason: str) -> None:
+        warning = RouteWarning(message, route_idx, reason)
+        route_warnings.append(warning)
+        route_result.failure_reason = message
+        warnings.warn(warning, stacklevel=3)
 
     # Get cross-section to determine routing layer
     cross_section_obj = gf.get_cross_section(cross_section, **kwargs)
@@ -329,9 +734,12 @@ def route_astar(
 
     # Generate initial obstacle grid
     # IMPORTANT: Pass empty list [] instead of None to avoid blocking all device bboxes
-    grid_static, x, y = _generate_grid(
-        component, resolution, all_avoid_layers, distance
-    )
+    with route_result.timed("grid"):
+        grid_static, x, y = _generate_grid(
+            component, resolution, all_avoid_layers, distance
+        )
+    route_result.grid_shape = tuple(grid_static.shape)
+    route_result.clearance = distance
 
     # Dynamic grid for tracking previously routed paths
     grid_dynamic = np.zeros_like(grid_static)
@@ -368,15 +776,29 @@ def route_astar(
     # Minimum segment length for simplification
     min_segment_length = max(resolution * 2, width * 2)
 
+    cache = resolve_route_cache(route_cache)
+    cache_context = (
+        "route_astar",
+        str(routing_layer),
+        width,
+        resolution,
+        distance,
+        search_strategy,
+        bend_cost if search_strategy == "bend_penalty" else None,
+        avoid_same_layer,
+        float(x_vals[0]),
+        float(y_vals[0]),
+    )
+
     for route_idx, (p1, p2) in enumerate(zip(port1, port2)):
         # Create working copy of static grid for this route
         grid_working = grid_static.copy()
 
         # Get port positions in um
-        port1x = p1.x / 1000
-        port1y = p1.y / 1000
-        port2x = p2.x / 1000
-        port2y = p2.y / 1000
+        port1x = p1.dx
+        port1y = p1.dy
+        port2x = p2.dx
+        port2y = p2.dy
 
         # Get port grid indices
         p1_ix = get_index(port1x, x_vals)
@@ -386,352 +808,93 @@ def route_astar(
 
         # Create port exclusion zones - unblock areas around ports
         for px, py in [(p1_ix, p1_iy), (p2_ix, p2_iy)]:
-            for di in range(-port_exclusion_radius, port_exclusion_radius + 1):
-                for dj in range(-port_exclusion_radius, port_exclusion_radius + 1):
-                    ni, nj = px + di, py + dj
-                    if (
-                        0 <= ni < grid_working.shape[0]
-                        and 0 <= nj < grid_working.shape[1]
-                    ):
-                        grid_working[ni, nj] = 0
-
-        # Build navigation graph
-        G = nx.grid_2d_graph(len(x_vals), len(y_vals))
-
-        # Remove obstacle nodes
-        nodes_to_remove = []
-        for i in range(len(x_vals)):
-            for j in range(len(y_vals)):
-                if grid_working[i, j] == 1 or grid_dynamic[i, j] == 1:
-                    nodes_to_remove.append((i, j))
-        G.remove_nodes_from(nodes_to_remove)
-
-        # Get start/end nodes
-        start_node = (p1_ix, p1_iy)
-        end_node = (p2_ix, p2_iy)
-
-        # Verify nodes exist in graph
-        if start_node not in G:
-            valid_nodes = sorted(G.nodes)
-            if not valid_nodes:
-                print(f"WARNING: No valid nodes in graph for route {route_idx}")
-                continue
-            start_node = min(
-                valid_nodes,
-                key=lambda n: (
-                    np.sqrt((n[0] - p1_ix) ** 2 + (n[1] - p1_iy) ** 2),
-                    n[0],
-                    n[1],
-                ),
+            _fill_window(grid_working, px, py, port_exclusion_radius, 0)
+
+        # Obstacle mask for the grid search
+        blocked = (grid_working == 1) | (grid_dynamic == 1)
+
+        cache_key = None
+        cached = None
+        if cache is not None:
+            cache_key = cache.make_key(
+                *cache_context,
+                [_port_cache_key(p) for p in (p1, p2)],
+                array_digest(blocked),
             )
-
-        if end_node not in G:
-            valid_nodes = sorted(G.nodes)
-            if not valid_nodes:
-                print(f"WARNING: No valid nodes in graph for route {route_idx}")
+            cached = cache.get(cache_key)
+
+        if cached is not None:
+            nodes_expanded.append(0)
+            if cached["path"] is None:
+                _warn(
+                    f"No path found for route {route_idx}: {p1.name} -> {p2.name}",
+                    route_idx,
+                    "no_path",
+                )
                 continue
-            end_node = min(
-                valid_nodes,
-                key=lambda n: (
-                    np.sqrt((n[0] - p2_ix) ** 2 + (n[1] - p2_iy) ** 2),
-                    n[0],
-                    n[1],
-                ),
-            )
-
-        # A* heuristic (Manhattan distance)
-        def heuristic(u, v):
-            return abs(u[0] - v[0]) + abs(u[1] - v[1])
-
-        # Find path
-        try:
-            path = nx.astar_path(G, start_node, end_node, heuristic=heuristic)
-        except nx.NetworkXNoPath:
-            print(
-                f"WARNING: No path found for route {route_idx}: {p1.name} -> {p2.name}"
-            )
-            continue
-        except Exception as e:
-            print(f"WARNING: Path finding failed for route {route_idx}: {e}")
-            continue
-
-        # Convert path to waypoints (in um) - only keep turning points
-        raw_path = [[x_vals[i], y_vals[j]] for i, j in path]
-
-        # Extract only the turning points from the path
-        if len(raw_path) <= 2:
-            waypoints_grid = raw_path
+            path = expand_path([tuple(cell) for cell in cached["path"]])
+            final_points = [kdb.Point(x, y) for x, y in cached["points"]]
         else:
-            waypoints_grid = [raw_path[0]]
-            for i in range(1, len(raw_path) - 1):
-                prev = raw_path[i - 1]
-                curr = raw_path[i]
-                next_pt = raw_path[i + 1]
-
-                # Check if this is a turning point (direction change)
-                dx1 = curr[0] - prev[0]
-                dy1 = curr[1] - prev[1]
-                dx2 = next_pt[0] - curr[0]
-                dy2 = next_pt[1] - curr[1]
-
-                # Direction changes when one axis switches from moving to static or vice versa
-                is_turn = (np.isclose(dx1, 0) != np.isclose(dx2, 0)) or (
-                    np.isclose(dy1, 0) != np.isclose(dy2, 0)
+            # Get start/end nodes
+            start_node = (p1_ix, p1_iy)
+            end_node = (p2_ix, p2_iy)
+
+            # Verify nodes are free, otherwise snap to the nearest free cell
+            if blocked[start_node]:
+                start_node = _nearest_free_cell(blocked, start_node)
+            if start_node is not None and blocked[end_node]:
+                end_node = _nearest_free_cell(blocked, end_node)
+            if start_node is None or end_node is None:
+                _warn(
+                    f"No valid nodes in graph for route {route_idx}",
+                    route_idx,
+                    "no_free_cell",
                 )
-
-                if is_turn:
-                    waypoints_grid.append(curr)
-
-            waypoints_grid.append(raw_path[-1])
-
-        # Ensure minimum standoff from ports - INSERT new waypoints if needed
-        # This is critical because grid paths often don't align with port orientations
-        min_standoff_um = max(1.5, width * 2)  # At least 1.5um or 2x wire width
-
-        # Get port orientations
-        angle1 = p1.orientation if p1.orientation is not None else 0
-        angle2 = p2.orientation if p2.orientation is not None else 0
-
-        # Port facing direction vectors
-        # 0° = facing right (+x), 90° = facing up (+y), 180° = left, 270° = down
-        import math
-
-        def port_facing_direction(angle):
-            rad = math.radians(angle)
-            dx = math.cos(rad)
-            dy = math.sin(rad)
-            # Snap to cardinal direction
-            if abs(dx) > abs(dy):
-                return (1 if dx > 0 else -1, 0)
-            else:
-                return (0, 1 if dy > 0 else -1)
-
-        dir1 = port_facing_direction(angle1)
-        dir2 = port_facing_direction(angle2)
-
-        # Create standoff point for port1 - always insert at start
-        standoff1_x = port1x + dir1[0] * min_standoff_um
-        standoff1_y = port1y + dir1[1] * min_standoff_um
-
-        # Create standoff point for port2 - always insert at end
-        standoff2_x = port2x + dir2[0] * min_standoff_um
-        standoff2_y = port2y + dir2[1] * min_standoff_um
-
-        # Build new waypoints list with standoffs
-        # Structure: port1 -> standoff1 -> grid path -> standoff2 -> port2
-        new_waypoints_grid = [[standoff1_x, standoff1_y]]
-
-        # Check if we can skip grid waypoints and use a direct route
-        # This is the case when there are no obstacles to avoid
-        # Direct route is possible if standoff1 and standoff2 can be connected simply
-
-        # Only use direct route if standoff points are far enough apart
-        standoff_dist = abs(standoff1_x - standoff2_x) + abs(standoff1_y - standoff2_y)
-        if standoff_dist > 2 * min_standoff_um:
-            # Check if grid path has any significant waypoints (turns around obstacles)
-            # If all grid waypoints are near the standoff points, we can use direct route
-            significant_waypoints = []
-            for wp in waypoints_grid:
-                dist1 = max(abs(wp[0] - standoff1_x), abs(wp[1] - standoff1_y))
-                dist2 = max(abs(wp[0] - standoff2_x), abs(wp[1] - standoff2_y))
-                # Keep waypoints that are far from both standoffs
-                if dist1 >= min_standoff_um * 2 and dist2 >= min_standoff_um * 2:
-                    significant_waypoints.append(wp)
-
-            if len(significant_waypoints) > 0:
-                # There are obstacles - use grid path
-                for wp in significant_waypoints:
-                    new_waypoints_grid.append(wp)
-
-        # Add standoff2 at end
-        new_waypoints_grid.append([standoff2_x, standoff2_y])
-
-        waypoints_grid = new_waypoints_grid
-
-        # Now build final waypoints: port1 -> path -> port2
-        # with proper Manhattan connections
-        final_waypoints = [[port1x, port1y]]
-
-        for wp in waypoints_grid:
-            last = final_waypoints[-1]
-
-            # Skip if same position
-            if np.isclose(last[0], wp[0]) and np.isclose(last[1], wp[1]):
                 continue
 
-            # Ensure Manhattan: add intermediate if diagonal
-            if not np.isclose(last[0], wp[0]) and not np.isclose(last[1], wp[1]):
-                # Check port orientation for first segment
-                if len(final_waypoints) == 1:
-                    # First segment - respect port1 orientation
-                    angle1 = p1.orientation if p1.orientation is not None else 0
-                    if abs(angle1 - 90) < 45 or abs(angle1 - 270) < 45:
-                        # Port faces vertical - go vertical first
-                        final_waypoints.append([last[0], wp[1]])
-                    else:
-                        # Port faces horizontal - go horizontal first
-                        final_waypoints.append([wp[0], last[1]])
-                else:
-                    # Default: horizontal then vertical
-                    final_waypoints.append([wp[0], last[1]])
-
-            final_waypoints.append(wp)
-
-        # Add port2 with proper connection
-        last = final_waypoints[-1]
-        if not (np.isclose(last[0], port2x) and np.isclose(last[1], port2y)):
-            if not np.isclose(last[0], port2x) and not np.isclose(last[1], port2y):
-                # Need intermediate - use port2 orientation
-                angle2 = p2.orientation if p2.orientation is not None else 0
-                if abs(angle2 - 90) < 45 or abs(angle2 - 270) < 45:
-                    # Port faces vertical - arrive vertically
-                    final_waypoints.append([port2x, last[1]])
-                else:
-                    # Port faces horizontal - arrive horizontally
-                    final_waypoints.append([last[0], port2y])
-            final_waypoints.append([port2x, port2y])
-
-        # Apply final simplification
-        cleaned_waypoints = _simplify_manhattan_path(
-            final_waypoints, min_segment_length
-        )
-
-        # Additional cleanup: ensure minimum distance from ports for proper bend placement
-        # Remove points that are too close to start/end ports but maintain Manhattan routing
-        min_standoff = max(2.0, width * 3)  # 2um minimum standoff
-
-        if len(cleaned_waypoints) > 3:
-            # Check first waypoint after start - but keep Manhattan structure
-            wp = cleaned_waypoints[1]
-            dx = abs(wp[0] - port1x)
-            dy = abs(wp[1] - port1y)
-            dist = max(dx, dy)
-            if dist < min_standoff and len(cleaned_waypoints) > 3:
-                # Replace with a point that maintains Manhattan routing
-                wp_next = cleaned_waypoints[2]
-                if np.isclose(wp[0], wp_next[0]):
-                    # Vertical segment follows - keep x, move closer to next y
-                    cleaned_waypoints[1] = [wp[0], port1y]
-                elif np.isclose(wp[1], wp_next[1]):
-                    # Horizontal segment follows - keep y, move closer to next x
-                    cleaned_waypoints[1] = [port1x, wp[1]]
-
-            # Check last waypoint before end
-            wp = cleaned_waypoints[-2]
-            dx = abs(wp[0] - port2x)
-            dy = abs(wp[1] - port2y)
-            dist = max(dx, dy)
-            if dist < min_standoff and len(cleaned_waypoints) > 3:
-                wp_prev = cleaned_waypoints[-3]
-                if np.isclose(wp[0], wp_prev[0]):
-                    # Vertical segment precedes
-                    cleaned_waypoints[-2] = [wp[0], port2y]
-                elif np.isclose(wp[1], wp_prev[1]):
-                    # Horizontal segment precedes
-                    cleaned_waypoints[-2] = [port2x, wp[1]]
-
-        # Ensure we have at least a valid 2-point path
-        if len(cleaned_waypoints) < 2:
-            cleaned_waypoints = [[port1x, port1y], [port2x, port2y]]
-
-        # Final Manhattan validation - ensure all segments are orthogonal
-        valid_waypoints = [cleaned_waypoints[0]]
-        for i in range(1, len(cleaned_waypoints)):
-            prev = valid_waypoints[-1]
-            curr = cleaned_waypoints[i]
-
-            if not np.isclose(prev[0], curr[0]) and not np.isclose(prev[1], curr[1]):
-                # Diagonal - insert intermediate
-                valid_waypoints.append([curr[0], prev[1]])
-
-            valid_waypoints.append(curr)
-
-        cleaned_waypoints = valid_waypoints
+            # Find path
+            with route_result.timed("search"):
+                result = search_grid(
+                    blocked,
+                    start_node,
+                    end_node,
+                    strategy=search_strategy,
+                    bend_cost=bend_cost,
+                )
+            nodes_expanded.append(result.nodes_expanded)
+            if result.path is None:
+                if cache is not None:
+                    cache.put(cache_key, {"path": None, "points": []})
+                _warn(
+                    f"No path found for route {route_idx}: {p1.name} -> {p2.name}",
+                    route_idx,
+                    "no_path",
+                )
+                continue
+            path = result.path
 
-        # For very close ports, just use direct connection
-        port_dist = abs(port1x - port2x) + abs(port1y - port2y)
-        if port_dist < min_standoff:
-            # Just connect directly - let route_single handle it
-            if np.isclose(port1x, port2x) or np.isclose(port1y, port2y):
-                # Already Manhattan
-                cleaned_waypoints = [[port1x, port1y], [port2x, port2y]]
-            else:
-                # Need intermediate
-                cleaned_waypoints = [
-                    [port1x, port1y],
-                    [port2x, port1y],
-                    [port2x, port2y],
-                ]
-
-        # Convert to DBU points
-        final_points_dbu = [
-            kdb.Point(int(round(pt[0] * 1000)), int(round(pt[1] * 1000)))
-            for pt in cleaned_waypoints
-        ]
-
-        # Remove duplicate DBU points
-        final_points = [final_points_dbu[0]]
-        for pt in final_points_dbu[1:]:
-            if pt != final_points[-1]:
-                final_points.append(pt)
-
-        # Aggressive short segment removal - route_single fails with segments under ~500nm
-        min_segment_dbu = 1000  # 1um minimum segment length in DBU (nm)
-
-        def is_manhattan(p1, p2):
-            return p1.x == p2.x or p1.y == p2.y
-
-        # Remove short segments - only if result is still Manhattan
-        # Single pass to avoid infinite loop
-        i = 1
-        while i < len(final_points) - 1 and len(final_points) > 2:
-            prev_pt = final_points[i - 1]
-            curr_pt = final_points[i]
-            next_pt = final_points[i + 1]
-
-            # Calculate segment length from prev to curr
-            seg_len = max(abs(curr_pt.x - prev_pt.x), abs(curr_pt.y - prev_pt.y))
-
-            if seg_len < min_segment_dbu:
-                # Try to remove this point if result is Manhattan
-                if is_manhattan(prev_pt, next_pt):
-                    final_points.pop(i)
-                    # Don't increment i - check the new point at this index
-                    continue
-            i += 1
-
-        # Check last segment - if too short, try to fix
-        if len(final_points) > 2:
-            seg_len = max(
-                abs(final_points[-1].x - final_points[-2].x),
-                abs(final_points[-1].y - final_points[-2].y),
+            final_points = _grid_path_to_points(
+                path, x_vals, y_vals, p1, p2, width, min_segment_length
             )
-            if seg_len < min_segment_dbu:
-                # Try removing second-to-last if result is Manhattan
-                prev_pt = final_points[-3] if len(final_points) > 2 else final_points[0]
-                end_pt = final_points[-1]
-                if is_manhattan(prev_pt, end_pt):
-                    final_points.pop(-2)
-
-        # Ensure exact port positions
-        if final_points:
-            final_points[0] = kdb.Point(p1.x, p1.y)
-            final_points[-1] = kdb.Point(p2.x, p2.y)
-        else:
-            final_points = [kdb.Point(p1.x, p1.y), kdb.Point(p2.x, p2.y)]
+            if cache is not None:
+                cache.put(
+                    cache_key,
+                    {
+                        "path": [list(cell) for cell in compress_path(path)],
+                        "points": [[pt.x, pt.y] for pt in final_points],
+                    },
+                )
 
         # Mark path nodes as occupied for subsequent routes
         # Use wider buffer for better spacing
+        # Each straight run of the path dilates to one rectangle.
         spacing_radius = max(2, int(np.ceil((width + distance) / resolution)))
-        for i, j in path:
-            for di in range(-spacing_radius, spacing_radius + 1):
-                for dj in range(-spacing_radius, spacing_radius + 1):
-                    ni, nj = i + di, j + dj
-                    if (
-                        0 <= ni < grid_dynamic.shape[0]
-                        and 0 <= nj < grid_dynamic.shape[1]
-                    ):
-                        grid_dynamic[ni, nj] = 1
+        corners = compress_path(path)
+        for (i0, j0), (i1, j1) in zip(corners, corners[1:] or corners):
+            grid_dynamic[
+                max(0, min(i0, i1) - spacing_radius) : max(i0, i1) + spacing_radius + 1,
+                max(0, min(j0, j1) - spacing_radius) : max(j0, j1) + spacing_radius + 1,
+            ] = 1
 
         # Create physical route
         def wire_corner_safe(**kw):
@@ -754,17 +917,34 @@ def route_astar(
         try:
             # Convert kdb.Point to tuples for gdsfactory compatibility (coordinates in nm -> um)
             waypoints_um = [(pt.x / 1000, pt.y / 1000) for pt in final_points]
-
-            r = gf.routing.route_single(
-                component=component,
-                port1=p1,
-                port2=p2,
-                waypoints=waypoints_um,
-                cross_section=cross_section,
-                bend=bend_component,
-                straight=straight,
-                port_type="electrical" if is_electrical else None,
-                **rs_kwargs,
+            # DPoint waypoints are the whole backbone, port centers included;
+            # tuples would get the port centers added a second time.
+            backbone = [kdb.DPoint(x_um, y_um) for x_um, y_um in waypoints_um]
+
+            with route_result.timed("draw"):
+                r = gf.routing.route_single(
+                    component=component,
+                    port1=p1,
+                    port2=p2,
+                    waypoints=backbone,
+                    cross_section=cross_section,
+                    bend=bend_component,
+                    straight=straight,
+                    port_type="electrical" if is_electrical else None,
+                    **rs_kwargs,
+                )
+            if not getattr(r, "instances", True):
+                # route_single draws a backbone it cannot place on the error
+                # layer instead of raising.
+                _warn(
+                    f"route_single could not place route {route_idx} "
+                    f"through {waypoints_um}",
+                    route_idx,
+                    "route_single_failed",
+                )
+                continue
+            route_result.add_polyline(
+                [(x_um, y_um, routing_layer) for x_um, y_um in waypoints_um]
             )
 
             if hasattr(r, "references"):
@@ -778,7 +958,263 @@ def route_astar(
                 ports.extend(r.ports)
 
         except Exception as e:
-            print(f"WARNING: route_single failed for route {route_idx}: {e}")
+            _warn(
+                f"route_single failed for route {route_idx}: {e}",
+                route_idx,
+                "route_single_failed",
+            )
+            continue
+
+    route_result.ports = list(ports)
+    route_result.nodes_expanded = sum(nodes_expanded)
+    route_result.attempts = len(port1)
+    route_result.success = len(route_result.polylines) == len(port1)
+    route_result.timings["total"] = time.perf_counter() - t_start
+
+    return Route(
+        references,
+        length,
+        length_effective,
+        ports,
+        nodes_expanded=nodes_expanded,
+        search_strategy=search_strategy,
+        warnings=route_warnings,
+        result=route_result,
+    )
+
+
+# sky130_fd_sc_hd routing tracks (offset, pitch) in um: met1 runs
+# horizontally, met2 vertically.
+_SC_HD_MET1_TRACKS = (0.17, 0.34)
+_SC_HD_MET2_TRACKS = (0.23, 0.46)
+_MET1 = (68, 20)
+_MET2 = (69, 20)
+
+
+def _channel_sides(ys: Sequence[float]) -> tuple[float, float | None]:
+    """(bottom, top) of the channel: the widest gap between pin rows.
+
+    top is None if all pins are on one row; the channel is then above it.
+    """
+    levels = sorted(set(ys))
+    if len(levels) == 1:
+        return levels[0], None
+    _, k = max((b - a, k) for k, (a, b) in enumerate(zip(levels, levels[1:])))
+    return levels[k], levels[k + 1]
+
+
+def _via_runs(xs: Sequence[float], tol: float = 1e-6) -> list[tuple[float, int, float]]:
+    """Split sorted positions into equally spaced runs (start, count, pitch)."""
+    runs: list[tuple[float, int, float]] = []
+    k = 0
+    while k < len(xs):
+        count, pitch = 1, 0.0
+        if k + 1 < len(xs):
+            pitch = xs[k + 1] - xs[k]
+            count = 2
+            while (
+                k + count < len(xs)
+                and abs(xs[k + count] - xs[k + count - 1] - pitch) < tol
+            ):
+                count += 1
+        runs.append((xs[k], count, pitch))
+        k += count
+    return runs
+
+
+def route_channel(
+    component: Component,
+    port1: Port | list[Port],
+    port2: Port | list[Port],
+    dogleg: bool = True,
+    width: float = 0.14,
+    edge_margin: float = 0.48,
+) -> Route:
+    """Route port pairs through the channel between two standard-cell rows.
+
+    Track router for ``sky130_fd_sc_hd`` rows: pins sit on the met2 track
+    columns (0.46 um pitch, the unithd site width), nets get horizontal met1
+    trunks on the met1 tracks (0.34 um pitch) of the channel and met2
+    branches from their pins, and tracks are assigned with the constrained
+    left-edge algorithm, with doglegs if `dogleg` (see
+    ``sky130.channel_route``). No grid search is involved, so thousands of
+    nets route in seconds. Vias are placed as arrayed references, one per
+    run of equally spaced vias on a track.
+
+    Pairs sharing a port location form one net. The channel lies between the
+    two pin rows with the widest gap; with a single pin row it is placed
+    above that row. All pins must be on the two rows bounding the channel
+    and on the met2 track columns.
+
+    Args:
+        component: Component to route within.
+        port1: Source port(s), on met1 or met2.
+        port2: Destination port(s), on met1 or met2.
+        dogleg: Split nets at their pin columns and break constraint cycles
+            with jogs.
+        width: Wire width in um.
+        edge_margin: Minimum distance in um of the trunks from the pin rows
+            (clears the met1 power rails at the row edges).
+
+    Returns:
+        Route with the via references, the total wire length and a
+        RouteResult in ``result``.
+
+    Raises:
+        ValueError: If pins are not on met1/met2, not on the two channel sides
+            or off the met2 tracks, pins of different nets share a column on
+            one side, or the channel is too narrow.
+    """
+    t_start = time.perf_counter()
+    if isinstance(port1, list):
+        if not isinstance(port2, list) or len(port1) != len(port2):
+            raise ValueError(
+                "If port1 is a list, port2 must be a list of the same length."
+            )
+    else:
+        port1 = [port1]
+        port2 = [port2]
+    route_result = RouteResult(router="channel")
+
+    # Nets: pairs sharing a port location are merged (union-find on pairs).
+    parent = list(range(len(port1)))
+
+    def find(k: int) -> int:
+        while parent[k] != k:
+            parent[k] = parent[parent[k]]
+            k = parent[k]
+        return k
+
+    pins: dict[tuple[float, float], Port] = {}
+    pair_at: dict[tuple[float, float], int] = {}
+    for idx, pair in enumerate(zip(port1, port2)):
+        for port in pair:
+            key = (round(port.x, 3), round(port.y, 3))
+            pins.setdefault(key, port)
+            a, b = find(idx), find(pair_at.setdefault(key, idx))
+            parent[max(a, b)] = min(a, b)
+    net_of = {key: f"net{find(idx)}" for key, idx in pair_at.items()}
+
+    offset_x, pitch_x = _SC_HD_MET2_TRACKS
+    bottom, top = _channel_sides([y for _, y in pins])
+    channel_pins = []
+    pin_layers: dict[tuple[float, float], tuple[int, int]] = {}
+    column_x: dict[int, float] = {}
+    for (x, y), port in pins.items():
+        info = component.kcl.get_info(port.layer)
+        layer = (info.layer, info.datatype)
+        if layer not in (_MET1, _MET2):
+            raise ValueError(
+                f"route_channel connects met1 or met2 pins, port {port.name!r} "
+                f"is on {layer}"
+            )
+        # Branches of pins on other rows would cross the cell rows.
+        if y not in (bottom, top):
+            raise ValueError(
+                f"Port {port.name!r} at y={y} is not on the channel sides "
+                f"y={bottom} and y={top}"
+            )
+        column = int(round((x - offset_x) / pitch_x))
+        if abs(offset_x + column * pitch_x - x) > 5e-4:
+            raise ValueError(
+                f"Port {port.name!r} at x={x} is not on a met2 track "
+                f"({offset_x} + k * {pitch_x} um)"
+            )
+        pin_layers[x, y] = layer
+        column_x.setdefault(column, x)
+        channel_pins.append(
+            ChannelPin(net_of[x, y], column, top is not None and y >= top)
+        )
+    assignment = assign_tracks(channel_pins, dogleg=dogleg)
+    for _, column in assignment.jogs:
+        column_x.setdefault(column, offset_x + column * pitch_x)
+
+    # Track 0 is the highest met1 track at least edge_margin below the top
+    # row (or the lowest above the single row, counted upwards).
+    offset_y, pitch_y = _SC_HD_MET1_TRACKS
+    num_tracks = assignment.num_tracks
+    if top is not None:
+        first = math.floor((top - edge_margin - offset_y) / pitch_y + 1e-9)
+        lowest = offset_y + (first - num_tracks + 1) * pitch_y
+        if lowest < bottom + edge_margin - 1e-9:
+            room = offset_y + first * pitch_y - bottom - edge_margin
+            raise ValueError(
+                f"Channel between y={bottom} and y={top} fits "
+                f"{max(int(room // pitch_y) + 1, 0)} tracks, {num_tracks} needed"
+            )
+    else:
+        lowest_k = math.ceil((bottom + edge_margin - offset_y) / pitch_y - 1e-9)
+        first = lowest_k + num_tracks - 1
+    track_y = [round(offset_y + (first - t) * pitch_y, 3) for t in range(num_tracks)]
+
+    # Wire ends per (net, column): trunk tracks reaching the column and pins.
+    columns_of: dict[str, set[int]] = {}
+    for pin in channel_pins:
+        columns_of.setdefault(pin.net, set()).add(pin.column)
+    for net, column in assignment.jogs:
+        columns_of[net].add(column)
+    ends: dict[tuple[str, int], list[float]] = {}
+    vias: set[tuple[float, float]] = set()
+    half = width / 2
+    length = 0.0
+    for trunk in assignment.trunks:
+        y = track_y[trunk.track]
+        x0, x1 = column_x[trunk.left], column_x[trunk.right]
+        component.add_polygon(
+            [
+                (x0 - half, y - half),
+                (x1 + half, y - half),
+                (x1 + half, y + half),
+                (x0 - half, y + half),
+            ],
+            layer=_MET1,
+        )
+        route_result.add_polyline([(x0, y, _MET1), (x1, y, _MET1)])
+        length += x1 - x0
+        for column in columns_of[trunk.net]:
+            if trunk.left <= column <= trunk.right:
+                ends.setdefault((trunk.net, column), []).append(y)
+                vias.add((column_x[column], y))
+    for pin, (x, y) in zip(channel_pins, pins):
+        ends.setdefault((pin.net, pin.column), []).append(y)
+        if pin_layers[x, y] == _MET1:
+            vias.add((column_x[pin.column], y))
+    for (_, column), ys in ends.items():
+        y0, y1 = min(ys), max(ys)
+        if y1 - y0 <= 0:
             continue
+        x = column_x[column]
+        component.add_polygon(
+            [(x - half, y0), (x + half, y0), (x + half, y1), (x - half, y1)],
+            layer=_MET2,
+        )
+        route_result.add_polyline([(x, y0, _MET2), (x, y1, _MET2)])
+        length += y1 - y0
 
-    return Route(references, length, length_effective, ports)
+    # One arrayed reference per run of equally spaced vias on a row. The
+    # 0.26 um pads clear the neighbouring met1 tracks; kfactory needs ports of
+    # an even number of DBU, so the pad is 0.21 um plus 0.05 um of enclosure.
+    via = via_transition(width=0.21, length=0.21, via_enclosure=(0.05, 0.05))
+    references = []
+    by_row: dict[float, list[float]] = {}
+    for x, y in vias:
+        by_row.setdefault(y, []).append(x)
+    for y, xs in sorted(by_row.items()):
+        for x, count, pitch in _via_runs(sorted(xs)):
+            ref = component.add_ref(via, columns=count, rows=1, column_pitch=pitch)
+            ref.move((x, y))
+            references.append(ref)
+    route_result.via_count = len(vias)
+
+    route_result.grid_shape = (num_tracks, len(column_x))
+    route_result.attempts = 1
+    route_result.success = True
+    route_result.timings["total"] = time.perf_counter() - t_start
+    return Route(
+        references,
+        length,
+        length,
+        [],
+        search_strategy="channel",
+        result=route_result,
+    )
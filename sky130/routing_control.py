@@ -0,0 +1,206 @@
+"""Progress events, time budgets and cancellation for routing runs.
+
+``route_multilayer_3d`` and the multi-net routers take optional arguments
+for long runs:
+
+- ``progress``: called with a RouteEvent when a run, a net-order attempt or
+  a net starts and ends, for each clearance step of a net and before a
+  fallback router is tried.
+- ``budget``: wall-clock seconds for the call; multi-net routers also take
+  ``net_budget``, seconds per net.
+- ``cancel``: a CancellationToken, checked before each net, clearance step,
+  search window, retry and fallback.
+
+A net that runs out of time or is cancelled fails with the reason "time
+budget exceeded" (or the cancellation reason). A multi-net run that runs out
+of time or is cancelled stops trying net orders and returns its best partial
+result (``success`` False) instead of raising::
+
+    token = CancellationToken()  # token.cancel() from another thread
+    route_nets_deterministic(
+        c, nets, progress=print, budget=600, net_budget=30, cancel=token
+    )
+
+From asyncio, ``route_events`` runs a router in a worker thread and yields
+its events as they happen::
+
+    async for event in route_events(route_nets_deterministic, c, nets):
+        if event.kind == "result":
+            routed = event.data["result"]
+"""
+
+import asyncio
+import functools
+import threading
+import time
+from collections.abc import AsyncIterator, Callable
+from dataclasses import dataclass, field, replace
+from typing import Any
+
+BUDGET_EXCEEDED = "time budget exceeded"
+
+
+@dataclass(frozen=True)
+class RouteEvent:
+    """Progress of a routing run.
+
+    Attributes:
+        kind: "run_start", "attempt_start", "net_start", "clearance",
+            "fallback", "net_done", "attempt_done", "run_done", or "result"
+            for the last event of ``route_events``.
+        net: Net name, for events of a net in a multi-net run.
+        attempt: Net-order attempt of a multi-net run.
+        success: Outcome, for the "..._done" events.
+        reason: Failure or stop reason.
+        elapsed: Seconds since the run started.
+        data: Further fields of the event (net order, clearance step, number
+            of routed nets, the router's return value for "result").
+    """
+
+    kind: str
+    net: str | None = None
+    attempt: int | None = None
+    success: bool | None = None
+    reason: str | None = None
+    elapsed: float = 0.0
+    data: dict[str, Any] = field(default_factory=dict)
+
+
+ProgressCallback = Callable[[RouteEvent], None]
+
+
+class CancellationToken:
+    """Flag to stop a routing run, settable from any thread."""
+
+    def __init__(self) -> None:
+        self._event = threading.Event()
+        self.reason = "cancelled"
+
+    def cancel(self, reason: str = "cancelled") -> None:
+        self.reason = reason
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+
+class RouteControl:
+    """Progress, budget and cancellation state of one routing call.
+
+    Args:
+        progress: Callback receiving the RouteEvents of the call.
+        budget: Wall-clock seconds for the call, None for no limit.
+        cancel: Token stopping the call when set.
+        net_budget: Seconds per net of a multi-net call.
+        **context: Fields (net, attempt) set on every emitted event.
+    """
+
+    def __init__(
+        self,
+        progress: ProgressCallback | None = None,
+        budget: float | None = None,
+        cancel: CancellationToken | None = None,
+        net_budget: float | None = None,
+        **context: Any,
+    ) -> None:
+        self.progress = progress
+        self.cancel = cancel
+        self.net_budget = net_budget
+        self.context = context
+        self.t_start = time.perf_counter()
+        self.deadline = None if budget is None else self.t_start + budget
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.t_start
+
+    def remaining(self) -> float | None:
+        """Seconds left of the budget, None without a budget."""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.perf_counter())
+
+    def stop_reason(self) -> str | None:
+        """Why the call has to stop now, None while it may go on."""
+        if self.cancel is not None and self.cancel.cancelled:
+            return self.cancel.reason
+        if self.deadline is not None and time.perf_counter() >= self.deadline:
+            return BUDGET_EXCEEDED
+        return None
+
+    def emit(self, kind: str, **fields: Any) -> None:
+        if self.progress is not None:
+            fields = {**self.context, **fields}
+            self.progress(RouteEvent(kind, elapsed=self.elapsed(), **fields))
+
+    def net_budget_left(self) -> float | None:
+        """Budget of the next net: ``net_budget`` capped by what is left."""
+        budgets = [b for b in (self.net_budget, self.remaining()) if b is not None]
+        return min(budgets) if budgets else None
+
+    def forward(self, **context: Any) -> ProgressCallback | None:
+        """Progress callback for a nested router call.
+
+        Events of the nested call are passed on with `context` (e.g. net and
+        attempt) and the elapsed time of this call.
+        """
+        if self.progress is None:
+            return None
+        progress = self.progress
+        context = {**self.context, **context}
+
+        def forward(event: RouteEvent) -> None:
+            progress(replace(event, elapsed=self.elapsed(), **context))
+
+        return forward
+
+
+async def route_events(
+    router: Callable[..., Any], *args: Any, **kwargs: Any
+) -> AsyncIterator[RouteEvent]:
+    """Run `router` in a worker thread and yield its progress events.
+
+    The last event has kind "result" and the router's return value in
+    ``data["result"]``; an exception of the router is raised from the
+    generator instead. Closing the generator early cancels the run through
+    the ``cancel`` token (a new one unless given) and waits for it to stop.
+
+    Args:
+        router: Router taking ``progress`` and ``cancel`` keywords, e.g.
+            route_nets_deterministic.
+        *args: Positional arguments of `router`.
+        **kwargs: Keyword arguments of `router`.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue[RouteEvent] = asyncio.Queue()
+    if kwargs.get("cancel") is None:
+        kwargs["cancel"] = CancellationToken()
+
+    def progress(event: RouteEvent) -> None:
+        loop.call_soon_threadsafe(queue.put_nowait, event)
+
+    future = loop.run_in_executor(
+        None, functools.partial(router, *args, progress=progress, **kwargs)
+    )
+    get = None
+    try:
+        while True:
+            get = asyncio.ensure_future(queue.get())
+            done, _ = await asyncio.wait(
+                {get, future}, return_when=asyncio.FIRST_COMPLETED
+            )
+            if get in done:
+                yield get.result()
+                continue
+            # Events are queued before the thread's result, so none is lost.
+            get.cancel()
+            while not queue.empty():
+                yield queue.get_nowait()
+            break
+        yield RouteEvent("result", data=dict(result=await future))
+    finally:
+        if get is not None:
+            get.cancel()
+        if not future.done():
+            kwargs["cancel"].cancel()
+            await asyncio.wait({future})
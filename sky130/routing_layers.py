@@ -0,0 +1,309 @@
+"""Routing layer model for the sky130 3D routers.
+
+The routable metals (li1, met1-met5) and the cuts between them are read from
+``sky130.layers.LAYER_STACK`` (level order by ``zmin``) and
+``sky130.layers.connectivity`` (which cut joins two metals). Each metal
+carries a preferred direction and its minimum width and spacing, each cut its
+size, spacing and metal enclosure, so a router can work on any contiguous
+range of the stack::
+
+    stack = routing_stack(("met1", "met2", "met3"))
+    stack.directions  # ["h", "v", "h"]
+    stack.vias[1].name  # "via2"
+"""
+
+import functools
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass
+from typing import Any
+
+Layer = tuple[int, int]
+
+# Routable metals, bottom to top, named as LAYER_STACK levels.
+ROUTING_METALS = ("li1", "met1", "met2", "met3", "met4", "met5")
+
+# Drawing layer of each metal, to accept layer tuples as well as names.
+_METAL_NAMES = {
+    (67, 20): "li1",
+    (68, 20): "met1",
+    (69, 20): "met2",
+    (70, 20): "met3",
+    (71, 20): "met4",
+    (72, 20): "met5",
+}
+
+# Preferred direction alternates up the stack, met1 horizontal.
+_DIRECTIONS = {
+    "li1": "v",
+    "met1": "h",
+    "met2": "v",
+    "met3": "h",
+    "met4": "v",
+    "met5": "h",
+}
+
+# (min width, min spacing) in um, sky130 periphery rules.
+_METAL_RULES = {
+    "li1": (0.17, 0.17),
+    "met1": (0.14, 0.14),
+    "met2": (0.14, 0.14),
+    "met3": (0.30, 0.30),
+    "met4": (0.30, 0.30),
+    "met5": (1.60, 1.60),
+}
+
+# (cut size, cut spacing, metal enclosure) in um, by cut layer tuple. The
+# enclosure is the larger of the two metals' rules; via1 keeps the values of
+# via_m1_m2.
+_CUT_RULES = {
+    (67, 44): (0.17, 0.19, 0.06),  # mcon
+    (68, 44): (0.15, 0.17, 0.07),  # via1
+    (69, 44): (0.20, 0.20, 0.065),  # via2
+    (70, 44): (0.20, 0.20, 0.065),  # via3
+    (71, 44): (0.80, 0.80, 0.31),  # via4
+}
+
+
+@dataclass(frozen=True)
+class RoutingLayer:
+    """One routable metal.
+
+    Attributes:
+        name: LAYER_STACK level name (e.g. "met2").
+        layer: Drawing layer (layer, datatype).
+        direction: Preferred direction, "h" or "v".
+        min_width: Minimum wire width in um.
+        min_spacing: Minimum spacing in um.
+    """
+
+    name: str
+    layer: Layer
+    direction: str
+    min_width: float
+    min_spacing: float
+
+
+@dataclass(frozen=True)
+class RoutingVia:
+    """Cut between two adjacent routable metals.
+
+    Attributes:
+        name: LAYER_STACK level name of the cut (e.g. "via1").
+        layer: Cut layer (layer, datatype).
+        bottom: Lower metal.
+        top: Upper metal.
+        size: Cut size in um.
+        spacing: Cut spacing in um.
+        enclosure: Metal enclosure of the cut array in um; landing pads are
+            drawn this much larger than the via pad.
+    """
+
+    name: str
+    layer: Layer
+    bottom: RoutingLayer
+    top: RoutingLayer
+    size: float
+    spacing: float
+    enclosure: float
+
+    @property
+    def min_pad(self) -> float:
+        """Smallest via pad in um holding one cut on both metals."""
+        return round(
+            max(
+                self.size + 2 * self.enclosure,
+                self.bottom.min_width,
+                self.top.min_width,
+            ),
+            6,
+        )
+
+
+@dataclass(frozen=True)
+class RoutingStack:
+    """Contiguous range of routable metals, bottom first.
+
+    Attributes:
+        layers: Metals, bottom to top.
+        vias: Cut between layers[k] and layers[k + 1].
+    """
+
+    layers: tuple[RoutingLayer, ...]
+    vias: tuple[RoutingVia, ...]
+
+    def __len__(self) -> int:
+        return len(self.layers)
+
+    @property
+    def names(self) -> list[str]:
+        return [layer.name for layer in self.layers]
+
+    @property
+    def layer_tuples(self) -> list[Layer]:
+        return [layer.layer for layer in self.layers]
+
+    @property
+    def directions(self) -> list[str]:
+        return [layer.direction for layer in self.layers]
+
+    def index(self, layer: Any) -> int | None:
+        """Position of a metal given by name or layer, None if not in the stack."""
+        for k, routing_layer in enumerate(self.layers):
+            if layer == routing_layer.name or _as_tuple(layer) == routing_layer.layer:
+                return k
+        return None
+
+    def via(self, z0: int, z1: int) -> RoutingVia:
+        """Cut joining the adjacent stack positions z0 and z1."""
+        if abs(z0 - z1) != 1:
+            raise ValueError(f"Layers {z0} and {z1} are not adjacent")
+        return self.vias[min(z0, z1)]
+
+    def via_costs(
+        self,
+        default: float,
+        overrides: Mapping[tuple[str, str], float] | None = None,
+    ) -> list[float]:
+        """Cost per cut, bottom first.
+
+        Args:
+            default: Cost of cuts without an override.
+            overrides: Cost per metal pair, e.g. {("met2", "met3"): 20.0}. The
+                order of the pair does not matter.
+        """
+        costs = [float(default)] * len(self.vias)
+        for (a, b), cost in (overrides or {}).items():
+            za, zb = self.index(a), self.index(b)
+            if za is None or zb is None or abs(za - zb) != 1:
+                raise ValueError(f"({a!r}, {b!r}) is not a via in {self.names}")
+            costs[min(za, zb)] = float(cost)
+        return costs
+
+
+def _as_tuple(layer: Any) -> Layer | None:
+    """(layer, datatype) of a layer tuple, layer enum or LogicalLayer."""
+    if layer is None or isinstance(layer, str):
+        return None
+    if hasattr(layer, "datatype"):
+        return int(layer.layer), int(layer.datatype)
+    if hasattr(layer, "layer"):
+        return _as_tuple(layer.layer)
+    return int(layer[0]), int(layer[1])
+
+
+def _stack_levels(layer_stack) -> list[tuple[str, Layer, float]]:
+    """(name, layer, zmin) of the metal and cut levels, bottom to top."""
+    levels = []
+    for name, level in layer_stack.layers.items():
+        layer = _as_tuple(level.layer)
+        if name in ROUTING_METALS or layer in _CUT_RULES:
+            levels.append((name, layer, float(level.zmin)))
+    return sorted(levels, key=lambda level: level[2])
+
+
+def _connecting_cut(
+    bottom: RoutingLayer,
+    top: RoutingLayer,
+    levels: list[tuple[str, Layer, float]],
+    connections: Sequence[tuple[str, ...]],
+    layer_map,
+) -> tuple[str, Layer]:
+    """Cut joining two adjacent metals, from connectivity or the level order."""
+    names = {layer: name for name, layer, _ in levels}
+    for conn in connections:
+        if len(conn) != 3:
+            continue
+        lower, cut, upper = (_as_tuple(getattr(layer_map, n, None)) for n in conn)
+        if {lower, upper} == {bottom.layer, top.layer} and cut in _CUT_RULES:
+            return names.get(cut, conn[1]), cut
+    # connectivity has no triple for this pair (e.g. li1/mcon/met1): use the
+    # cut level between the two metals.
+    z0 = next(z for name, _, z in levels if name == bottom.name)
+    z1 = next(z for name, _, z in levels if name == top.name)
+    for name, layer, z in levels:
+        if z0 < z < z1 and layer in _CUT_RULES:
+            return name, layer
+    raise ValueError(f"No cut between {bottom.name} and {top.name}")
+
+
+@functools.cache
+def _default_stack(names: tuple[str, ...]) -> RoutingStack:
+    from sky130.layers import LAYER, LAYER_STACK, connectivity
+
+    return build_routing_stack(names, LAYER_STACK, connectivity, LAYER)
+
+
+def build_routing_stack(
+    names: Sequence[str],
+    layer_stack,
+    connections: Sequence[tuple[str, ...]],
+    layer_map,
+    directions: Mapping[str, str] | None = None,
+) -> RoutingStack:
+    """Build a RoutingStack from a layer stack and a connectivity list.
+
+    Args:
+        names: Contiguous metal level names, e.g. ("met1", "met2").
+        layer_stack: LayerStack providing the metal and cut levels.
+        connections: Connectivity triples (metal, cut, metal) by layer name.
+        layer_map: Layer map resolving connectivity names to layers.
+        directions: Preferred direction overrides by metal name.
+    """
+    levels = _stack_levels(layer_stack)
+    metals = [name for name, _, _ in levels if name in ROUTING_METALS]
+    names = list(names)
+    if not names or any(name not in metals for name in names):
+        raise ValueError(f"Routing layers must be among {metals}, got {names}")
+    first = metals.index(names[0])
+    if metals[first : first + len(names)] != names:
+        raise ValueError(f"Routing layers must be contiguous in {metals}, got {names}")
+
+    directions = {**_DIRECTIONS, **(directions or {})}
+    layer_of = {name: layer for name, layer, _ in levels}
+    layers = tuple(
+        RoutingLayer(
+            name=name,
+            layer=layer_of[name],
+            direction=directions[name],
+            min_width=_METAL_RULES[name][0],
+            min_spacing=_METAL_RULES[name][1],
+        )
+        for name in names
+    )
+    vias = []
+    for bottom, top in zip(layers, layers[1:]):
+        cut_name, cut = _connecting_cut(bottom, top, levels, connections, layer_map)
+        size, spacing, enclosure = _CUT_RULES[cut]
+        vias.append(
+            RoutingVia(
+                name=cut_name,
+                layer=cut,
+                bottom=bottom,
+                top=top,
+                size=size,
+                spacing=spacing,
+                enclosure=enclosure,
+            )
+        )
+    return RoutingStack(layers=layers, vias=tuple(vias))
+
+
+def routing_stack(layers: Sequence[Any] = ("met1", "met2")) -> RoutingStack:
+    """RoutingStack of sky130 for a contiguous range of metals.
+
+    Args:
+        layers: Metals bottom to top, by LAYER_STACK name ("li1", "met1", ...)
+            or layer tuple. A two-element (first, last) range such as
+            ("met1", "met4") is expanded to every metal in between.
+    """
+    names = []
+    for layer in layers:
+        name = layer if isinstance(layer, str) else _METAL_NAMES.get(_as_tuple(layer))
+        if name not in ROUTING_METALS:
+            raise ValueError(f"{layer} is not a routing layer")
+        names.append(name)
+    if len(names) == 2:
+        lo, hi = ROUTING_METALS.index(names[0]), ROUTING_METALS.index(names[1])
+        if lo < hi:
+            names = list(ROUTING_METALS[lo : hi + 1])
+    return _default_stack(tuple(names))
@@ -0,0 +1,235 @@
+"""Obstruction geometry shared by the nets of one multi-net routing run.
+
+Without a session every ``route_multilayer_3d`` call flattens the cell
+hierarchy of each obstruction layer again (per clearance step and once more
+in the hierarchical fallback), although only the previous net's route has
+changed. A ``RoutingSession`` keeps per layer:
+
+- the flattened baseline geometry (flattened once),
+- the baseline sized for each clearance (sized once per clearance and set of
+  port-excluded polygons),
+- the geometry added by routes, flattened and sized incrementally from the
+  instances that appeared since the previous net.
+
+While a ``RouteTransaction`` (``sky130.route_geometry``) is open, route output
+goes to an overlay cell placed in the routed cell; the session then treats
+the overlay's shapes and instances as the routed cell's own.
+"""
+
+from collections import Counter
+from collections.abc import Iterable, Sequence
+
+import klayout.db as kdb
+
+from sky130.spatial_index import LayerShapes, ShapeIndex
+
+# Upper bound on cached sized baseline regions.
+_MAX_SIZED_REGIONS = 256
+
+
+def _instance_key(inst: kdb.Instance) -> tuple[int, str]:
+    return inst.cell_index, inst.cell_inst.to_s()
+
+
+def _instance_polygons(inst: kdb.Instance, layer_index: int) -> list[kdb.Polygon]:
+    """Flattened polygons of one (possibly arrayed) instance on a layer."""
+    region = kdb.Region(inst.cell.begin_shapes_rec(layer_index))
+    if region.is_empty():
+        return []
+    polygons: list[kdb.Polygon] = []
+    for trans in inst.cell_inst.each_cplx_trans():
+        polygons.extend(region.transformed(trans).each())
+    return polygons
+
+
+class RoutingSession(ShapeIndex):
+    """Incrementally updated ``ShapeIndex`` for routing several nets in a cell.
+
+    Pass the session to ``route_multilayer_3d(..., session=...)``. Each call
+    syncs it with the cell first, so instances added by earlier routes are
+    flattened once and appended to the layers. Shapes drawn into the cell
+    itself are appended when reported through ``add_shapes`` (as
+    ``RouteGeometryWriter`` does). Removing instances or editing top-level
+    shapes otherwise makes the affected layers flatten again; after rolling
+    the cell back to its baseline call ``reset`` to keep the flattened
+    baseline instead.
+
+    Attributes:
+        overlay: Cell placed without transformation in `kc` that routers
+            draw into while a RouteTransaction is open, else None.
+        recorder: RouteRecorder (``sky130.route_journal``) the routers report
+            drawn geometry to while a net is journaled, else None.
+
+    Args:
+        kc: KCell being routed.
+    """
+
+    def __init__(self, kc) -> None:
+        super().__init__(kc)
+        self._baseline_counts: dict[tuple[int, int], int] = {}
+        self._top_counts: dict[tuple[int, int], int] = {}
+        # Instances already folded into each layer's polygons.
+        self._seen: dict[tuple[int, int], Counter] = {}
+        self._sized: dict[tuple, kdb.Region] = {}
+        self._routed_sized: dict[tuple, tuple[tuple[int, ...], kdb.Region]] = {}
+        self.flattens = 0
+        self.incremental_updates = 0
+        self.overlay = None
+        self.recorder = None
+
+    def _instances(self) -> list[kdb.Instance]:
+        """Instances of the cell, with the overlay's in place of the overlay."""
+        instances = [inst.instance for inst in self.kc.insts]
+        if self.overlay is None:
+            return instances
+        overlay_index = self.overlay.cell_index()
+        instances = [inst for inst in instances if inst.cell_index != overlay_index]
+        instances.extend(inst.instance for inst in self.overlay.insts)
+        return instances
+
+    def _instance_keys(self) -> Counter:
+        return Counter(_instance_key(inst) for inst in self._instances())
+
+    def _top_count(self, shapes: LayerShapes) -> int:
+        count = self.kc.shapes(shapes.layer_index).size()
+        if self.overlay is not None:
+            count += self.overlay.shapes(shapes.layer_index).size()
+        return count
+
+    def layer(self, layer: tuple[int, int]) -> LayerShapes:
+        layer = tuple(layer)
+        shapes = self._layers.get(layer)
+        if shapes is None:
+            shapes = super().layer(layer)
+            self.flattens += 1
+            self._baseline_counts[layer] = len(shapes)
+            self._top_counts[layer] = self._top_count(shapes)
+            self._seen[layer] = self._instance_keys()
+        return shapes
+
+    def invalidate(self, layers: Iterable[tuple[int, int]] | None = None) -> None:
+        super().invalidate(layers)
+        if layers is None:
+            layers = list(self._baseline_counts)
+        for layer in layers:
+            self._baseline_counts.pop(tuple(layer), None)
+            self._top_counts.pop(tuple(layer), None)
+            self._seen.pop(tuple(layer), None)
+        self._sized.clear()
+        self._routed_sized.clear()
+
+    def add_shapes(
+        self, layer: tuple[int, int], polygons: Iterable[kdb.Polygon]
+    ) -> None:
+        polygons = list(polygons)
+        super().add_shapes(layer, polygons)
+        layer = tuple(layer)
+        if layer in self._top_counts:
+            self._top_counts[layer] += len(polygons)
+
+    def reset(self, kc=None) -> None:
+        """Drop routed geometry and keep the flattened baseline.
+
+        Args:
+            kc: Cell to bind to instead, e.g. a fresh copy of the baseline cell.
+                Its geometry must equal the baseline the session was built on.
+        """
+        if kc is not None:
+            self.kc = kc
+        current = self._instance_keys()
+        for layer, shapes in self._layers.items():
+            shapes.truncate(self._baseline_counts[layer])
+            self._top_counts[layer] = self._top_count(shapes)
+            self._seen[layer] = current
+        self._routed_sized.clear()
+        self._base.clear()
+
+    def sync(self) -> None:
+        """Pick up geometry added to the cell since the layers were flattened.
+
+        Layers whose instances were removed or whose top-level shapes changed
+        are dropped and flattened again on next use.
+        """
+        if not self._layers:
+            return
+        current = self._instance_keys()
+        stale = [
+            layer
+            for layer, shapes in self._layers.items()
+            if self._seen[layer] - current
+            or self._top_count(shapes) != self._top_counts[layer]
+        ]
+        if stale:
+            self.invalidate(stale)
+
+        instances = None
+        for layer, shapes in self._layers.items():
+            added = current - self._seen[layer]
+            if not added:
+                continue
+            if instances is None:
+                instances = self._instances()
+            polygons: list[kdb.Polygon] = []
+            for inst in instances:
+                key = _instance_key(inst)
+                if added[key] > 0:
+                    added[key] -= 1
+                    polygons.extend(_instance_polygons(inst, shapes.layer_index))
+            shapes.extend(polygons)
+            self._seen[layer] = current
+            self.incremental_updates += 1
+
+    def obstruction_region(
+        self,
+        layers: Sequence[tuple[int, int]],
+        excluded: Iterable[tuple[int, int]] = (),
+        buffer_dbu: int = 0,
+    ) -> kdb.Region:
+        """Like ``ShapeIndex.obstruction_region`` with cached sizing.
+
+        The returned region may be shared with the cache; do not modify it.
+        """
+        layers = tuple(tuple(layer) for layer in layers)
+        excluded = frozenset(excluded)
+        shapes = [self.layer(layer) for layer in layers]
+        baseline = [self._baseline_counts[layer] for layer in layers]
+        if buffer_dbu <= 0 or any(i >= baseline[pos] for pos, i in excluded):
+            return super().obstruction_region(layers, excluded, buffer_dbu)
+
+        key = (layers, buffer_dbu, excluded)
+        base = self._sized.get(key)
+        if base is None:
+            region = kdb.Region()
+            for pos, layer_shapes in enumerate(shapes):
+                for i, poly in enumerate(layer_shapes.polygons[: baseline[pos]]):
+                    if (pos, i) not in excluded:
+                        region.insert(poly)
+            base = region.sized(buffer_dbu)
+            if len(self._sized) >= _MAX_SIZED_REGIONS:
+                self._sized.pop(next(iter(self._sized)))
+            self._sized[key] = base
+
+        routed = self._routed_region(layers, shapes, baseline, buffer_dbu)
+        if routed.is_empty():
+            return base
+        return (base + routed).merged()
+
+    def _routed_region(
+        self,
+        layers: tuple[tuple[int, int], ...],
+        shapes: list[LayerShapes],
+        baseline: list[int],
+        buffer_dbu: int,
+    ) -> kdb.Region:
+        """Routed geometry of `layers` sized by `buffer_dbu`, sized incrementally."""
+        key = (layers, buffer_dbu)
+        counts = tuple(len(layer_shapes) for layer_shapes in shapes)
+        done, region = self._routed_sized.get(key, (tuple(baseline), kdb.Region()))
+        if done != counts:
+            new = kdb.Region()
+            for pos, layer_shapes in enumerate(shapes):
+                for poly in layer_shapes.polygons[done[pos] : counts[pos]]:
+                    new.insert(poly)
+            region = region + new.sized(buffer_dbu)
+            self._routed_sized[key] = (counts, region)
+        return region
@@ -0,0 +1,138 @@
+"""Logging and tracing for the sky130 routers.
+
+Router diagnostics go through the ``sky130.routing`` logger, so they are
+silent unless a handler is configured (for example
+``logging.basicConfig(level=logging.DEBUG)``).
+
+Phase timing is collected as spans. Spans cost a single flag check while
+tracing is off. Turn tracing on for a run and export it as a Chrome trace
+(open in ``chrome://tracing`` or https://ui.perfetto.dev)::
+
+    with tracing("route_trace.json"):
+        route_nets_deterministic(c, nets, ...)
+"""
+
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Any, TypeVar
+
+logger = logging.getLogger("sky130.routing")
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+_NULL_SPAN = nullcontext()
+_enabled = False
+_events: list[dict[str, Any]] = []
+_events_lock = threading.Lock()
+
+
+def tracing_enabled() -> bool:
+    return _enabled
+
+
+def enable_tracing(clear: bool = True) -> None:
+    """Start recording spans (dropping earlier events unless clear=False)."""
+    global _enabled
+    if clear:
+        clear_trace()
+    _enabled = True
+
+
+def disable_tracing() -> None:
+    global _enabled
+    _enabled = False
+
+
+def clear_trace() -> None:
+    with _events_lock:
+        _events.clear()
+
+
+def trace_events() -> list[dict[str, Any]]:
+    """Recorded spans as Chrome trace "complete" events."""
+    with _events_lock:
+        return list(_events)
+
+
+@contextmanager
+def _record_span(name: str, category: str, args: dict[str, Any]) -> Iterator[None]:
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        t1 = time.perf_counter()
+        event = {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": t0 * 1e6,
+            "dur": (t1 - t0) * 1e6,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+        }
+        if args:
+            event["args"] = {k: _jsonable(v) for k, v in args.items()}
+        with _events_lock:
+            _events.append(event)
+
+
+def span(name: str, category: str = "routing", **args: Any):
+    """Context manager timing a routing phase; a no-op while tracing is off."""
+    if not _enabled:
+        return _NULL_SPAN
+    return _record_span(name, category, args)
+
+
+def traced(name: str | None = None, category: str = "routing") -> Callable[[F], F]:
+    """Decorator recording a span around every call of the function."""
+
+    def decorator(func: F) -> F:
+        span_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with _record_span(span_name, category, {}):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def export_chrome_trace(path: str | Path) -> Path:
+    """Write the recorded spans to a Chrome trace JSON file."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(
+        json.dumps({"traceEvents": trace_events(), "displayTimeUnit": "ms"})
+    )
+    return path
+
+
+@contextmanager
+def tracing(path: str | Path | None = None) -> Iterator[None]:
+    """Record spans for the enclosed block and optionally export them to path."""
+    was_enabled = _enabled
+    enable_tracing()
+    try:
+        yield
+    finally:
+        if not was_enabled:
+            disable_tracing()
+        if path is not None:
+            export_chrome_trace(path)
+
+
+def _jsonable(value: Any) -> Any:
+    if isinstance(value, str | int | float | bool) or value is None:
+        return value
+    return str(value)
@@ -1,8 +1,14 @@
 """Utilities for multi-layer routing using doroutes A* pathfinding."""
 
-from collections.abc import Iterable, Sequence
+import logging
+import os
+import time
+import warnings
+from collections.abc import Callable, Iterable, Iterator, Sequence
 from dataclasses import dataclass
-from itertools import permutations
+from functools import cache
+from itertools import chain, islice, permutations
+from typing import Any
 
 import gdsfactory as gf
 import numpy as np
@@ -10,7 +16,36 @@ from gdsfactory.component import Component
 from gdsfactory.typings import LayerSpec, Port
 
 # from doroutes import find_route_astar
-from sky130.pcells.vias import via_m1_m2
+from sky130.global_route import (
+    GlobalNet,
+    GlobalRouteResult,
+    build_gcell_grid,
+    gcell_guide,
+    route_global,
+)
+from sky130.pcells.vias import quantize_via_pad, via_stack
+from sky130.route_cache import RouteCache, array_digest, resolve_route_cache
+from sky130.route_geometry import RouteGeometryWriter, RouteTransaction
+from sky130.route_journal import RouteJournal
+from sky130.route_result import RouteResult
+from sky130.routing import RouteWarning
+from sky130.routing_control import (
+    CancellationToken,
+    ProgressCallback,
+    RouteControl,
+)
+from sky130.routing_layers import RoutingStack, RoutingVia, routing_stack
+from sky130.routing_session import RoutingSession
+from sky130.routing_trace import logger, span, traced
+from sky130.spatial_index import (
+    BoxIndex,
+    ObstructionBuffer,
+    ShapeIndex,
+    any_box_overlap,
+    corridor_windows,
+    overlapping_boxes,
+)
+from sky130.steiner import next_branch, polyline_segments
 
 # Layer definitions for Sky130
 LAYER_M1 = (68, 20)  # Metal 1 - Horizontal
@@ -25,12 +60,12 @@ _DRC = {
         LAYER_M1: 0.29,
         LAYER_M2: 0.29,
     },
-    # via_m1_m2 draws landing metals as (width + enclosure) on M1/M2.
+    # via_stack draws landing metals as (width + enclosure) on M1/M2.
     "via_metal_enclosure_add": 0.07,
 }
 
 
-@dataclass
+@dataclass(frozen=True)
 class PortGeometry:
     width_x: float
     width_y: float
@@ -59,6 +94,15 @@ class RouteNetSpec:
     port_name_prefix: str = "seg"
 
 
+@dataclass(frozen=True)
+class MultiTerminalNetSpec:
+    """Net connecting several ports, routed as one tree (route_multi_terminal_net)."""
+
+    name: str
+    ports: tuple[Port, ...]
+    port_name_prefix: str = "seg"
+
+
 def _deterministic_clearance_attempts(
     clearance: float,
     clearance_ladder: tuple[float, ...],
@@ -74,15 +118,6 @@ def _deterministic_clearance_attempts(
     return attempts
 
 
-def _bbox_overlap(
-    a: tuple[float, float, float, float], b: tuple[float, float, float, float]
-) -> bool:
-    """Axis-aligned bbox overlap check."""
-    ax0, ay0, ax1, ay1 = a
-    bx0, by0, bx1, by1 = b
-    return ax0 < bx1 and ax1 > bx0 and ay0 < by1 and ay1 > by0
-
-
 def _segment_envelope_um(
     p1: tuple[float, float],
     p2: tuple[float, float],
@@ -130,9 +165,14 @@ def _via_envelope_um(
     )
 
 
-def _via_pad_size_um(width_um: float) -> float:
-    """Square via pad size used for M1<->M2 transitions."""
-    return max(width_um, _DRC["min_via_pad"][LAYER_M1], _DRC["min_via_pad"][LAYER_M2])
+def _via_pad_size_um(width_um: float, via: RoutingVia | None = None) -> float:
+    """Square via pad size used for M1<->M2 transitions (or for `via`).
+
+    The smallest canonical pad (see quantize_via_pad) of at least `width_um`:
+    the wire width rounded up to 0.01 um, and at least the one-cut pad.
+    """
+    via = via or routing_stack().vias[0]
+    return quantize_via_pad(max(width_um, via.min_pad), via)
 
 
 def _snap_even_dbu_width_um(
@@ -149,62 +189,110 @@ def _snap_even_dbu_width_um(
     return units * dbu
 
 
-def _via_metal_footprint_um(via_pad_um: float) -> float:
-    """Actual M1/M2 square metal footprint produced by via_m1_m2."""
+def _via_metal_footprint_um(via_pad_um: float, via: RoutingVia | None = None) -> float:
+    """Actual M1/M2 square metal footprint produced by via_stack (or `via`)."""
+    if via is not None:
+        return via_pad_um + via.enclosure
     return via_pad_um + float(_DRC["via_metal_enclosure_add"])
 
 
+def _via_component(via: RoutingVia | None, via_pad_um: float) -> Component:
+    """Via cell for a stack transition, or for M1<->M2 if `via` is None."""
+    via = via or routing_stack().vias[0]
+    return via_stack(width=via_pad_um, bottom=via.bottom.name, top=via.top.name)
+
+
+def _obstruction_boxes_um(
+    polys: Sequence[np.ndarray],
+    dbu: float,
+    port_points_um: Sequence[tuple[float, float]],
+) -> BoxIndex:
+    """Bounding boxes (um) of obstruction polygons not containing a port point."""
+    if isinstance(polys, ObstructionBuffer):
+        boxes_um = polys.boxes * dbu
+        keep = np.ones(len(boxes_um), dtype=bool)
+        for px, py in port_points_um:
+            keep &= ~(
+                (boxes_um[:, 0] <= px)
+                & (px <= boxes_um[:, 2])
+                & (boxes_um[:, 1] <= py)
+                & (py <= boxes_um[:, 3])
+            )
+        return BoxIndex(map(tuple, boxes_um[keep].tolist()))
+    boxes = BoxIndex()
+    for poly in polys:
+        if len(poly) >= 3:
+            box = (
+                float(poly[:, 0].min()) * dbu,
+                float(poly[:, 1].min()) * dbu,
+                float(poly[:, 0].max()) * dbu,
+                float(poly[:, 1].max()) * dbu,
+            )
+            if not any(
+                box[0] <= px <= box[2] and box[1] <= py <= box[3]
+                for px, py in port_points_um
+            ):
+                boxes.append(box)
+    return boxes
+
+
+def _layer_obstruction_boxes_um(
+    polys_per_layer: Sequence[Sequence[np.ndarray]],
+    start_xy_dbu: tuple[int, int],
+    stop_xy_dbu: tuple[int, int],
+    dbu: float,
+) -> list[BoxIndex]:
+    """Obstruction boxes per layer of a route, without those holding its ports.
+
+    Built once per net and shared by all geometry trials of that net.
+    """
+    port_points_um = [
+        (start_xy_dbu[0] * dbu, start_xy_dbu[1] * dbu),
+        (stop_xy_dbu[0] * dbu, stop_xy_dbu[1] * dbu),
+    ]
+    return [
+        _obstruction_boxes_um(polys, dbu, port_points_um) for polys in polys_per_layer
+    ]
+
+
 def _is_via_legal_on_both_layers(
     center_um: tuple[float, float],
     via_pad_um: float,
-    m1_bboxes: list[tuple[float, float, float, float]],
-    m2_bboxes: list[tuple[float, float, float, float]],
+    m1_bboxes: Sequence[tuple[float, float, float, float]],
+    m2_bboxes: Sequence[tuple[float, float, float, float]],
+    via: RoutingVia | None = None,
 ) -> bool:
-    """True if via envelope at center is clear on both adjacent routing layers."""
-    via_metal = _via_metal_footprint_um(via_pad_um)
+    """True if via envelope at center is clear on both adjacent routing layers.
+
+    `m1_bboxes`/`m2_bboxes` are the obstructions of the lower and upper layer.
+    """
+    via_metal = _via_metal_footprint_um(via_pad_um, via)
     via_box = _via_envelope_um(center_um, via_metal, via_metal)
-    if any(_bbox_overlap(via_box, obox) for obox in m1_bboxes):
+    if any_box_overlap(via_box, m1_bboxes):
         return False
-    if any(_bbox_overlap(via_box, obox) for obox in m2_bboxes):
+    if any_box_overlap(via_box, m2_bboxes):
         return False
     return True
 
 
-def _deterministic_via_candidate_centers(
-    base_center_um: tuple[float, float],
-    step_um: float,
-    radius_um: float,
-    max_candidates: int,
-    dbu: float,
-) -> list[tuple[float, float]]:
-    """Generate stable nearby via centers around base point, snapped to DBU."""
-    step = max(step_um, dbu)
-    max_ring = max(0, int(round(radius_um / step)))
-    centers: list[tuple[float, float]] = []
-    seen = set()
+@cache
+def _via_ring_offsets(ring: int) -> tuple[tuple[int, int], ...]:
+    """Grid offsets at Manhattan distance `ring`, in candidate order.
 
-    def _append(center: tuple[float, float]) -> None:
-        key = (int(round(center[0] / dbu)), int(round(center[1] / dbu)))
-        if key in seen:
-            return
-        seen.add(key)
-        centers.append((key[0] * dbu, key[1] * dbu))
-
-    _append(base_center_um)
-    if len(centers) >= max_candidates:
-        return centers
-
-    for md in range(1, max_ring + 1):
-        offsets = []
-        for ix in range(-md, md + 1):
-            iy_abs = md - abs(ix)
-            if iy_abs == 0:
-                offsets.append((ix, 0))
-            else:
-                offsets.append((ix, iy_abs))
-                offsets.append((ix, -iy_abs))
-        offsets = sorted(
-            set(offsets),
+    Axis offsets come first (+x, +y, -x, -y), then the diagonal quadrants;
+    within a group smaller |dy| wins, then smaller |dx|.
+    """
+    offsets = set()
+    for ix in range(-ring, ring + 1):
+        iy_abs = ring - abs(ix)
+        if iy_abs == 0:
+            offsets.add((ix, 0))
+        else:
+            offsets.add((ix, iy_abs))
+            offsets.add((ix, -iy_abs))
+    return tuple(
+        sorted(
+            offsets,
             key=lambda p: (
                 0 if (p[0] == 0 or p[1] == 0) else 1,
                 0
@@ -226,42 +314,80 @@ def _deterministic_via_candidate_centers(
                 abs(p[0]),
             ),
         )
-        for ix, iy in offsets:
-            _append((base_center_um[0] + ix * step, base_center_um[1] + iy * step))
-            if len(centers) >= max_candidates:
-                return centers
+    )
 
-    return centers
+
+def _iter_via_candidate_centers(
+    base_center_um: tuple[float, float],
+    step_um: float,
+    radius_um: float,
+    dbu: float,
+) -> Iterator[tuple[float, float]]:
+    """Nearby via centers around the base point (base first), snapped to DBU."""
+    step = max(step_um, dbu)
+    max_ring = max(0, int(round(radius_um / step)))
+    seen = set()
+    offsets = chain(
+        [(0, 0)], *(_via_ring_offsets(ring) for ring in range(1, max_ring + 1))
+    )
+    for ix, iy in offsets:
+        key = (
+            int(round((base_center_um[0] + ix * step) / dbu)),
+            int(round((base_center_um[1] + iy * step) / dbu)),
+        )
+        if key in seen:
+            continue
+        seen.add(key)
+        yield key[0] * dbu, key[1] * dbu
 
 
+@traced("via_legalization")
 def _resolve_legal_via_center(
     base_center_um: tuple[float, float],
     via_pad_um: float,
-    m1_bboxes: list[tuple[float, float, float, float]],
-    m2_bboxes: list[tuple[float, float, float, float]],
+    m1_bboxes: Sequence[tuple[float, float, float, float]],
+    m2_bboxes: Sequence[tuple[float, float, float, float]],
     dbu: float,
     relocate_step_um: float = 0.14,
     relocate_radius_um: float = 1.0,
     max_candidates: int = 64,
     allow_relocate: bool = True,
+    via: RoutingVia | None = None,
 ) -> tuple[float, float] | None:
-    """Return first legal via center (base first), else None."""
+    """Return first legal via center (base first), else None.
+
+    The obstructions near the candidates are looked up once (through the
+    BoxIndex buckets) and each candidate is only tested against those.
+    Candidates are generated lazily, in a fixed order (see
+    _iter_via_candidate_centers).
+    """
     if not allow_relocate:
         return (
             base_center_um
             if _is_via_legal_on_both_layers(
-                base_center_um, via_pad_um, m1_bboxes, m2_bboxes
+                base_center_um, via_pad_um, m1_bboxes, m2_bboxes, via
             )
             else None
         )
-    for center in _deterministic_via_candidate_centers(
-        base_center_um,
-        step_um=relocate_step_um,
-        radius_um=relocate_radius_um,
-        max_candidates=max_candidates,
-        dbu=dbu,
-    ):
-        if _is_via_legal_on_both_layers(center, via_pad_um, m1_bboxes, m2_bboxes):
+    # Every candidate lies within the outermost ring (plus DBU snapping).
+    step = max(relocate_step_um, dbu)
+    reach = (
+        max(0, int(round(relocate_radius_um / step))) * step
+        + _via_metal_footprint_um(via_pad_um, via) / 2.0
+        + dbu
+    )
+    x, y = base_center_um
+    window = (x - reach, y - reach, x + reach, y + reach)
+    local_m1 = overlapping_boxes(window, m1_bboxes)
+    local_m2 = overlapping_boxes(window, m2_bboxes)
+    candidates = islice(
+        _iter_via_candidate_centers(
+            base_center_um, relocate_step_um, relocate_radius_um, dbu
+        ),
+        max(1, max_candidates),
+    )
+    for center in candidates:
+        if _is_via_legal_on_both_layers(center, via_pad_um, local_m1, local_m2, via):
             return center
     return None
 
@@ -511,6 +637,7 @@ def _is_manhattan_layered_path(corners_3d: list[tuple[int, int, int]]) -> bool:
     return True
 
 
+@traced("astar_search")
 def _run_astar_rectilinear(
     polys: list,
     start_pos: tuple[int, int, str],
@@ -532,8 +659,6 @@ def _run_astar_rectilinear(
     ]
 
     try:
-        print(straight_width)
-        print(grid_unit_dbu)
         # input("debugging...")
         corners = _doroutes.show(
             polys=polys,
@@ -546,16 +671,19 @@ def _run_astar_rectilinear(
         )
         return corners
     except Exception as e:
-        print(f"A* failed: {e}")
+        logger.warning("A* failed: %s", e)
         return None
 
 
+@traced("extract_obstructions")
 def _extract_polys_for_layers(
     kc,
     layers: list[tuple[int, int]],
     dbu: float,
     port_points: list[tuple[int, int]] = None,
     buffer_dbu: int = 0,
+    shape_index: ShapeIndex | None = None,
+    window: tuple[int, int, int, int] | None = None,
 ):
     """Extract obstruction polygons from specified layers.
 
@@ -567,47 +695,68 @@ def _extract_polys_for_layers(
                     ONLY polygons containing these exact points are excluded.
                     All other polygons are hard obstructions - router must go around.
         buffer_dbu: Optional obstruction inflation in DBU.
+        shape_index: Per-layer shape index of `kc` (or a RoutingSession)
+            shared across calls. A temporary one is built if omitted.
+        window: Optional (left, bottom, right, top) DBU box; only obstructions
+            inside it are returned (clipped to it).
 
     Returns:
         List of polygon point arrays.
     """
-    import numpy as np
-    from kfactory import kdb
+    region = _obstruction_region_for_layers(
+        kc, layers, port_points, buffer_dbu, shape_index
+    )
+    return _region_polys(region, window)
+
+
+def _obstruction_region_for_layers(
+    kc,
+    layers: list[tuple[int, int]],
+    port_points: list[tuple[int, int]] = None,
+    buffer_dbu: int = 0,
+    shape_index: ShapeIndex | None = None,
+    excluded: frozenset[tuple[int, int]] | None = None,
+):
+    """Obstruction Region of `layers` without the polygons holding port points.
+
+    See _extract_polys_for_layers; the region may be shared with the shape
+    index cache, do not modify it. Pass `excluded` from _port_exclusions to
+    skip the port lookup when asking for several clearances.
+    """
+    if shape_index is None:
+        shape_index = ShapeIndex(kc)
+    if excluded is None:
+        excluded = _port_exclusions(
+            [shape_index.layer(layer) for layer in layers], port_points
+        )
+    # Remaining polygons, optionally inflated by clearance. The merged base
+    # region is cached by the shape index, so each clearance is one sizing.
+    return shape_index.obstruction_region(layers, excluded, buffer_dbu)
 
-    # Collect all obstruction polygons
-    all_polys = []
-    for layer in layers:
-        layer_idx = kc.kcl.layer(*layer)
-        r = kdb.Region(kc.begin_shapes_rec(layer_idx))
-        for poly in r.each():
-            all_polys.append(poly)
-
-    # Find and exclude ONLY polygons that contain port points
-    excluded_indices = set()
-    if port_points:
-        for px, py in port_points:
-            port_point = kdb.Point(px, py)
-            for i, poly in enumerate(all_polys):
-                if poly.inside(port_point):
-                    excluded_indices.add(i)
-                    break  # Only exclude ONE polygon per port
-
-    # Convert remaining polygons to region, optionally inflating by clearance.
-    obstruction_region = kdb.Region()
-    for i, poly in enumerate(all_polys):
-        if i not in excluded_indices:
-            obstruction_region.insert(poly)
-
-    if buffer_dbu > 0:
-        obstruction_region = obstruction_region.sized(buffer_dbu)
-
-    polys = []
-    for poly in obstruction_region.each():
-        pts = np.array([(p.x, p.y) for p in poly.each_point_hull()], dtype=np.int64)
-        if len(pts) >= 3:
-            polys.append(pts)
-
-    return polys
+
+def _port_exclusions(
+    layer_shapes, port_points: list[tuple[int, int]] | None
+) -> frozenset[tuple[int, int]]:
+    """(layer position, polygon index) of the polygons holding port points.
+
+    Only the first containing polygon in layer order is excluded, one per port.
+    """
+    excluded: set[tuple[int, int]] = set()
+    for px, py in port_points or ():
+        for layer_pos, shapes in enumerate(layer_shapes):
+            hits = shapes.containing(px, py)
+            if hits:
+                excluded.add((layer_pos, hits[0]))
+                break
+    return frozenset(excluded)
+
+
+def _region_polys(region, window: tuple[int, int, int, int] | None = None):
+    """Polygon point arrays of `region`, clipped to a DBU window if given.
+
+    The region order is kept; see ObstructionBuffer.from_region.
+    """
+    return list(ObstructionBuffer.from_region(region, window))
 
 
 def _get_pos_with_dir(port, dbu: float) -> tuple[int, int, str]:
@@ -638,7 +787,12 @@ def _below_cut_layer_for_metal(layer_tuple: tuple[int, int]) -> tuple[int, int]
     return mapping.get(layer_tuple)
 
 
-def _count_below_port_cuts(kc, port_poly, layer_tuple: tuple[int, int] | None) -> int:
+def _count_below_port_cuts(
+    kc,
+    port_poly,
+    layer_tuple: tuple[int, int] | None,
+    shape_index: ShapeIndex | None = None,
+) -> int:
     """Count lower-cut shapes whose centers are inside the selected port polygon."""
     from kfactory import kdb
 
@@ -648,11 +802,12 @@ def _count_below_port_cuts(kc, port_poly, layer_tuple: tuple[int, int] | None) -
     if cut_layer is None:
         return 0
 
-    cut_idx = kc.kcl.layer(*cut_layer)
-    cut_region = kdb.Region(kc.begin_shapes_rec(cut_idx))
+    if shape_index is None:
+        shape_index = ShapeIndex(kc)
+    cuts = shape_index.layer(cut_layer)
     count = 0
-    for cut in cut_region.each():
-        bbox = cut.bbox()
+    for i in cuts.touching(port_poly.bbox()):
+        bbox = cuts.polygons[i].bbox()
         center = kdb.Point((bbox.left + bbox.right) // 2, (bbox.bottom + bbox.top) // 2)
         if port_poly.inside(center):
             count += 1
@@ -889,6 +1044,7 @@ def _build_corner_patches_from_segments(
     plan_segments: list[
         tuple[tuple[float, float], tuple[float, float], tuple[int, int], float]
     ],
+    min_widths: dict[tuple[int, int], float] | None = None,
 ) -> list[tuple[tuple[float, float], tuple[int, int], float, float]]:
     """Build anisotropic corner patches from adjacent straight segments.
 
@@ -911,7 +1067,12 @@ def _build_corner_patches_from_segments(
         v_widths = [w for is_h, w in entries if not is_h]
         if not h_widths or not v_widths:
             continue
-        min_w = float(_DRC["min_width"][LAYER_M1 if layer == LAYER_M1 else LAYER_M2])
+        if min_widths is not None:
+            min_w = float(min_widths[layer])
+        else:
+            min_w = float(
+                _DRC["min_width"][LAYER_M1 if layer == LAYER_M1 else LAYER_M2]
+            )
         patch_w = max(min_w, max(h_widths))
         patch_h = max(min_w, max(v_widths))
         patches.append(((x, y), layer, patch_w, patch_h))
@@ -935,13 +1096,19 @@ def _transition_target_via_width(
     return max(widths)
 
 
-def _via_pad_candidates(target_pad_um: float) -> list[float]:
-    """Deterministic descending via-pad fallback ladder down to minimum legal pad."""
-    min_pad = _via_pad_size_um(0.0)
-    target = max(min_pad, float(target_pad_um))
+def _via_pad_candidates(
+    target_pad_um: float, via: RoutingVia | None = None
+) -> list[float]:
+    """Deterministic descending via-pad fallback ladder down to minimum legal pad.
+
+    Every pad of the ladder is canonical (see quantize_via_pad).
+    """
+    via = via or routing_stack().vias[0]
+    min_pad = _via_pad_size_um(0.0, via)
+    target = quantize_via_pad(max(min_pad, float(target_pad_um)), via)
     vals = [target]
     for scale in (0.85, 0.70, 0.55, 0.40, 0.25):
-        vals.append(max(min_pad, target * scale))
+        vals.append(quantize_via_pad(target * scale, via, round_up=False))
     vals.append(min_pad)
     out: list[float] = []
     for v in sorted(vals, reverse=True):
@@ -955,13 +1122,17 @@ def _get_port_geometry(
     kc,
     dbu: float,
     default_width: float = 0.25,
+    shape_index: ShapeIndex | None = None,
 ) -> PortGeometry:
-    """Extract axis-aware port geometry from the containing metal polygon."""
-    from kfactory import kdb
+    """Extract axis-aware port geometry from the containing metal polygon.
 
+    Results are memoized on the shape index by port position, layer and
+    `default_width`, and reused until shapes are added or removed around the
+    port polygon (see ShapeIndex.memo), so pins shared by many nets are
+    analyzed once per session.
+    """
     px_dbu = int(port.dcenter[0] / dbu)
     py_dbu = int(port.dcenter[1] / dbu)
-    port_point = kdb.Point(px_dbu, py_dbu)
 
     layer_tuple = None
     if hasattr(port, "layer"):
@@ -971,22 +1142,30 @@ def _get_port_geometry(
     if layer_tuple is None:
         return PortGeometry(default_width, default_width, "o", None, None, None, 0)
 
-    layer_idx = kc.kcl.layer(*layer_tuple)
-    region = kdb.Region(kc.begin_shapes_rec(layer_idx))
+    if shape_index is None:
+        shape_index = ShapeIndex(kc)
+    memo_key = ("port_geometry", px_dbu, py_dbu, layer_tuple, default_width)
+    cached = shape_index.memo(memo_key)
+    if cached is not None:
+        return cached
+    shapes = shape_index.layer(layer_tuple)
 
     best_poly = None
     best_area = 0
-    for poly in region.each():
-        if poly.inside(port_point):
-            area = poly.area()
-            if area > best_area:
-                best_area = area
-                best_poly = poly
+    for i in shapes.containing(px_dbu, py_dbu):
+        poly = shapes.polygons[i]
+        area = poly.area()
+        if area > best_area:
+            best_area = area
+            best_poly = poly
 
     if best_poly is None:
-        return PortGeometry(
+        geometry = PortGeometry(
             default_width, default_width, "o", None, None, layer_tuple, 0
         )
+        point = (px_dbu, py_dbu, px_dbu, py_dbu)
+        shape_index.remember(memo_key, geometry, [layer_tuple], point)
+        return geometry
 
     bbox = best_poly.bbox()
     x_extent_um = max(_DRC["min_width"][LAYER_M1], (bbox.right - bbox.left) * dbu)
@@ -994,9 +1173,11 @@ def _get_port_geometry(
     exit_dir = "h" if y_extent_um >= x_extent_um else "v"
     bbox_dbu = (bbox.left, bbox.bottom, bbox.right, bbox.top)
     dev_center = ((bbox.left + bbox.right) // 2, (bbox.bottom + bbox.top) // 2)
-    below_cut_count = _count_below_port_cuts(kc, best_poly, layer_tuple)
+    below_cut_count = _count_below_port_cuts(
+        kc, best_poly, layer_tuple, shape_index=shape_index
+    )
 
-    return PortGeometry(
+    geometry = PortGeometry(
         width_x=x_extent_um,
         width_y=y_extent_um,
         exit_dir=exit_dir,
@@ -1005,6 +1186,13 @@ def _get_port_geometry(
         layer_tuple=layer_tuple,
         below_cut_count=below_cut_count,
     )
+    # A larger polygon around the port or a new cut inside it changes the result.
+    layers = [layer_tuple]
+    cut_layer = _below_cut_layer_for_metal(layer_tuple)
+    if cut_layer is not None:
+        layers.append(cut_layer)
+    shape_index.remember(memo_key, geometry, layers, bbox_dbu)
+    return geometry
 
 
 def route_hierarchical_astar(
@@ -1017,11 +1205,24 @@ def route_hierarchical_astar(
     layers_to_avoid: Iterable[LayerSpec] = None,
     detail_margin: float = 5.0,  # Margin around corners for detail routing (um)
     clearance: float = 0.14,
+    shape_index: ShapeIndex | None = None,
+    window_margin: int = 8,
+    window_growth: float = 2.0,
+    guide: Sequence[tuple[float, float]] | None = None,
+    apply_detail: bool = False,
+    detail_workers: int | None = None,
 ) -> list[tuple[float, float]]:
     """Hierarchical two-phase routing: global then detailed.
 
-    Phase 1 (Global): Uses coarse grid to find general path quickly.
-    Phase 2 (Detailed): Refines path segments near obstacles with fine grid.
+    Phase 1 (Global): Uses coarse grid to find general path quickly, first in
+    a corridor around the ports that grows geometrically on failure.
+    Phase 2 (Detailed, only with apply_detail=True): Refines path segments
+    near obstacles with fine grid. The obstructions of all segment windows
+    are clipped from one index in a single pass, windows without obstructions
+    keep their global segment, and the other windows are searched in a
+    thread pool (see _refine_segments).
+
+    Each search only receives the obstructions inside its window.
 
     Args:
         c: Component to route in.
@@ -1033,6 +1234,18 @@ def route_hierarchical_astar(
         layers_to_avoid: Layers containing obstructions (polygons containing ports are auto-excluded).
         detail_margin: Margin around path for detailed routing refinement (um).
         clearance: Minimum obstruction offset in um.
+        shape_index: Per-layer shape index of the component, shared with the
+            calling router. Built on demand if omitted.
+        window_margin: Margin in global grid units of the first global search
+            window around the ports.
+        window_growth: Factor the window margin grows by after each failed
+            global search, up to the full area.
+        guide: Optional coarse route (um points, e.g. from plan_global_routes)
+            the first global search window must cover besides the ports.
+        apply_detail: Refine the global path with detail searches. Off by
+            default: the global path is returned as is.
+        detail_workers: Threads for the detail searches. None uses up to the
+            CPU count; 1 searches the windows one after the other.
 
     Returns:
         List of corner points in um, or None if no route found.
@@ -1042,6 +1255,8 @@ def route_hierarchical_astar(
 
     dbu = c.kcl.dbu
     kc = c.kcl.kcells[c.name]
+    if shape_index is None:
+        shape_index = ShapeIndex(kc)
 
     # Validate layers
     _layers = [
@@ -1060,8 +1275,12 @@ def route_hierarchical_astar(
 
     # Extract obstruction polygons, excluding polygons that contain ports
     buffer_dbu = int(round(max(0.0, clearance) / dbu))
-    polys = _extract_polys_for_layers(
-        kc, _layers, dbu, port_points, buffer_dbu=buffer_dbu
+    obstructions = _obstruction_region_for_layers(
+        kc,
+        _layers,
+        port_points,
+        buffer_dbu=buffer_dbu,
+        shape_index=shape_index,
     )
 
     # Invert stop orientation (port faces inward, we approach from opposite direction)
@@ -1080,10 +1299,8 @@ def route_hierarchical_astar(
     min_y = min(start_y, stop_y, comp_bbox.bottom) - padding
     max_y = max(start_y, stop_y, comp_bbox.top) + padding
 
-    bbox_tuple = (max_y, max_x, min_y, min_x)
-
     # ========== PHASE 1: GLOBAL ROUTING ==========
-    print(f"[GLOBAL] Routing with grid_unit={global_grid_unit}um...")
+    logger.debug("[GLOBAL] Routing with grid_unit=%sum...", global_grid_unit)
 
     global_grid_dbu = int(global_grid_unit / dbu)
     width_dbu = int(width / dbu)
@@ -1091,115 +1308,189 @@ def route_hierarchical_astar(
     global_straight_width += (global_straight_width + 1) % 2
     global_bend_radius = max(1, (width_dbu + global_grid_dbu - 1) // global_grid_dbu)
 
-    # Try with exact orientations first
-    global_corners = _run_astar_rectilinear(
-        polys=polys,
-        start_pos=start_pos,
-        stop_pos=stop_pos,
-        bbox_tuple=bbox_tuple,
-        grid_unit_dbu=global_grid_dbu,
-        straight_width=global_straight_width,
-        bend_radius=global_bend_radius,
+    corridor_points = [(start_x, start_y), (stop_x, stop_y)]
+    if guide is not None:
+        corridor_points.extend(
+            (int(round(x / dbu)), int(round(y / dbu))) for x, y in guide
+        )
+    windows = corridor_windows(
+        corridor_points,
+        margin=max(1, window_margin) * global_grid_dbu,
+        limit=(min_x, min_y, max_x, max_y),
+        growth=window_growth,
     )
+    global_corners = None
+    for window_idx, window in enumerate(windows, start=1):
+        polys = _region_polys(obstructions, window)
+        bbox_tuple = (window[3], window[2], window[1], window[0])
+        logger.debug(
+            "[GLOBAL] window %s/%s with %s obstructions",
+            window_idx,
+            len(windows),
+            len(polys),
+        )
 
-    # Fallback to omnidirectional if failed
-    if global_corners is None:
-        print("[GLOBAL] Retrying with relaxed orientations...")
-        start_relaxed = (start_pos[0], start_pos[1], "o")
-        stop_relaxed = (stop_pos[0], stop_pos[1], "o")
+        # Try with exact orientations first
         global_corners = _run_astar_rectilinear(
             polys=polys,
-            start_pos=start_relaxed,
-            stop_pos=stop_relaxed,
+            start_pos=start_pos,
+            stop_pos=stop_pos,
             bbox_tuple=bbox_tuple,
             grid_unit_dbu=global_grid_dbu,
             straight_width=global_straight_width,
             bend_radius=global_bend_radius,
         )
 
+        # Fallback to omnidirectional if failed
+        if global_corners is None:
+            logger.debug("[GLOBAL] Retrying with relaxed orientations...")
+            start_relaxed = (start_pos[0], start_pos[1], "o")
+            stop_relaxed = (stop_pos[0], stop_pos[1], "o")
+            global_corners = _run_astar_rectilinear(
+                polys=polys,
+                start_pos=start_relaxed,
+                stop_pos=stop_relaxed,
+                bbox_tuple=bbox_tuple,
+                grid_unit_dbu=global_grid_dbu,
+                straight_width=global_straight_width,
+                bend_radius=global_bend_radius,
+            )
+        if global_corners and len(global_corners) >= 2:
+            break
+
     # Check for no route found (None or empty list)
     if not global_corners or len(global_corners) < 2:
-        print("[GLOBAL] No route found!")
+        logger.warning("[GLOBAL] No route found!")
         return None
 
-    print(f"[GLOBAL] Found path with {len(global_corners)} corners")
+    logger.info("[GLOBAL] Found path with %s corners", len(global_corners))
 
     # Convert to um
     global_path_um = [(p[0] * dbu, p[1] * dbu) for p in global_corners]
 
     # If no obstructions or detail not needed, return global path
-    if not polys or detail_grid_unit >= global_grid_unit:
-        print("[DETAIL] Skipping (no obstructions or detail not finer than global)")
+    if (
+        not apply_detail
+        or obstructions.is_empty()
+        or detail_grid_unit >= global_grid_unit
+    ):
+        logger.debug(
+            "[DETAIL] Skipping (not requested, no obstructions or detail not "
+            "finer than global)"
+        )
         return global_path_um
 
     # ========== PHASE 2: DETAILED ROUTING ==========
-    print(f"[DETAIL] Refining with grid_unit={detail_grid_unit}um...")
+    logger.debug("[DETAIL] Refining with grid_unit=%sum...", detail_grid_unit)
 
     detail_grid_dbu = int(detail_grid_unit / dbu)
     detail_straight_width = max(width, width_dbu // detail_grid_dbu + 1)
     detail_straight_width += (detail_straight_width + 1) % 2
     detail_bend_radius = max(1, (width_dbu + detail_grid_dbu - 1) // detail_grid_dbu)
-    margin_dbu = int(detail_margin / dbu)
+    refined_path = _refine_segments(
+        global_corners,
+        obstructions,
+        margin_dbu=int(detail_margin / dbu),
+        grid_unit_dbu=detail_grid_dbu,
+        straight_width=detail_straight_width,
+        bend_radius=detail_bend_radius,
+        max_workers=detail_workers,
+    )
+    logger.debug("[DETAIL] Refined path has %s corners", len(refined_path))
+
+    # Convert to um
+    refined_path_um = [(p[0] * dbu, p[1] * dbu) for p in refined_path]
+    return refined_path_um
 
-    # Refine each segment of the global path
-    refined_path = [global_corners[0]]
 
-    for i in range(len(global_corners) - 1):
-        seg_start = global_corners[i]
-        seg_end = global_corners[i + 1]
+def _refine_segments(
+    corners: Sequence[tuple[int, int]],
+    obstructions,
+    margin_dbu: int,
+    grid_unit_dbu: int,
+    straight_width: int,
+    bend_radius: int,
+    max_workers: int | None = None,
+) -> list[tuple[int, int]]:
+    """Refine each segment of a global path with a detail search in its window.
 
-        # Create tight bounding box around this segment
-        seg_min_x = min(seg_start[0], seg_end[0]) - margin_dbu
-        seg_max_x = max(seg_start[0], seg_end[0]) + margin_dbu
-        seg_min_y = min(seg_start[1], seg_end[1]) - margin_dbu
-        seg_max_y = max(seg_start[1], seg_end[1]) + margin_dbu
-        seg_bbox = (seg_max_y, seg_max_x, seg_min_y, seg_min_x)
+    The windows (segment bbox grown by `margin_dbu`) take their obstructions
+    from one ObstructionBuffer and BoxIndex built over all windows at once.
+    Windows without obstructions keep their segment unsearched. The searches
+    are independent, so they run in a thread pool; the refined segments are
+    stitched in path order, and a failed search keeps its segment.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    from kfactory import kdb
 
-        # Determine segment directions
+    segments = list(zip(corners, corners[1:]))
+    windows = [
+        (
+            min(a[0], b[0]) - margin_dbu,
+            min(a[1], b[1]) - margin_dbu,
+            max(a[0], b[0]) + margin_dbu,
+            max(a[1], b[1]) + margin_dbu,
+        )
+        for a, b in segments
+    ]
+    # One clip to the union of the windows, then a box query per window.
+    union = kdb.Region()
+    for window in windows:
+        union.insert(kdb.Box(*window))
+    buffer = ObstructionBuffer.from_region(obstructions & union)
+    index = BoxIndex(map(tuple, buffer.boxes.tolist()))
+    hits = [index.query(window, strict=False) for window in windows]
+
+    def search(k: int):
+        if not hits[k]:
+            return None
+        (seg_start, seg_end), window = segments[k], windows[k]
         dx = seg_end[0] - seg_start[0]
         dy = seg_end[1] - seg_start[1]
-
         if abs(dx) > abs(dy):  # Horizontal segment
             start_dir = "e" if dx > 0 else "w"
             end_dir = "w" if dx > 0 else "e"
         else:  # Vertical segment
             start_dir = "n" if dy > 0 else "s"
             end_dir = "s" if dy > 0 else "n"
-
-        seg_start_pos = (seg_start[0], seg_start[1], start_dir)
-        seg_end_pos = (seg_end[0], seg_end[1], end_dir)
-
-        # Try detailed routing for this segment
-        print("detailed...")
-        detail_corners = _run_astar_rectilinear(
-            polys=polys,
-            start_pos=seg_start_pos,
-            stop_pos=seg_end_pos,
-            bbox_tuple=seg_bbox,
-            grid_unit_dbu=detail_grid_dbu,
-            straight_width=detail_straight_width,
-            bend_radius=detail_bend_radius,
+        left, bottom, right, top = window
+        return _run_astar_rectilinear(
+            polys=[buffer[i] for i in hits[k]],
+            start_pos=(seg_start[0], seg_start[1], start_dir),
+            stop_pos=(seg_end[0], seg_end[1], end_dir),
+            bbox_tuple=(top, right, bottom, left),
+            grid_unit_dbu=grid_unit_dbu,
+            straight_width=straight_width,
+            bend_radius=bend_radius,
         )
-        detail_corners = None
 
-        if detail_corners and len(detail_corners) > 1:
+    blocked = sum(bool(window_hits) for window_hits in hits)
+    logger.debug("[DETAIL] %s of %s windows hold obstructions", blocked, len(windows))
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    workers = max(1, min(max_workers, blocked))
+    if workers == 1:
+        details = [search(k) for k in range(len(segments))]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            details = list(pool.map(search, range(len(segments))))
+
+    refined = [corners[0]]
+    for (_, seg_end), detail in zip(segments, details):
+        if detail and len(detail) > 1:
             # Add detailed path (skip first point as it's same as last added)
-            refined_path.extend(detail_corners[1:])
+            refined.extend(tuple(p) for p in detail[1:])
         else:
-            # Keep original segment if detail routing fails
-            refined_path.append(seg_end)
-
-    print(f"[DETAIL] Refined path has {len(refined_path)} corners")
-
-    # Convert to um
-    refined_path_um = [(p[0] * dbu, p[1] * dbu) for p in refined_path]
-    return refined_path_um
+            refined.append(seg_end)
+    return refined
 
 
 # Minimum segment length to draw (skip segments shorter than this)
 MIN_SEGMENT_LENGTH = 0.01  # 10nm minimum
 
 
+@traced("emit_geometry")
 def _draw_route_segments(
     c: Component,
     points_um: list[tuple[float, float]],
@@ -1209,6 +1500,8 @@ def _draw_route_segments(
     horizontal_layer: tuple = LAYER_M1,
     vertical_layer: tuple = LAYER_M2,
     add_vias: bool = True,
+    *,
+    writer: RouteGeometryWriter,
 ) -> list[Port]:
     """Draw metal segments and vias for a route path.
 
@@ -1221,6 +1514,8 @@ def _draw_route_segments(
         horizontal_layer: Layer tuple for horizontal segments.
         vertical_layer: Layer tuple for vertical segments.
         add_vias: If True, add vias at corners between horizontal and vertical segments.
+        writer: Geometry writer for `c`. The caller flushes it, which also
+            draws the segment port markers.
 
     Returns:
         List of ports added to segments (empty if add_segment_ports=False).
@@ -1230,10 +1525,7 @@ def _draw_route_segments(
     # If single-layer routing (checking if layers are same), add corner patches
     if horizontal_layer == vertical_layer:
         for p in points_um:
-            patch = c.add_ref(
-                gf.components.rectangle(size=(width, width), layer=horizontal_layer)
-            )
-            patch.dcenter = p
+            writer.rect(p, (width, width), horizontal_layer)
 
     if len(points_um) < 2:
         return segment_ports
@@ -1249,73 +1541,64 @@ def _draw_route_segments(
             continue  # Skip this zero-length segment entirely
 
         horiz = _is_horizontal(p_curr, p_next)
-
-        if horiz:
-            # Horizontal segment
-            x_min = min(p_curr[0], p_next[0])
-            x_max = max(p_curr[0], p_next[0])
-            length = x_max - x_min
-            y = p_curr[1]
-
-            if length >= 0.001:
-                rect = c.add_ref(
-                    gf.components.rectangle(
-                        size=(length, width), layer=horizontal_layer
-                    )
-                )
-                rect.dmove((x_min, y - width / 2))
-
-                # Add port at segment center if requested
-                if add_segment_ports:
-                    port_center = (x_min + length / 2, y)
-                    port_name = f"{port_name_prefix}"
-                    port = c.add_port(
-                        name=port_name,
-                        center=port_center,
-                        width=0.01,
-                        orientation=0,  # Horizontal segment
-                        layer=(horizontal_layer[0], 16),
-                        port_type="electrical",
-                    )
-                    segment_ports.append(port)
-                    c.draw_ports()
-        else:
-            # Vertical segment
-            y_min = min(p_curr[1], p_next[1])
-            y_max = max(p_curr[1], p_next[1])
-            length = y_max - y_min
-            x = p_curr[0]
-
-            if length >= 0.001:
-                rect = c.add_ref(
-                    gf.components.rectangle(size=(width, length), layer=vertical_layer)
-                )
-                rect.dmove((x - width / 2, y_min))
-
-                # Add port at segment center if requested
-                if add_segment_ports:
-                    port_center = (x, y_min + length / 2)
-                    port_name = f"{port_name_prefix}"
-                    port = c.add_port(
-                        name=port_name,
-                        center=port_center,
-                        width=0.01,
-                        orientation=90,  # Vertical segment
-                        layer=(vertical_layer[0], 16),
-                        port_type="electrical",
-                    )
-                    segment_ports.append(port)
-                    c.draw_ports()
+        layer = horizontal_layer if horiz else vertical_layer
+        drawn = writer.segment(p_curr, p_next, width, layer)
+
+        # Add port at segment center if requested
+        if drawn is not None and add_segment_ports:
+            port = writer.port(
+                name=f"{port_name_prefix}",
+                center=drawn[0],
+                width=0.01,
+                orientation=0 if horiz else 90,
+                layer=(layer[0], 16),
+                port_type="electrical",
+            )
+            segment_ports.append(port)
 
         # Place via at each corner (intermediate points only)
         if add_vias and i < len(points_um) - 2:
             via_w = _via_pad_size_um(width)
-            via = c.add_ref(via_m1_m2(width=via_w, length=via_w))
-            via.dcenter = p_next
+            writer.via(_via_component(None, via_w), p_next)
+
+    return segment_ports
+
 
+def _emit_planned_geometry(
+    writer: RouteGeometryWriter,
+    patches: Sequence[tuple[tuple[float, float], tuple[int, int], float, float]],
+    vias: Sequence[tuple[tuple[float, float], float, int]],
+    segments: Sequence[
+        tuple[tuple[float, float], tuple[float, float], tuple[int, int], float]
+    ],
+    stack: RoutingStack,
+    add_segment_ports: bool,
+    port_name_prefix: str,
+) -> list[Port]:
+    """Draw planned corner patches, vias and segments; return segment ports."""
+    for center, layer, patch_w, patch_h in patches:
+        writer.rect(center, (patch_w, patch_h), layer)
+
+    for center, via_w, z in vias:
+        writer.via(_via_component(stack.vias[z], via_w), center)
+
+    segment_ports: list[Port] = []
+    for p0, p1, layer, seg_w in segments:
+        drawn = writer.segment(p0, p1, seg_w, layer)
+        if drawn is not None and add_segment_ports:
+            port = writer.port(
+                name=f"{port_name_prefix}",
+                center=drawn[0],
+                width=0.01,
+                orientation=0 if drawn[1] else 90,
+                layer=(layer[0], 16),
+                port_type="electrical",
+            )
+            segment_ports.append(port)
     return segment_ports
 
 
+@traced("emit_geometry")
 def _draw_dynamic_geometry_for_corners(
     c: Component,
     corners_3d: list[tuple[int, int, int]],
@@ -1324,22 +1607,37 @@ def _draw_dynamic_geometry_for_corners(
     body_width: float,
     width: float,
     dynamic_width: bool,
-    m1_polys: list[np.ndarray],
-    m2_polys: list[np.ndarray],
+    polys_per_layer: Sequence[list[np.ndarray]],
     start_xy_dbu: tuple[int, int],
     stop_xy_dbu: tuple[int, int],
     dbu: float,
     clearance: float,
     add_segment_ports: bool,
     port_name_prefix: str,
+    stack: RoutingStack | None = None,
+    *,
+    writer: RouteGeometryWriter,
+    layer_bboxes: list[BoxIndex] | None = None,
 ) -> list[Port] | None:
     """Draw dynamic-width route geometry from layered corners.
 
+    Args:
+        polys_per_layer: Obstruction polygons per stack layer.
+        stack: Routing layers the corner layer indices refer to (met1/met2 if
+            omitted).
+        writer: Geometry writer for `c`. The caller flushes it, which also
+            draws the segment port markers.
+        layer_bboxes: Obstruction boxes per stack layer from
+            _layer_obstruction_boxes_um, to share them between calls for one
+            net. Built from `polys_per_layer` if omitted.
+
     Returns:
         List of segment ports if drawing succeeds, otherwise None.
     """
     if len(corners_3d) < 2:
         return []
+    if stack is None:
+        stack = routing_stack()
 
     seg_widths = _build_segment_widths_dynamic(
         corners_3d=corners_3d,
@@ -1351,41 +1649,14 @@ def _draw_dynamic_geometry_for_corners(
     )
     min_seg_w = max(float(_DRC["min_width"][LAYER_M1]), float(width))
     seg_widths = [_snap_even_dbu_width_um(sw, dbu, min_seg_w) for sw in seg_widths]
-    min_seg_w = max(float(_DRC["min_width"][LAYER_M1]), float(width))
-    seg_widths = [_snap_even_dbu_width_um(sw, dbu, min_seg_w) for sw in seg_widths]
 
-    port_points_um = [
-        (start_xy_dbu[0] * dbu, start_xy_dbu[1] * dbu),
-        (stop_xy_dbu[0] * dbu, stop_xy_dbu[1] * dbu),
-    ]
-    m1_bboxes = []
-    m2_bboxes = []
-    for poly in m1_polys:
-        if len(poly) >= 3:
-            box = (
-                float(poly[:, 0].min()) * dbu,
-                float(poly[:, 1].min()) * dbu,
-                float(poly[:, 0].max()) * dbu,
-                float(poly[:, 1].max()) * dbu,
-            )
-            if not any(
-                box[0] <= px <= box[2] and box[1] <= py <= box[3]
-                for px, py in port_points_um
-            ):
-                m1_bboxes.append(box)
-    for poly in m2_polys:
-        if len(poly) >= 3:
-            box = (
-                float(poly[:, 0].min()) * dbu,
-                float(poly[:, 1].min()) * dbu,
-                float(poly[:, 0].max()) * dbu,
-                float(poly[:, 1].max()) * dbu,
-            )
-            if not any(
-                box[0] <= px <= box[2] and box[1] <= py <= box[3]
-                for px, py in port_points_um
-            ):
-                m2_bboxes.append(box)
+    if layer_bboxes is None:
+        layer_bboxes = _layer_obstruction_boxes_um(
+            polys_per_layer, start_xy_dbu, stop_xy_dbu, dbu
+        )
+    bboxes_by_layer = dict(zip(stack.layer_tuples, layer_bboxes))
+    min_widths = {layer.layer: layer.min_width for layer in stack.layers}
+    horizontal_first = {layer.layer: layer.direction == "h" for layer in stack.layers}
 
     width_profiles: list[list[float]] = [list(seg_widths)]
     if dynamic_width and seg_widths:
@@ -1413,31 +1684,20 @@ def _draw_dynamic_geometry_for_corners(
             _, _, z1 = corners_trial[i + 1]
             if z0 == z1:
                 continue
+            via_def = stack.via(z0, z1)
             target_w = _transition_target_via_width(
                 corners_trial, seg_widths_trial, i, width
             )
             target_pad = _snap_even_dbu_width_um(
-                _via_pad_size_um(target_w),
-                dbu,
-                max(
-                    float(_DRC["min_via_pad"][LAYER_M1]),
-                    float(_DRC["min_via_pad"][LAYER_M2]),
-                ),
+                _via_pad_size_um(target_w, via_def), dbu, via_def.min_pad
             )
             base_center = (x0 * dbu, y0 * dbu)
             allow_relocate = i > 0 and (i + 1) < (len(corners_trial) - 1)
             resolved = None
             chosen_pad = None
             tried_pads = set()
-            for via_pad_raw in _via_pad_candidates(target_pad):
-                via_pad = _snap_even_dbu_width_um(
-                    via_pad_raw,
-                    dbu,
-                    max(
-                        float(_DRC["min_via_pad"][LAYER_M1]),
-                        float(_DRC["min_via_pad"][LAYER_M2]),
-                    ),
-                )
+            for via_pad_raw in _via_pad_candidates(target_pad, via_def):
+                via_pad = _snap_even_dbu_width_um(via_pad_raw, dbu, via_def.min_pad)
                 key = int(round(via_pad / dbu))
                 if key in tried_pads:
                     continue
@@ -1445,13 +1705,14 @@ def _draw_dynamic_geometry_for_corners(
                 candidate = _resolve_legal_via_center(
                     base_center_um=base_center,
                     via_pad_um=via_pad,
-                    m1_bboxes=m1_bboxes,
-                    m2_bboxes=m2_bboxes,
+                    m1_bboxes=layer_bboxes[min(z0, z1)],
+                    m2_bboxes=layer_bboxes[max(z0, z1)],
                     dbu=dbu,
                     relocate_step_um=max(clearance, 0.14),
                     relocate_radius_um=max(1.0, 2.0 * clearance),
                     max_candidates=64,
                     allow_relocate=allow_relocate,
+                    via=via_def,
                 )
                 if candidate is None:
                     continue
@@ -1475,7 +1736,7 @@ def _draw_dynamic_geometry_for_corners(
         plan_segments: list[
             tuple[tuple[float, float], tuple[float, float], tuple[int, int], float]
         ] = []
-        plan_vias: list[tuple[tuple[float, float], float]] = []
+        plan_vias: list[tuple[tuple[float, float], float, int]] = []
 
         def _plan_add_segment(
             p0: tuple[float, float],
@@ -1489,11 +1750,11 @@ def _draw_dynamic_geometry_for_corners(
             if dx < MIN_SEGMENT_LENGTH and dy < MIN_SEGMENT_LENGTH:
                 return
             if dx > 0.001 and dy > 0.001:
-                mid = (p1[0], p0[1]) if layer == LAYER_M1 else (p0[0], p1[1])
+                mid = (p1[0], p0[1]) if horizontal_first[layer] else (p0[0], p1[1])
                 _plan_add_segment(p0, mid, layer, seg_w)
                 _plan_add_segment(mid, p1, layer, seg_w)
                 return
-            _segments.append((p0, p1, layer, seg_w))
+            _segments.append((p0, p1, layer, max(seg_w, min_widths[layer])))
 
         for i in range(len(corners_trial) - 1):
             x0, y0, z0 = corners_trial[i]
@@ -1502,48 +1763,49 @@ def _draw_dynamic_geometry_for_corners(
             p0 = (x0 * dbu, y0 * dbu)
             p1 = (x1 * dbu, y1 * dbu)
             if z0 != z1:
+                via_def = stack.via(z0, z1)
                 via_pad = via_pad_by_transition.get(
                     i,
                     _snap_even_dbu_width_um(
                         _via_pad_size_um(
                             _transition_target_via_width(
                                 corners_trial, seg_widths_trial, i, width
-                            )
+                            ),
+                            via_def,
                         ),
                         dbu,
-                        max(
-                            float(_DRC["min_via_pad"][LAYER_M1]),
-                            float(_DRC["min_via_pad"][LAYER_M2]),
-                        ),
+                        via_def.min_pad,
                     ),
                 )
-                plan_vias.append((p0, via_pad))
-                _plan_add_segment(p0, p1, LAYER_M1 if z1 == 0 else LAYER_M2, seg_w)
+                plan_vias.append((p0, via_pad, min(z0, z1)))
+                _plan_add_segment(p0, p1, stack.layers[z1].layer, seg_w)
             else:
-                _plan_add_segment(p0, p1, LAYER_M1 if z0 == 0 else LAYER_M2, seg_w)
+                _plan_add_segment(p0, p1, stack.layers[z0].layer, seg_w)
 
-        plan_patches = _build_corner_patches_from_segments(plan_segments)
+        plan_patches = _build_corner_patches_from_segments(plan_segments, min_widths)
 
         if not geom_blocked:
             for p0, p1, layer, seg_w in plan_segments:
                 seg_box = _segment_envelope_um(p0, p1, seg_w)
-                target = m1_bboxes if layer == LAYER_M1 else m2_bboxes
-                if any(_bbox_overlap(seg_box, obox) for obox in target):
+                if any_box_overlap(seg_box, bboxes_by_layer[layer]):
                     geom_blocked = True
                     break
 
         if not geom_blocked:
             for center, layer, patch_w, patch_h in plan_patches:
                 patch_box = _rect_envelope_um(center, patch_w, patch_h)
-                target = m1_bboxes if layer == LAYER_M1 else m2_bboxes
-                if any(_bbox_overlap(patch_box, obox) for obox in target):
+                if any_box_overlap(patch_box, bboxes_by_layer[layer]):
                     geom_blocked = True
                     break
 
         if not geom_blocked:
-            for center, via_w in plan_vias:
+            for center, via_w, z in plan_vias:
                 if not _is_via_legal_on_both_layers(
-                    center, via_w, m1_bboxes, m2_bboxes
+                    center,
+                    via_w,
+                    layer_bboxes[z],
+                    layer_bboxes[z + 1],
+                    stack.vias[z],
                 ):
                     geom_blocked = True
                     break
@@ -1552,68 +1814,45 @@ def _draw_dynamic_geometry_for_corners(
             continue
 
         if trial_idx > 0:
-            print(
-                f"[ROUTE] Dynamic straight width downgraded by profile {trial_idx} "
-                "for legal geometry."
+            logger.debug(
+                "[ROUTE] Dynamic straight width downgraded by profile %s for legal "
+                "geometry.",
+                trial_idx,
             )
 
-        segment_ports: list[Port] = []
-        for center, layer, patch_w, patch_h in plan_patches:
-            patch = c.add_ref(
-                gf.components.rectangle(size=(patch_w, patch_h), layer=layer)
-            )
-            patch.dcenter = center
+        return _emit_planned_geometry(
+            writer,
+            plan_patches,
+            plan_vias,
+            plan_segments,
+            stack,
+            add_segment_ports,
+            port_name_prefix,
+        )
 
-        for center, via_w in plan_vias:
-            via = c.add_ref(via_m1_m2(width=via_w, length=via_w))
-            via.dcenter = center
+    return None
 
-        for p0, p1, layer, seg_w in plan_segments:
-            is_horiz = abs(p1[1] - p0[1]) < 0.001
-            if is_horiz:
-                x_min = min(p0[0], p1[0])
-                x_max = max(p0[0], p1[0])
-                seg_len = x_max - x_min
-                if seg_len >= 0.001:
-                    rect = c.add_ref(
-                        gf.components.rectangle(size=(seg_len, seg_w), layer=layer)
-                    )
-                    rect.dmove((x_min, p0[1] - seg_w / 2))
-                    if add_segment_ports:
-                        port = c.add_port(
-                            name=f"{port_name_prefix}",
-                            center=(x_min + seg_len / 2, p0[1]),
-                            width=0.01,
-                            orientation=0,
-                            layer=(layer[0], 16),
-                            port_type="electrical",
-                        )
-                        segment_ports.append(port)
-                        c.draw_ports()
-            else:
-                y_min = min(p0[1], p1[1])
-                y_max = max(p0[1], p1[1])
-                seg_len = y_max - y_min
-                if seg_len >= 0.001:
-                    rect = c.add_ref(
-                        gf.components.rectangle(size=(seg_w, seg_len), layer=layer)
-                    )
-                    rect.dmove((p0[0] - seg_w / 2, y_min))
-                    if add_segment_ports:
-                        port = c.add_port(
-                            name=f"{port_name_prefix}",
-                            center=(p0[0], y_min + seg_len / 2),
-                            width=0.01,
-                            orientation=90,
-                            layer=(layer[0], 16),
-                            port_type="electrical",
-                        )
-                        segment_ports.append(port)
-                        c.draw_ports()
 
-        return segment_ports
+def _corners_to_polyline(
+    corners_3d: Sequence[tuple[int, int, int]],
+    dbu: float,
+    layers: Sequence[tuple[int, int]] = (LAYER_M1, LAYER_M2),
+) -> list[tuple[float, float, tuple[int, int]]]:
+    """Convert (x_dbu, y_dbu, layer_idx) corners to RouteResult polyline points."""
+    return [(x * dbu, y * dbu, layers[z]) for x, y, z in corners_3d]
 
-    return None
+
+def _finish_route_result(
+    result: RouteResult, ports: list[Port], return_result: bool
+) -> list[Port] | RouteResult:
+    """Finalize `result` from the drawn geometry and pick the return value."""
+    result.ports = list(ports)
+    result.success = bool(result.polylines)
+    if result.success:
+        result.failure_reason = None
+    elif result.failure_reason is None:
+        result.failure_reason = "no geometry drawn"
+    return result if return_result else ports
 
 
 def route_hierarchical(
@@ -1631,7 +1870,11 @@ def route_hierarchical(
     add_segment_ports: bool = False,
     port_name_prefix: str = "seg",
     dynamic_width: bool = True,
-) -> list[Port]:
+    return_result: bool = False,
+    guide: Sequence[tuple[float, float]] | None = None,
+    emit_shapes: bool = True,
+    apply_detail: bool = False,
+) -> list[Port] | RouteResult:
     """Route using hierarchical two-phase approach: global then detailed.
 
     This is the recommended routing function for designs with:
@@ -1639,7 +1882,8 @@ def route_hierarchical(
     - Small features (<1um) that need to be avoided
 
     Phase 1 (Global): Uses coarse 2um grid to find general path quickly.
-    Phase 2 (Detailed): Refines path with fine 0.25um grid near obstacles.
+    Phase 2 (Detailed, with apply_detail=True): Refines path with fine 0.25um
+    grid near obstacles.
 
     Polygons containing the start/end ports are automatically excluded from
     obstructions, allowing the router to connect to ports on device metal.
@@ -1663,12 +1907,71 @@ def route_hierarchical(
         deterministic: Enable deterministic candidate ordering/tie-breaks.
         add_segment_ports: If True, add a port to each straight segment.
         port_name_prefix: Prefix for port names (default: "seg").
+        return_result: If True, return a RouteResult with geometry, metrics
+            and timings instead of the port list.
+        guide: Optional coarse route (um points, e.g. from plan_global_routes)
+            the global search window must cover besides the ports.
+        emit_shapes: Draw wires as plain shapes of `c` instead of one
+            rectangle cell reference per segment.
+        apply_detail: Refine the global path with detail searches (see
+            route_hierarchical_astar).
 
     Returns:
-        List of ports added to segments (empty if add_segment_ports=False or routing fails).
+        List of ports added to segments (empty if add_segment_ports=False or routing fails),
+        or a RouteResult if return_result=True.
     """
+    result = RouteResult(router="hierarchical")
+    with result.timed("total"):
+        ports = _route_hierarchical(
+            c,
+            start,
+            stop,
+            global_grid_unit=global_grid_unit,
+            detail_grid_unit=detail_grid_unit,
+            width=width,
+            layers_to_avoid=layers_to_avoid,
+            detail_margin=detail_margin,
+            clearance=clearance,
+            clearance_ladder=clearance_ladder,
+            deterministic=deterministic,
+            add_segment_ports=add_segment_ports,
+            port_name_prefix=port_name_prefix,
+            dynamic_width=dynamic_width,
+            result=result,
+            guide=guide,
+            emit_shapes=emit_shapes,
+            apply_detail=apply_detail,
+        )
+    return _finish_route_result(result, ports, return_result)
+
+
+def _route_hierarchical(
+    c: Component,
+    start: Port,
+    stop: Port,
+    global_grid_unit: float = 2.0,
+    detail_grid_unit: float = 0.25,
+    width: float = 0.25,
+    layers_to_avoid: Iterable[LayerSpec] = None,
+    detail_margin: float = 5.0,
+    clearance: float = 0.14,
+    clearance_ladder: tuple[float, ...] = (0.14, 0.10, 0.07),
+    deterministic: bool = True,
+    add_segment_ports: bool = False,
+    port_name_prefix: str = "seg",
+    dynamic_width: bool = True,
+    *,
+    result: RouteResult,
+    shape_index: ShapeIndex | None = None,
+    guide: Sequence[tuple[float, float]] | None = None,
+    emit_shapes: bool = True,
+    apply_detail: bool = False,
+) -> list[Port]:
+    """Body of route_hierarchical; records geometry and failures on `result`."""
     dbu = c.kcl.dbu
     kc = c.kcl.kcells[c.name]
+    if shape_index is None:
+        shape_index = ShapeIndex(kc)
     _layers = [
         layer if isinstance(layer, tuple) else (layer, 0)
         for layer in (layers_to_avoid or [])
@@ -1712,17 +2015,22 @@ def route_hierarchical(
         return False
 
     # Get the hierarchical path
-    path = route_hierarchical_astar(
-        c=c,
-        start=start,
-        stop=stop,
-        global_grid_unit=global_grid_unit,
-        detail_grid_unit=detail_grid_unit,
-        width=width,
-        layers_to_avoid=layers_to_avoid,
-        detail_margin=detail_margin,
-        clearance=clearance,
-    )
+    with result.timed("search"):
+        path = route_hierarchical_astar(
+            c=c,
+            start=start,
+            stop=stop,
+            global_grid_unit=global_grid_unit,
+            detail_grid_unit=detail_grid_unit,
+            width=width,
+            layers_to_avoid=layers_to_avoid,
+            detail_margin=detail_margin,
+            clearance=clearance,
+            shape_index=shape_index,
+            guide=guide,
+            apply_detail=apply_detail,
+        )
+    result.clearance = clearance
 
     # Validate A* result including required corner/start-end vias.
     use_m2_horiz = False
@@ -1734,28 +2042,38 @@ def route_hierarchical(
         buffer_dbu = int(round(max(0.0, clearance) / dbu))
         m1_polys = (
             _extract_polys_for_layers(
-                kc, [LAYER_M1], dbu, port_points_dbu, buffer_dbu=buffer_dbu
+                kc,
+                [LAYER_M1],
+                dbu,
+                port_points_dbu,
+                buffer_dbu=buffer_dbu,
+                shape_index=shape_index,
             )
             if LAYER_M1 in _layers
             else []
         )
         m2_polys = (
             _extract_polys_for_layers(
-                kc, [LAYER_M2], dbu, port_points_dbu, buffer_dbu=buffer_dbu
+                kc,
+                [LAYER_M2],
+                dbu,
+                port_points_dbu,
+                buffer_dbu=buffer_dbu,
+                shape_index=shape_index,
             )
             if LAYER_M2 in _layers
             else []
         )
-        m1_bboxes = [
+        m1_bboxes = BoxIndex(
             b
             for b in _poly_bboxes_um(m1_polys)
             if not _bbox_contains_any_point(b, port_points_um)
-        ]
-        m2_bboxes = [
+        )
+        m2_bboxes = BoxIndex(
             b
             for b in _poly_bboxes_um(m2_polys)
             if not _bbox_contains_any_point(b, port_points_um)
-        ]
+        )
 
         path_blocked = False
         for i in range(len(path) - 1):
@@ -1764,7 +2082,7 @@ def route_hierarchical(
             seg_layer = LAYER_M1 if _is_horizontal(p0, p1) else LAYER_M2
             seg_box = _segment_envelope_um(p0, p1, width)
             target = m1_bboxes if seg_layer == LAYER_M1 else m2_bboxes
-            if any(_bbox_overlap(seg_box, obox) for obox in target):
+            if any_box_overlap(seg_box, target):
                 path_blocked = True
                 break
 
@@ -1786,7 +2104,7 @@ def route_hierarchical(
                     break
 
         if path_blocked:
-            print(
+            logger.debug(
                 "[ROUTE] Initial A* path violates corner/via obstruction clearance; "
                 "switching to via-escape search."
             )
@@ -1794,7 +2112,7 @@ def route_hierarchical(
 
     # If M1 routing failed, try deterministic via-escape strategy.
     if path is None:
-        print(
+        logger.debug(
             "[VIA-ESCAPE] M1 routing blocked - trying deterministic escape routing..."
         )
 
@@ -1845,8 +2163,8 @@ def route_hierarchical(
         def _candidate_blocking_boxes(
             candidate_path: list[tuple[float, float]],
             use_m2_horiz: bool,
-            m1_bboxes: list[tuple[float, float, float, float]],
-            m2_bboxes: list[tuple[float, float, float, float]],
+            m1_bboxes: Sequence[tuple[float, float, float, float]],
+            m2_bboxes: Sequence[tuple[float, float, float, float]],
             via_pad_w: float,
             via_pad_h: float,
             start_layer: tuple[int, int] | None,
@@ -1862,9 +2180,7 @@ def route_hierarchical(
                 )
                 seg_box = _segment_envelope_um(p0, p1, width)
                 target_bboxes = m1_bboxes if seg_layer == LAYER_M1 else m2_bboxes
-                for obox in target_bboxes:
-                    if _bbox_overlap(seg_box, obox):
-                        blocking.append(obox)
+                blocking.extend(overlapping_boxes(seg_box, target_bboxes))
             via_points = _candidate_via_points(
                 candidate_path, use_m2_horiz, start_layer, stop_layer
             )
@@ -1892,31 +2208,45 @@ def route_hierarchical(
             buffer_dbu = int(round(max(0.0, clearance_try) / dbu))
             m1_polys = (
                 _extract_polys_for_layers(
-                    kc, [LAYER_M1], dbu, port_points_dbu, buffer_dbu=buffer_dbu
+                    kc,
+                    [LAYER_M1],
+                    dbu,
+                    port_points_dbu,
+                    buffer_dbu=buffer_dbu,
+                    shape_index=shape_index,
                 )
                 if LAYER_M1 in _layers
                 else []
             )
             m2_polys = (
                 _extract_polys_for_layers(
-                    kc, [LAYER_M2], dbu, port_points_dbu, buffer_dbu=buffer_dbu
+                    kc,
+                    [LAYER_M2],
+                    dbu,
+                    port_points_dbu,
+                    buffer_dbu=buffer_dbu,
+                    shape_index=shape_index,
                 )
                 if LAYER_M2 in _layers
                 else []
             )
-            m1_bboxes = [
+            m1_bboxes = BoxIndex(
                 b
                 for b in _poly_bboxes_um(m1_polys)
                 if not _bbox_contains_any_point(b, port_points_um)
-            ]
-            m2_bboxes = [
+            )
+            m2_bboxes = BoxIndex(
                 b
                 for b in _poly_bboxes_um(m2_polys)
                 if not _bbox_contains_any_point(b, port_points_um)
-            ]
-            print(
-                f"[VIA-ESCAPE] attempt {attempt_idx}/{len(clearance_attempts)} "
-                f"clearance={clearance_try:.3f}um m1_obs={len(m1_bboxes)} m2_obs={len(m2_bboxes)}"
+            )
+            logger.debug(
+                "[VIA-ESCAPE] attempt %s/%s clearance=%.3fum m1_obs=%s m2_obs=%s",
+                attempt_idx,
+                len(clearance_attempts),
+                clearance_try,
+                len(m1_bboxes),
+                len(m2_bboxes),
             )
 
             direct_candidates = [
@@ -2148,7 +2478,7 @@ def route_hierarchical(
             for name, candidate in candidate_paths:
                 simplified = _simplify_path(candidate)
                 if not _is_valid_manhattan_path(simplified):
-                    print(f"[VIA-ESCAPE] Path '{name}': INVALID")
+                    logger.debug("[VIA-ESCAPE] Path '%s': INVALID", name)
                     continue
 
                 use_m2_horiz_candidate = _candidate_uses_m2_horiz(name)
@@ -2176,9 +2506,13 @@ def route_hierarchical(
                     for px, py in simplified
                 )
                 rank = (length, vias, bends, lex_key) if deterministic else (length,)
-                print(
-                    f"[VIA-ESCAPE] Path '{name}': length={length:.3f}um vias={vias} bends={bends} "
-                    f"{'BLOCKED' if is_blocked else 'CLEAR'}"
+                logger.debug(
+                    "[VIA-ESCAPE] Path '%s': length=%.3fum vias=%s bends=%s %s",
+                    name,
+                    length,
+                    vias,
+                    bends,
+                    "BLOCKED" if is_blocked else "CLEAR",
                 )
                 if is_blocked:
                     continue
@@ -2194,9 +2528,12 @@ def route_hierarchical(
             if best_choice is not None:
                 path = best_choice["path"]
                 use_m2_horiz = best_choice["use_m2_horiz"]
-                print(
-                    f"[VIA-ESCAPE] Selected '{best_choice['name']}' on clearance {clearance_try:.3f}um "
-                    f"(length={best_choice['length']:.3f}um)"
+                result.clearance = clearance_try
+                logger.info(
+                    "[VIA-ESCAPE] Selected '%s' on clearance %.3fum (length=%.3fum)",
+                    best_choice["name"],
+                    clearance_try,
+                    best_choice["length"],
                 )
                 break
 
@@ -2205,8 +2542,8 @@ def route_hierarchical(
         use_m2_horiz = False
 
     if path is None:
-        print("Hierarchical routing failed - no path found on M1 or M2")
-        return []
+        logger.warning("Hierarchical routing failed - no path found on M1 or M2")
+        return result.fail("no path found on M1 or M2")
 
     # Force first and last points to exact port centers
     path[0] = tuple(start.dcenter)
@@ -2216,8 +2553,8 @@ def route_hierarchical(
     path = _make_manhattan(path)
     path = _simplify_path(path)
 
-    print(f"Route from {start.dcenter} to {stop.dcenter}")
-    print(f"Final path ({len(path)} points): {path}")
+    logger.debug("Route from %s to %s", start.dcenter, stop.dcenter)
+    logger.debug("Final path (%s points): %s", len(path), path)
 
     # Draw the segments - this enforces Horizontal=M1, Vertical=M2
     # Unless use_m2_horiz is True, in which case Horizontal=M2
@@ -2228,25 +2565,39 @@ def route_hierarchical(
     # Final via legality guard (both layers) just before drawing.
     via_guard_buffer_dbu = int(round(max(0.0, clearance) / dbu))
     via_guard_m1 = _extract_polys_for_layers(
-        kc, [LAYER_M1], dbu, port_points_dbu, buffer_dbu=via_guard_buffer_dbu
+        kc,
+        [LAYER_M1],
+        dbu,
+        port_points_dbu,
+        buffer_dbu=via_guard_buffer_dbu,
+        shape_index=shape_index,
     )
     via_guard_m2 = _extract_polys_for_layers(
-        kc, [LAYER_M2], dbu, port_points_dbu, buffer_dbu=via_guard_buffer_dbu
+        kc,
+        [LAYER_M2],
+        dbu,
+        port_points_dbu,
+        buffer_dbu=via_guard_buffer_dbu,
+        shape_index=shape_index,
     )
-    m1_via_bboxes = [
+    m1_via_bboxes = BoxIndex(
         b
         for b in _poly_bboxes_um(via_guard_m1)
         if not _bbox_contains_any_point(b, port_points_um)
-    ]
-    m2_via_bboxes = [
+    )
+    m2_via_bboxes = BoxIndex(
         b
         for b in _poly_bboxes_um(via_guard_m2)
         if not _bbox_contains_any_point(b, port_points_um)
-    ]
+    )
 
     if dynamic_width:
-        start_geom = _get_port_geometry(start, kc, dbu, default_width=width)
-        stop_geom = _get_port_geometry(stop, kc, dbu, default_width=width)
+        start_geom = _get_port_geometry(
+            start, kc, dbu, default_width=width, shape_index=shape_index
+        )
+        stop_geom = _get_port_geometry(
+            stop, kc, dbu, default_width=width, shape_index=shape_index
+        )
         selected_endpoint, selected_axis = _selected_polygon_meta(start_geom, stop_geom)
         body_width = max(
             _DRC["min_width"][LAYER_M1],
@@ -2274,7 +2625,7 @@ def route_hierarchical(
             return 1
 
         if len(path) < 2:
-            return []
+            return result.fail("path collapsed to a single point")
 
         start_layer_tuple = _get_layer_tuple_local(start, c)
         stop_layer_tuple = _get_layer_tuple_local(stop, c)
@@ -2306,6 +2657,11 @@ def route_hierarchical(
                 out.append((out[-1][0], out[-1][1], stop_layer_idx))
             return out
 
+        start_xy_dbu = (int(round(start_x / dbu)), int(round(start_y / dbu)))
+        stop_xy_dbu = (int(round(stop_x / dbu)), int(round(stop_y / dbu)))
+        via_guard_boxes = _layer_obstruction_boxes_um(
+            [via_guard_m1, via_guard_m2], start_xy_dbu, stop_xy_dbu, dbu
+        )
         for axis_mode in ("hard", "prefer", "off"):
             path_trial = list(path)
             if axis_mode != "off":
@@ -2320,35 +2676,43 @@ def route_hierarchical(
             if len(path_trial) < 2:
                 continue
             corners_3d = _build_corners_from_path(path_trial)
-            dyn_ports = _draw_dynamic_geometry_for_corners(
-                c=c,
-                corners_3d=corners_3d,
-                start_geom=start_geom,
-                stop_geom=stop_geom,
-                body_width=body_width,
-                width=width,
-                dynamic_width=True,
-                m1_polys=via_guard_m1,
-                m2_polys=via_guard_m2,
-                start_xy_dbu=(int(round(start_x / dbu)), int(round(start_y / dbu))),
-                stop_xy_dbu=(int(round(stop_x / dbu)), int(round(stop_y / dbu))),
-                dbu=dbu,
-                clearance=clearance,
-                add_segment_ports=add_segment_ports,
-                port_name_prefix=port_name_prefix,
-            )
+            with result.timed("draw"):
+                writer = RouteGeometryWriter(c, emit_shapes, shape_index)
+                dyn_ports = _draw_dynamic_geometry_for_corners(
+                    c=c,
+                    corners_3d=corners_3d,
+                    start_geom=start_geom,
+                    stop_geom=stop_geom,
+                    body_width=body_width,
+                    width=width,
+                    dynamic_width=True,
+                    polys_per_layer=[via_guard_m1, via_guard_m2],
+                    start_xy_dbu=start_xy_dbu,
+                    stop_xy_dbu=stop_xy_dbu,
+                    dbu=dbu,
+                    clearance=clearance,
+                    add_segment_ports=add_segment_ports,
+                    port_name_prefix=port_name_prefix,
+                    writer=writer,
+                    layer_bboxes=via_guard_boxes,
+                )
+                writer.flush()
             if dyn_ports is not None:
+                result.add_polyline(_corners_to_polyline(corners_3d, dbu))
                 if axis_mode == "prefer":
-                    print(
-                        "[ROUTE] Axis policy downgraded to prefer for legal fallback geometry."
+                    logger.debug(
+                        "[ROUTE] Axis policy downgraded to prefer for legal fallback "
+                        "geometry."
                     )
                 elif axis_mode == "off":
-                    print(
-                        "[ROUTE] Axis policy downgraded to off for legal fallback geometry."
+                    logger.debug(
+                        "[ROUTE] Axis policy downgraded to off for legal fallback "
+                        "geometry."
                     )
                 return dyn_ports
-        print(
-            "[ROUTE] Dynamic fallback geometry blocked; downgrading to fixed-width fallback."
+        logger.debug(
+            "[ROUTE] Dynamic fallback geometry blocked; downgrading to fixed-width "
+            "fallback."
         )
 
     # Final segment and corner legality guard before any drawing.
@@ -2358,25 +2722,27 @@ def route_hierarchical(
         seg_layer = horiz_layer if _is_horizontal(p0, p1) else vert_layer
         seg_box = _segment_envelope_um(p0, p1, width)
         seg_obs = m1_via_bboxes if seg_layer == LAYER_M1 else m2_via_bboxes
-        if any(_bbox_overlap(seg_box, obox) for obox in seg_obs):
-            print(
-                "[ROUTE] Final planned segment blocked on "
-                f"{'M1' if seg_layer == LAYER_M1 else 'M2'}; aborting route."
+        if any_box_overlap(seg_box, seg_obs):
+            logger.warning(
+                "[ROUTE] Final planned segment blocked on %s; aborting route.",
+                "M1" if seg_layer == LAYER_M1 else "M2",
             )
-            return []
+            return result.fail("planned segment blocked")
 
     # Same-layer bends materialize as square corner patches in _draw_route_segments.
     if horiz_layer == vert_layer and len(path) >= 3:
         patch_obs = m1_via_bboxes if horiz_layer == LAYER_M1 else m2_via_bboxes
         for corner in path[1:-1]:
             patch_box = _via_envelope_um(corner, width, width)
-            if any(_bbox_overlap(patch_box, obox) for obox in patch_obs):
-                print(
-                    "[ROUTE] Final planned corner patch blocked on "
-                    f"{'M1' if horiz_layer == LAYER_M1 else 'M2'} at "
-                    f"({corner[0]:.3f}, {corner[1]:.3f}); aborting route."
+            if any_box_overlap(patch_box, patch_obs):
+                logger.warning(
+                    "[ROUTE] Final planned corner patch blocked on %s "
+                    "at (%.3f, %.3f); aborting route.",
+                    "M1" if horiz_layer == LAYER_M1 else "M2",
+                    corner[0],
+                    corner[1],
                 )
-                return []
+                return result.fail("planned corner patch blocked")
 
     if add_vias:
         via_pad = _via_pad_size_um(width)
@@ -2384,11 +2750,13 @@ def route_hierarchical(
             if not _is_via_legal_on_both_layers(
                 via_pt, via_pad, m1_via_bboxes, m2_via_bboxes
             ):
-                print(
-                    "[ROUTE] Intermediate via blocked on M1/M2 at "
-                    f"({via_pt[0]:.3f}, {via_pt[1]:.3f}); aborting route."
+                logger.warning(
+                    "[ROUTE] Intermediate via blocked on M1/M2 at (%.3f, %.3f); "
+                    "aborting route.",
+                    via_pt[0],
+                    via_pt[1],
                 )
-                return []
+                return result.fail("intermediate via blocked")
 
     # Pre-check start/end transition vias before any geometry is drawn.
     start_transition_via = None
@@ -2411,11 +2779,13 @@ def route_hierarchical(
             if not _is_via_legal_on_both_layers(
                 start_transition_via, via_w, m1_via_bboxes, m2_via_bboxes
             ):
-                print(
-                    "[ROUTE] Start transition via blocked on M1/M2 at "
-                    f"({start_transition_via[0]:.3f}, {start_transition_via[1]:.3f}); aborting route."
+                logger.warning(
+                    "[ROUTE] Start transition via blocked on M1/M2 at (%.3f, %.3f); "
+                    "aborting route.",
+                    start_transition_via[0],
+                    start_transition_via[1],
                 )
-                return []
+                return result.fail("start transition via blocked")
 
         last_horiz = _is_horizontal(path[-2], path[-1])
         last_layer = horiz_layer if last_horiz else vert_layer
@@ -2426,34 +2796,49 @@ def route_hierarchical(
             if not _is_via_legal_on_both_layers(
                 stop_transition_via, via_w, m1_via_bboxes, m2_via_bboxes
             ):
-                print(
-                    "[ROUTE] Stop transition via blocked on M1/M2 at "
-                    f"({stop_transition_via[0]:.3f}, {stop_transition_via[1]:.3f}); aborting route."
+                logger.warning(
+                    "[ROUTE] Stop transition via blocked on M1/M2 at (%.3f, %.3f); "
+                    "aborting route.",
+                    stop_transition_via[0],
+                    stop_transition_via[1],
                 )
-                return []
+                return result.fail("stop transition via blocked")
 
-    segment_ports = _draw_route_segments(
-        c,
-        path,
-        width,
-        add_segment_ports=add_segment_ports,
-        port_name_prefix=port_name_prefix,
-        horizontal_layer=horiz_layer,
-        vertical_layer=vert_layer,
-        add_vias=add_vias,
-    )
+    with result.timed("draw"):
+        writer = RouteGeometryWriter(c, emit_shapes, shape_index)
+        segment_ports = _draw_route_segments(
+            c,
+            path,
+            width,
+            add_segment_ports=add_segment_ports,
+            port_name_prefix=port_name_prefix,
+            horizontal_layer=horiz_layer,
+            vertical_layer=vert_layer,
+            add_vias=add_vias,
+            writer=writer,
+        )
 
-    # Handle start/end layer transitions
-    # This automatically adds vias if start/end ports (M1) don't match first/last segment M2
-    if start_transition_via is not None:
-        via_w = _via_pad_size_um(width)
-        via = c.add_ref(via_m1_m2(width=via_w, length=via_w))
-        via.dcenter = start_transition_via
+        # Handle start/end layer transitions
+        # This automatically adds vias if start/end ports (M1) don't match first/last segment M2
+        if start_transition_via is not None:
+            via_w = _via_pad_size_um(width)
+            writer.via(_via_component(None, via_w), start_transition_via)
+
+        if stop_transition_via is not None:
+            via_w = _via_pad_size_um(width)
+            writer.via(_via_component(None, via_w), stop_transition_via)
+        writer.flush()
 
+    polyline = []
+    if start_transition_via is not None:
+        polyline.append((path[0][0], path[0][1], start_layer))
+    for p0, p1 in zip(path, path[1:]):
+        seg_layer = horiz_layer if _is_horizontal(p0, p1) else vert_layer
+        polyline.append((p0[0], p0[1], seg_layer))
+        polyline.append((p1[0], p1[1], seg_layer))
     if stop_transition_via is not None:
-        via_w = _via_pad_size_um(width)
-        via = c.add_ref(via_m1_m2(width=via_w, length=via_w))
-        via.dcenter = stop_transition_via
+        polyline.append((path[-1][0], path[-1][1], stop_layer))
+    result.add_polyline(polyline)
 
     return segment_ports
 
@@ -2473,15 +2858,31 @@ def route_multilayer_3d(
     clearance: float = 0.14,
     clearance_ladder: tuple[float, ...] = (0.14, 0.10, 0.07),
     deterministic: bool = True,
-) -> list[Port]:
+    route_cache: RouteCache | bool | None = None,
+    return_result: bool = False,
+    session: RoutingSession | None = None,
+    routing_layers: Sequence[str | tuple[int, int]] = ("met1", "met2"),
+    via_costs: dict[tuple[str, str], float] | None = None,
+    guide: Sequence[tuple[float, float]] | None = None,
+    window_margin: int = 8,
+    window_growth: float = 2.0,
+    emit_shapes: bool = True,
+    journal: RouteJournal | None = None,
+    journal_key: str | None = None,
+    progress: ProgressCallback | None = None,
+    budget: float | None = None,
+    cancel: CancellationToken | None = None,
+) -> list[Port] | RouteResult:
     """Route using the new 3D multi-layer A* router.
 
     This uses the Rust-based show_3d function which builds a 3D grid
     with per-layer obstructions and finds a path using cost-weighted A*.
 
-    Metal 1 (layer 0) is treated as Horizontal-preferred.
-    Metal 2 (layer 1) is treated as Vertical-preferred.
-    Vias are placed automatically at layer transitions.
+    The grid has one layer per metal of `routing_layers` (met1 and met2 by
+    default). Preferred directions, minimum widths and the via cell of each
+    layer pair come from ``sky130.routing_layers`` (met1 horizontal, met2
+    vertical, alternating up the stack). Vias are placed automatically at
+    layer transitions.
 
     Args:
         c: Component to add the route to.
@@ -2499,36 +2900,280 @@ def route_multilayer_3d(
         clearance: Preferred minimum obstruction offset in um.
         clearance_ladder: Deterministic fallback offsets in um.
         deterministic: Enable deterministic routing retry behavior.
+        route_cache: Cache for 3D search results, off by default. True uses
+            the process-wide default cache (see ``sky130.route_cache``), a
+            RouteCache instance a cache owned by the caller.
+        return_result: If True, return a RouteResult with geometry, metrics
+            and timings instead of the port list.
+        session: RoutingSession of `c` shared by the nets of a multi-net run.
+            Obstruction layers are then flattened once and only updated with
+            newly routed geometry.
+        routing_layers: Contiguous metals to route on, by name ("li1",
+            "met1", ... "met5") or layer tuple; ("met1", "met4") means met1
+            through met4.
+        via_costs: Via cost per metal pair overriding `via_cost`, e.g.
+            {("met3", "met4"): 20.0}. The 3D search takes a single via cost,
+            so it uses the cheapest pair's and issues a RouteWarning;
+            route_nets_negotiated plans with the per-pair costs.
+        guide: Optional coarse route (um points, e.g. from a global router)
+            the first search window must cover besides the endpoints.
+        window_margin: Margin in grid units of the first search window around
+            the endpoints (and guide). Only obstructions inside the window are
+            passed to the search, so search cost follows net length rather
+            than cell size.
+        window_growth: Factor the window margin grows by after each failed
+            search, up to the full area (cell bbox and endpoints plus half
+            the endpoint distance).
+        emit_shapes: Draw wires and corner patches as plain shapes of `c`
+            (vias stay via cell references). False adds one rectangle cell
+            reference per wire and patch instead.
+        journal: RouteJournal to replay the net from and record it into. If
+            its entry for the net has the same endpoints and settings and no
+            obstacle near the recorded geometry changed, the geometry is
+            drawn again without a search.
+        journal_key: Key of the net in `journal`. Defaults to the start and
+            stop port names.
+        progress: Called with a RouteEvent when the net starts and ends, for
+            each clearance step and before the hierarchical fallback (see
+            ``sky130.routing_control``).
+        budget: Wall-clock seconds for the net. Once spent, no further
+            clearance step, window, retry or fallback is tried and the net
+            fails with "time budget exceeded".
+        cancel: CancellationToken checked at the same points; once set the
+            net fails with the token's reason.
 
     Returns:
-        List of ports added to segments.
+        List of ports added to segments, or a RouteResult if return_result=True.
+    """
+    result = RouteResult(router="multilayer_3d")
+    control = RouteControl(progress, budget, cancel)
+    control.emit("net_start")
+    stop_reason = control.stop_reason()
+    if stop_reason is not None:
+        result.fail(stop_reason)
+        return _finish_net(control, result, [], return_result)
+    recording = None
+    if journal is not None:
+        if session is None:
+            session = RoutingSession(c.kcl.kcells[c.name])
+        if journal_key is None:
+            journal_key = f"{start.name}:{stop.name}"
+        obstacle_layers = list(routing_stack(routing_layers).layer_tuples)
+        for layer in layers_to_avoid or []:
+            layer = layer if isinstance(layer, tuple) else (layer, 0)
+            if layer not in obstacle_layers:
+                obstacle_layers.append(layer)
+        fingerprint = RouteCache.make_key(
+            "route_multilayer_3d",
+            _port_spec(start, c),
+            _port_spec(stop, c),
+            grid_unit,
+            width,
+            dynamic_width,
+            obstacle_layers,
+            add_segment_ports,
+            port_name_prefix,
+            via_cost,
+            wrong_way_penalty,
+            clearance,
+            clearance_ladder,
+            via_costs,
+            guide,
+            emit_shapes,
+        )
+        with result.timed("replay"):
+            replayed = journal.replay(
+                journal_key, fingerprint, c, session, obstacle_layers, emit_shapes
+            )
+        if replayed is not None:
+            ports, polylines = replayed
+            for polyline in polylines:
+                result.add_polyline(polyline)
+            result.replayed = True
+            return _finish_net(control, result, ports, return_result)
+        recording = journal.start(session, obstacle_layers)
+    with result.timed("total"):
+        ports = _route_multilayer_3d(
+            c,
+            start,
+            stop,
+            grid_unit=grid_unit,
+            width=width,
+            dynamic_width=dynamic_width,
+            layers_to_avoid=layers_to_avoid,
+            add_segment_ports=add_segment_ports,
+            port_name_prefix=port_name_prefix,
+            via_cost=via_cost,
+            wrong_way_penalty=wrong_way_penalty,
+            clearance=clearance,
+            clearance_ladder=clearance_ladder,
+            deterministic=deterministic,
+            route_cache=route_cache,
+            result=result,
+            session=session,
+            routing_layers=routing_layers,
+            via_costs=via_costs,
+            guide=guide,
+            window_margin=window_margin,
+            window_growth=window_growth,
+            emit_shapes=emit_shapes,
+            control=control,
+        )
+    if recording is not None:
+        journal.finish(
+            journal_key,
+            fingerprint,
+            session,
+            recording,
+            result.polylines or None,
+        )
+    return _finish_net(control, result, ports, return_result)
+
+
+def _finish_net(
+    control: RouteControl,
+    result: RouteResult,
+    ports: list[Port],
+    return_result: bool,
+) -> list[Port] | RouteResult:
+    """_finish_route_result, then report the outcome as a "net_done" event."""
+    out = _finish_route_result(result, ports, return_result)
+    control.emit("net_done", success=result.success, reason=result.failure_reason)
+    return out
+
+
+def _show_3d(engine, buffers: Sequence[ObstructionBuffer], **kwargs):
+    """Call ``engine.show_3d`` with the obstructions of each layer.
+
+    show_3d takes one point array per polygon (``polys_per_layer``), so the
+    buffers are split into per-polygon views here; the flat arrays only serve
+    the cache digest and the obstruction boxes.
+    """
+    return engine.show_3d(polys_per_layer=[list(b) for b in buffers], **kwargs)
+
+
+def _route_multilayer_3d(
+    c: Component,
+    start: Port,
+    stop: Port,
+    grid_unit: float = 1.0,
+    width: float = 0.25,
+    dynamic_width: bool = True,
+    layers_to_avoid: Iterable[LayerSpec] = None,
+    add_segment_ports: bool = False,
+    port_name_prefix: str = "seg",
+    via_cost: float = 10.0,
+    wrong_way_penalty: float = 8.0,
+    clearance: float = 0.14,
+    clearance_ladder: tuple[float, ...] = (0.14, 0.10, 0.07),
+    deterministic: bool = True,
+    route_cache: RouteCache | bool | None = None,
+    *,
+    result: RouteResult,
+    session: RoutingSession | None = None,
+    planned_corners: list[tuple[int, int, int]] | None = None,
+    routing_layers: Sequence[str | tuple[int, int]] = ("met1", "met2"),
+    via_costs: dict[tuple[str, str], float] | None = None,
+    guide: Sequence[tuple[float, float]] | None = None,
+    window_margin: int = 8,
+    window_growth: float = 2.0,
+    emit_shapes: bool = True,
+    control: RouteControl | None = None,
+) -> list[Port]:
+    """Body of route_multilayer_3d; records geometry and failures on `result`.
+
+    With `planned_corners` (DBU corners from a global planner such as the
+    negotiated-congestion router) the 3D search is skipped and the plan goes
+    straight to cleanup, legality checks and drawing. `control` is checked
+    before each clearance step, window, retry and the fallback.
     """
     from doroutes import doroutes as _doroutes
+    from kfactory import kdb
 
     if layers_to_avoid is None:
         layers_to_avoid = []
+    if control is None:
+        control = RouteControl()
 
     dbu = c.kcl.dbu
     kc = c.kcl.kcells[c.name]
+    if session is not None:
+        session.sync()
+        shape_index = session
+    else:
+        shape_index = ShapeIndex(kc)
 
     _layers = [
         layer if isinstance(layer, tuple) else (layer, 0) for layer in layers_to_avoid
     ]
+    stack = routing_stack(routing_layers)
+    pair_via_costs = stack.via_costs(via_cost, via_costs)
+    num_layers = len(stack)
+    if planned_corners is None and len(set(pair_via_costs)) > 1:
+        warnings.warn(
+            RouteWarning(
+                "show_3d takes a single via cost: per-pair via_costs "
+                f"{pair_via_costs} are searched with the cheapest, "
+                f"{min(pair_via_costs)} (route_nets_negotiated plans with "
+                "per-pair costs)",
+                0,
+                "via_costs_ignored",
+            ),
+            stacklevel=3,
+        )
+
+    def _fallback_to_hierarchical(reason: str) -> list[Port]:
+        # The hierarchical router only knows met1/met2.
+        if stack.layer_tuples != [LAYER_M1, LAYER_M2] and not {
+            start_layer,
+            stop_layer,
+        } <= {LAYER_M1, LAYER_M2}:
+            logger.warning(
+                "[3D ROUTE] No hierarchical fallback for ports on %s/%s",
+                start_layer,
+                stop_layer,
+            )
+            return result.fail(reason)
+        result.fallback = "hierarchical"
+        result.fallback_reason = reason
+        return _route_hierarchical(
+            c,
+            start,
+            stop,
+            global_grid_unit=grid_unit * 2,
+            detail_grid_unit=grid_unit,
+            width=width,
+            dynamic_width=dynamic_width,
+            layers_to_avoid=layers_to_avoid,
+            clearance=clearance,
+            clearance_ladder=clearance_ladder,
+            deterministic=deterministic,
+            add_segment_ports=add_segment_ports,
+            port_name_prefix=port_name_prefix,
+            result=result,
+            shape_index=shape_index,
+            guide=guide,
+            emit_shapes=emit_shapes,
+        )
 
     # Get port positions
     start_pos = _get_pos_with_dir(start, dbu)
     stop_pos = _get_pos_with_dir(stop, dbu)
 
     # Geometry-aware widths for dynamic mode.
-    start_geom = _get_port_geometry(start, kc, dbu, default_width=width)
-    stop_geom = _get_port_geometry(stop, kc, dbu, default_width=width)
+    start_geom = _get_port_geometry(
+        start, kc, dbu, default_width=width, shape_index=shape_index
+    )
+    stop_geom = _get_port_geometry(
+        stop, kc, dbu, default_width=width, shape_index=shape_index
+    )
     selected_poly, selected_axis = _selected_polygon_meta(start_geom, stop_geom)
     selected_straight_width = _selected_straight_width(start_geom, stop_geom, width)
     if dynamic_width:
         start_width = max(width, start_geom.width_x, start_geom.width_y)
         stop_width = max(width, stop_geom.width_x, stop_geom.width_y)
         body_width = max(
-            _DRC["min_width"][LAYER_M1],
+            stack.layers[0].min_width,
             min(
                 start_geom.width_x,
                 start_geom.width_y,
@@ -2551,7 +3196,7 @@ def route_multilayer_3d(
         (stop_pos[0], stop_pos[1]),
     ]
 
-    # Bounding box
+    # Full search area, the last of the search windows below.
     start_x, start_y = start_pos[0], start_pos[1]
     stop_x, stop_y = stop_pos[0], stop_pos[1]
     dist = max(abs(stop_x - start_x), abs(stop_y - start_y))
@@ -2563,8 +3208,6 @@ def route_multilayer_3d(
     min_y = min(start_y, stop_y, comp_bbox.bottom) - padding
     max_y = max(start_y, stop_y, comp_bbox.top) + padding
 
-    bbox_tuple = (max_y, max_x, min_y, min_x)
-
     grid_unit_dbu = int(grid_unit / dbu)
 
     # Helper to get layer tuple from port
@@ -2575,17 +3218,11 @@ def route_multilayer_3d(
             return (info.layer, info.datatype)
         return None
 
-    # Determine start/stop layer from port layer
-    start_layer_idx = 0  # Default to M1
-    stop_layer_idx = 0
-
+    # Determine start/stop layer from port layer, defaulting to the bottom layer.
     start_layer = _get_layer_tuple_local(start, c)
     stop_layer = _get_layer_tuple_local(stop, c)
-
-    if start_layer == LAYER_M2:
-        start_layer_idx = 1
-    if stop_layer == LAYER_M2:
-        stop_layer_idx = 1
+    start_layer_idx = stack.index(start_layer) or 0
+    stop_layer_idx = stack.index(stop_layer) or 0
 
     # Prepare start/stop with layer info
     start_3d = (start_x, start_y, start_layer_idx, start_pos[2])
@@ -2594,46 +3231,116 @@ def route_multilayer_3d(
     # Debug: show grid dimensions
     grid_w = (max_x - min_x) // grid_unit_dbu
     grid_h = (max_y - min_y) // grid_unit_dbu
-    print(
-        f"[3D ROUTE] Grid: {grid_w}x{grid_h} x 2 layers = {grid_w * grid_h * 2} cells"
+    result.grid_shape = (int(grid_w), int(grid_h), num_layers)
+    logger.debug(
+        "[3D ROUTE] Grid: %sx%s x %s layers (%s) = %s cells",
+        grid_w,
+        grid_h,
+        num_layers,
+        "/".join(stack.names),
+        grid_w * grid_h * num_layers,
     )
-    print(
-        f"[3D ROUTE] from ({start_x * dbu:.3f}, {start_y * dbu:.3f}, L{start_layer_idx}) "
-        f"to ({stop_x * dbu:.3f}, {stop_y * dbu:.3f}, L{stop_layer_idx})"
+    logger.debug(
+        "[3D ROUTE] from (%.3f, %.3f, L%s) to (%.3f, %.3f, L%s)",
+        start_x * dbu,
+        start_y * dbu,
+        start_layer_idx,
+        stop_x * dbu,
+        stop_y * dbu,
+        stop_layer_idx,
     )
-    print(
-        f"[3D ROUTE] BBox: ({min_x * dbu:.1f}, {min_y * dbu:.1f}) -> ({max_x * dbu:.1f}, {max_y * dbu:.1f})"
+    logger.debug(
+        "[3D ROUTE] BBox: (%.1f, %.1f) -> (%.1f, %.1f)",
+        min_x * dbu,
+        min_y * dbu,
+        max_x * dbu,
+        max_y * dbu,
     )
-    print(
-        f"[3D ROUTE] widths dynamic={dynamic_width} "
-        f"start={start_width:.3f}um body={body_width:.3f}um stop={stop_width:.3f}um "
-        f"selected={selected_poly} selected_straight={selected_straight_width:.3f}um "
-        f"selected_axis={selected_axis}"
+    logger.debug(
+        "[3D ROUTE] widths dynamic=%s start=%.3fum body=%.3fum stop=%.3fum "
+        "selected=%s selected_straight=%.3fum selected_axis=%s",
+        dynamic_width,
+        start_width,
+        body_width,
+        stop_width,
+        selected_poly,
+        selected_straight_width,
+        selected_axis,
     )
 
     # Wider search clearance in dynamic mode to honor endpoint/body widths.
-    max_wire_width = max(
-        start_width, stop_width, body_width, _DRC["min_width"][LAYER_M1]
-    )
+    max_wire_width = max(start_width, stop_width, body_width, stack.layers[0].min_width)
     wire_half_width_dbu = int(max_wire_width / 2 / dbu) if dynamic_width else 0
+    cache = resolve_route_cache(route_cache)
 
     def _show_3d_with_width(bbox_value, grid_unit_value, polys_per_layer):
         kwargs = dict(
-            polys_per_layer=polys_per_layer,
             start=start_3d,
             stop=stop_3d,
             bbox=bbox_value,
             grid_unit=grid_unit_value,
-            layer_directions=["h", "v"],
-            via_cost=via_cost,
+            layer_directions=stack.directions,
+            via_cost=min(pair_via_costs, default=via_cost),
             wrong_way_penalty=wrong_way_penalty,
         )
-        if dynamic_width and wire_half_width_dbu > 0:
-            try:
-                return _doroutes.show_3d(wire_half_width=wire_half_width_dbu, **kwargs)
-            except TypeError:
-                pass
-        return _doroutes.show_3d(**kwargs)
+        cache_key = None
+        if cache is not None:
+            layer_arrays = []
+            for buffer in polys_per_layer:
+                layer_arrays.append(np.array([len(buffer)], dtype=np.int64))
+                layer_arrays.extend(buffer.arrays())
+            cache_key = cache.make_key(
+                "route_multilayer_3d",
+                start_3d,
+                stop_3d,
+                bbox_value,
+                grid_unit_value,
+                stack.names,
+                pair_via_costs,
+                wrong_way_penalty,
+                wire_half_width_dbu if dynamic_width else 0,
+                array_digest(layer_arrays),
+            )
+            cached = cache.get(cache_key)
+            if cached is not None:
+                if cached["error"] is not None:
+                    raise RuntimeError(cached["error"])
+                return [tuple(corner) for corner in cached["corners"]], cached[
+                    "num_vias"
+                ]
+
+        try:
+            with span("search_3d", grid_unit=grid_unit_value):
+                if dynamic_width and wire_half_width_dbu > 0:
+                    try:
+                        result = _show_3d(
+                            _doroutes,
+                            polys_per_layer,
+                            wire_half_width=wire_half_width_dbu,
+                            **kwargs,
+                        )
+                    except TypeError as e:
+                        # Builds of show_3d without wire_half_width.
+                        if "wire_half_width" not in str(e):
+                            raise
+                        result = _show_3d(_doroutes, polys_per_layer, **kwargs)
+                else:
+                    result = _show_3d(_doroutes, polys_per_layer, **kwargs)
+        except Exception as e:
+            if cache is not None:
+                cache.put(cache_key, {"error": str(e), "corners": [], "num_vias": 0})
+            raise
+        if cache is not None:
+            corners, num_vias = result
+            cache.put(
+                cache_key,
+                {
+                    "error": None,
+                    "corners": [[int(v) for v in corner] for corner in corners],
+                    "num_vias": int(num_vias),
+                },
+            )
+        return result
 
     clearance_attempts = (
         _deterministic_clearance_attempts(clearance, clearance_ladder)
@@ -2641,87 +3348,201 @@ def route_multilayer_3d(
         else [max(0.0, clearance)]
     )
 
+    # Search windows: a corridor around the endpoints (and the guide or the
+    # planned path) that grows geometrically while the search fails, ending
+    # with the full area above. Only obstructions inside the window, grown by
+    # a guard band for wire width, via pads and via relocation, are passed on.
+    corridor_points = [(start_x, start_y), (stop_x, stop_y)]
+    if guide is not None:
+        corridor_points.extend(
+            (int(round(x / dbu)), int(round(y / dbu))) for x, y in guide
+        )
+    if planned_corners is not None:
+        corridor_points.extend((x, y) for x, y, _ in planned_corners)
+    windows = corridor_windows(
+        corridor_points,
+        margin=max(1, window_margin) * grid_unit_dbu,
+        limit=(min_x, min_y, max_x, max_y),
+        growth=window_growth,
+    )
+    guard_dbu = int(
+        round(
+            (
+                max(1.0, 2.0 * clearance)
+                + max_wire_width
+                + max((via.min_pad + via.enclosure for via in stack.vias), default=0)
+                + max(clearance_attempts)
+            )
+            / dbu
+        )
+    )
+
+    def _window_polys(regions, window):
+        guarded = (
+            window[0] - guard_dbu,
+            window[1] - guard_dbu,
+            window[2] + guard_dbu,
+            window[3] + guard_dbu,
+        )
+        with result.timed("extract"):
+            return [
+                ObstructionBuffer.from_region(
+                    region if region is not None else kdb.Region(), guarded
+                )
+                for region in regions
+            ]
+
     corners_3d = None
     num_vias = 0
     last_error: Exception | None = None
 
+    # Port exclusions are looked up once per net; each clearance below only
+    # sizes the merged base region cached by the shape index.
+    with result.timed("extract"):
+        exclusions = {
+            layer: _port_exclusions([shape_index.layer(layer)], port_points)
+            for layer in stack.layer_tuples
+            if layer in _layers
+        }
+
     for clearance_um in clearance_attempts:
+        stop_reason = control.stop_reason()
+        if stop_reason is not None:
+            return result.fail(stop_reason)
+        result.attempts += 1
+        control.emit("clearance", data=dict(clearance=clearance_um))
         buffer_dbu = int(round(clearance_um / dbu))
-        m1_polys = (
-            _extract_polys_for_layers(
-                kc, [LAYER_M1], dbu, port_points, buffer_dbu=buffer_dbu
-            )
-            if LAYER_M1 in _layers
-            else []
-        )
-        m2_polys = (
-            _extract_polys_for_layers(
-                kc, [LAYER_M2], dbu, port_points, buffer_dbu=buffer_dbu
+        with result.timed("extract"):
+            regions = [
+                _obstruction_region_for_layers(
+                    kc,
+                    [layer],
+                    buffer_dbu=buffer_dbu,
+                    shape_index=shape_index,
+                    excluded=exclusions[layer],
+                )
+                if layer in exclusions
+                else None
+                for layer in stack.layer_tuples
+            ]
+        for window_idx, window in enumerate(windows, start=1):
+            stop_reason = control.stop_reason()
+            if stop_reason is not None:
+                return result.fail(stop_reason)
+            polys_per_layer = _window_polys(regions, window)
+            logger.debug(
+                "[3D ROUTE] Obstructions@%.3fum window %s/%s: %s",
+                clearance_um,
+                window_idx,
+                len(windows),
+                ", ".join(
+                    f"{name}={len(polys)}"
+                    for name, polys in zip(stack.names, polys_per_layer)
+                ),
             )
-            if LAYER_M2 in _layers
-            else []
-        )
-        polys_per_layer = [m1_polys, m2_polys]
-        print(
-            f"[3D ROUTE] Obstructions@{clearance_um:.3f}um: M1={len(m1_polys)}, M2={len(m2_polys)}"
-        )
+            if planned_corners is not None:
+                corners_3d = [tuple(corner) for corner in planned_corners]
+                num_vias = sum(a[2] != b[2] for a, b in zip(corners_3d, corners_3d[1:]))
+                result.clearance = clearance_um
+                break
+
+            try:
+                with result.timed("search"):
+                    corners_3d, num_vias = _show_3d_with_width(
+                        (window[3], window[2], window[1], window[0]),
+                        grid_unit_dbu,
+                        polys_per_layer,
+                    )
+                result.clearance = clearance_um
+                result.grid_shape = (
+                    int((window[2] - window[0]) // grid_unit_dbu),
+                    int((window[3] - window[1]) // grid_unit_dbu),
+                    num_layers,
+                )
+                logger.info(
+                    "[3D ROUTE] clearance=%.3fum succeeded in window %s/%s",
+                    clearance_um,
+                    window_idx,
+                    len(windows),
+                )
+                break
+            except Exception as e:
+                last_error = e
+                logger.debug(
+                    "[3D ROUTE] clearance=%.3fum window %s/%s failed: %s",
+                    clearance_um,
+                    window_idx,
+                    len(windows),
+                    e,
+                )
+        if corners_3d is not None:
+            break
 
+        stop_reason = control.stop_reason()
+        if stop_reason is not None:
+            return result.fail(stop_reason)
+        logger.debug(
+            "[3D ROUTE] Retrying this clearance with expanded bbox and finer grid..."
+        )
         try:
-            corners_3d, num_vias = _show_3d_with_width(
-                bbox_tuple, grid_unit_dbu, polys_per_layer
+            retry_min_x = min_x - padding
+            retry_max_x = max_x + padding
+            retry_min_y = min_y - padding
+            retry_max_y = max_y + padding
+            retry_bbox = (retry_max_y, retry_max_x, retry_min_y, retry_min_x)
+            polys_per_layer = _window_polys(
+                regions, (retry_min_x, retry_min_y, retry_max_x, retry_max_y)
             )
-            print(f"[3D ROUTE] clearance={clearance_um:.3f}um succeeded")
-            break
-        except Exception as e:
-            last_error = e
-            print(f"[3D ROUTE] clearance={clearance_um:.3f}um failed: {e}")
-            print(
-                "[3D ROUTE] Retrying this clearance with expanded bbox and finer grid..."
+
+            retry_grid_unit = grid_unit * 0.5
+            retry_grid_unit_dbu = int(retry_grid_unit / dbu)
+            r_grid_w = (retry_max_x - retry_min_x) // retry_grid_unit_dbu
+            r_grid_h = (retry_max_y - retry_min_y) // retry_grid_unit_dbu
+            logger.debug(
+                "[3D ROUTE RETRY] Grid: %sx%s x %s layers",
+                r_grid_w,
+                r_grid_h,
+                num_layers,
             )
-            try:
-                retry_min_x = min_x - padding
-                retry_max_x = max_x + padding
-                retry_min_y = min_y - padding
-                retry_max_y = max_y + padding
-                retry_bbox = (retry_max_y, retry_max_x, retry_min_y, retry_min_x)
-
-                retry_grid_unit = grid_unit * 0.5
-                retry_grid_unit_dbu = int(retry_grid_unit / dbu)
-                r_grid_w = (retry_max_x - retry_min_x) // retry_grid_unit_dbu
-                r_grid_h = (retry_max_y - retry_min_y) // retry_grid_unit_dbu
-                print(f"[3D ROUTE RETRY] Grid: {r_grid_w}x{r_grid_h} x 2 layers")
 
+            with result.timed("search"):
                 corners_3d, num_vias = _show_3d_with_width(
                     retry_bbox, retry_grid_unit_dbu, polys_per_layer
                 )
-                print(f"[3D ROUTE] clearance={clearance_um:.3f}um succeeded on retry")
-                break
-            except Exception as e2:
-                last_error = e2
-                print(f"[3D ROUTE] clearance={clearance_um:.3f}um retry failed: {e2}")
+            result.grid_shape = (int(r_grid_w), int(r_grid_h), num_layers)
+            result.clearance = clearance_um
+            logger.info(
+                "[3D ROUTE] clearance=%.3fum succeeded on retry",
+                clearance_um,
+            )
+            break
+        except Exception as e2:
+            last_error = e2
+            logger.debug(
+                "[3D ROUTE] clearance=%.3fum retry failed: %s",
+                clearance_um,
+                e2,
+            )
 
     if corners_3d is None:
-        print(f"[3D ROUTE] All clearance attempts failed: {clearance_attempts}")
-        if last_error is not None:
-            print(f"[3D ROUTE] Last error: {last_error}")
-        print("[3D ROUTE] Falling back to hierarchical router...")
-        return route_hierarchical(
-            c,
-            start,
-            stop,
-            global_grid_unit=grid_unit * 2,
-            detail_grid_unit=grid_unit,
-            width=width,
-            dynamic_width=dynamic_width,
-            layers_to_avoid=layers_to_avoid,
-            clearance=clearance,
-            clearance_ladder=clearance_ladder,
-            deterministic=deterministic,
-            add_segment_ports=add_segment_ports,
-            port_name_prefix=port_name_prefix,
+        logger.warning(
+            "[3D ROUTE] All clearance attempts failed: %s",
+            clearance_attempts,
         )
-
-    print(f"[3D ROUTE] Found path with {len(corners_3d)} corners, {num_vias} vias")
+        if last_error is not None:
+            logger.warning("[3D ROUTE] Last error: %s", last_error)
+        stop_reason = control.stop_reason()
+        if stop_reason is not None:
+            return result.fail(stop_reason)
+        logger.warning("[3D ROUTE] Falling back to hierarchical router...")
+        control.emit("fallback", reason="all clearance attempts failed")
+        return _fallback_to_hierarchical("all clearance attempts failed")
+
+    logger.info(
+        "[3D ROUTE] Found path with %s corners, %s vias",
+        len(corners_3d),
+        num_vias,
+    )
 
     # Manhattanize the 3D path to fix any diagonal segments
     # The A* router or simplification might return diagonal jumps for off-grid points
@@ -2745,16 +3566,15 @@ def route_multilayer_3d(
             if dx > 1 and dy > 1:  # Tolerance of 1 DBU
                 # Diagonal! Split into L-shape based on layer preference
                 layer_idx = curr[2]
-                # Even layer (0, 2...) -> Horizontal preference (M1) -> Move H then V
-                # Odd layer (1, 3...) -> Vertical preference (M2) -> Move V then H
-                # (Assuming M1=H, M2=V as per standard Sky130 usage here)
+                # Horizontal-preferred layer (e.g. M1) -> Move H then V
+                # Vertical-preferred layer (e.g. M2) -> Move V then H
 
-                if layer_idx % 2 == 0:  # M1 (Horizontal)
+                if stack.layers[layer_idx].direction == "h":
                     # Add intermediate point: (curr.x, prev.y)
                     # First leg Horizontal, second Vertical
                     intermediate = (curr[0], prev[1], layer_idx)
                     manhattan_corners.append(intermediate)
-                else:  # M2 (Vertical)
+                else:
                     # Add intermediate point: (prev.x, curr.y)
                     # First leg Vertical, second Horizontal
                     intermediate = (prev[0], curr[1], layer_idx)
@@ -2815,9 +3635,9 @@ def route_multilayer_3d(
             dy = abs(corners_3d[1][1] - corners_3d[0][1])
             if dx > 1 and dy > 1:  # Diagonal (both x and y differ by > 1 DBU)
                 layer_idx = corners_3d[0][2]
-                if layer_idx % 2 == 0:  # M1 (H pref): horizontal first
+                if stack.layers[layer_idx].direction == "h":  # horizontal first
                     intermediate = (corners_3d[1][0], corners_3d[0][1], layer_idx)
-                else:  # M2 (V pref): vertical first
+                else:  # V pref: vertical first
                     intermediate = (corners_3d[0][0], corners_3d[1][1], layer_idx)
                 corners_3d.insert(1, intermediate)
 
@@ -2827,11 +3647,10 @@ def route_multilayer_3d(
             dy = abs(corners_3d[-1][1] - corners_3d[-2][1])
             if dx > 1 and dy > 1:  # Diagonal
                 layer_idx = corners_3d[-1][2]
-                if (
-                    layer_idx % 2 == 0
-                ):  # M1 (H pref): arrive via vertical then horizontal
+                if stack.layers[layer_idx].direction == "h":
+                    # H pref: arrive via vertical then horizontal
                     intermediate = (corners_3d[-1][0], corners_3d[-2][1], layer_idx)
-                else:  # M2 (V pref): arrive via horizontal then vertical
+                else:  # V pref: arrive via horizontal then vertical
                     intermediate = (corners_3d[-2][0], corners_3d[-1][1], layer_idx)
                 corners_3d.insert(-1, intermediate)
 
@@ -2925,74 +3744,45 @@ def route_multilayer_3d(
     _anchor_corners_endpoints(corners_3d, (start_x, start_y), (stop_x, stop_y))
 
     if len(corners_3d) < 2:
-        print(
-            "[3D ROUTE] Path collapsed after cleanup; falling back to hierarchical router..."
-        )
-        return route_hierarchical(
-            c,
-            start,
-            stop,
-            global_grid_unit=grid_unit * 2,
-            detail_grid_unit=grid_unit,
-            width=width,
-            dynamic_width=dynamic_width,
-            layers_to_avoid=layers_to_avoid,
-            clearance=clearance,
-            clearance_ladder=clearance_ladder,
-            deterministic=deterministic,
-            add_segment_ports=add_segment_ports,
-            port_name_prefix=port_name_prefix,
+        logger.warning(
+            "[3D ROUTE] Path collapsed after cleanup; falling back to hierarchical "
+            "router..."
         )
+        return _fallback_to_hierarchical("path collapsed after cleanup")
 
     if (corners_3d[0][0], corners_3d[0][1]) != (start_x, start_y) or (
         corners_3d[-1][0],
         corners_3d[-1][1],
     ) != (stop_x, stop_y):
-        print(
-            "[3D ROUTE] Endpoint anchoring failed after cleanup; falling back to hierarchical router..."
-        )
-        return route_hierarchical(
-            c,
-            start,
-            stop,
-            global_grid_unit=grid_unit * 2,
-            detail_grid_unit=grid_unit,
-            width=width,
-            dynamic_width=dynamic_width,
-            layers_to_avoid=layers_to_avoid,
-            clearance=clearance,
-            clearance_ladder=clearance_ladder,
-            deterministic=deterministic,
-            add_segment_ports=add_segment_ports,
-            port_name_prefix=port_name_prefix,
+        logger.warning(
+            "[3D ROUTE] Endpoint anchoring failed after cleanup; falling back to "
+            "hierarchical router..."
         )
+        return _fallback_to_hierarchical("endpoint anchoring failed after cleanup")
 
     if not _is_manhattan_layered_path(corners_3d):
-        print(
-            "[3D ROUTE] Non-manhattan same-layer segment after cleanup; falling back to hierarchical router..."
-        )
-        return route_hierarchical(
-            c,
-            start,
-            stop,
-            global_grid_unit=grid_unit * 2,
-            detail_grid_unit=grid_unit,
-            width=width,
-            dynamic_width=dynamic_width,
-            layers_to_avoid=layers_to_avoid,
-            clearance=clearance,
-            clearance_ladder=clearance_ladder,
-            deterministic=deterministic,
-            add_segment_ports=add_segment_ports,
-            port_name_prefix=port_name_prefix,
+        logger.warning(
+            "[3D ROUTE] Non-manhattan same-layer segment after cleanup; falling back "
+            "to hierarchical router..."
         )
+        return _fallback_to_hierarchical("non-manhattan segment after cleanup")
+
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("[3D ROUTE] Final path (%s corners):", len(corners_3d))
+        for idx, (cx, cy, cz) in enumerate(corners_3d):
+            logger.debug(
+                "  [%s] (%.3f, %.3f) L%s (%s)",
+                idx,
+                cx * dbu,
+                cy * dbu,
+                cz,
+                stack.names[cz],
+            )
 
-    # Debug: print final path
-    print(f"[3D ROUTE] Final path ({len(corners_3d)} corners):")
-    for idx, (cx, cy, cz) in enumerate(corners_3d):
-        print(
-            f"  [{idx}] ({cx * dbu:.3f}, {cy * dbu:.3f}) L{cz} ({'M1' if cz == 0 else 'M2'})"
-        )
+    # Obstruction boxes of this net, shared by all geometry trials.
+    layer_bboxes = _layer_obstruction_boxes_um(
+        polys_per_layer, (start_x, start_y), (stop_x, stop_y), dbu
+    )
 
     if dynamic_width:
         base_corners = [tuple(c) for c in corners_3d]
@@ -3032,50 +3822,48 @@ def route_multilayer_3d(
                 continue
             if not _is_manhattan_layered_path(trial_corners):
                 continue
-            dyn_ports = _draw_dynamic_geometry_for_corners(
-                c=c,
-                corners_3d=trial_corners,
-                start_geom=start_geom,
-                stop_geom=stop_geom,
-                body_width=body_width,
-                width=width,
-                dynamic_width=True,
-                m1_polys=m1_polys,
-                m2_polys=m2_polys,
-                start_xy_dbu=(start_x, start_y),
-                stop_xy_dbu=(stop_x, stop_y),
-                dbu=dbu,
-                clearance=clearance,
-                add_segment_ports=add_segment_ports,
-                port_name_prefix=port_name_prefix,
-            )
+            with result.timed("draw"):
+                writer = RouteGeometryWriter(c, emit_shapes, shape_index)
+                dyn_ports = _draw_dynamic_geometry_for_corners(
+                    c=c,
+                    corners_3d=trial_corners,
+                    start_geom=start_geom,
+                    stop_geom=stop_geom,
+                    body_width=body_width,
+                    width=width,
+                    dynamic_width=True,
+                    polys_per_layer=polys_per_layer,
+                    start_xy_dbu=(start_x, start_y),
+                    stop_xy_dbu=(stop_x, stop_y),
+                    dbu=dbu,
+                    clearance=clearance,
+                    add_segment_ports=add_segment_ports,
+                    port_name_prefix=port_name_prefix,
+                    stack=stack,
+                    writer=writer,
+                    layer_bboxes=layer_bboxes,
+                )
+                writer.flush()
             if dyn_ports is not None:
+                result.add_polyline(
+                    _corners_to_polyline(trial_corners, dbu, stack.layer_tuples)
+                )
                 if axis_mode == "prefer":
-                    print(
-                        "[3D ROUTE] Axis policy downgraded to prefer for legal geometry."
+                    logger.debug(
+                        "[3D ROUTE] Axis policy downgraded to prefer for legal "
+                        "geometry."
                     )
                 elif axis_mode == "off":
-                    print(
+                    logger.debug(
                         "[3D ROUTE] Axis policy downgraded to off for legal geometry."
                     )
                 return dyn_ports
-        print(
-            "[3D ROUTE] Planned geometry violates obstruction clearance; falling back to hierarchical router..."
+        logger.warning(
+            "[3D ROUTE] Planned geometry violates obstruction clearance; falling "
+            "back to hierarchical router..."
         )
-        return route_hierarchical(
-            c,
-            start,
-            stop,
-            global_grid_unit=grid_unit * 2,
-            detail_grid_unit=grid_unit,
-            width=width,
-            dynamic_width=dynamic_width,
-            layers_to_avoid=layers_to_avoid,
-            clearance=clearance,
-            clearance_ladder=clearance_ladder,
-            deterministic=deterministic,
-            add_segment_ports=add_segment_ports,
-            port_name_prefix=port_name_prefix,
+        return _fallback_to_hierarchical(
+            "planned geometry violates obstruction clearance"
         )
 
     # Convert corners to um with layer information
@@ -3091,36 +3879,9 @@ def route_multilayer_3d(
         dynamic_width=dynamic_width,
     )
 
-    # Build obstruction bboxes.
-    port_points_um = [(start_x * dbu, start_y * dbu), (stop_x * dbu, stop_y * dbu)]
-    m1_bboxes = []
-    m2_bboxes = []
-    for poly in m1_polys:
-        if len(poly) >= 3:
-            box = (
-                float(poly[:, 0].min()) * dbu,
-                float(poly[:, 1].min()) * dbu,
-                float(poly[:, 0].max()) * dbu,
-                float(poly[:, 1].max()) * dbu,
-            )
-            if not any(
-                box[0] <= px <= box[2] and box[1] <= py <= box[3]
-                for px, py in port_points_um
-            ):
-                m1_bboxes.append(box)
-    for poly in m2_polys:
-        if len(poly) >= 3:
-            box = (
-                float(poly[:, 0].min()) * dbu,
-                float(poly[:, 1].min()) * dbu,
-                float(poly[:, 0].max()) * dbu,
-                float(poly[:, 1].max()) * dbu,
-            )
-            if not any(
-                box[0] <= px <= box[2] and box[1] <= py <= box[3]
-                for px, py in port_points_um
-            ):
-                m2_bboxes.append(box)
+    bboxes_by_layer = dict(zip(stack.layer_tuples, layer_bboxes))
+    min_widths = {layer.layer: layer.min_width for layer in stack.layers}
+    horizontal_first = {layer.layer: layer.direction == "h" for layer in stack.layers}
 
     geom_blocked = False
     via_pad_by_transition: dict[int, float] = {}
@@ -3129,29 +3890,18 @@ def route_multilayer_3d(
         _, _, z1 = corners_3d[i + 1]
         if z0 == z1:
             continue
+        via_def = stack.via(z0, z1)
         target_w = _transition_target_via_width(corners_3d, seg_widths, i, width)
         target_pad = _snap_even_dbu_width_um(
-            _via_pad_size_um(target_w),
-            dbu,
-            max(
-                float(_DRC["min_via_pad"][LAYER_M1]),
-                float(_DRC["min_via_pad"][LAYER_M2]),
-            ),
+            _via_pad_size_um(target_w, via_def), dbu, via_def.min_pad
         )
         base_center = (x0 * dbu, y0 * dbu)
         allow_relocate = i > 0 and (i + 1) < (len(corners_3d) - 1)
         resolved = None
         chosen_pad = None
         tried_pads = set()
-        for via_pad_raw in _via_pad_candidates(target_pad):
-            via_pad = _snap_even_dbu_width_um(
-                via_pad_raw,
-                dbu,
-                max(
-                    float(_DRC["min_via_pad"][LAYER_M1]),
-                    float(_DRC["min_via_pad"][LAYER_M2]),
-                ),
-            )
+        for via_pad_raw in _via_pad_candidates(target_pad, via_def):
+            via_pad = _snap_even_dbu_width_um(via_pad_raw, dbu, via_def.min_pad)
             key = int(round(via_pad / dbu))
             if key in tried_pads:
                 continue
@@ -3159,13 +3909,14 @@ def route_multilayer_3d(
             candidate = _resolve_legal_via_center(
                 base_center_um=base_center,
                 via_pad_um=via_pad,
-                m1_bboxes=m1_bboxes,
-                m2_bboxes=m2_bboxes,
+                m1_bboxes=layer_bboxes[min(z0, z1)],
+                m2_bboxes=layer_bboxes[max(z0, z1)],
                 dbu=dbu,
                 relocate_step_um=max(clearance, 0.14),
                 relocate_radius_um=max(1.0, 2.0 * clearance),
                 max_candidates=64,
                 allow_relocate=allow_relocate,
+                via=via_def,
             )
             if candidate is None:
                 continue
@@ -3174,32 +3925,40 @@ def route_multilayer_3d(
             break
         if resolved is None or chosen_pad is None:
             geom_blocked = True
-            print(
-                f"[3D ROUTE] Via blocked at ({base_center[0]:.3f}, {base_center[1]:.3f})"
+            logger.debug(
+                "[3D ROUTE] Via blocked at (%.3f, %.3f)",
+                base_center[0],
+                base_center[1],
             )
             break
         via_pad_by_transition[i] = chosen_pad
         if chosen_pad + 1e-6 < target_pad:
-            print(
-                f"[3D ROUTE] Via pad stepped down at index {i} "
-                f"from {target_pad:.3f}um to {chosen_pad:.3f}um"
+            logger.debug(
+                "[3D ROUTE] Via pad stepped down at index %s from %.3fum to %.3fum",
+                i,
+                target_pad,
+                chosen_pad,
             )
         if resolved != base_center:
             rx = int(round(resolved[0] / dbu))
             ry = int(round(resolved[1] / dbu))
             corners_3d[i] = (rx, ry, z0)
             corners_3d[i + 1] = (rx, ry, z1)
-            print(
-                f"[3D ROUTE] Relocated via at index {i} "
-                f"from ({base_center[0]:.3f}, {base_center[1]:.3f}) "
-                f"to ({resolved[0]:.3f}, {resolved[1]:.3f})"
+            logger.debug(
+                "[3D ROUTE] Relocated via at index %s "
+                "from (%.3f, %.3f) to (%.3f, %.3f)",
+                i,
+                base_center[0],
+                base_center[1],
+                resolved[0],
+                resolved[1],
             )
 
     # Build canonical primitives so every drawn shape is validated.
     plan_segments: list[
         tuple[tuple[float, float], tuple[float, float], tuple[int, int], float]
     ] = []
-    plan_vias: list[tuple[tuple[float, float], float]] = []
+    plan_vias: list[tuple[tuple[float, float], float, int]] = []
 
     def _plan_add_segment(
         p0: tuple[float, float],
@@ -3212,11 +3971,11 @@ def route_multilayer_3d(
         if dx < MIN_SEGMENT_LENGTH and dy < MIN_SEGMENT_LENGTH:
             return
         if dx > 0.001 and dy > 0.001:
-            mid = (p1[0], p0[1]) if layer == LAYER_M1 else (p0[0], p1[1])
+            mid = (p1[0], p0[1]) if horizontal_first[layer] else (p0[0], p1[1])
             _plan_add_segment(p0, mid, layer, seg_w)
             _plan_add_segment(mid, p1, layer, seg_w)
             return
-        plan_segments.append((p0, p1, layer, seg_w))
+        plan_segments.append((p0, p1, layer, max(seg_w, min_widths[layer])))
 
     if len(corners_3d) >= 2:
         for i in range(len(corners_3d) - 1):
@@ -3226,147 +3985,83 @@ def route_multilayer_3d(
             p0 = (x0 * dbu, y0 * dbu)
             p1 = (x1 * dbu, y1 * dbu)
             if z0 != z1:
+                via_def = stack.via(z0, z1)
                 via_pad = via_pad_by_transition.get(
                     i,
                     _snap_even_dbu_width_um(
                         _via_pad_size_um(
                             _transition_target_via_width(
                                 corners_3d, seg_widths, i, width
-                            )
+                            ),
+                            via_def,
                         ),
                         dbu,
-                        max(
-                            float(_DRC["min_via_pad"][LAYER_M1]),
-                            float(_DRC["min_via_pad"][LAYER_M2]),
-                        ),
+                        via_def.min_pad,
                     ),
                 )
-                plan_vias.append((p0, via_pad))
-                _plan_add_segment(p0, p1, LAYER_M1 if z1 == 0 else LAYER_M2, seg_w)
+                plan_vias.append((p0, via_pad, min(z0, z1)))
+                _plan_add_segment(p0, p1, stack.layers[z1].layer, seg_w)
             else:
-                _plan_add_segment(p0, p1, LAYER_M1 if z0 == 0 else LAYER_M2, seg_w)
+                _plan_add_segment(p0, p1, stack.layers[z0].layer, seg_w)
 
-    plan_patches = _build_corner_patches_from_segments(plan_segments)
+    plan_patches = _build_corner_patches_from_segments(plan_segments, min_widths)
 
     if not geom_blocked:
         for p0, p1, layer, seg_w in plan_segments:
             seg_box = _segment_envelope_um(p0, p1, seg_w)
-            target = m1_bboxes if layer == LAYER_M1 else m2_bboxes
-            if any(_bbox_overlap(seg_box, obox) for obox in target):
+            if any_box_overlap(seg_box, bboxes_by_layer[layer]):
                 geom_blocked = True
-                print(
-                    f"[3D ROUTE] Planned segment blocked on {'M1' if layer == LAYER_M1 else 'M2'}"
-                )
+                logger.debug("[3D ROUTE] Planned segment blocked on %s", layer)
                 break
 
     if not geom_blocked:
         for center, layer, patch_w, patch_h in plan_patches:
             patch_box = _rect_envelope_um(center, patch_w, patch_h)
-            target = m1_bboxes if layer == LAYER_M1 else m2_bboxes
-            if any(_bbox_overlap(patch_box, obox) for obox in target):
+            if any_box_overlap(patch_box, bboxes_by_layer[layer]):
                 geom_blocked = True
-                print(
-                    f"[3D ROUTE] Planned patch blocked on {'M1' if layer == LAYER_M1 else 'M2'}"
-                )
+                logger.debug("[3D ROUTE] Planned patch blocked on %s", layer)
                 break
 
     if not geom_blocked:
-        for center, via_w in plan_vias:
-            if not _is_via_legal_on_both_layers(center, via_w, m1_bboxes, m2_bboxes):
+        for center, via_w, z in plan_vias:
+            if not _is_via_legal_on_both_layers(
+                center, via_w, layer_bboxes[z], layer_bboxes[z + 1], stack.vias[z]
+            ):
                 geom_blocked = True
-                print(
-                    f"[3D ROUTE] Planned via blocked at ({center[0]:.3f}, {center[1]:.3f})"
+                logger.debug(
+                    "[3D ROUTE] Planned via blocked at (%.3f, %.3f)",
+                    center[0],
+                    center[1],
                 )
                 break
 
     if geom_blocked:
-        print(
-            "[3D ROUTE] Planned geometry violates obstruction clearance; falling back to hierarchical router..."
+        logger.warning(
+            "[3D ROUTE] Planned geometry violates obstruction clearance; falling "
+            "back to hierarchical router..."
         )
-        return route_hierarchical(
-            c,
-            start,
-            stop,
-            global_grid_unit=grid_unit * 2,
-            detail_grid_unit=grid_unit,
-            width=width,
-            dynamic_width=dynamic_width,
-            layers_to_avoid=layers_to_avoid,
-            clearance=clearance,
-            clearance_ladder=clearance_ladder,
-            deterministic=deterministic,
-            add_segment_ports=add_segment_ports,
-            port_name_prefix=port_name_prefix,
+        return _fallback_to_hierarchical(
+            "planned geometry violates obstruction clearance"
         )
 
-    segment_ports = []
-    for center, layer, patch_w, patch_h in plan_patches:
-        patch = c.add_ref(gf.components.rectangle(size=(patch_w, patch_h), layer=layer))
-        patch.dcenter = center
-
-    for center, via_w in plan_vias:
-        via = c.add_ref(via_m1_m2(width=via_w, length=via_w))
-        via.dcenter = center
-
-    for p0, p1, layer, seg_w in plan_segments:
-        is_horiz = abs(p1[1] - p0[1]) < 0.001
-        if is_horiz:
-            x_min = min(p0[0], p1[0])
-            x_max = max(p0[0], p1[0])
-            seg_len = x_max - x_min
-            if seg_len >= 0.001:
-                rect = c.add_ref(
-                    gf.components.rectangle(size=(seg_len, seg_w), layer=layer)
-                )
-                rect.dmove((x_min, p0[1] - seg_w / 2))
-                if add_segment_ports:
-                    port = c.add_port(
-                        name=f"{port_name_prefix}",
-                        center=(x_min + seg_len / 2, p0[1]),
-                        width=0.01,
-                        orientation=0,
-                        layer=(layer[0], 16),
-                        port_type="electrical",
-                    )
-                    segment_ports.append(port)
-                    c.draw_ports()
-        else:
-            y_min = min(p0[1], p1[1])
-            y_max = max(p0[1], p1[1])
-            seg_len = y_max - y_min
-            if seg_len >= 0.001:
-                rect = c.add_ref(
-                    gf.components.rectangle(size=(seg_w, seg_len), layer=layer)
-                )
-                rect.dmove((p0[0] - seg_w / 2, y_min))
-                if add_segment_ports:
-                    port = c.add_port(
-                        name=f"{port_name_prefix}",
-                        center=(p0[0], y_min + seg_len / 2),
-                        width=0.01,
-                        orientation=90,
-                        layer=(layer[0], 16),
-                        port_type="electrical",
-                    )
-                    segment_ports.append(port)
-                    c.draw_ports()
+    with result.timed("draw"):
+        writer = RouteGeometryWriter(c, emit_shapes, shape_index)
+        segment_ports = _emit_planned_geometry(
+            writer,
+            plan_patches,
+            plan_vias,
+            plan_segments,
+            stack,
+            add_segment_ports,
+            port_name_prefix,
+        )
+        writer.flush()
 
+    if plan_segments or plan_vias:
+        result.add_polyline(_corners_to_polyline(corners_3d, dbu, stack.layer_tuples))
     return segment_ports
 
 
-def _clear_component_routes_from_baseline(
-    c: Component,
-    baseline_instances: set,
-    baseline_port_count: int,
-) -> None:
-    """Rollback route-created instances/ports to a known baseline."""
-    for inst in list(c.insts):
-        if inst.instance not in baseline_instances:
-            inst.instance.delete()
-    if len(c.ports.bases) > baseline_port_count:
-        del c.ports.bases[baseline_port_count:]
-
-
 def _build_deterministic_net_orders(
     nets: Sequence[RouteNetSpec],
 ) -> list[tuple[RouteNetSpec, ...]]:
@@ -3404,6 +4099,134 @@ def _build_deterministic_net_orders(
     return [tuple(nets[i] for i in ord_idxs) for ord_idxs in dedup]
 
 
+def _collect_net_results(
+    result: RouteResult,
+    net_results: dict[str, RouteResult],
+    t_start: float,
+    failure_reason: str | None,
+) -> None:
+    """Fill a multi-net result from the per-net results of one attempt."""
+    for name, net_result in net_results.items():
+        result.nets[name] = net_result
+        result.merge(net_result)
+    result.timings.pop("total", None)
+    result.timings["total"] = time.perf_counter() - t_start
+    result.success = failure_reason is None
+    result.failure_reason = failure_reason
+
+
+def plan_global_routes(
+    c: Component,
+    nets: Sequence[RouteNetSpec],
+    gcell_size: float = 10.0,
+    width: float = 0.25,
+    layers_to_avoid: Iterable[LayerSpec] = None,
+    clearance: float = 0.14,
+    routing_layers: Sequence[str | tuple[int, int]] = ("met1", "met2"),
+    max_iterations: int = 20,
+    seed: int | None = None,
+    shape_index: ShapeIndex | None = None,
+) -> tuple[dict[str, list[tuple[float, float]]], GlobalRouteResult]:
+    """Plan a GCell corridor for every net before detail routing.
+
+    The cell is divided into GCells of `gcell_size`; each GCell boundary gets
+    the number of tracks of the `routing_layers` running across it (track
+    pitch = min width + spacing of the layer, at least `width` + `clearance`)
+    that are not covered by obstructions grown by `clearance`. All nets are
+    then assigned GCell paths together, minimizing boundary overflow (see
+    ``sky130.global_route``). Polygons holding net ports do not count as
+    obstructions.
+
+    Args:
+        c: Component to plan in; it is not modified.
+        nets: Nets to plan.
+        gcell_size: GCell edge length in um.
+        width: Wire width in um.
+        layers_to_avoid: Layers containing obstructions.
+        clearance: Obstruction offset in um.
+        routing_layers: Contiguous metals providing the tracks.
+        max_iterations: Maximum rip-up-and-reroute iterations.
+        seed: Seed for the planning order; None keeps the order of `nets`.
+        shape_index: Per-layer shape index of `c` (or a RoutingSession).
+
+    Returns:
+        Guide per net name (um points at the GCell path's ends and bends, to
+        pass as ``guide`` to route_multilayer_3d or route_hierarchical) and
+        the GlobalRouteResult with paths, overflow and the congestion map.
+    """
+    if layers_to_avoid is None:
+        layers_to_avoid = []
+    kc = c.kcl.kcells[c.name]
+    dbu = c.kcl.dbu
+    if shape_index is None:
+        shape_index = ShapeIndex(kc)
+    _layers = [
+        layer if isinstance(layer, tuple) else (layer, 0) for layer in layers_to_avoid
+    ]
+    stack = routing_stack(routing_layers)
+    ends = {
+        net.name: [_get_pos_with_dir(port, dbu)[:2] for port in (net.start, net.stop)]
+        for net in nets
+    }
+    port_points = [point for points in ends.values() for point in points]
+    buffer_dbu = int(round(max(0.0, clearance) / dbu))
+    gcell_dbu = max(1, int(round(gcell_size / dbu)))
+
+    blockages = []
+    for layer in stack.layer_tuples:
+        if layer not in _layers:
+            blockages.append([])
+            continue
+        region = _obstruction_region_for_layers(
+            kc, [layer], port_points, buffer_dbu, shape_index
+        )
+        blockages.append(
+            [
+                (box.left, box.bottom, box.right, box.top)
+                for box in (
+                    poly.bbox() for poly in region.decompose_trapezoids_to_region()
+                )
+            ]
+        )
+    pitches = [
+        int(round(max(layer.min_width + layer.min_spacing, width + clearance) / dbu))
+        for layer in stack.layers
+    ]
+    bbox = kc.bbox()
+    xs = [x for x, _ in port_points] + [bbox.left, bbox.right]
+    ys = [y for _, y in port_points] + [bbox.bottom, bbox.top]
+    grid = build_gcell_grid(
+        (
+            min(xs) - gcell_dbu,
+            min(ys) - gcell_dbu,
+            max(xs) + gcell_dbu,
+            max(ys) + gcell_dbu,
+        ),
+        gcell_dbu,
+        blockages,
+        stack.directions,
+        pitches,
+    )
+    plan = route_global(
+        grid,
+        [GlobalNet(net.name, *ends[net.name]) for net in nets],
+        max_iterations=max_iterations,
+        seed=seed,
+    )
+    logger.info(
+        "[GLOBAL] %s nets on %sx%s GCells: overflow=%s after %s iterations",
+        len(nets),
+        *grid.shape,
+        plan.overflow,
+        plan.iterations,
+    )
+    guides = {
+        name: [(x * dbu, y * dbu) for x, y in gcell_guide(grid, path)]
+        for name, path in plan.paths.items()
+    }
+    return guides, plan
+
+
 def route_nets_deterministic(
     c: Component,
     nets: Sequence[RouteNetSpec],
@@ -3418,77 +4241,470 @@ def route_nets_deterministic(
     deterministic: bool = True,
     add_segment_ports: bool = True,
     require_all: bool = True,
-) -> dict[str, list[Port]]:
+    route_cache: RouteCache | bool | None = None,
+    return_result: bool = False,
+    routing_layers: Sequence[str | tuple[int, int]] = ("met1", "met2"),
+    via_costs: dict[tuple[str, str], float] | None = None,
+    global_route: bool = False,
+    gcell_size: float = 10.0,
+    emit_shapes: bool = True,
+    journal: RouteJournal | None = None,
+    progress: ProgressCallback | None = None,
+    budget: float | None = None,
+    net_budget: float | None = None,
+    cancel: CancellationToken | None = None,
+) -> dict[str, list[Port]] | RouteResult:
     """Deterministically route multiple nets with whole-attempt rollback/retry.
 
-    This guarantees no partial geometry is left behind from failed attempts.
+    This guarantees no partial geometry is left behind from failed attempts:
+    each attempt routes into the overlay of a RouteTransaction, which is
+    emptied before the next attempt and merged into `c` once at the end. If
+    all attempts fail and require_all is False, the order that routed the
+    most nets is kept (routed again unless it was the last attempt).
+    With a ``route_cache``, nets routed against the same geometry in
+    different attempts reuse the cached search result. Obstruction layers are
+    flattened once and updated incrementally per net (see RoutingSession).
+
+    With return_result=True a RouteResult is returned whose ``nets`` holds the
+    per-net results of the chosen attempt. `routing_layers`, `via_costs` and
+    `emit_shapes` are passed to route_multilayer_3d.
+
+    With global_route=True all nets are first planned together on a GCell
+    congestion map of `gcell_size` um (see plan_global_routes) and each net
+    is detail routed in its planned corridor (``guide``).
+
+    With a `journal` (see ``sky130.route_journal``) nets whose endpoints and
+    nearby obstacles match their journal entry are drawn from it without a
+    search; the others are routed and recorded under the net name.
+
+    `progress` receives run, attempt and net events, `budget` and
+    `net_budget` limit the wall-clock seconds of the run and of each net, and
+    `cancel` stops the run (see ``sky130.routing_control``). A run stopped by
+    its budget or `cancel` does not raise: it keeps the attempt that routed
+    the most nets (an earlier one is routed again from the route cache) and
+    returns it as a partial result.
     """
     if layers_to_avoid is None:
         layers_to_avoid = []
+    result = RouteResult(router="nets_deterministic")
     if not nets:
-        return {}
+        result.success = True
+        return result if return_result else {}
+    t_start = time.perf_counter()
 
-    baseline_instances = {inst.instance for inst in c.insts}
-    baseline_port_count = len(c.ports.bases)
     net_orders = _build_deterministic_net_orders(nets)
+    session = RoutingSession(c.kcl.kcells[c.name])
+    guides: dict[str, list[tuple[float, float]]] = {}
+    if global_route:
+        with result.timed("global"):
+            guides, _ = plan_global_routes(
+                c,
+                nets,
+                gcell_size=gcell_size,
+                width=width,
+                layers_to_avoid=layers_to_avoid,
+                clearance=clearance,
+                routing_layers=routing_layers,
+                shape_index=session,
+            )
 
+    control = RouteControl(progress, budget, cancel, net_budget=net_budget)
+    control.emit("run_start", data=dict(nets=len(nets), orders=len(net_orders)))
+
+    def _route_order(
+        ordered_nets: Sequence[RouteNetSpec], attempt_idx: int, limited: bool
+    ) -> tuple[dict[str, list[Port]], dict[str, RouteResult], str | None]:
+        routed: dict[str, list[Port]] = {}
+        net_results: dict[str, RouteResult] = {}
+        for net in ordered_nets:
+            limits = {}
+            if limited:
+                stop_reason = control.stop_reason()
+                if stop_reason is not None:
+                    return routed, net_results, stop_reason
+                limits = dict(budget=control.net_budget_left(), cancel=cancel)
+            before_ports = len(c.ports.bases)
+            with span("net", net=net.name, attempt=attempt_idx):
+                net_result = route_multilayer_3d(
+                    c,
+                    start=net.start,
+                    stop=net.stop,
+                    grid_unit=grid_unit,
+                    width=width,
+                    dynamic_width=dynamic_width,
+                    layers_to_avoid=layers_to_avoid,
+                    add_segment_ports=add_segment_ports,
+                    port_name_prefix=net.port_name_prefix,
+                    via_cost=via_cost,
+                    wrong_way_penalty=wrong_way_penalty,
+                    clearance=clearance,
+                    clearance_ladder=clearance_ladder,
+                    deterministic=deterministic,
+                    route_cache=route_cache,
+                    return_result=True,
+                    session=session,
+                    routing_layers=routing_layers,
+                    via_costs=via_costs,
+                    guide=guides.get(net.name),
+                    emit_shapes=emit_shapes,
+                    journal=journal,
+                    journal_key=net.name,
+                    progress=control.forward(net=net.name, attempt=attempt_idx),
+                    **limits,
+                )
+            net_results[net.name] = net_result
+            if not net_result.success:
+                if len(c.ports.bases) > before_ports:
+                    del c.ports.bases[before_ports:]
+                logger.warning(
+                    "[MULTINET] net '%s' failed in attempt %s",
+                    net.name,
+                    attempt_idx,
+                )
+                return (
+                    routed,
+                    net_results,
+                    f"net '{net.name}': {net_result.failure_reason}",
+                )
+            routed[net.name] = net_result.ports
+        return routed, net_results, None
+
+    best_idx: int | None = None
     best_partial: dict[str, list[Port]] = {}
+    best_results: dict[str, RouteResult] = {}
+    failure_reason: str | None = None
+    stop_reason: str | None = None
 
+    transaction = RouteTransaction(c, session)
     for attempt_idx, ordered_nets in enumerate(net_orders, start=1):
+        stop_reason = control.stop_reason()
+        if stop_reason is not None:
+            break
+        result.attempts = attempt_idx
         if attempt_idx > 1:
-            _clear_component_routes_from_baseline(
-                c, baseline_instances, baseline_port_count
-            )
-        print(
-            f"[MULTINET] Attempt {attempt_idx}/{len(net_orders)} order="
-            f"{','.join(net.name for net in ordered_nets)}"
+            transaction.rollback()
+        logger.info(
+            "[MULTINET] Attempt %s/%s order=%s",
+            attempt_idx,
+            len(net_orders),
+            ",".join(net.name for net in ordered_nets),
+        )
+        control.emit(
+            "attempt_start",
+            attempt=attempt_idx,
+            data=dict(order=[net.name for net in ordered_nets]),
         )
 
-        routed: dict[str, list[Port]] = {}
-        failed_name: str | None = None
-
-        for net in ordered_nets:
-            before_inst = len(c.insts)
-            before_ports = len(c.ports.bases)
-            seg_ports = route_multilayer_3d(
-                c,
-                start=net.start,
-                stop=net.stop,
-                grid_unit=grid_unit,
-                width=width,
-                dynamic_width=dynamic_width,
-                layers_to_avoid=layers_to_avoid,
-                add_segment_ports=add_segment_ports,
-                port_name_prefix=net.port_name_prefix,
-                via_cost=via_cost,
-                wrong_way_penalty=wrong_way_penalty,
-                clearance=clearance,
-                clearance_ladder=clearance_ladder,
-                deterministic=deterministic,
-            )
-            after_inst = len(c.insts)
-            after_ports = len(c.ports.bases)
-            success = after_inst > before_inst
-            if not success:
-                if after_ports > before_ports:
-                    del c.ports.bases[before_ports:]
-                failed_name = net.name
-                print(f"[MULTINET] net '{net.name}' failed in attempt {attempt_idx}")
-                break
-            routed[net.name] = seg_ports
+        routed, net_results, attempt_failure = _route_order(
+            ordered_nets, attempt_idx, limited=True
+        )
+        control.emit(
+            "attempt_done",
+            attempt=attempt_idx,
+            success=attempt_failure is None,
+            reason=attempt_failure,
+            data=dict(routed=len(routed)),
+        )
 
-        if failed_name is None and len(routed) == len(nets):
-            print(f"[MULTINET] Success on attempt {attempt_idx}")
-            return routed
+        if attempt_failure is None:
+            logger.info("[MULTINET] Success on attempt %s", attempt_idx)
+            transaction.commit()
+            _collect_net_results(result, net_results, t_start, None)
+            control.emit("run_done", success=True, data=dict(routed=len(routed)))
+            return result if return_result else routed
+        failure_reason = attempt_failure
 
         if len(routed) > len(best_partial):
+            best_idx = attempt_idx
             best_partial = routed
+            best_results = {name: net_results[name] for name in routed}
+        stop_reason = control.stop_reason()
+        if stop_reason is not None:
+            break
+
+    def _commit_best() -> None:
+        # The overlay holds the last attempt; route the best one again if it
+        # was an earlier one (its rollback removed its ports).
+        nonlocal best_partial, best_results
+        if best_idx != result.attempts:
+            transaction.rollback()
+            if best_idx is not None:
+                best_partial, net_results, _ = _route_order(
+                    net_orders[best_idx - 1], best_idx, limited=False
+                )
+                best_results = {name: net_results[name] for name in best_partial}
+        transaction.commit()
 
+    if stop_reason is not None:
+        logger.warning(
+            "[MULTINET] Stopped after %s attempts: %s", result.attempts, stop_reason
+        )
+        _commit_best()
+        _collect_net_results(result, best_results, t_start, stop_reason)
+        control.emit(
+            "run_done",
+            success=False,
+            reason=stop_reason,
+            data=dict(routed=len(best_partial)),
+        )
+        return result if return_result else best_partial
+
+    if not require_all:
+        _commit_best()
+    control.emit(
+        "run_done",
+        success=False,
+        reason=failure_reason,
+        data=dict(routed=len(best_partial)),
+    )
     if require_all:
+        transaction.abort()
         raise RuntimeError(
             "[MULTINET] Unable to complete all requested nets without obstruction conflicts."
         )
-    return best_partial
+    _collect_net_results(result, best_results, t_start, failure_reason)
+    return result if return_result else best_partial
+
+
+def _route_net_order(
+    trial: Component,
+    ordered_nets: Sequence[RouteNetSpec],
+    attempt_idx: int,
+    route_kwargs: dict[str, Any],
+    session: RoutingSession | None = None,
+    should_stop: Callable[[], bool] | None = None,
+    control: RouteControl | None = None,
+) -> tuple[dict[str, list[Port]], dict[str, RouteResult], str | None]:
+    """Route nets in order on `trial`, stopping at the first failure.
+
+    With `control`, each net gets what is left of the run and net budgets,
+    its events are forwarded, and the order stops once the run has to stop.
+
+    Returns:
+        Ports per routed net, the per-net results and the failure reason
+        (None if every net was routed).
+    """
+    routed: dict[str, list[Port]] = {}
+    net_results: dict[str, RouteResult] = {}
+    for net in ordered_nets:
+        if should_stop is not None and should_stop():
+            return routed, net_results, "cancelled"
+        net_kwargs = route_kwargs
+        if control is not None:
+            stop_reason = control.stop_reason()
+            if stop_reason is not None:
+                return routed, net_results, stop_reason
+            net_kwargs = dict(
+                route_kwargs,
+                progress=control.forward(net=net.name, attempt=attempt_idx),
+                budget=control.net_budget_left(),
+                cancel=control.cancel,
+            )
+        with span("net", net=net.name, attempt=attempt_idx):
+            net_result = route_multilayer_3d(
+                trial,
+                start=net.start,
+                stop=net.stop,
+                port_name_prefix=net.port_name_prefix,
+                return_result=True,
+                session=session,
+                journal_key=net.name,
+                **net_kwargs,
+            )
+        net_results[net.name] = net_result
+        if not net_result.success:
+            logger.warning(
+                "[MULTINET-COPY] net '%s' failed in attempt %s",
+                net.name,
+                attempt_idx,
+            )
+            return (
+                routed,
+                net_results,
+                f"net '{net.name}': {net_result.failure_reason}",
+            )
+        routed[net.name] = net_result.ports
+    return routed, net_results, None
+
+
+def _attempt_report(
+    attempt_idx: int,
+    ordered_nets: Sequence[RouteNetSpec],
+    routed: int,
+    failure_reason: str | None,
+    seconds: float,
+) -> dict[str, Any]:
+    return dict(
+        index=attempt_idx,
+        order=[net.name for net in ordered_nets],
+        success=failure_reason is None,
+        routed=routed,
+        failure_reason=failure_reason,
+        seconds=seconds,
+    )
+
+
+def _port_spec(port: Port, c: Component) -> dict[str, Any]:
+    """Picklable description of a port for re-creating it in a worker."""
+    info = c.kcl.get_info(port.layer)
+    return dict(
+        center=(float(port.dcenter[0]), float(port.dcenter[1])),
+        width=float(port.width),
+        orientation=port.orientation,
+        layer=(info.layer, info.datatype),
+        port_type=port.port_type,
+    )
+
+
+# Baseline components imported by a pool worker, keyed by snapshot digest.
+_worker_baselines: dict[str, tuple[Component, dict[str, Port]]] = {}
+
+
+def _worker_baseline(
+    snapshot: bytes, port_specs: dict[str, dict[str, Any]]
+) -> tuple[Component, dict[str, Port]]:
+    import hashlib
+    import tempfile
+    from pathlib import Path
+
+    digest = hashlib.blake2b(snapshot, digest_size=16).hexdigest()
+    if digest not in _worker_baselines:
+        with tempfile.TemporaryDirectory() as tmp:
+            gdspath = Path(tmp) / f"{digest}.gds"
+            gdspath.write_bytes(snapshot)
+            baseline = gf.import_gds(gdspath)
+        ports = {
+            name: baseline.add_port(name=name, **spec)
+            for name, spec in port_specs.items()
+        }
+        _worker_baselines[digest] = (baseline, ports)
+    return _worker_baselines[digest]
+
+
+def _evaluate_net_order_worker(
+    snapshot: bytes,
+    port_specs: dict[str, dict[str, Any]],
+    order: list[tuple[str, str, str, str]],
+    attempt_idx: int,
+    route_kwargs: dict[str, Any],
+    cancel_event,
+) -> dict[str, Any]:
+    """Process-pool entry point: route one net order on a baseline snapshot."""
+    t0 = time.perf_counter()
+    baseline, ports = _worker_baseline(snapshot, port_specs)
+    ordered_nets = [
+        RouteNetSpec(name, ports[start], ports[stop], prefix)
+        for name, start, stop, prefix in order
+    ]
+    cache = RouteCache()
+    trial = baseline.copy()
+    routed, _, failure_reason = _route_net_order(
+        trial,
+        ordered_nets,
+        attempt_idx,
+        dict(route_kwargs, route_cache=cache),
+        session=RoutingSession(trial.kcl.kcells[trial.name]),
+        should_stop=cancel_event.is_set,
+    )
+    report = _attempt_report(
+        attempt_idx,
+        ordered_nets,
+        len(routed),
+        failure_reason,
+        time.perf_counter() - t0,
+    )
+    report["cache_entries"] = cache.entries() if failure_reason is None else {}
+    return report
+
+
+def _evaluate_net_orders_parallel(
+    c: Component,
+    net_orders: list[tuple[RouteNetSpec, ...]],
+    route_kwargs: dict[str, Any],
+    max_workers: int,
+    should_stop: Callable[[], bool] | None = None,
+) -> list[dict[str, Any]]:
+    """Evaluate net orders in a process pool.
+
+    Each worker routes one order on its own copy of a GDS snapshot of `c`.
+    Once the lowest-index successful order is known (every earlier order has
+    failed), or once `should_stop` returns True, pending attempts are
+    cancelled and running ones stop before their next net.
+
+    Returns:
+        Attempt reports sorted by attempt index (cancelled attempts omitted).
+    """
+    import multiprocessing
+    import tempfile
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+    from pathlib import Path
+
+    with tempfile.TemporaryDirectory() as tmp:
+        gdspath = Path(tmp) / "baseline.gds"
+        c.write_gds(str(gdspath), with_metadata=False)
+        snapshot = gdspath.read_bytes()
+
+    port_names: dict[int, str] = {}
+    port_specs: dict[str, dict[str, Any]] = {}
+    for ordered_nets in net_orders:
+        for net in ordered_nets:
+            for port in (net.start, net.stop):
+                if id(port) not in port_names:
+                    name = f"__net_port_{len(port_names)}"
+                    port_names[id(port)] = name
+                    port_specs[name] = _port_spec(port, c)
+
+    context = multiprocessing.get_context("spawn")
+    reports: dict[int, dict[str, Any]] = {}
+    with context.Manager() as manager:
+        cancel_event = manager.Event()
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as pool:
+            pending = {
+                pool.submit(
+                    _evaluate_net_order_worker,
+                    snapshot,
+                    port_specs,
+                    [
+                        (
+                            net.name,
+                            port_names[id(net.start)],
+                            port_names[id(net.stop)],
+                            net.port_name_prefix,
+                        )
+                        for net in ordered_nets
+                    ],
+                    attempt_idx,
+                    route_kwargs,
+                    cancel_event,
+                )
+                for attempt_idx, ordered_nets in enumerate(net_orders, start=1)
+            }
+            # Poll should_stop while waiting for the workers.
+            timeout = None if should_stop is None else 0.2
+            while pending:
+                done, pending = wait(
+                    pending, timeout=timeout, return_when=FIRST_COMPLETED
+                )
+                for future in done:
+                    if future.cancelled():
+                        continue
+                    report = future.result()
+                    if report["failure_reason"] != "cancelled":
+                        reports[report["index"]] = report
+                winner = next(
+                    (
+                        idx
+                        for idx in range(1, len(net_orders) + 1)
+                        if idx not in reports or reports[idx]["success"]
+                    ),
+                    None,
+                )
+                stop = should_stop is not None and should_stop()
+                if stop or (winner is not None and winner in reports):
+                    cancel_event.set()
+                    for future in pending:
+                        future.cancel()
+    return [reports[idx] for idx in sorted(reports)]
 
 
 def route_nets_deterministic_copy(
@@ -3505,37 +4721,490 @@ def route_nets_deterministic_copy(
     deterministic: bool = True,
     add_segment_ports: bool = True,
     require_all: bool = True,
-) -> tuple[Component, dict[str, list[Port]]]:
-    """Deterministically route multiple nets on copy-attempts.
-
-    Avoids in-place rip-up side effects by evaluating each net-order attempt on
-    a fresh `Component.copy()`.
+    route_cache: RouteCache | bool | None = None,
+    return_result: bool = False,
+    max_workers: int | None = None,
+    routing_layers: Sequence[str | tuple[int, int]] = ("met1", "met2"),
+    via_costs: dict[tuple[str, str], float] | None = None,
+    emit_shapes: bool = True,
+    journal: RouteJournal | None = None,
+    progress: ProgressCallback | None = None,
+    budget: float | None = None,
+    net_budget: float | None = None,
+    cancel: CancellationToken | None = None,
+) -> tuple[Component, dict[str, list[Port]] | RouteResult]:
+    """Deterministically route multiple nets on a copy of `c`.
+
+    Leaves `c` untouched: the net-order attempts run on one `Component.copy()`,
+    each in a RouteTransaction whose overlay is dropped if the attempt fails.
+    With a ``route_cache``, nets routed against the same geometry in
+    different attempts reuse the cached search result. The flattened baseline
+    obstructions are shared by all attempts (see RoutingSession). If all
+    attempts fail and require_all is False, the order that routed the most
+    nets is routed again and kept.
+
+    With max_workers > 1 the net orders are evaluated in a process pool on a
+    GDS snapshot of `c`. The successful order with the lowest index wins, as
+    in the sequential loop, and is then replayed on a local copy, reusing the
+    winning worker's search results through ``route_cache`` (a cache local to
+    the call if none is given).
+
+    With return_result=True the second element is a RouteResult whose ``nets``
+    holds the per-net results of the returned component and whose
+    ``attempt_reports`` lists each evaluated order with its timing and
+    failure reason. `routing_layers`, `via_costs`, `emit_shapes` and
+    `journal` are passed to route_multilayer_3d (the journal is not used by
+    pool workers, only when the chosen order is routed locally).
+
+    `progress`, `budget`, `net_budget` and `cancel` work as for
+    route_nets_deterministic: a run stopped by its budget or `cancel` routes
+    the order that got furthest again (from the route cache) and returns it
+    as a partial result instead of raising. Pool workers apply `net_budget`
+    per net and stop at their next net once the run stops; their progress is
+    reported per attempt.
     """
     if layers_to_avoid is None:
         layers_to_avoid = []
+    result = RouteResult(router="nets_deterministic_copy")
     if not nets:
-        return c.copy(), {}
+        result.success = True
+        return c.copy(), (result if return_result else {})
+    t_start = time.perf_counter()
 
     net_orders = _build_deterministic_net_orders(nets)
-    best_trial: Component | None = None
-    best_partial: dict[str, list[Port]] = {}
+    route_kwargs = dict(
+        grid_unit=grid_unit,
+        width=width,
+        dynamic_width=dynamic_width,
+        layers_to_avoid=[
+            layer if isinstance(layer, tuple) else (layer, 0)
+            for layer in layers_to_avoid
+        ],
+        add_segment_ports=add_segment_ports,
+        via_cost=via_cost,
+        wrong_way_penalty=wrong_way_penalty,
+        clearance=clearance,
+        clearance_ladder=tuple(clearance_ladder),
+        deterministic=deterministic,
+        routing_layers=tuple(routing_layers),
+        via_costs=via_costs,
+        emit_shapes=emit_shapes,
+    )
 
-    for attempt_idx, ordered_nets in enumerate(net_orders, start=1):
+    control = RouteControl(progress, budget, cancel, net_budget=net_budget)
+    control.emit("run_start", data=dict(nets=len(nets), orders=len(net_orders)))
+    # Routes the chosen order again at the end, unlimited but still reporting.
+    replay_control = RouteControl(control.forward())
+
+    if max_workers is not None and max_workers > 1 and len(net_orders) > 1:
+        with result.timed("portfolio"):
+            reports = _evaluate_net_orders_parallel(
+                c,
+                net_orders,
+                dict(route_kwargs, budget=net_budget),
+                max_workers,
+                should_stop=lambda: control.stop_reason() is not None,
+            )
+        # The replay needs the workers' results, with or without a cache.
+        cache = resolve_route_cache(route_cache)
+        if cache is None:
+            cache = RouteCache()
+        for report in reports:
+            entries = report.pop("cache_entries")
+            if entries:
+                cache.load(entries)
+            logger.info(
+                "[MULTINET-COPY] Attempt %s: %s in %.3fs",
+                report["index"],
+                "success" if report["success"] else report["failure_reason"],
+                report["seconds"],
+            )
+            control.emit(
+                "attempt_done",
+                attempt=report["index"],
+                success=report["success"],
+                reason=report["failure_reason"],
+                data=dict(routed=report["routed"]),
+            )
+        result.attempt_reports = reports
+        result.attempts = len(reports)
+        stop_reason = control.stop_reason()
         trial = c.copy()
-        print(
-            f"[MULTINET-COPY] Attempt {attempt_idx}/{len(net_orders)} order="
-            f"{','.join(net.name for net in ordered_nets)}"
+        if not reports:
+            # Stopped before any order finished.
+            _collect_net_results(result, {}, t_start, stop_reason or "cancelled")
+            control.emit("run_done", success=False, reason=result.failure_reason)
+            return trial, (result if return_result else {})
+        # Replay the winning (or best partial) order locally.
+        winner = next((r for r in reports if r["success"]), None)
+        if winner is None:
+            winner = max(reports, key=lambda r: (r["routed"], -r["index"]))
+        ordered_nets = net_orders[winner["index"] - 1]
+        routed, net_results, failure_reason = _route_net_order(
+            trial,
+            ordered_nets,
+            winner["index"],
+            dict(route_kwargs, route_cache=cache, journal=journal),
+            session=RoutingSession(trial.kcl.kcells[trial.name]),
+            control=replay_control,
+        )
+        if failure_reason is not None:
+            failure_reason = stop_reason or failure_reason
+        control.emit(
+            "run_done",
+            success=failure_reason is None,
+            reason=failure_reason,
+            data=dict(routed=len(routed)),
         )
+        if failure_reason is not None and require_all and stop_reason is None:
+            raise RuntimeError(
+                "[MULTINET-COPY] Unable to complete all requested nets without obstruction conflicts."
+            )
+        _collect_net_results(result, net_results, t_start, failure_reason)
+        return trial, (result if return_result else routed)
 
-        routed: dict[str, list[Port]] = {}
-        failed_name: str | None = None
+    trial = c.copy()
+    session = RoutingSession(trial.kcl.kcells[trial.name])
+    best_idx: int | None = None
+    best_routed = 0
+    failure_reason: str | None = None
+    stop_reason: str | None = None
 
-        for net in ordered_nets:
-            before_inst = len(trial.insts)
-            seg_ports = route_multilayer_3d(
+    transaction = RouteTransaction(trial, session)
+    for attempt_idx, ordered_nets in enumerate(net_orders, start=1):
+        stop_reason = control.stop_reason()
+        if stop_reason is not None:
+            break
+        result.attempts = attempt_idx
+        t_attempt = time.perf_counter()
+        if attempt_idx > 1:
+            transaction.rollback()
+        logger.info(
+            "[MULTINET-COPY] Attempt %s/%s order=%s",
+            attempt_idx,
+            len(net_orders),
+            ",".join(net.name for net in ordered_nets),
+        )
+        control.emit(
+            "attempt_start",
+            attempt=attempt_idx,
+            data=dict(order=[net.name for net in ordered_nets]),
+        )
+
+        routed, net_results, attempt_failure = _route_net_order(
+            trial,
+            ordered_nets,
+            attempt_idx,
+            dict(route_kwargs, route_cache=route_cache, journal=journal),
+            session=session,
+            control=control,
+        )
+        result.attempt_reports.append(
+            _attempt_report(
+                attempt_idx,
+                ordered_nets,
+                len(routed),
+                attempt_failure,
+                time.perf_counter() - t_attempt,
+            )
+        )
+        control.emit(
+            "attempt_done",
+            attempt=attempt_idx,
+            success=attempt_failure is None,
+            reason=attempt_failure,
+            data=dict(routed=len(routed)),
+        )
+
+        if attempt_failure is None:
+            logger.info("[MULTINET-COPY] Success on attempt %s", attempt_idx)
+            transaction.commit()
+            _collect_net_results(result, net_results, t_start, None)
+            control.emit("run_done", success=True, data=dict(routed=len(routed)))
+            return trial, (result if return_result else routed)
+        failure_reason = attempt_failure
+
+        if len(routed) > best_routed:
+            best_idx, best_routed = attempt_idx, len(routed)
+        stop_reason = control.stop_reason()
+        if stop_reason is not None:
+            break
+
+    if stop_reason is not None:
+        logger.warning(
+            "[MULTINET-COPY] Stopped after %s attempts: %s",
+            result.attempts,
+            stop_reason,
+        )
+        failure_reason = stop_reason
+    elif require_all:
+        control.emit("run_done", success=False, reason=failure_reason)
+        transaction.abort()
+        raise RuntimeError(
+            "[MULTINET-COPY] Unable to complete all requested nets without obstruction conflicts."
+        )
+    transaction.rollback()
+    best_partial: dict[str, list[Port]] = {}
+    best_results: dict[str, RouteResult] = {}
+    if best_idx is not None:
+        # Replay the best partial order; its searches hit the route cache.
+        best_partial, net_results, _ = _route_net_order(
+            trial,
+            net_orders[best_idx - 1],
+            best_idx,
+            dict(route_kwargs, route_cache=route_cache, journal=journal),
+            session=session,
+            control=replay_control,
+        )
+        best_results = {name: net_results[name] for name in best_partial}
+    transaction.commit()
+    _collect_net_results(result, best_results, t_start, failure_reason)
+    control.emit(
+        "run_done",
+        success=False,
+        reason=failure_reason,
+        data=dict(routed=len(best_partial)),
+    )
+    return trial, (result if return_result else best_partial)
+
+
+def _trapezoid_mask(trap, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+    """Grid points (xs x ys) inside or on a trapezoid with horizontal top/bottom."""
+    box = trap.bbox()
+    points = list(trap.each_point())
+    bottom = sorted(p.x for p in points if p.y == box.bottom)
+    top = sorted(p.x for p in points if p.y == box.top)
+    t = (ys - box.bottom) / max(1, box.height())
+    left = bottom[0] + (top[0] - bottom[0]) * t
+    right = bottom[-1] + (top[-1] - bottom[-1]) * t
+    in_y = (ys >= box.bottom) & (ys <= box.top)
+    return (xs[:, None] >= left - 1e-6) & (xs[:, None] <= right + 1e-6) & in_y
+
+
+def _grid_cells_in_polygon(
+    poly,
+    origin: tuple[int, int],
+    grid_dbu: int,
+    shape: tuple[int, int],
+) -> tuple[np.ndarray, np.ndarray]:
+    """Indices (i, j) of grid points origin + (i, j) * grid_dbu inside `poly`.
+
+    Points on the boundary count as inside. Non-box polygons are split into
+    trapezoids, each tested against the whole grid window at once.
+    """
+    box = poly.bbox()
+    x0, y0 = origin
+    i0 = max(0, -((x0 - box.left) // grid_dbu))
+    i1 = min(shape[0] - 1, (box.right - x0) // grid_dbu)
+    j0 = max(0, -((y0 - box.bottom) // grid_dbu))
+    j1 = min(shape[1] - 1, (box.top - y0) // grid_dbu)
+    if i0 > i1 or j0 > j1:
+        return np.empty(0, dtype=int), np.empty(0, dtype=int)
+    xs = x0 + np.arange(i0, i1 + 1) * grid_dbu
+    ys = y0 + np.arange(j0, j1 + 1) * grid_dbu
+    if poly.is_box():
+        inside = np.ones((len(xs), len(ys)), dtype=bool)
+    else:
+        inside = np.zeros((len(xs), len(ys)), dtype=bool)
+        for trap in poly.decompose_trapezoids():
+            inside |= _trapezoid_mask(trap, xs, ys)
+    ii, jj = np.nonzero(inside)
+    return ii + i0, jj + j0
+
+
+def route_nets_negotiated(
+    c: Component,
+    nets: Sequence[RouteNetSpec],
+    grid_unit: float = 1.0,
+    width: float = 0.25,
+    dynamic_width: bool = True,
+    layers_to_avoid: Iterable[LayerSpec] = None,
+    via_cost: float = 10.0,
+    wrong_way_penalty: float = 8.0,
+    clearance: float = 0.14,
+    clearance_ladder: tuple[float, ...] = (0.14, 0.10, 0.07),
+    add_segment_ports: bool = True,
+    require_all: bool = True,
+    max_iterations: int = 30,
+    seed: int | None = None,
+    return_result: bool = False,
+    routing_layers: Sequence[str | tuple[int, int]] = ("met1", "met2"),
+    via_costs: dict[tuple[str, str], float] | None = None,
+    emit_shapes: bool = True,
+) -> tuple[Component, dict[str, list[Port]] | RouteResult]:
+    """Route multiple nets with negotiated congestion (PathFinder).
+
+    Instead of retrying whole net orders (see route_nets_deterministic_copy),
+    all nets are planned together on one layered grid with shared history and
+    present-congestion costs; only nets that conflict are ripped up and
+    replanned (see ``sky130.pathfinder``). The plans are then drawn net by
+    net through the 3D router's cleanup, legality checks and drawing. A net
+    whose plan is missing or still conflicting is routed by the 3D router
+    against the geometry drawn so far.
+
+    Args:
+        c: Component to route; it is copied, not modified.
+        nets: Nets to route.
+        grid_unit: Planning grid pitch in um.
+        width: Wire width in um (fallback/base width).
+        dynamic_width: If True, derive endpoint/body widths from port geometry.
+        layers_to_avoid: Layers containing obstructions.
+        via_cost: Cost weight for via transitions.
+        wrong_way_penalty: Penalty for routing against preferred direction.
+        clearance: Minimum obstruction offset in um, used for planning.
+        clearance_ladder: Fallback offsets for nets routed without a plan.
+        add_segment_ports: If True, add a port to each straight segment.
+        require_all: If True, raise if any net cannot be routed.
+        max_iterations: Maximum rip-up-and-reroute iterations.
+        seed: Seed for the planning order; None keeps the order of `nets`.
+            Results are deterministic for a given seed.
+        return_result: If True, the second element is a RouteResult whose
+            ``nets`` holds the per-net results.
+        routing_layers: Contiguous metals to plan and route on (see
+            route_multilayer_3d).
+        via_costs: Via cost per metal pair overriding `via_cost`.
+        emit_shapes: Draw wires as plain shapes (see route_multilayer_3d).
+
+    Returns:
+        Routed copy of `c` and the ports per net (or a RouteResult), like
+        route_nets_deterministic_copy.
+    """
+    from sky130.pathfinder import CongestionNet, negotiate_routes, path_corners
+
+    if layers_to_avoid is None:
+        layers_to_avoid = []
+    result = RouteResult(router="nets_negotiated")
+    if not nets:
+        result.success = True
+        return c.copy(), (result if return_result else {})
+    t_start = time.perf_counter()
+
+    trial = c.copy()
+    kc = trial.kcl.kcells[trial.name]
+    dbu = trial.kcl.dbu
+    session = RoutingSession(kc)
+    _layers = [
+        layer if isinstance(layer, tuple) else (layer, 0) for layer in layers_to_avoid
+    ]
+    stack = routing_stack(routing_layers)
+    grid_layers = stack.layer_tuples
+    grid_dbu = max(1, int(round(grid_unit / dbu)))
+    buffer_dbu = int(round((clearance + width / 2) / dbu))
+
+    def _terminal(port: Port) -> tuple[int, int, int]:
+        x, y, _ = _get_pos_with_dir(port, dbu)
+        info = trial.kcl.get_info(port.layer)
+        return x, y, stack.index((info.layer, info.datatype)) or 0
+
+    terminals = [(_terminal(net.start), _terminal(net.stop)) for net in nets]
+
+    with result.timed("grid"):
+        bbox = kc.bbox()
+        xs = [t[0] for pair in terminals for t in pair] + [bbox.left, bbox.right]
+        ys = [t[1] for pair in terminals for t in pair] + [bbox.bottom, bbox.top]
+        pad = 4 * grid_dbu
+        x0 = (min(xs) - pad) // grid_dbu * grid_dbu
+        y0 = (min(ys) - pad) // grid_dbu * grid_dbu
+        shape = (
+            (max(xs) + pad - x0) // grid_dbu + 1,
+            (max(ys) + pad - y0) // grid_dbu + 1,
+        )
+        # Number of sized obstruction polygons covering each node.
+        coverage = np.zeros((len(grid_layers), *shape), dtype=np.int32)
+        for pos, layer in enumerate(grid_layers):
+            if layer not in _layers:
+                continue
+            for poly in session.layer(layer).polygons:
+                ii, jj = _grid_cells_in_polygon(
+                    poly.sized(buffer_dbu), (x0, y0), grid_dbu, shape
+                )
+                coverage[pos, ii, jj] += 1
+
+        def _node(x: int, y: int, z: int) -> tuple[int, int, int]:
+            i = min(max(int(round((x - x0) / grid_dbu)), 0), shape[0] - 1)
+            j = min(max(int(round((y - y0) / grid_dbu)), 0), shape[1] - 1)
+            return z, i, j
+
+        def _pin_nodes(x: int, y: int, z: int) -> set[tuple[int, int, int]]:
+            # Nodes only blocked by the pin polygon itself stay usable by its net.
+            layer = grid_layers[z]
+            if layer not in _layers:
+                return set()
+            shapes = session.layer(layer)
+            hits = shapes.containing(x, y)
+            if not hits:
+                return set()
+            ii, jj = _grid_cells_in_polygon(
+                shapes.polygons[hits[0]].sized(buffer_dbu), (x0, y0), grid_dbu, shape
+            )
+            own = coverage[z, ii, jj] == 1
+            return {(z, int(i), int(j)) for i, j in zip(ii[own], jj[own])}
+
+        congestion_nets = [
+            CongestionNet(
+                name=net.name,
+                source=_node(*start),
+                target=_node(*stop),
+                passable=frozenset(_pin_nodes(*start) | _pin_nodes(*stop)),
+            )
+            for net, (start, stop) in zip(nets, terminals)
+        ]
+    result.grid_shape = (int(shape[0]), int(shape[1]), len(grid_layers))
+    result.clearance = clearance
+
+    with result.timed("negotiate"):
+        negotiation = negotiate_routes(
+            coverage > 0,
+            congestion_nets,
+            via_cost=stack.via_costs(via_cost, via_costs),
+            wrong_way_penalty=wrong_way_penalty,
+            max_iterations=max_iterations,
+            seed=seed,
+            directions=stack.directions,
+        )
+    result.attempts = negotiation.iterations
+    logger.info(
+        "[NEGOTIATED] %s nets, %s iterations, %s reroutes, converged=%s",
+        len(nets),
+        negotiation.iterations,
+        negotiation.reroutes,
+        negotiation.converged,
+    )
+
+    # Keep plans in net order while they do not share nodes with kept plans.
+    used: set[tuple[int, int, int]] = set()
+    plans: dict[str, list[tuple[int, int, int]]] = {}
+    for net, (start, stop) in zip(nets, terminals):
+        path = negotiation.paths[net.name]
+        if path is None or not used.isdisjoint(path):
+            continue
+        used.update(path)
+        corners = [start]
+        for z, i, j in path_corners(path):
+            corner = (x0 + i * grid_dbu, y0 + j * grid_dbu, z)
+            if corner != corners[-1]:
+                corners.append(corner)
+        if stop != corners[-1]:
+            corners.append(stop)
+        plans[net.name] = corners
+
+    routed: dict[str, list[Port]] = {}
+    net_results: dict[str, RouteResult] = {}
+    failure_reason: str | None = None
+    for net in nets:
+        planned = plans.get(net.name)
+        if planned is None:
+            logger.warning(
+                "[NEGOTIATED] net '%s' has no conflict-free plan; routing it "
+                "against the current geometry",
+                net.name,
+            )
+        net_result = RouteResult(router="multilayer_3d")
+        with span("net", net=net.name), net_result.timed("total"):
+            ports = _route_multilayer_3d(
                 trial,
-                start=net.start,
-                stop=net.stop,
+                net.start,
+                net.stop,
                 grid_unit=grid_unit,
                 width=width,
                 dynamic_width=dynamic_width,
@@ -3546,27 +5215,163 @@ def route_nets_deterministic_copy(
                 wrong_way_penalty=wrong_way_penalty,
                 clearance=clearance,
                 clearance_ladder=clearance_ladder,
-                deterministic=deterministic,
+                route_cache=False,
+                result=net_result,
+                session=session,
+                planned_corners=planned,
+                routing_layers=routing_layers,
+                via_costs=via_costs,
+                emit_shapes=emit_shapes,
             )
-            success = len(trial.insts) > before_inst
-            if not success:
-                failed_name = net.name
-                print(
-                    f"[MULTINET-COPY] net '{net.name}' failed in attempt {attempt_idx}"
-                )
-                break
-            routed[net.name] = seg_ports
+        _finish_route_result(net_result, ports, True)
+        net_results[net.name] = net_result
+        if net_result.success:
+            routed[net.name] = net_result.ports
+        elif failure_reason is None:
+            failure_reason = f"net '{net.name}': {net_result.failure_reason}"
+    result.nodes_expanded = negotiation.nodes_expanded
+
+    if failure_reason is not None and require_all:
+        raise RuntimeError(
+            f"[NEGOTIATED] Unable to complete all requested nets: {failure_reason}"
+        )
+    _collect_net_results(result, net_results, t_start, failure_reason)
+    return trial, (result if return_result else routed)
 
-        if failed_name is None and len(routed) == len(nets):
-            print(f"[MULTINET-COPY] Success on attempt {attempt_idx}")
-            return trial, routed
 
-        if len(routed) > len(best_partial):
-            best_partial = routed
-            best_trial = trial
+def _port_orientation_towards(
+    point: tuple[float, float], target: tuple[float, float]
+) -> float:
+    """Orientation of a port at `point` facing `target` along the dominant axis."""
+    dx, dy = target[0] - point[0], target[1] - point[1]
+    if abs(dx) >= abs(dy):
+        return 0 if dx >= 0 else 180
+    return 90 if dy > 0 else 270
 
-    if require_all:
-        raise RuntimeError(
-            "[MULTINET-COPY] Unable to complete all requested nets without obstruction conflicts."
-        )
-    return (best_trial if best_trial is not None else c.copy()), best_partial
+
+def route_multi_terminal_net(
+    c: Component,
+    net: MultiTerminalNetSpec,
+    grid_unit: float = 1.0,
+    width: float = 0.25,
+    dynamic_width: bool = True,
+    layers_to_avoid: Iterable[LayerSpec] = None,
+    add_segment_ports: bool = False,
+    via_cost: float = 10.0,
+    wrong_way_penalty: float = 8.0,
+    clearance: float = 0.14,
+    clearance_ladder: tuple[float, ...] = (0.14, 0.10, 0.07),
+    deterministic: bool = True,
+    route_cache: RouteCache | bool | None = None,
+    return_result: bool = False,
+    session: RoutingSession | None = None,
+    routing_layers: Sequence[str | tuple[int, int]] = ("met1", "met2"),
+    via_costs: dict[tuple[str, str], float] | None = None,
+    emit_shapes: bool = True,
+) -> list[Port] | RouteResult:
+    """Route a net with several ports as a rectilinear Steiner tree.
+
+    The tree is grown sequentially (see ``sky130.steiner``): starting from the
+    first port, the port closest to the tree is connected next, either to a
+    connected port or to the closest point of an already routed branch (a
+    Steiner point, tapped by a temporary port on that branch's wire). Each
+    branch is one route_multilayer_3d call and all branches share one
+    RoutingSession, so obstructions are flattened once and only updated with
+    each new branch: runtime grows with the number of ports, not with port
+    pairs. The wire polygon holding a tap is not an obstruction for the
+    branch ending there.
+
+    Args:
+        c: Component to add the net to.
+        net: Net to route; needs at least two ports.
+        grid_unit: Grid resolution in um.
+        width: Wire width in um (fallback/base width).
+        dynamic_width: If True, derive endpoint/body widths from port geometry.
+        layers_to_avoid: Layers containing obstructions.
+        add_segment_ports: If True, add a port to each straight segment.
+        via_cost: Cost weight for via transitions.
+        wrong_way_penalty: Penalty for routing against preferred direction.
+        clearance: Preferred minimum obstruction offset in um.
+        clearance_ladder: Deterministic fallback offsets in um.
+        deterministic: Enable deterministic routing retry behavior.
+        route_cache: Cache for 3D search results (see route_multilayer_3d).
+        return_result: If True, return a RouteResult merging all branches;
+            ``nets`` holds the branch results keyed "<net>:<port index>".
+        session: RoutingSession of `c` shared with other nets. A new one is
+            used if omitted.
+        routing_layers: Contiguous metals to route on (see route_multilayer_3d).
+        via_costs: Via cost per metal pair overriding `via_cost`.
+        emit_shapes: Draw wires as plain shapes (see route_multilayer_3d).
+
+    Returns:
+        Ports added by all branches, or a RouteResult if return_result=True.
+        Routing stops at the first branch that fails.
+    """
+    if len(net.ports) < 2:
+        raise ValueError(f"Net {net.name!r} needs at least two ports")
+    result = RouteResult(router="multi_terminal")
+    t_start = time.perf_counter()
+    if session is None:
+        session = RoutingSession(c.kcl.kcells[c.name])
+
+    pins = [(float(port.dcenter[0]), float(port.dcenter[1])) for port in net.ports]
+    connected = {0: pins[0]}
+    unconnected = {k: pins[k] for k in range(1, len(pins))}
+    segments = []
+    branch_results: dict[str, RouteResult] = {}
+    failure_reason: str | None = None
+    while unconnected:
+        # Taps keep a wire width from segment ends, where vias and bend
+        # patches overlap the segment.
+        k, attachment = next_branch(unconnected, connected, segments, width)
+        del unconnected[k]
+        tap_index = None
+        if attachment.pin is not None:
+            stop = net.ports[attachment.pin]
+        else:
+            tap_index = len(c.ports.bases)
+            stop = c.add_port(
+                name=f"{net.name}_tap{k}",
+                center=attachment.point,
+                width=width,
+                orientation=_port_orientation_towards(attachment.point, pins[k]),
+                layer=attachment.layer,
+                port_type="electrical",
+            )
+        with span("branch", net=net.name, port=k):
+            branch = route_multilayer_3d(
+                c,
+                start=net.ports[k],
+                stop=stop,
+                grid_unit=grid_unit,
+                width=width,
+                dynamic_width=dynamic_width,
+                layers_to_avoid=layers_to_avoid,
+                add_segment_ports=add_segment_ports,
+                port_name_prefix=net.port_name_prefix,
+                via_cost=via_cost,
+                wrong_way_penalty=wrong_way_penalty,
+                clearance=clearance,
+                clearance_ladder=clearance_ladder,
+                deterministic=deterministic,
+                route_cache=route_cache,
+                return_result=True,
+                session=session,
+                routing_layers=routing_layers,
+                via_costs=via_costs,
+                emit_shapes=emit_shapes,
+            )
+        if tap_index is not None:
+            del c.ports.bases[tap_index]
+        branch_results[f"{net.name}:{k}"] = branch
+        if not branch.success:
+            failure_reason = f"branch to port {k}: {branch.failure_reason}"
+            logger.warning("[STEINER] net '%s' %s", net.name, failure_reason)
+            break
+        connected[k] = pins[k]
+        for polyline in branch.polylines:
+            segments.extend(polyline_segments(polyline))
+
+    _collect_net_results(result, branch_results, t_start, failure_reason)
+    result.attempts = len(branch_results)
+    return result if return_result else result.ports
@@ -0,0 +1,535 @@
+"""Spatial indexes for obstruction and port lookups.
+
+``BoxIndex`` is a bucketed uniform grid over axis-aligned boxes. It behaves
+like a read-mostly list of ``(x0, y0, x1, y1)`` tuples (len, iteration,
+indexing, append) so it can replace the plain bbox lists used by the routers,
+and answers overlap queries by looking only at the buckets a query box covers.
+
+``ShapeIndex`` holds, per layer of one cell, the flattened polygons and a
+``BoxIndex`` over their bounding boxes. Routers build one per routing call
+and share it between all helpers that need to find shapes near a point.
+
+``ObstructionBuffer`` exports the polygons of a region in one pass into flat
+int64 arrays (bounding boxes, and hull points with per-polygon offsets for
+layers that are not all boxes), used for cache digests and obstruction boxes.
+
+Results derived from the shapes in a window (e.g. the geometry of a port)
+can be memoized on the index with ``remember``. ``memo`` returns them while
+no polygon touching the window was added to or removed from their layers.
+"""
+
+import math
+from collections.abc import Hashable, Iterable, Iterator, Sequence
+from typing import Any
+
+import klayout.db as kdb
+import numpy as np
+
+Box = tuple[float, float, float, float]
+
+# Below this size a linear scan beats building buckets.
+_LINEAR_SCAN_MAX = 16
+# Boxes covering more buckets than this are kept in a separate list.
+_MAX_BUCKETS_PER_BOX = 256
+# Upper bound on cached merged base regions per ShapeIndex.
+_MAX_BASE_REGIONS = 64
+
+
+def boxes_overlap(a: Box, b: Box, strict: bool = True) -> bool:
+    """Axis-aligned overlap; touching edges count only if strict=False."""
+    if strict:
+        return a[0] < b[2] and a[2] > b[0] and a[1] < b[3] and a[3] > b[1]
+    return a[0] <= b[2] and a[2] >= b[0] and a[1] <= b[3] and a[3] >= b[1]
+
+
+class BoxIndex(Sequence):
+    """Bucketed-grid index over axis-aligned boxes.
+
+    Args:
+        boxes: Initial boxes as (x0, y0, x1, y1).
+        cell_size: Bucket size. Defaults to twice the median box extent,
+            chosen when the first query builds the buckets.
+    """
+
+    def __init__(
+        self, boxes: Iterable[Sequence[float]] = (), cell_size: float | None = None
+    ) -> None:
+        self._boxes: list[Box] = [tuple(box) for box in boxes]
+        self._cell_size = cell_size
+        self._buckets: dict[tuple[int, int], list[int]] | None = None
+        self._large: list[int] = []
+
+    def __len__(self) -> int:
+        return len(self._boxes)
+
+    def __getitem__(self, i):
+        return self._boxes[i]
+
+    def __iter__(self) -> Iterator[Box]:
+        return iter(self._boxes)
+
+    def __repr__(self) -> str:
+        return f"BoxIndex({len(self._boxes)} boxes)"
+
+    def append(self, box: Sequence[float]) -> int:
+        """Add a box and return its index."""
+        box = tuple(box)
+        self._boxes.append(box)
+        idx = len(self._boxes) - 1
+        if self._buckets is not None:
+            self._insert(idx, box)
+        return idx
+
+    def extend(self, boxes: Iterable[Sequence[float]]) -> None:
+        for box in boxes:
+            self.append(box)
+
+    def truncate(self, count: int) -> None:
+        """Keep only the first `count` boxes; costs O(boxes removed)."""
+        if count >= len(self._boxes):
+            return
+        if self._buckets is not None:
+            for idx in range(len(self._boxes) - 1, count - 1, -1):
+                i0, j0, i1, j1 = self._cell_range(self._boxes[idx])
+                if (i1 - i0 + 1) * (j1 - j0 + 1) > _MAX_BUCKETS_PER_BOX:
+                    continue
+                # Indices are appended in order, so the removed ones are last.
+                for i in range(i0, i1 + 1):
+                    for j in range(j0, j1 + 1):
+                        bucket = self._buckets[i, j]
+                        bucket.pop()
+                        if not bucket:
+                            del self._buckets[i, j]
+            self._large = [idx for idx in self._large if idx < count]
+        del self._boxes[count:]
+
+    def _cell_range(self, box: Box) -> tuple[int, int, int, int]:
+        cs = self._cell_size
+        return (
+            math.floor(box[0] / cs),
+            math.floor(box[1] / cs),
+            math.floor(box[2] / cs),
+            math.floor(box[3] / cs),
+        )
+
+    def _insert(self, idx: int, box: Box) -> None:
+        i0, j0, i1, j1 = self._cell_range(box)
+        if (i1 - i0 + 1) * (j1 - j0 + 1) > _MAX_BUCKETS_PER_BOX:
+            self._large.append(idx)
+            return
+        for i in range(i0, i1 + 1):
+            for j in range(j0, j1 + 1):
+                self._buckets.setdefault((i, j), []).append(idx)
+
+    def _build(self) -> None:
+        if self._cell_size is None:
+            if self._boxes:
+                arr = np.asarray(self._boxes, dtype=float)
+                extent = np.maximum(arr[:, 2] - arr[:, 0], arr[:, 3] - arr[:, 1])
+                self._cell_size = float(np.median(extent)) * 2.0
+            if not self._cell_size or self._cell_size <= 0:
+                self._cell_size = 1.0
+        self._buckets = {}
+        self._large = []
+        for idx, box in enumerate(self._boxes):
+            self._insert(idx, box)
+
+    def query(self, box: Sequence[float], strict: bool = True) -> list[int]:
+        """Indices of boxes overlapping `box`, in insertion order."""
+        box = tuple(box)
+        if len(self._boxes) <= _LINEAR_SCAN_MAX:
+            return [
+                i for i, b in enumerate(self._boxes) if boxes_overlap(box, b, strict)
+            ]
+        if self._buckets is None:
+            self._build()
+        i0, j0, i1, j1 = self._cell_range(box)
+        candidates: set[int] = set(self._large)
+        if (i1 - i0 + 1) * (j1 - j0 + 1) > len(self._buckets):
+            for bucket in self._buckets.values():
+                candidates.update(bucket)
+        else:
+            for i in range(i0, i1 + 1):
+                for j in range(j0, j1 + 1):
+                    bucket = self._buckets.get((i, j))
+                    if bucket:
+                        candidates.update(bucket)
+        return sorted(
+            i for i in candidates if boxes_overlap(box, self._boxes[i], strict)
+        )
+
+    def any_overlap(self, box: Sequence[float], strict: bool = True) -> bool:
+        """True if any indexed box overlaps `box`; stops at the first hit."""
+        box = tuple(box)
+        boxes = self._boxes
+        if len(boxes) <= _LINEAR_SCAN_MAX:
+            return any(boxes_overlap(box, b, strict) for b in boxes)
+        if self._buckets is None:
+            self._build()
+        if any(boxes_overlap(box, boxes[i], strict) for i in self._large):
+            return True
+        i0, j0, i1, j1 = self._cell_range(box)
+        if (i1 - i0 + 1) * (j1 - j0 + 1) > len(self._buckets):
+            buckets = iter(self._buckets.values())
+        else:
+            buckets = (
+                self._buckets.get((i, j))
+                for i in range(i0, i1 + 1)
+                for j in range(j0, j1 + 1)
+            )
+        return any(
+            boxes_overlap(box, boxes[k], strict)
+            for bucket in buckets
+            if bucket
+            for k in bucket
+        )
+
+
+def any_box_overlap(box: Box, boxes: Sequence[Box]) -> bool:
+    """Strict overlap test of `box` against a BoxIndex or a plain box list."""
+    if isinstance(boxes, BoxIndex):
+        return boxes.any_overlap(box)
+    return any(boxes_overlap(box, other) for other in boxes)
+
+
+def overlapping_boxes(box: Box, boxes: Sequence[Box]) -> list[Box]:
+    """Boxes from a BoxIndex or a plain box list that strictly overlap `box`."""
+    if isinstance(boxes, BoxIndex):
+        return [boxes[i] for i in boxes.query(box)]
+    return [other for other in boxes if boxes_overlap(box, other)]
+
+
+def corridor_windows(
+    points: Iterable[Sequence[float]],
+    margin: float,
+    limit: Box,
+    growth: float = 2.0,
+    max_windows: int = 6,
+) -> list[Box]:
+    """Growing search windows around `points`, ending with `limit`.
+
+    The first window is the bounding box of the points grown by `margin`;
+    each following one grows the margin by `growth`. Windows are clipped to
+    `limit` (which is extended to contain the points) and the last window is
+    always `limit` itself, so a search that fails in every corridor still
+    gets the full area.
+    """
+    xs, ys = zip(*((p[0], p[1]) for p in points))
+    limit = (
+        min(limit[0], *xs),
+        min(limit[1], *ys),
+        max(limit[2], *xs),
+        max(limit[3], *ys),
+    )
+    windows: list[Box] = []
+    margin = max(margin, 1)
+    while len(windows) < max_windows - 1:
+        window = (
+            max(min(xs) - margin, limit[0]),
+            max(min(ys) - margin, limit[1]),
+            min(max(xs) + margin, limit[2]),
+            min(max(ys) + margin, limit[3]),
+        )
+        if window == limit:
+            break
+        if not windows or window != windows[-1]:
+            windows.append(window)
+        margin *= growth
+    windows.append(limit)
+    return windows
+
+
+def _box_hulls(boxes: np.ndarray) -> np.ndarray:
+    """(n, 4, 2) hull points of (n, 4) boxes, in each_point_hull order."""
+    return boxes[:, [0, 1, 0, 3, 2, 3, 2, 1]].reshape(-1, 4, 2)
+
+
+class ObstructionBuffer(Sequence):
+    """Polygons of one layer as flat int64 arrays (DBU).
+
+    ``boxes`` holds the bounding box of every polygon. The hull points of all
+    polygons are concatenated in one (n, 2) array, polygon i owning rows
+    ``offsets[i]:offsets[i + 1]``. For box-only layers the points are not
+    stored but derived from the boxes when asked for. Indexing and iteration
+    give per-polygon (n, 2) views, so a buffer can stand in for the list of
+    point arrays the routers used to pass around.
+
+    Attributes:
+        boxes: (n, 4) bounding boxes (left, bottom, right, top).
+        is_boxes: True if every polygon is a box.
+    """
+
+    def __init__(
+        self,
+        boxes: np.ndarray,
+        coords: np.ndarray | None = None,
+        offsets: np.ndarray | None = None,
+    ) -> None:
+        self.boxes = boxes
+        self.is_boxes = coords is None
+        self._coords = coords
+        self._offsets = offsets
+
+    @classmethod
+    def from_region(
+        cls, region: kdb.Region, window: tuple[int, int, int, int] | None = None
+    ) -> "ObstructionBuffer":
+        """Polygons of `region` in region order, clipped to a DBU window if given.
+
+        Polygons with fewer than 3 hull points are dropped.
+        """
+        if window is not None:
+            region = region & kdb.Region(kdb.Box(*window))
+        box_coords: list[int] = []
+        hull_coords: list[int] = []
+        hull_sizes: list[int] = []
+        hull_pos: list[int] = []
+        for poly in region.each():
+            if not poly.is_box():
+                size = poly.num_points_hull()
+                if size < 3:
+                    continue
+                for p in poly.each_point_hull():
+                    hull_coords += (p.x, p.y)
+                hull_sizes.append(size)
+                hull_pos.append(len(box_coords) // 4)
+            b = poly.bbox()
+            box_coords += (b.left, b.bottom, b.right, b.top)
+        boxes = np.array(box_coords, dtype=np.int64).reshape(-1, 4)
+        if not hull_pos:
+            return cls(boxes)
+
+        n = len(boxes)
+        sizes = np.full(n, 4, dtype=np.int64)
+        sizes[hull_pos] = hull_sizes
+        offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(sizes, out=offsets[1:])
+        coords = np.empty((offsets[-1], 2), dtype=np.int64)
+        is_box = np.ones(n, dtype=bool)
+        is_box[hull_pos] = False
+        box_pos = np.flatnonzero(is_box)
+        coords[offsets[box_pos, None] + np.arange(4)] = _box_hulls(boxes[box_pos])
+        hull_sizes_arr = sizes[hull_pos]
+        rows = np.repeat(offsets[hull_pos], hull_sizes_arr) + (
+            np.arange(hull_sizes_arr.sum())
+            - np.repeat(np.cumsum(hull_sizes_arr) - hull_sizes_arr, hull_sizes_arr)
+        )
+        coords[rows] = np.array(hull_coords, dtype=np.int64).reshape(-1, 2)
+        return cls(boxes, coords, offsets)
+
+    def hulls(self) -> tuple[np.ndarray, np.ndarray]:
+        """(points, offsets) of all polygons."""
+        if self._coords is None:
+            self._coords = _box_hulls(self.boxes).reshape(-1, 2)
+            self._offsets = np.arange(0, 4 * len(self.boxes) + 1, 4, dtype=np.int64)
+        return self._coords, self._offsets
+
+    def arrays(self) -> list[np.ndarray]:
+        """Arrays fully describing the polygons (e.g. for a cache digest)."""
+        if self.is_boxes:
+            return [self.boxes]
+        return [self.boxes, self._coords, self._offsets]
+
+    def __len__(self) -> int:
+        return len(self.boxes)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        coords, offsets = self.hulls()
+        if i < 0:
+            i += len(self)
+        return coords[offsets[i] : offsets[i + 1]]
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        if self.is_boxes:
+            return iter(_box_hulls(self.boxes))
+        return iter(np.split(self._coords, self._offsets[1:-1]))
+
+
+class LayerShapes:
+    """Flattened polygons of one layer of a cell with a bbox index (DBU)."""
+
+    def __init__(self, kc, layer: tuple[int, int]) -> None:
+        self.layer = layer
+        self.layer_index = kc.kcl.layer(*layer)
+        region = kdb.Region(kc.begin_shapes_rec(self.layer_index))
+        self.polygons: list[kdb.Polygon] = list(region.each())
+        self.index = BoxIndex(_polygon_boxes(self.polygons))
+        # Polygon count kept by each truncate, in order.
+        self.truncations: list[int] = []
+
+    def __len__(self) -> int:
+        return len(self.polygons)
+
+    def extend(self, polygons: Iterable[kdb.Polygon]) -> None:
+        """Add polygons (e.g. freshly routed geometry) to the layer."""
+        polygons = list(polygons)
+        self.polygons.extend(polygons)
+        self.index.extend(_polygon_boxes(polygons))
+
+    def truncate(self, count: int) -> None:
+        """Keep only the first `count` polygons; costs O(polygons removed)."""
+        del self.polygons[count:]
+        self.index.truncate(count)
+        self.truncations.append(count)
+
+    def floor_since(self, truncations: int, count: int) -> int:
+        """Polygons kept unchanged since the layer had `count` polygons.
+
+        Args:
+            truncations: ``len(self.truncations)`` at that time.
+            count: ``len(self)`` at that time.
+        """
+        return min([count, *self.truncations[truncations:]])
+
+    def containing(self, x: int, y: int) -> list[int]:
+        """Indices of polygons containing the DBU point (x, y), in region order."""
+        point = kdb.Point(x, y)
+        return [
+            i
+            for i in self.index.query((x, y, x, y), strict=False)
+            if self.polygons[i].inside(point)
+        ]
+
+    def touching(self, box: kdb.Box) -> list[int]:
+        """Indices of polygons whose bbox touches `box`, in region order."""
+        return self.index.query(
+            (box.left, box.bottom, box.right, box.top), strict=False
+        )
+
+
+def _polygon_boxes(polygons: Iterable[kdb.Polygon]) -> Iterator[Box]:
+    for poly in polygons:
+        b = poly.bbox()
+        yield (b.left, b.bottom, b.right, b.top)
+
+
+class ShapeIndex:
+    """Per-layer ``LayerShapes`` of one cell, built lazily on first use."""
+
+    def __init__(self, kc) -> None:
+        self.kc = kc
+        self._layers: dict[tuple[int, int], LayerShapes] = {}
+        self._base: dict[tuple, kdb.Region] = {}
+        self._memo: dict[Hashable, tuple[Any, Box, dict]] = {}
+
+    def layer(self, layer: tuple[int, int]) -> LayerShapes:
+        layer = tuple(layer)
+        shapes = self._layers.get(layer)
+        if shapes is None:
+            shapes = LayerShapes(self.kc, layer)
+            self._layers[layer] = shapes
+        return shapes
+
+    def invalidate(self, layers: Iterable[tuple[int, int]] | None = None) -> None:
+        """Drop cached layers (all if layers is None) after geometry changes."""
+        self._base.clear()
+        if layers is None:
+            self._layers.clear()
+            self._memo.clear()
+            return
+        for layer in layers:
+            self._layers.pop(tuple(layer), None)
+
+    def add_shapes(
+        self, layer: tuple[int, int], polygons: Iterable[kdb.Polygon]
+    ) -> None:
+        """Record polygons just inserted into the cell's own shapes of `layer`.
+
+        Layers not flattened yet pick them up when they are.
+        """
+        shapes = self._layers.get(tuple(layer))
+        if shapes is not None:
+            shapes.extend(polygons)
+
+    def remember(
+        self,
+        key: Hashable,
+        value: Any,
+        layers: Iterable[tuple[int, int]],
+        window: Box,
+    ) -> None:
+        """Memoize `value`, derived from the shapes of `layers` in `window` (DBU).
+
+        The value stays valid until a polygon touching `window` is added to
+        or removed from one of the layers, or a layer is flattened again.
+        """
+        stamps = {}
+        for layer in layers:
+            shapes = self.layer(layer)
+            last = max(shapes.index.query(window, strict=False), default=-1)
+            stamps[tuple(layer)] = (shapes, len(shapes.truncations), len(shapes), last)
+        self._memo[key] = (value, window, stamps)
+
+    def memo(self, key: Hashable) -> Any | None:
+        """Value stored by ``remember`` if it is still valid, else None."""
+        entry = self._memo.get(key)
+        if entry is None:
+            return None
+        value, window, stamps = entry
+        for layer, (shapes, truncations, count, last) in stamps.items():
+            if self._layers.get(layer) is not shapes:
+                del self._memo[key]
+                return None
+            if len(shapes.truncations) == truncations and len(shapes) == count:
+                continue
+            # Polygons from `floor` on were removed or added since the stamp.
+            floor = shapes.floor_since(truncations, count)
+            if last >= floor or any(
+                boxes_overlap(shapes.index[i], window, strict=False)
+                for i in range(floor, len(shapes))
+            ):
+                del self._memo[key]
+                return None
+            stamps[layer] = (shapes, len(shapes.truncations), len(shapes), last)
+        return value
+
+    def base_region(
+        self,
+        layers: Sequence[tuple[int, int]],
+        excluded: Iterable[tuple[int, int]] = (),
+    ) -> kdb.Region:
+        """Merged polygons of `layers` without the `excluded` ones, cached.
+
+        The region is built once per set of layers, exclusions and layer
+        contents; do not modify it.
+        """
+        layers = tuple(tuple(layer) for layer in layers)
+        excluded = frozenset(excluded)
+        shapes = [self.layer(layer) for layer in layers]
+        key = (layers, excluded, tuple(len(layer_shapes) for layer_shapes in shapes))
+        region = self._base.get(key)
+        if region is None:
+            region = kdb.Region()
+            for pos, layer_shapes in enumerate(shapes):
+                for i, poly in enumerate(layer_shapes.polygons):
+                    if (pos, i) not in excluded:
+                        region.insert(poly)
+            region.merge()
+            if len(self._base) >= _MAX_BASE_REGIONS:
+                self._base.pop(next(iter(self._base)))
+            self._base[key] = region
+        return region
+
+    def obstruction_region(
+        self,
+        layers: Sequence[tuple[int, int]],
+        excluded: Iterable[tuple[int, int]] = (),
+        buffer_dbu: int = 0,
+    ) -> kdb.Region:
+        """Polygons of `layers`, optionally sized by `buffer_dbu`.
+
+        The merged base region is cached (see base_region), so asking for
+        several clearances only costs one sizing each. The returned region
+        may be shared with the cache; do not modify it.
+
+        Args:
+            layers: Layers to collect.
+            excluded: (position in `layers`, polygon index) pairs to leave out.
+            buffer_dbu: Sizing applied to the merged polygons if positive.
+        """
+        region = self.base_region(layers, excluded)
+        if buffer_dbu > 0:
+            region = region.sized(buffer_dbu)
+        return region
@@ -0,0 +1,118 @@
+"""Sequential rectilinear Steiner trees for multi-terminal nets.
+
+A net with several terminals is grown one branch at a time: the unconnected
+terminal closest (Manhattan distance) to the tree is connected next, either
+to a connected terminal or to the closest point of a routed branch. Such a
+point on a branch is a Steiner point, so wire is shared between branches
+instead of every terminal being chained to another terminal::
+
+    segments = []
+    connected = {0: pins[0]}
+    unconnected = {k: pins[k] for k in range(1, len(pins))}
+    while unconnected:
+        k, attachment = next_branch(unconnected, connected, segments)
+        ...  # route terminal k to attachment.point
+        segments += polyline_segments(routed_polyline)
+
+The geometry is the routed geometry, not a planned tree, so every branch
+can use the detours its predecessors took.
+"""
+
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass
+
+Layer = tuple[int, int]
+Point = tuple[float, float]
+Segment = tuple[Point, Point, Layer]
+
+
+@dataclass(frozen=True)
+class TreeAttachment:
+    """Closest point of a tree to a terminal.
+
+    Attributes:
+        distance: Manhattan distance from the terminal.
+        point: Attachment point.
+        pin: Connected terminal at the point, None for a point on a segment.
+        layer: Layer of the segment, None for a terminal.
+    """
+
+    distance: float
+    point: Point
+    pin: int | None = None
+    layer: Layer | None = None
+
+
+def polyline_segments(polyline: Sequence[tuple[float, float, Layer]]) -> list[Segment]:
+    """Wire segments of a routed polyline (see RouteResult.polylines).
+
+    Consecutive points on different layers are vias and give no segment.
+    """
+    return [
+        ((x0, y0), (x1, y1), l0)
+        for (x0, y0, l0), (x1, y1, l1) in zip(polyline, polyline[1:])
+        if l0 == l1 and (x0, y0) != (x1, y1)
+    ]
+
+
+def closest_on_segment(
+    point: Point, segment: Segment, end_margin: float = 0.0
+) -> Point:
+    """Point of an axis-parallel segment closest to `point`.
+
+    The result keeps `end_margin` from the segment ends (vias and bends sit
+    there) when the segment is long enough, else it is the segment middle.
+    """
+    (x0, y0), (x1, y1), _ = segment
+
+    def clamp(v: float, a: float, b: float) -> float:
+        lo, hi = min(a, b) + end_margin, max(a, b) - end_margin
+        if lo > hi:
+            return (a + b) / 2
+        return min(max(v, lo), hi)
+
+    return clamp(point[0], x0, x1), clamp(point[1], y0, y1)
+
+
+def nearest_attachment(
+    point: Point,
+    pins: Mapping[int, Point],
+    segments: Sequence[Segment],
+    end_margin: float = 0.0,
+) -> TreeAttachment:
+    """Closest connected terminal or segment point to `point`.
+
+    Terminals win ties against segments; ties are broken by terminal index
+    and segment order, so the choice is deterministic.
+    """
+    best: TreeAttachment | None = None
+    for pin in sorted(pins):
+        px, py = pins[pin]
+        distance = abs(px - point[0]) + abs(py - point[1])
+        if best is None or distance < best.distance:
+            best = TreeAttachment(distance, (px, py), pin=pin)
+    for segment in segments:
+        x, y = closest_on_segment(point, segment, end_margin)
+        distance = abs(x - point[0]) + abs(y - point[1])
+        if best is None or distance < best.distance:
+            best = TreeAttachment(distance, (x, y), layer=segment[2])
+    if best is None:
+        raise ValueError("The tree has no terminals or segments")
+    return best
+
+
+def next_branch(
+    unconnected: Mapping[int, Point],
+    pins: Mapping[int, Point],
+    segments: Sequence[Segment],
+    end_margin: float = 0.0,
+) -> tuple[int, TreeAttachment]:
+    """Unconnected terminal closest to the tree and where it attaches."""
+    best: tuple[int, TreeAttachment] | None = None
+    for pin in sorted(unconnected):
+        attachment = nearest_attachment(unconnected[pin], pins, segments, end_margin)
+        if best is None or attachment.distance < best[1].distance:
+            best = pin, attachment
+    if best is None:
+        raise ValueError("No unconnected terminals")
+    return best
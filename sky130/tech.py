@@ -9,7 +9,7 @@ from gdsfactory.cross_section import CrossSection
 from gdsfactory.typings import LayerSpec
 
 from sky130.layers import LAYER, LAYER_STACK, LAYER_VIEWS  # noqa: F401
-from sky130.routing import route_astar
+from sky130.routing import route_astar, route_channel
 
 ############################
 # Cross-sections functions
@@ -153,6 +153,7 @@ routing_strategies = dict(
     route_astar_metal3=route_astar_metal3,
     route_astar_metal4=route_astar_metal4,
     route_astar_metal5=route_astar_metal5,
+    route_channel=route_channel,
 )
 
 
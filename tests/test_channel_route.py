@@ -0,0 +1,136 @@
+import random
+
+import pytest
+
+from sky130.channel_route import ChannelPin, assign_tracks
+
+
+def _check(pins, assignment, vertical_gap=2) -> None:
+    # Trunks of different nets on one track do not share a column.
+    by_track = {}
+    for trunk in assignment.trunks:
+        by_track.setdefault(trunk.track, []).append(trunk)
+    for trunks in by_track.values():
+        for a, b in zip(trunks, trunks[1:]):
+            assert a.right < b.left or (a.net == b.net and a.right <= b.left)
+    # The top net of a column stays above its bottom net.
+    slots = {(pin.column, pin.top): pin.net for pin in pins}
+    columns = {}
+    for pin in pins:
+        columns.setdefault(pin.net, set()).add(pin.column)
+    for net, column in assignment.jogs:
+        columns[net].add(column)
+
+    def tracks(net, column):
+        return [
+            t.track
+            for t in assignment.trunks
+            if t.net == net and t.left <= column <= t.right and column in columns[net]
+        ]
+
+    for (column, top), net in slots.items():
+        lower = slots.get((column, False))
+        if top and lower is not None and lower != net:
+            assert max(tracks(net, column)) + vertical_gap <= min(tracks(lower, column))
+
+
+def test_left_edge_respects_vertical_constraints() -> None:
+    pins = [
+        ChannelPin("a", 0, top=True),
+        ChannelPin("a", 3, top=False),
+        ChannelPin("b", 1, top=True),
+        ChannelPin("b", 4, top=False),
+        ChannelPin("c", 3, top=True),
+        ChannelPin("c", 5, top=False),
+    ]
+    assignment = assign_tracks(pins)
+    _check(pins, assignment)
+    assert not assignment.jogs
+
+    with pytest.raises(ValueError, match="share the top pin"):
+        assign_tracks([ChannelPin("a", 0, top=True), ChannelPin("b", 0, top=True)])
+
+
+def test_dogleg_breaks_constraint_cycles() -> None:
+    # a must be above b in column 0 and below it in column 3.
+    pins = [
+        ChannelPin("a", 0, top=True),
+        ChannelPin("a", 3, top=False),
+        ChannelPin("b", 0, top=False),
+        ChannelPin("b", 3, top=True),
+    ]
+    with pytest.raises(ValueError, match="Cyclic"):
+        assign_tracks(pins, dogleg=False)
+    assignment = assign_tracks(pins)
+    assert len(assignment.jogs) == 1
+    _check(pins, assignment)
+
+    rng = random.Random(0)
+    pins, used = [], set()
+    for k in range(500):
+        while True:
+            c0 = rng.randrange(3000)
+            c1 = c0 + rng.randint(1, 30)
+            s0, s1 = rng.random() < 0.5, rng.random() < 0.5
+            if (c0, s0) not in used and (c1, s1) not in used:
+                break
+        used |= {(c0, s0), (c1, s1)}
+        pins += [ChannelPin(f"n{k}", c0, s0), ChannelPin(f"n{k}", c1, s1)]
+    _check(pins, assign_tracks(pins))
+
+
+def test_route_channel_strategy() -> None:
+    import gdsfactory as gf
+
+    from sky130.tech import routing_strategies
+
+    c = gf.Component()
+    ports = []
+    for k, (x, y) in enumerate([(0.23, 0), (1.61, 5.44), (0.69, 5.44), (2.07, 0)]):
+        ports.append(
+            c.add_port(
+                name=f"p{k}",
+                center=(x, y),
+                width=0.14,
+                orientation=90 if y == 0 else 270,
+                layer=(69, 20),
+                port_type="electrical",
+            )
+        )
+    route = routing_strategies["route_channel"](c, ports[:2], ports[2:])
+
+    assert route.result.success
+    assert route.result.attempts == 1
+    assert route.result.via_count == 4
+    assert route.result.wirelength_by_layer[(68, 20)] == pytest.approx(0.92)
+    assert len(route.references) == 2
+
+
+@pytest.mark.parametrize(
+    "points",
+    [
+        # A third row: the 0.69 pin would branch through the row at 5.44.
+        [(0.23, 0), (1.61, 5.44), (0.69, 8.16), (2.07, 0)],
+        # Between two met2 tracks.
+        [(0.3, 0), (1.61, 5.44), (0.69, 5.44), (2.07, 0)],
+    ],
+)
+def test_route_channel_rejects_pins_off_the_channel(points) -> None:
+    import gdsfactory as gf
+
+    from sky130.routing import route_channel
+
+    c = gf.Component()
+    ports = [
+        c.add_port(
+            name=f"p{k}",
+            center=(x, y),
+            width=0.14,
+            orientation=90 if y == 0 else 270,
+            layer=(69, 20),
+            port_type="electrical",
+        )
+        for k, (x, y) in enumerate(points)
+    ]
+    with pytest.raises(ValueError, match="not on"):
+        route_channel(c, ports[:2], ports[2:])
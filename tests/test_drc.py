@@ -0,0 +1,72 @@
+import klayout.db as kdb
+import klayout.rdb as rdb
+
+from sky130.drc import DrcRule, run_drc
+
+MET1, VIA, MET2 = (68, 20), (68, 44), (69, 20)
+DIFF, POLY = (65, 20), (66, 20)
+
+RULES = [
+    DrcRule("met1.width", "width", MET1, 0.14),
+    DrcRule("met1.space", "space", MET1, 0.14),
+    DrcRule("via.enclosure.met2", "enclosure", MET2, 0.055, other=VIA),
+    DrcRule("poly.extension.diff", "extension", POLY, 0.13, other=DIFF),
+]
+
+
+def _layout() -> tuple[kdb.Layout, kdb.Cell]:
+    layout = kdb.Layout()
+    layout.dbu = 0.001
+    top = layout.create_cell("top")
+    leaf = layout.create_cell("leaf")
+
+    def box(cell, layer, x0, y0, x1, y1):
+        cell.shapes(layout.layer(*layer)).insert(kdb.Box(x0, y0, x1, y1))
+
+    box(top, MET1, 0, 0, 100, 1000)  # too narrow
+    box(top, MET1, 300, 0, 600, 1000)
+    box(top, MET1, 700, 0, 1000, 1000)  # 100 from the one before
+    box(top, VIA, 2000, 0, 2150, 150)
+    box(top, MET2, 1960, -40, 2190, 190)  # encloses by 40 only
+    box(top, VIA, 3000, 0, 3150, 150)  # no met2 at all
+    box(leaf, DIFF, 0, 0, 1000, 500)
+    box(leaf, POLY, 400, -100, 550, 600)  # 100 end caps
+    # Violations of the placed cells are found in every instance.
+    top.insert(kdb.CellInstArray(leaf.cell_index(), kdb.Trans(10000, 0)))
+    top.insert(kdb.CellInstArray(leaf.cell_index(), kdb.Trans(300000, 0)))
+    return layout, top
+
+
+def test_run_drc_finds_each_violation_once(tmp_path) -> None:
+    _, top = _layout()
+    for threads in (1, 4):
+        # Tiles of 5 um split the cell in many tiles with shared violations.
+        report = run_drc(top, RULES, threads=threads, tile_size=5.0)
+        assert report.by_rule() == {
+            "met1.width": 1,
+            "met1.space": 1,
+            "via.enclosure.met2": 5,
+            "poly.extension.diff": 4,
+        }
+        # Four short sides of the enclosed via, one via without met2.
+        assert len(report.polygons["via.enclosure.met2"]) == 1
+        assert report.count == 11
+
+    path = report.save(tmp_path / "top.lyrdb")
+    db = rdb.ReportDatabase("")
+    db.load(str(path))
+    assert db.num_items() == 11
+    assert {c.name() for c in db.each_category()} == set(report.by_rule())
+
+
+def test_run_drc_with_clean_or_missing_layers() -> None:
+    layout, top = _layout()
+    clean = [DrcRule("met1.width", "width", MET1, 0.1)]
+    assert run_drc(top, clean).count == 0
+
+    missing = [
+        DrcRule("met3.width", "width", (70, 20), 0.3),
+        DrcRule("via.enclosure.met3", "enclosure", (70, 20), 0.06, other=VIA),
+    ]
+    report = run_drc(top, missing)
+    assert report.by_rule() == {"via.enclosure.met3": 2}
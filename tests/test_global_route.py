@@ -0,0 +1,46 @@
+import numpy as np
+
+from sky130.global_route import GlobalNet, build_gcell_grid, gcell_guide, route_global
+
+
+def test_gcell_capacity_from_pitch_and_blockages() -> None:
+    # Half of GCell (1, 0) is covered on the horizontal layer.
+    grid = build_gcell_grid(
+        (0, 0, 3000, 2000),
+        1000,
+        [[(1000, 0, 2000, 500)], []],
+        ["h", "v"],
+        [100, 250],
+    )
+
+    assert grid.shape == (3, 2)
+    np.testing.assert_array_equal(grid.capacity_h, [[5, 10], [5, 10]])
+    np.testing.assert_array_equal(grid.capacity_v, [[4], [4], [4]])
+    assert grid.gcell(2500, -10) == (2, 0)
+    assert grid.center((2, 1)) == (2500, 1500)
+
+
+def test_global_route_spreads_nets_over_gaps() -> None:
+    # A wall with three gaps one track wide; three nets want to cross it.
+    wall = [(4000, 1000, 6000, 4000), (4000, 5000, 6000, 9000)]
+    grid = build_gcell_grid(
+        (0, 0, 10000, 10000), 1000, [wall, wall], ["h", "v"], [1000, 500]
+    )
+    nets = [
+        GlobalNet(f"n{k}", (500, 1500 + 3000 * k), (9500, 1500 + 3000 * k))
+        for k in range(3)
+    ]
+    result = route_global(grid, nets)
+
+    assert result.converged and result.overflow == 0
+    assert (result.demand_h <= grid.capacity_h).all()
+    crossings = {(i, j) for path in result.paths.values() for i, j in path if i == 5}
+    assert {j for _, j in crossings} == {0, 4, 9}
+    for net in nets:
+        path = result.paths[net.name]
+        assert path[0] == grid.gcell(*net.source)
+        assert path[-1] == grid.gcell(*net.target)
+        for (i0, j0), (i1, j1) in zip(path, path[1:]):
+            assert abs(i1 - i0) + abs(j1 - j0) == 1
+        guide = gcell_guide(grid, path)
+        assert guide[0] == grid.center(path[0]) and guide[-1] == grid.center(path[-1])
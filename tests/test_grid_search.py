@@ -0,0 +1,88 @@
+from collections import deque
+
+import numpy as np
+import pytest
+
+from sky130.grid_search import (
+    SEARCH_STRATEGIES,
+    compress_path,
+    expand_path,
+    search_grid,
+)
+
+
+def _bfs_length(blocked: np.ndarray, start, goal) -> int | None:
+    nx, ny = blocked.shape
+    dist = {start: 0}
+    queue = deque([start])
+    while queue:
+        node = queue.popleft()
+        if node == goal:
+            return dist[node]
+        for di, dj in ((1, 0), (0, 1), (-1, 0), (0, -1)):
+            nb = (node[0] + di, node[1] + dj)
+            if 0 <= nb[0] < nx and 0 <= nb[1] < ny and not blocked[nb]:
+                if nb not in dist:
+                    dist[nb] = dist[node] + 1
+                    queue.append(nb)
+    return None
+
+
+def _assert_valid_path(blocked: np.ndarray, path, start, goal) -> None:
+    assert path[0] == start
+    assert path[-1] == goal
+    for a, b in zip(path, path[1:]):
+        assert abs(a[0] - b[0]) + abs(a[1] - b[1]) == 1
+        assert not blocked[b]
+
+
+@pytest.mark.parametrize("strategy", SEARCH_STRATEGIES)
+def test_random_grids_match_bfs(strategy: str) -> None:
+    rng = np.random.default_rng(1234)
+    for _ in range(200):
+        nx, ny = rng.integers(2, 20, size=2)
+        blocked = rng.random((nx, ny)) < 0.3
+        start = (int(rng.integers(nx)), int(rng.integers(ny)))
+        goal = (int(rng.integers(nx)), int(rng.integers(ny)))
+        blocked[start] = False
+        blocked[goal] = False
+
+        expected = _bfs_length(blocked, start, goal)
+        result = search_grid(blocked, start, goal, strategy=strategy)
+        if expected is None:
+            assert result.path is None
+            continue
+        _assert_valid_path(blocked, result.path, start, goal)
+        if strategy != "bend_penalty":
+            assert len(result.path) - 1 == expected
+
+
+def test_jps_expands_fewer_nodes_on_open_grid() -> None:
+    blocked = np.zeros((200, 200), dtype=bool)
+    blocked[100, 20:180] = True
+    astar = search_grid(blocked, (5, 100), (195, 105), strategy="astar")
+    jps = search_grid(blocked, (5, 100), (195, 105), strategy="jps")
+    assert len(jps.path) == len(astar.path)
+    assert jps.nodes_expanded < astar.nodes_expanded
+
+
+def test_bend_penalty_reduces_corners() -> None:
+    blocked = np.zeros((60, 60), dtype=bool)
+    plain = search_grid(blocked, (0, 0), (50, 50), strategy="bidirectional")
+    bend = search_grid(blocked, (0, 0), (50, 50), strategy="bend_penalty")
+    assert bend.num_bends == 1
+    assert bend.num_bends <= plain.num_bends
+
+
+def test_unknown_strategy_raises() -> None:
+    with pytest.raises(ValueError):
+        search_grid(np.zeros((3, 3), dtype=bool), (0, 0), (2, 2), strategy="dfs")
+
+
+def test_compress_expand_round_trip() -> None:
+    blocked = np.zeros((30, 30), dtype=bool)
+    blocked[10, :25] = True
+    path = search_grid(blocked, (0, 0), (29, 0)).path
+    corners = compress_path(path)
+    assert len(corners) < len(path)
+    assert expand_path(corners) == path
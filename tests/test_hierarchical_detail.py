@@ -0,0 +1,46 @@
+import klayout.db as kdb
+
+from sky130 import routing_utils
+
+
+def test_detail_searches_only_blocked_windows(monkeypatch) -> None:
+    searched = []
+
+    def fake_search(polys, start_pos, stop_pos, **kwargs):
+        searched.append((start_pos, len(polys)))
+        (x0, y0, _), (x1, y1, _) = start_pos, stop_pos
+        return [(x0, y0), (x0, y0 + 500), (x1, y1 + 500), (x1, y1)]
+
+    monkeypatch.setattr(routing_utils, "_run_astar_rectilinear", fake_search)
+    corners = [(0, 0), (10000, 0), (10000, 10000), (20000, 10000)]
+    obstructions = kdb.Region()
+    obstructions.insert(kdb.Box(4000, -200, 5000, 200))
+    obstructions.insert(kdb.Box(14000, 9800, 15000, 10200))
+
+    for workers in (1, 4):
+        searched.clear()
+        refined = routing_utils._refine_segments(
+            corners,
+            obstructions,
+            margin_dbu=1000,
+            grid_unit_dbu=100,
+            straight_width=3,
+            bend_radius=1,
+            max_workers=workers,
+        )
+        assert refined == [
+            (0, 0),
+            (0, 500),
+            (10000, 500),
+            (10000, 0),
+            (10000, 10000),
+            (10000, 10500),
+            (20000, 10500),
+            (20000, 10000),
+        ]
+        assert sorted(searched) == [((0, 0, "e"), 1), ((10000, 10000, "e"), 1)]
+
+    searched.clear()
+    refined = routing_utils._refine_segments(corners, kdb.Region(), 1000, 100, 3, 1)
+    assert refined == corners
+    assert not searched
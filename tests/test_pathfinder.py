@@ -0,0 +1,86 @@
+import klayout.db as kdb
+import numpy as np
+
+from sky130.pathfinder import CongestionNet, negotiate_routes, path_corners
+from sky130.routing_utils import _grid_cells_in_polygon
+
+
+def _check_paths(blocked, nets, result) -> None:
+    used = set()
+    for net in nets:
+        path = result.paths[net.name]
+        assert path[0] == net.source and path[-1] == net.target
+        for a, b in zip(path, path[1:]):
+            assert sum(abs(u - v) for u, v in zip(a, b)) == 1
+        assert not any(blocked[node] for node in path)
+        assert used.isdisjoint(path)
+        used.update(path)
+
+
+def test_negotiation_resolves_shared_channel() -> None:
+    # Two nets whose shortest paths both run through the single gap in a wall.
+    blocked = np.zeros((2, 21, 11), dtype=bool)
+    blocked[:, 10, :] = True
+    blocked[:, 10, 5] = False
+    blocked[:, 10, 0] = False
+    nets = [
+        CongestionNet("a", (0, 0, 5), (0, 20, 5)),
+        CongestionNet("b", (0, 0, 4), (0, 20, 4)),
+    ]
+    result = negotiate_routes(blocked, nets)
+
+    assert result.converged
+    assert result.overused == 0
+    _check_paths(blocked, nets, result)
+
+
+def test_negotiation_is_deterministic() -> None:
+    rng = np.random.default_rng(0)
+    blocked = rng.random((2, 30, 30)) < 0.1
+    nets = []
+    for k in range(12):
+        source = (0, k * 2, 0)
+        target = (0, 29 - k * 2, 29)
+        blocked[source] = blocked[target] = False
+        nets.append(CongestionNet(f"n{k}", source, target))
+
+    first = negotiate_routes(blocked, nets, seed=3)
+    second = negotiate_routes(blocked, nets, seed=3)
+    assert first.converged
+    assert first.paths == second.paths
+    _check_paths(blocked, nets, first)
+    corners = path_corners(first.paths["n0"])
+    assert corners[0] == nets[0].source and corners[-1] == nets[0].target
+
+
+def test_per_pair_via_costs_on_four_layers() -> None:
+    # Layers 0 and 1 are walled off; the path has to climb to layer 2 but
+    # never to the expensive layer 3.
+    blocked = np.zeros((4, 21, 11), dtype=bool)
+    blocked[:2, 10, :] = True
+    nets = [CongestionNet("a", (0, 0, 5), (0, 20, 5))]
+    result = negotiate_routes(blocked, nets, via_cost=[1.0, 1.0, 100.0])
+
+    assert result.converged
+    _check_paths(blocked, nets, result)
+    assert max(node[0] for node in result.paths["a"]) == 2
+
+    vertical = negotiate_routes(
+        blocked, nets, via_cost=[1.0, 1.0, 1.0], directions=["v", "h", "v", "h"]
+    )
+    assert max(node[0] for node in vertical.paths["a"]) == 3
+
+
+def test_grid_cells_in_polygon_matches_point_tests() -> None:
+    ring = kdb.Polygon(kdb.Box(0, 0, 1000, 1000))
+    ring.insert_hole(kdb.Box(200, 200, 600, 600))
+    triangle = kdb.Polygon([kdb.Point(0, 0), kdb.Point(1000, 0), kdb.Point(500, 800)])
+    square = kdb.Polygon(kdb.Box(0, 0, 90, 90))
+    for poly in (ring, triangle, triangle.sized(37), square):
+        ii, jj = _grid_cells_in_polygon(poly, (-120, -80), 40, (40, 40))
+        got = set(zip(ii.tolist(), jj.tolist()))
+        for i in range(40):
+            for j in range(40):
+                point = kdb.Point(-120 + 40 * i, -80 + 40 * j)
+                on_boundary = any(edge.contains(point) for edge in poly.each_edge())
+                assert ((i, j) in got) == (on_boundary or poly.inside(point))
@@ -0,0 +1,55 @@
+import numpy as np
+
+from sky130.route_cache import RouteCache, array_digest, resolve_route_cache
+
+
+def test_lru_eviction_and_stats() -> None:
+    cache = RouteCache(maxsize=2)
+    cache.put("a", {"path": [[0, 0]]})
+    cache.put("b", {"path": [[1, 1]]})
+    assert cache.get("a") == {"path": [[0, 0]]}
+    cache.put("c", {"path": [[2, 2]]})
+
+    assert cache.get("b") is None
+    assert cache.get("c") is not None
+    stats = cache.stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+    assert stats["entries"] == 2
+
+
+def test_disk_store_round_trip(tmp_path) -> None:
+    key = RouteCache.make_key("route", (1, 2), 0.5)
+    RouteCache(path=tmp_path).put(key, {"points": [[0, 0], [1000, 0]]})
+
+    fresh = RouteCache(path=tmp_path)
+    assert fresh.get(key) == {"points": [[0, 0], [1000, 0]]}
+    assert fresh.stats()["disk_hits"] == 1
+
+
+def test_disabled_cache_never_hits() -> None:
+    cache = RouteCache()
+    cache.put("a", 1)
+    with cache.disabled():
+        assert cache.get("a") is None
+        assert resolve_route_cache(cache) is None
+    assert cache.get("a") == 1
+    assert resolve_route_cache(False) is None
+
+
+def test_entries_transfer_between_caches() -> None:
+    worker = RouteCache()
+    worker.put("a", {"corners": [[0, 0, 0]]})
+    main = RouteCache()
+    main.load(worker.entries())
+
+    assert main.get("a") == {"corners": [[0, 0, 0]]}
+    assert main.stats()["stores"] == 0
+
+
+def test_array_digest_depends_on_content_and_shape() -> None:
+    grid = np.zeros((4, 4), dtype=bool)
+    assert array_digest(grid) == array_digest(grid.copy())
+    assert array_digest(grid) != array_digest(grid.reshape(2, 8))
+    grid[1, 2] = True
+    assert array_digest(grid) != array_digest(np.zeros((4, 4), dtype=bool))
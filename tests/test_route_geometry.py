@@ -0,0 +1,160 @@
+import gdsfactory as gf
+
+from sky130 import routing_utils
+from sky130.route_geometry import RouteGeometryWriter, RouteTransaction
+from sky130.route_result import RouteResult
+from sky130.routing_session import RoutingSession
+from sky130.spatial_index import ShapeIndex
+
+M1 = (68, 20)
+M1_PIN = (68, 16)
+M2 = (69, 20)
+
+
+def _add_segment(writer: RouteGeometryWriter, x: float) -> None:
+    drawn = writer.segment((x, 0), (x + 1, 0), 0.14, M1)
+    writer.port(
+        name="seg",
+        center=drawn[0],
+        width=0.01,
+        orientation=0,
+        layer=M1_PIN,
+        port_type="electrical",
+    )
+
+
+def test_port_markers_are_drawn_once_per_flush() -> None:
+    c = gf.Component()
+    pin_shapes = c.shapes(c.kcl.layer(*M1_PIN))
+
+    writer = RouteGeometryWriter(c)
+    for i in range(3):
+        _add_segment(writer, 2.0 * i)
+    assert pin_shapes.size() == 0
+    writer.flush()
+    per_port = pin_shapes.size() // 3
+    assert per_port > 0
+    assert pin_shapes.size() == 3 * per_port
+
+    # Markers of earlier ports are not drawn again.
+    for i in range(3, 5):
+        _add_segment(writer, 2.0 * i)
+    writer.flush()
+    assert pin_shapes.size() == 5 * per_port
+    assert len(c.ports) == 5
+    assert len(c.insts) == 0
+
+
+def _same_region(a, b) -> bool:
+    return (a ^ b).is_empty()
+
+
+def test_transaction_rollback_and_commit() -> None:
+    from sky130.pcells.vias import via_m1_m2
+
+    c = gf.Component()
+    c.add_ref(gf.components.rectangle(size=(1, 0.5), layer=M1))
+    kc = c.kcl.kcells[c.name]
+    session = RoutingSession(kc)
+    baseline = session.obstruction_region([M1, M2], buffer_dbu=140)
+    transaction = RouteTransaction(c, session)
+
+    writer = RouteGeometryWriter(c, shape_index=session)
+    _add_segment(writer, 2.0)
+    writer.via(via_m1_m2(), (3, 0))
+    writer.flush()
+    session.sync()
+    routed = session.obstruction_region([M1, M2], buffer_dbu=140)
+    assert not _same_region(routed, baseline)
+    assert c.shapes(c.kcl.layer(*M1)).size() == 0
+    assert len(c.ports) == 1
+
+    transaction.rollback()
+    assert len(c.ports) == 0
+    for index in (session, ShapeIndex(kc)):
+        assert _same_region(
+            index.obstruction_region([M1, M2], buffer_dbu=140), baseline
+        )
+
+    writer = RouteGeometryWriter(c, shape_index=session)
+    _add_segment(writer, 2.0)
+    writer.via(via_m1_m2(), (3, 0))
+    writer.flush()
+    overlay = transaction.overlay.cell_index()
+    transaction.commit()
+    assert session.overlay is None
+    assert not c.kcl.layout.is_valid_cell_index(overlay)
+    assert c.shapes(c.kcl.layer(*M1)).size() == 1
+    assert c.shapes(c.kcl.layer(*M1_PIN)).size() > 0
+    assert len(c.insts) == 2
+    session.sync()
+    assert _same_region(
+        session.obstruction_region([M1, M2], buffer_dbu=140),
+        ShapeIndex(kc).obstruction_region([M1, M2], buffer_dbu=140),
+    )
+    assert _same_region(session.obstruction_region([M1, M2], buffer_dbu=140), routed)
+
+    # An aborted transaction leaves neither an instance nor a cell behind.
+    # Layout.cells() counts freed slots too, so compare the live cells.
+    cells = {cell.name for cell in c.kcl.layout.each_cell()}
+    transaction = RouteTransaction(c, session)
+    overlay = transaction.overlay.cell_index()
+    transaction.abort()
+    assert not c.kcl.layout.is_valid_cell_index(overlay)
+    assert {cell.name for cell in c.kcl.layout.each_cell()} == cells
+    assert len(c.insts) == 2
+
+
+def test_failed_run_keeps_the_best_order(monkeypatch) -> None:
+    def fake_route(c, start, stop, port_name_prefix, session, **kwargs):
+        # Net "c" never routes, so the orders ending with it route the most.
+        result = RouteResult(router="multilayer_3d")
+        if port_name_prefix == "c":
+            result.fail("blocked")
+            return result
+        writer = RouteGeometryWriter(c, shape_index=session)
+        x = 4.0 * "ab".index(port_name_prefix)
+        drawn = writer.segment((x, 0), (x + 1, 0), 0.14, M1)
+        port = writer.port(
+            name=f"{port_name_prefix}_seg",
+            center=drawn[0],
+            width=0.01,
+            orientation=0,
+            layer=M1_PIN,
+            port_type="electrical",
+        )
+        writer.flush()
+        result.add_polyline([(x, 0, M1), (x + 1, 0, M1)])
+        result.ports = [port]
+        result.success = True
+        return result
+
+    monkeypatch.setattr(routing_utils, "route_multilayer_3d", fake_route)
+    c = gf.Component()
+    nets = []
+    for k, name in enumerate("abc"):
+        start, stop = (
+            c.add_port(
+                name=f"{name}{end}",
+                center=(4.0 * k + 2 * end, 5.0 + k),
+                width=0.14,
+                orientation=0,
+                layer=M1,
+                port_type="electrical",
+            )
+            for end in (0, 1)
+        )
+        nets.append(routing_utils.RouteNetSpec(name, start, stop, name))
+    orders = routing_utils._build_deterministic_net_orders(nets)
+    assert orders[-1][-1].name != "c"  # the last attempt is not the best
+
+    result = routing_utils.route_nets_deterministic(
+        c, nets, require_all=False, return_result=True
+    )
+    assert not result.success
+    assert set(result.nets) == {"a", "b"}
+    port_names = [port.name for port in c.ports]
+    assert port_names[6:] == ["a_seg", "b_seg"]
+    for net in result.nets.values():
+        assert all(port.name in port_names for port in net.ports)
+    assert c.shapes(c.kcl.layer(*M1)).size() == 2
@@ -0,0 +1,57 @@
+import gdsfactory as gf
+
+from sky130.pcells.vias import via_m1_m2
+from sky130.route_geometry import RouteGeometryWriter
+from sky130.route_journal import RouteJournal
+from sky130.routing_session import RoutingSession
+
+M1 = (68, 20)
+M2 = (69, 20)
+LAYERS = [M1, M2]
+
+
+def _baseline(obstacle_x: float) -> tuple[gf.Component, RoutingSession]:
+    c = gf.Component()
+    c.add_ref(gf.components.rectangle(size=(1, 0.5), layer=M1))
+    ref = c.add_ref(gf.components.rectangle(size=(1, 1), layer=M2))
+    ref.move((obstacle_x, 2))
+    return c, RoutingSession(c.kcl.kcells[c.name])
+
+
+def _record(journal: RouteJournal) -> None:
+    c, session = _baseline(obstacle_x=8)
+    recording = journal.start(session, LAYERS)
+    writer = RouteGeometryWriter(c, shape_index=session)
+    writer.segment((2, 0), (6, 0), 0.14, M1)
+    writer.via(via_m1_m2(width=0.29, length=0.29), (6, 0))
+    writer.segment((6, 0), (6, 3), 0.14, M2)
+    writer.port(name="seg", center=(4, 0), width=0.01, orientation=0, layer=(68, 16))
+    writer.flush()
+    polylines = [[(2, 0, M1), (6, 0, M1), (6, 0, M2), (6, 3, M2)]]
+    journal.finish("a", "fp", session, recording, polylines)
+
+
+def test_journal_replays_until_nearby_obstacles_change(tmp_path) -> None:
+    journal = RouteJournal(margin=1.0)
+    _record(journal)
+    assert "a" in journal
+    assert journal.reroutes == 1
+
+    path = tmp_path / "routes.json"
+    journal.save(path)
+    journal = RouteJournal.load(path)
+
+    c, session = _baseline(obstacle_x=8)
+    assert journal.replay("a", "other settings", c, session, LAYERS) is None
+    ports, polylines = journal.replay("a", "fp", c, session, LAYERS)
+    assert [port.name for port in ports] == ["seg"]
+    assert polylines[0][-1] == (6, 3, M2)
+    assert c.shapes(c.kcl.layer(*M1)).size() == 1
+    assert c.shapes(c.kcl.layer(*M2)).size() == 1
+    assert len(c.insts) == 3
+    assert journal.replays == 1
+
+    # The obstacle moves next to the recorded wire.
+    c, session = _baseline(obstacle_x=6.5)
+    assert journal.replay("a", "fp", c, session, LAYERS) is None
+    assert c.shapes(c.kcl.layer(*M1)).size() == 0
@@ -0,0 +1,132 @@
+import sys
+import types
+
+import gdsfactory as gf
+import klayout.db as kdb
+import pytest
+
+from sky130.route_result import RouteResult
+from sky130.routing import RouteWarning, route_astar
+from sky130.routing_utils import route_multilayer_3d
+
+M1 = (68, 20)
+M2 = (69, 20)
+VIA1 = (68, 44)
+PR_BOUNDARY = (235, 4)
+
+
+def _port(c: gf.Component, name, center, orientation, layer, width):
+    return c.add_port(
+        name,
+        center=center,
+        width=width,
+        orientation=orientation,
+        layer=layer,
+        port_type="electrical",
+    )
+
+
+def _drawn(c: gf.Component, layer: tuple[int, int]) -> kdb.Region:
+    layout = c.kcl.layout
+    cell = layout.cell(c.cell_index())
+    return kdb.Region(cell.begin_shapes_rec(layout.find_layer(*layer))).merged()
+
+
+def _covered(c: gf.Component, polyline, layer: tuple[int, int]) -> bool:
+    """True if every `layer` segment of `polyline` lies on drawn metal."""
+    dbu = c.kcl.dbu
+    drawn = _drawn(c, layer)
+    for (x0, y0, l0), (x1, y1, l1) in zip(polyline, polyline[1:]):
+        if l0 != layer or l1 != layer:
+            continue
+        points = [
+            kdb.Point(round(x / dbu), round(y / dbu)) for x, y in ((x0, y0), (x1, y1))
+        ]
+        if not (kdb.Region(kdb.Path(points, 10)) - drawn).is_empty():
+            return False
+    return True
+
+
+def test_polyline_metrics() -> None:
+    result = RouteResult(router="multilayer_3d")
+    result.add_polyline([(0, 0, M1), (5, 0, M1), (5, 0, M2), (5, 3, M2)])
+
+    assert result.via_count == 1
+    assert result.wirelength_by_layer == {M1: 5.0, M2: 3.0}
+    assert result.wirelength == 8.0
+
+
+def test_fail_and_merge() -> None:
+    net_a = RouteResult(router="multilayer_3d")
+    net_a.add_polyline([(0, 0, M1), (2, 0, M1)])
+    with net_a.timed("search"):
+        pass
+    net_b = RouteResult(router="multilayer_3d")
+    assert net_b.fail("no path") == []
+    assert not net_b
+
+    total = RouteResult(router="nets_deterministic")
+    total.merge(net_a)
+    assert total.wirelength_by_layer == {M1: 2.0}
+    assert "search" in total.timings
+    summary = total.to_dict()
+    assert summary["wirelength_by_layer"] == {"68/20": 2.0}
+
+
+def test_route_astar_result_matches_drawn_route() -> None:
+    c = gf.Component()
+    # The search grid spans the component bbox, ports alone have none.
+    c.add_polygon([(-2, -2), (22, -2), (22, 2), (-2, 2)], layer=PR_BOUNDARY)
+    a = _port(c, "a", (0, 0), 0, M1, 0.2)
+    b = _port(c, "b", (20, 0), 180, M1, 0.2)
+
+    route = route_astar(c, a, b, cross_section="metal1", straight="straight_metal1")
+    result = route.result
+
+    assert result.success and result.failure_reason is None
+    assert len(result.polylines) == 1 and result.via_count == 0
+    (x0, y0, layer), *_, (x1, y1, _) = result.polylines[0]
+    assert (x0, y0, x1, y1) == (0, 0, 20, 0)
+    # A 0.2 um wire of the reported length covers the drawn area.
+    area = _drawn(c, M1).area() * c.kcl.dbu**2
+    assert abs(area / 0.2 - result.wirelength) < 0.05
+    assert result.wirelength_by_layer == {layer: result.wirelength}
+
+
+def test_route_astar_reports_unplaceable_route() -> None:
+    c = gf.Component()
+    c.add_polygon([(-2, -2), (22, -2), (22, 12), (-2, 12)], layer=PR_BOUNDARY)
+    a = _port(c, "a", (0, 0), 0, M1, 0.2)
+    b = _port(c, "b", (20, 10), 180, M1, 0.2)
+
+    # The grid path leaves port a with a jog too short for a bend.
+    with pytest.warns(RouteWarning, match="could not place"):
+        route = route_astar(c, a, b, cross_section="metal1", straight="straight_metal1")
+    assert not route.result.success and not route.result.polylines
+    assert "could not place" in route.result.failure_reason
+
+
+def test_route_multilayer_3d_result_matches_drawn_route(monkeypatch) -> None:
+    def show_3d(start, stop, polys_per_layer, **kwargs):
+        # An L from the met1 port along x, then up on met2 to the met2 port.
+        (x0, y0, z0, _), (x1, y1, z1, _) = start, stop
+        return [(x0, y0, z0), (x1, y0, z0), (x1, y0, z1), (x1, y1, z1)], 1
+
+    engine = types.ModuleType("doroutes")
+    engine.doroutes = types.SimpleNamespace(show_3d=show_3d)
+    monkeypatch.setitem(sys.modules, "doroutes", engine)
+
+    c = gf.Component()
+    start = _port(c, "a", (0, 0), 0, M1, 0.3)
+    stop = _port(c, "b", (10, 8), 270, M2, 0.3)
+    result = route_multilayer_3d(c, start, stop, width=0.3, return_result=True)
+
+    assert result.success and result.fallback is None
+    assert result.failure_reason is None
+    (polyline,) = result.polylines
+    assert polyline[0] == (0, 0, M1) and polyline[-1] == (10, 8, M2)
+    assert set(result.wirelength_by_layer) == {M1, M2}
+    assert _covered(c, polyline, M1) and _covered(c, polyline, M2)
+    # One via cut (array) drawn per reported layer change.
+    cuts = _drawn(c, VIA1).sized(100).merged()
+    assert result.via_count == cuts.count() == 1
@@ -0,0 +1,62 @@
+import asyncio
+import time
+
+from sky130.routing_control import (
+    BUDGET_EXCEEDED,
+    CancellationToken,
+    RouteControl,
+    route_events,
+)
+
+
+def test_control_budgets_and_cancellation() -> None:
+    events = []
+    token = CancellationToken()
+    control = RouteControl(events.append, budget=60, cancel=token, net_budget=5)
+    assert control.stop_reason() is None
+    assert control.net_budget_left() == 5
+
+    forward = control.forward(net="a", attempt=2)
+    nested = RouteControl(forward, budget=control.net_budget_left())
+    nested.emit("net_done", success=True)
+    assert (events[0].kind, events[0].net, events[0].attempt) == ("net_done", "a", 2)
+    assert events[0].success
+
+    token.cancel("shutdown")
+    assert control.stop_reason() == "shutdown"
+    assert RouteControl(budget=0).stop_reason() == BUDGET_EXCEEDED
+    assert RouteControl(budget=0.5, net_budget=5).net_budget_left() <= 0.5
+
+
+def _fake_router(nets, progress=None, budget=None, cancel=None):
+    control = RouteControl(progress, budget, cancel)
+    routed = []
+    for net in nets:
+        if control.stop_reason() is not None:
+            break
+        control.emit("net_done", net=net, success=True)
+        routed.append(net)
+        time.sleep(0.01)
+    return routed
+
+
+def test_route_events_streams_events_then_result() -> None:
+    async def collect():
+        return [event async for event in route_events(_fake_router, ["a", "b"])]
+
+    events = asyncio.run(collect())
+    assert [event.kind for event in events] == ["net_done", "net_done", "result"]
+    assert events[-1].data["result"] == ["a", "b"]
+
+
+def test_closing_route_events_cancels_the_run() -> None:
+    token = CancellationToken()
+
+    async def first_event():
+        stream = route_events(_fake_router, list(range(1000)), cancel=token)
+        event = await anext(stream)
+        await stream.aclose()
+        return event
+
+    assert asyncio.run(first_event()).net == 0
+    assert token.cancelled
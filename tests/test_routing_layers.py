@@ -0,0 +1,132 @@
+import sys
+import types
+
+import gdsfactory as gf
+import pytest
+
+from sky130.layers import LAYER
+from sky130.pcells.vias import (
+    quantize_via_pad,
+    via_pad_size,
+    via_stack,
+    via_transition,
+)
+from sky130.routing import RouteWarning
+from sky130.routing_layers import routing_stack
+from sky130.routing_utils import _via_pad_size_um, route_multilayer_3d
+
+
+def test_default_stack_is_met1_met2() -> None:
+    stack = routing_stack()
+    assert stack.names == ["met1", "met2"]
+    assert stack.layer_tuples == [(68, 20), (69, 20)]
+    assert stack.directions == ["h", "v"]
+    assert stack.vias[0].layer == (68, 44)
+    assert stack.vias[0].min_pad == pytest.approx(0.29)
+
+
+def test_full_stack_from_layer_stack_and_connectivity() -> None:
+    stack = routing_stack(("li1", "met5"))
+    assert stack.names == ["li1", "met1", "met2", "met3", "met4", "met5"]
+    assert stack.directions == ["v", "h", "v", "h", "v", "h"]
+    assert [via.name for via in stack.vias] == ["mcon", "via1", "via2", "via3", "via4"]
+    assert stack.index((70, 20)) == 3
+    assert stack.index("met5") == 5
+    assert stack.via(4, 5).min_pad == pytest.approx(1.6)
+
+
+def test_stack_rejects_gaps_and_bad_via_costs() -> None:
+    with pytest.raises(ValueError):
+        routing_stack(("met1", "met3", "met4"))
+    stack = routing_stack(("met1", "met3"))
+    assert stack.via_costs(10.0, {("met3", "met2"): 25.0}) == [10.0, 25.0]
+    with pytest.raises(ValueError):
+        stack.via_costs(10.0, {("met1", "met3"): 1.0})
+
+
+def test_3d_search_warns_about_per_pair_via_costs(monkeypatch) -> None:
+    calls = []
+
+    def show_3d(start, stop, polys_per_layer, **kwargs):
+        # A build without wire_half_width: rejected, then retried without it.
+        if "wire_half_width" in kwargs:
+            raise TypeError("show_3d() got an unexpected keyword 'wire_half_width'")
+        calls.append(kwargs)
+        (x0, y0, z0, _), (x1, y1, z1, _) = start, stop
+        return [(x0, y0, z0), (x1, y0, z0), (x1, y0, z1), (x1, y1, z1)], 1
+
+    engine = types.ModuleType("doroutes")
+    engine.doroutes = types.SimpleNamespace(show_3d=show_3d)
+    monkeypatch.setitem(sys.modules, "doroutes", engine)
+
+    c = gf.Component()
+    for name, center, orientation, layer in (
+        ("a", (0, 0), 0, (68, 20)),
+        ("b", (10, 8), 270, (69, 20)),
+    ):
+        c.add_port(
+            name,
+            center=center,
+            width=0.3,
+            orientation=orientation,
+            layer=layer,
+            port_type="electrical",
+        )
+    with pytest.warns(RouteWarning, match="via_costs") as record:
+        result = route_multilayer_3d(
+            c,
+            c.ports["a"],
+            c.ports["b"],
+            width=0.3,
+            routing_layers=("met1", "met3"),
+            via_costs={("met2", "met3"): 25.0},
+            return_result=True,
+        )
+    assert record[0].message.reason == "via_costs_ignored"
+    assert result.success
+    assert [call["via_cost"] for call in calls] == [10.0]
+    assert "via_costs" not in calls[0]
+
+
+def test_via_transition_layers() -> None:
+    via = routing_stack(("met3", "met4")).vias[0]
+    c = via_transition(
+        width=1.0,
+        length=1.0,
+        bottom_layer=via.bottom.layer,
+        via_layer=via.layer,
+        top_layer=via.top.layer,
+        via_size=(via.size, via.size),
+        via_spacing=(via.spacing, via.spacing),
+        via_enclosure=(via.enclosure, via.enclosure),
+    )
+    polygons = c.get_polygons()
+    for layer in (LAYER.met3drawing, LAYER.via3drawing, LAYER.met4drawing):
+        assert polygons.get(layer)
+
+
+def test_via_pads_are_quantized() -> None:
+    via = routing_stack().vias[0]
+    assert [via_pad_size(via, n) for n in (1, 2, 3)] == [0.29, 0.54, 0.86]
+    assert quantize_via_pad(0.1, via) == 0.29
+    assert quantize_via_pad(0.3, via) == 0.3
+    assert quantize_via_pad(0.301, via) == 0.31
+    assert quantize_via_pad(0.309, via, round_up=False) == 0.3
+    assert quantize_via_pad(0.2, via, round_up=False) == 0.29
+    # A 0.30 um wire keeps a 0.30 um pad (one cut), not a 2 x 2 cut pad.
+    assert _via_pad_size_um(0.30) == 0.3
+    for width in [w / 1000 for w in range(140, 1200, 7)]:
+        assert 0 <= _via_pad_size_um(width) - max(width, 0.29) < 0.01
+
+
+def test_via_stack_from_li1_to_met3() -> None:
+    c = via_stack(width=0.7, bottom="li1", top="met3")
+    polygons = c.get_polygons()
+    for layer in (LAYER.li1drawing, LAYER.met1drawing, LAYER.met3drawing):
+        assert len(polygons[layer]) == 1
+        assert c.shapes(layer).size() == 1
+    # One arrayed reference of 2 x 2 cuts per level.
+    assert len(c.insts) == 3
+    for layer in (LAYER.mcondrawing, LAYER.viadrawing, LAYER.via2drawing):
+        assert len(polygons[layer]) == 4
+    assert [port.name for port in c.ports] == ["e1", "e2"]
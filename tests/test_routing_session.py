@@ -0,0 +1,112 @@
+import gdsfactory as gf
+
+from sky130.routing_session import RoutingSession
+from sky130.spatial_index import ShapeIndex
+
+M1 = (68, 20)
+M2 = (69, 20)
+
+
+def _same_region(a, b) -> bool:
+    return (a ^ b).is_empty()
+
+
+def test_session_tracks_routed_geometry() -> None:
+    c = gf.Component()
+    for i in range(20):
+        ref = c.add_ref(gf.components.rectangle(size=(1, 0.5), layer=M1))
+        ref.move((2.0 * i, 0))
+    kc = c.kcl.kcells[c.name]
+    session = RoutingSession(kc)
+    buffer_dbu = 140
+    baseline = session.obstruction_region([M1, M2], buffer_dbu=buffer_dbu)
+
+    ref = c.add_ref(gf.components.rectangle(size=(0.5, 3), layer=M2))
+    ref.move((5, 5))
+    session.sync()
+    routed = session.obstruction_region([M1, M2], buffer_dbu=buffer_dbu)
+    fresh = ShapeIndex(kc).obstruction_region([M1, M2], buffer_dbu=buffer_dbu)
+    assert session.flattens == 2
+    assert _same_region(routed, fresh)
+    assert not _same_region(routed, baseline)
+
+    ref.instance.delete()
+    session.reset()
+    assert _same_region(
+        session.obstruction_region([M1, M2], buffer_dbu=buffer_dbu), baseline
+    )
+    assert session.flattens == 2
+
+
+def test_clearances_share_the_base_region() -> None:
+    from sky130.routing_utils import _region_polys
+
+    c = gf.Component()
+    c.add_ref(gf.components.rectangle(size=(1, 0.5), layer=M1))
+    c.add_polygon([(3, 0), (5, 0), (5, 2), (4, 2), (4, 1), (3, 1)], layer=M1)
+    kc = c.kcl.kcells[c.name]
+    index = ShapeIndex(kc)
+
+    base = index.base_region([M1])
+    for buffer_dbu in (0, 70, 140):
+        region = index.obstruction_region([M1], buffer_dbu=buffer_dbu)
+        assert _same_region(region, base.sized(buffer_dbu))
+    assert index.base_region([M1]) is base
+
+    # Bulk conversion keeps the hull points and order of each_point_hull.
+    expected = [[[p.x, p.y] for p in poly.each_point_hull()] for poly in base.each()]
+    assert [pts.tolist() for pts in _region_polys(base)] == expected
+
+
+def test_writer_emits_shapes_into_the_session() -> None:
+    from sky130.route_geometry import RouteGeometryWriter
+
+    c = gf.Component()
+    c.add_ref(gf.components.rectangle(size=(1, 0.5), layer=M1))
+    kc = c.kcl.kcells[c.name]
+    session = RoutingSession(kc)
+    baseline = session.obstruction_region([M1, M2], buffer_dbu=140)
+
+    writer = RouteGeometryWriter(c, shape_index=session)
+    assert writer.segment((2, 0), (6, 0), 0.14, M1) == ((4, 0), True)
+    assert writer.segment((6, 0), (6, 3), 0.14, M2) == ((6, 1.5), False)
+    assert writer.segment((6, 3), (6, 3), 0.14, M2) is None
+    writer.flush()
+    assert len(c.insts) == 1
+    session.sync()
+    routed = session.obstruction_region([M1, M2], buffer_dbu=140)
+    fresh = ShapeIndex(kc).obstruction_region([M1, M2], buffer_dbu=140)
+    assert session.flattens == 2
+    assert _same_region(routed, fresh)
+
+    for layer in (M1, M2):
+        c.shapes(c.kcl.layer(*layer)).clear()
+    session.reset()
+    assert session.flattens == 2
+    assert _same_region(
+        ShapeIndex(kc).obstruction_region([M1, M2], buffer_dbu=140), baseline
+    )
+
+
+def test_memo_survives_unrelated_shapes() -> None:
+    c = gf.Component()
+    c.add_ref(gf.components.rectangle(size=(1, 0.5), layer=M1))
+    kc = c.kcl.kcells[c.name]
+    session = RoutingSession(kc)
+    window = (0, 0, 1000, 500)
+    session.remember("pin", 1, [M1], window)
+
+    far = gf.components.rectangle(size=(1, 1), layer=M1)
+    c.add_ref(far).move((5, 5))
+    session.sync()
+    assert session.memo("pin") == 1
+
+    c.add_ref(far).move((0.5, 0))
+    session.sync()
+    assert session.memo("pin") is None
+
+    session.reset()
+    session.remember("pin", 2, [M1], window)
+    assert session.memo("pin") == 2
+    session.reset()
+    assert session.memo("pin") == 2
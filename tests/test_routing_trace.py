@@ -0,0 +1,22 @@
+import json
+
+from sky130.route_result import RouteResult
+from sky130.routing_trace import span, trace_events, tracing, tracing_enabled
+
+
+def test_tracing_exports_chrome_trace(tmp_path) -> None:
+    with span("ignored"):
+        pass
+    result = RouteResult(router="astar")
+    path = tmp_path / "trace.json"
+    with tracing(path):
+        with result.timed("search"):
+            with span("net", net="a"):
+                pass
+
+    assert not tracing_enabled()
+    names = [event["name"] for event in trace_events()]
+    assert names == ["net", "search"]
+    data = json.loads(path.read_text())
+    assert data["traceEvents"][0]["args"] == {"net": "a"}
+    assert data["traceEvents"][1]["ph"] == "X"
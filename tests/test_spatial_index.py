@@ -0,0 +1,100 @@
+import klayout.db as kdb
+import numpy as np
+
+from sky130.spatial_index import (
+    BoxIndex,
+    ObstructionBuffer,
+    boxes_overlap,
+    corridor_windows,
+)
+
+
+def test_box_index_matches_linear_scan() -> None:
+    rng = np.random.default_rng(0)
+    origins = rng.uniform(0, 100, size=(300, 2))
+    sizes = rng.uniform(0.1, 5, size=(300, 2))
+    boxes = [(x, y, x + w, y + h) for (x, y), (w, h) in zip(origins, sizes)]
+    boxes.append((-10, -10, 200, 200))
+    index = BoxIndex(boxes[:200])
+    index.extend(boxes[200:])
+    small = BoxIndex(boxes[:300])
+
+    for x, y in rng.uniform(-5, 105, size=(100, 2)):
+        query = (x, y, x + 3, y + 1)
+        for strict in (True, False):
+            expected = [
+                i for i, box in enumerate(boxes) if boxes_overlap(query, box, strict)
+            ]
+            assert index.query(query, strict) == expected
+            assert index.any_overlap(query, strict)
+            # Without the box covering everything.
+            assert small.any_overlap(query, strict) == any(i < 300 for i in expected)
+
+
+def test_box_index_truncate() -> None:
+    rng = np.random.default_rng(1)
+    origins = rng.uniform(0, 100, size=(400, 2))
+    sizes = rng.uniform(0.1, 5, size=(400, 2))
+    boxes = [(x, y, x + w, y + h) for (x, y), (w, h) in zip(origins, sizes)]
+    boxes[250] = (-10, -10, 200, 200)
+    index = BoxIndex(boxes)
+    index.truncate(200)
+    index.extend(boxes[300:])
+    kept = boxes[:200] + boxes[300:]
+    assert list(index) == kept
+
+    for x, y in rng.uniform(-5, 105, size=(100, 2)):
+        query = (x, y, x + 3, y + 1)
+        expected = [i for i, box in enumerate(kept) if boxes_overlap(query, box)]
+        assert index.query(query) == expected
+
+
+def test_box_index_touching_edges() -> None:
+    index = BoxIndex([(0, 0, 1, 1)] * 20)
+    assert not index.any_overlap((1, 0, 2, 1))
+    assert index.any_overlap((1, 0, 2, 1), strict=False)
+
+
+def test_corridor_windows_grow_to_limit() -> None:
+    limit = (-1000, -1000, 1000, 1000)
+    windows = corridor_windows([(0, 0), (100, 20)], margin=10, limit=limit)
+
+    assert windows[0] == (-10, -10, 110, 30)
+    assert windows[-1] == limit
+    for inner, outer in zip(windows, windows[1:]):
+        assert outer[0] <= inner[0] and outer[1] <= inner[1]
+        assert outer[2] >= inner[2] and outer[3] >= inner[3]
+    assert len(windows) <= 6
+
+    # Points outside the limit extend it; a huge margin goes straight to it.
+    assert corridor_windows([(0, 0), (2000, 0)], margin=1e6, limit=limit) == [
+        (-1000, -1000, 2000, 1000)
+    ]
+
+
+def test_obstruction_buffer_matches_region_hulls() -> None:
+    region = kdb.Region()
+    for i in range(5):
+        region.insert(kdb.Box(100 * i, 0, 100 * i + 50, 80))
+    corner = [(0, 200), (300, 200), (300, 260), (60, 260), (60, 400), (0, 400)]
+    region.insert(kdb.Polygon([kdb.Point(x, y) for x, y in corner]))
+    expected = [[[p.x, p.y] for p in poly.each_point_hull()] for poly in region.each()]
+
+    buffer = ObstructionBuffer.from_region(region)
+    assert not buffer.is_boxes
+    assert [pts.tolist() for pts in buffer] == expected
+    assert [buffer[i].tolist() for i in range(len(buffer))] == expected
+    coords, offsets = buffer.hulls()
+    assert offsets[-1] == len(coords) == sum(len(pts) for pts in expected)
+    bboxes = [poly.bbox() for poly in region.each()]
+    assert buffer.boxes.tolist() == [[b.left, b.bottom, b.right, b.top] for b in bboxes]
+
+    # Box-only layers keep just the boxes; clipping keeps the region order.
+    boxes_only = ObstructionBuffer.from_region(region, window=(0, 0, 1000, 100))
+    assert boxes_only.is_boxes
+    assert len(boxes_only.arrays()) == 1
+    assert [pts.tolist() for pts in boxes_only] == [
+        [[p.x, p.y] for p in poly.each_point_hull()]
+        for poly in (region & kdb.Region(kdb.Box(0, 0, 1000, 100))).each()
+    ]
+    assert len(ObstructionBuffer.from_region(kdb.Region())) == 0
@@ -0,0 +1,34 @@
+from sky130.steiner import (
+    closest_on_segment,
+    nearest_attachment,
+    next_branch,
+    polyline_segments,
+)
+
+M1 = (68, 20)
+M2 = (69, 20)
+
+
+def test_polyline_segments_skip_vias() -> None:
+    polyline = [(0, 0, M1), (10, 0, M1), (10, 0, M2), (10, 5, M2)]
+    assert polyline_segments(polyline) == [
+        ((0, 0), (10, 0), M1),
+        ((10, 0), (10, 5), M2),
+    ]
+
+
+def test_branches_attach_to_steiner_points() -> None:
+    segment = ((0, 0), (10, 0), M1)
+    assert closest_on_segment((5, 3), segment) == (5, 0)
+    assert closest_on_segment((-4, 3), segment, end_margin=1) == (1, 0)
+    assert closest_on_segment((4, 3), ((0, 0), (1, 0), M1), end_margin=1) == (0.5, 0)
+
+    # Pin 2 is closer to the middle of the 0-1 branch than to either pin.
+    pins = {0: (0, 0), 1: (10, 0)}
+    attachment = nearest_attachment((5, 2), pins, [segment])
+    assert attachment.point == (5, 0) and attachment.layer == M1
+    assert attachment.pin is None and attachment.distance == 2
+
+    # The closest unconnected pin goes first; pins win ties with segments.
+    pin, attachment = next_branch({2: (5, 8), 3: (11, 0)}, pins, [segment])
+    assert pin == 3 and attachment.pin == 1
@@ -0,0 +1,36 @@
+import numpy as np
+
+from sky130.routing_utils import (
+    _is_via_legal_on_both_layers,
+    _iter_via_candidate_centers,
+    _resolve_legal_via_center,
+)
+from sky130.spatial_index import BoxIndex
+
+
+def _boxes(rng, n: int) -> list[tuple[float, float, float, float]]:
+    origins = rng.uniform(0, 40, size=(n, 2))
+    sizes = rng.uniform(0.14, 2, size=(n, 2))
+    return [(x, y, x + w, y + h) for (x, y), (w, h) in zip(origins, sizes)]
+
+
+def test_via_candidates_are_ordered_rings() -> None:
+    centers = list(_iter_via_candidate_centers((1.0, 2.0), 0.5, 1.0, 0.001))
+    assert centers[:5] == [(1.0, 2.0), (1.5, 2.0), (1.0, 2.5), (0.5, 2.0), (1.0, 1.5)]
+    assert len(centers) == len(set(centers)) == 13
+
+
+def test_resolved_via_is_first_legal_candidate() -> None:
+    rng = np.random.default_rng(3)
+    m1, m2 = _boxes(rng, 400), _boxes(rng, 400)
+    index_m1, index_m2 = BoxIndex(m1), BoxIndex(m2)
+    for base in rng.uniform(0, 40, size=(50, 2)):
+        base = (float(base[0]), float(base[1]))
+        candidates = list(_iter_via_candidate_centers(base, 0.14, 1.0, 0.001))[:64]
+        expected = next(
+            (c for c in candidates if _is_via_legal_on_both_layers(c, 0.29, m1, m2)),
+            None,
+        )
+        assert (
+            _resolve_legal_via_center(base, 0.29, index_m1, index_m2, 0.001) == expected
+        )